@@ -1,2 +1,3 @@
+from kiwooma.api.errors import *
 from kiwooma.api.api import *
 from kiwooma.api.easy_api import *
@@ -1,27 +1,139 @@
 import sys
-from PyQt5.QAxContainer import QAxWidget
-from PyQt5.QtCore import QObject, pyqtSignal, QEventLoop, QThread
+from PyQt5.QtCore import QObject, pyqtSignal, QEventLoop, QTimer
 import time
 import pandas as pd
 from datetime import datetime
 from kiwooma.utils import *
+from kiwooma.api.backend import create_ocx
+from kiwooma.api.tr_schema import get_schema
+from kiwooma.api.ohlcv import OHLCVBuffer
+from kiwooma.api.scheduler import TRScheduler, PRIORITY_QUERY, PRIORITY_BULK
+from kiwooma.api.screen import ScreenPool
+from kiwooma.api.quote_table import QuoteTable
+from kiwooma.api.real_schema import REAL_SCHEMAS, STOCK_TRADE_FIDS, parse_price
+from kiwooma.api.tick_stream import TickStream, DROP_OLDEST
+from kiwooma.api.realtime_worker import RealTimeWorker, RealTimeConsumer
+from kiwooma.api.realtime import RealTimeManager
+from kiwooma.api.bars import BarAggregator
+from kiwooma.api.portfolio import Portfolio
+from kiwooma.api.orders import OrderManager
+from kiwooma.api.supervisor import ConnectionSupervisor
+from kiwooma.api.metrics import Metrics, StatsSink
+from kiwooma.storage.tick_archive import TickArchiveWriter
+from kiwooma.api.errors import KiwoomError, TRError
+from concurrent.futures import Future
+from functools import partial
+import asyncio
 import collections
+import itertools
+import warnings
+
+
+class TRResult(object):
+    """
+    TR 요청 하나의 응답
+
+    Attributes
+    ---------------------
+    trcode: str
+    rqname: str
+    screen_no: str
+    single: dict
+        싱글데이터 {항목: 값}
+    multi: list or dict
+        멀티데이터, 행별 dict의 리스트 (차트 TR은 {컬럼: 배열})
+    remained: bool
+        연속조회할 데이터가 남아있는지 여부
+    """
+
+    def __init__(self, trcode, rqname, screen_no, single, multi, remained):
+        self.trcode = trcode
+        self.rqname = rqname
+        self.screen_no = screen_no
+        self.single = single
+        self.multi = multi
+        self.remained = remained
+
+
+class _PendingTR(object):
+    """
+    응답을 기다리는 TR 요청
+    """
+
+    def __init__(self, future, trcode, screen_no, store, next=0, priority=PRIORITY_QUERY, dispatch=None):
+        self.future = future
+        self.trcode = trcode
+        self.screen_no = screen_no
+        self.pooled = screen_no is None
+        self.store = store
+        self.next = next
+        self.priority = priority
+        self.dispatch = dispatch # 재접속 후 다시 보낼 때 사용
+        self.sent = False # CommRqData를 보냈고 응답을 기다리는 중
+        self.submitted = time.perf_counter()
+        self.sent_at = None
+
 
 class API(QObject):
 
     chejan_received = pyqtSignal(dict)
+    balance_received = pyqtSignal(dict)
+    order_updated = pyqtSignal(object) # OrderHandle
 
-    def __init__(self):
+    def __init__(self, ocx=None, scheduler=None, auto_reconnect=True):
+        """
+        Parameters
+        ---------------------
+        ocx: OCXBackend
+            OpenAPI 호출을 처리할 백엔드 (SimulatedOCX 등), None이면 키움 OCX 컨트롤을 사용
+        scheduler: TRScheduler
+            TR 요청 스케줄러, None이면 키움 기본 조회 제한으로 생성
+        auto_reconnect: bool
+            로그인 후 ConnectionSupervisor로 접속을 감시하고 끊기면 재접속할지 여부
+        """
         super().__init__()
-        self.ocx = QAxWidget()
+        self.ocx = ocx
+        self.auto_reconnect = auto_reconnect
+        self.login_event_loop = None
+        self._connect_error = None
+        self.scheduler = scheduler or TRScheduler()
+        self._inputs = {}
+        self.screens = ScreenPool(5000, 100) # TR 요청용 화면번호
+        self._pending_tr = {} # {rqname: _PendingTR}
+        self._remained_data = False
+        self._tr_seq = itertools.count(1)
+        self._tr_handlers = {} # {rqname: handler} 스키마 대신 직접 처리하는 요청
+        self.real_tables = {real_type: QuoteTable(schema.fields) for real_type, schema in REAL_SCHEMAS.items()}
+        self.quotes = self.real_tables['주식체결'] # 종목별 최신 주식체결 시세
+        self._real_plans = {} # {실시간 타입: 디코딩 계획}
+        self._real_plan_version = None
+        self._real_price_slot = None # 주식체결 계획에서 현재가(FID 10)의 위치
+        self.tick_streams = [] # 주식체결 틱을 빠짐없이 받을 TickStream들
+        self.bar_aggregators = [] # 주식체결 틱으로 봉을 만드는 BarAggregator들
+        self.tick_archives = {} # {TickArchiveWriter: (TickStream, TickConsumer, QTimer)}
+        self.real_worker = None # start_realtime_worker()로 켬
+        self.real_consumers = [] # 실시간 이벤트를 자기 스레드에서 처리하는 RealTimeConsumer들
+        self.order_consumers = [] # 주문 상태 변경을 자기 스레드에서 처리하는 RealTimeConsumer들
+        self._bar_index = tuple(self.quotes.names.index(name) for name in ('체결시간', '현재가', '거래량'))
+        self.portfolio = Portfolio() # 체결/잔고통보와 시세로 갱신되는 보유종목 장부
+        self.orders = OrderManager(self) # 주문번호/종목코드로 색인된 주문 상태
+        self.orders.listeners.append(self.order_updated.emit)
+        self.orders.listeners.append(self._publish_order)
         self._create_kiwoom_instance()
+        self.realtime = RealTimeManager(self.ocx) # 실시간 등록 관리
+        self._real_subscription = None # request_real_data로 등록한 구독
+        self.supervisor = ConnectionSupervisor(self) # 접속 감시, 재접속
+        self.metrics = None # enable_metrics()로 켬
+        self._metrics_event = 'api' # dynamicCall을 집계할 현재 이벤트
+        self._metrics_timer = None
         self._set_signal_slots()
 
     def _create_kiwoom_instance(self):
         """
         Kiwoom Open API 객체를 사용
         """
-        self.ocx.setControl("KHOPENAPI.KHOpenAPICtrl.1")
+        if self.ocx is None:
+            self.ocx = create_ocx()
 
     def get_login_info(self, tag):
         """
@@ -39,13 +151,127 @@ class API(QObject):
         self.ocx.OnReceiveChejanData.connect(self._receive_chejan_data) # OnReceiveChejanData이벤트 발생시
         self.ocx.OnReceiveRealData.connect(self._receive_real_data)
 
+    def _metered_slots(self):
+        # (시그널, 원래 슬롯, 측정하는 슬롯)
+        return ((self.ocx.OnEventConnect, self._event_connect, self._metered_event_connect),
+                (self.ocx.OnReceiveTrData, self._receive_tr_data, self._metered_tr_data),
+                (self.ocx.OnReceiveChejanData, self._receive_chejan_data, self._metered_chejan_data),
+                (self.ocx.OnReceiveRealData, self._receive_real_data, self._metered_real_data))
+
+    def enable_metrics(self, metrics=None, export_interval=0):
+        """
+        이벤트 처리 경로의 측정을 켜는 메소드
+
+        켜져 있는 동안 OCX 이벤트 슬롯을 측정하는 슬롯으로 바꿔서 연결하고 dynamicCall 호출 수를 센다.
+        끄면 원래 슬롯으로 되돌리므로 측정하지 않을 때는 비용이 없다.
+
+        기록되는 값
+            tr_queue_seconds, tr_server_seconds, tr_total_seconds: {trcode} 큐 대기, 서버 응답, 요청부터 변환 완료까지
+            handler_seconds, handler_cpu_seconds: {이벤트} 이벤트 처리 시간 (tr:trcode, real:실시간타입, chejan:구분, connect)
+            dynamic_calls: {이벤트:함수} dynamicCall 호출 수
+            real_ticks: {종목코드} 실시간 수신 횟수 (스냅샷의 rates에 초당 수신 횟수)
+            게이지: tr_queue_depth, order_queue_depth, pending_tr, live_orders, real_codes
+
+        Parameters
+        ---------------------
+        metrics: Metrics
+            None이면 StatsSink 하나를 가진 Metrics를 만듦
+        export_interval: float
+            0보다 크면 이 주기(초)마다 metrics.export()를 호출
+
+        Returns
+        ---------------------
+        metrics: Metrics
+        """
+        if self.metrics is not None:
+            self.disable_metrics()
+        self.metrics = metrics = metrics or Metrics([StatsSink()])
+
+        dynamic_call = self.ocx.dynamicCall
+        def metered_dynamic_call(signature, *args):
+            metrics.inc('dynamic_calls', self._metrics_event + ':' + signature.split('(', 1)[0])
+            return dynamic_call(signature, *args)
+        self.ocx.dynamicCall = metered_dynamic_call
+        self._real_plan_version = None # 실시간 getter가 측정하는 dynamicCall을 쓰도록 다시 만듦
+
+        for signal, slot, metered in self._metered_slots():
+            signal.disconnect(slot)
+            signal.connect(metered)
+
+        metrics.register_gauge('tr_queue_depth', self.scheduler.queue_depth)
+        metrics.register_gauge('order_queue_depth', self.orders.scheduler.queue_depth)
+        metrics.register_gauge('pending_tr', lambda: len(self._pending_tr))
+        metrics.register_gauge('live_orders', lambda: len(self.orders.live_orders()))
+        metrics.register_gauge('real_codes', lambda: len(self.realtime.registered_codes()))
+
+        if export_interval:
+            self._metrics_timer = QTimer()
+            self._metrics_timer.timeout.connect(metrics.export)
+            self._metrics_timer.start(int(export_interval * 1000))
+        return metrics
+
+    def disable_metrics(self):
+        """
+        측정을 끄고 원래 슬롯과 dynamicCall로 되돌리는 메소드
+        """
+        if self.metrics is None:
+            return
+        for signal, slot, metered in self._metered_slots():
+            signal.disconnect(metered)
+            signal.connect(slot)
+        del self.ocx.dynamicCall
+        self._real_plan_version = None
+        if self._metrics_timer is not None:
+            self._metrics_timer.stop()
+            self._metrics_timer = None
+        self.metrics = None
+
+    def _metered(self, event, slot, *args):
+        metrics = self.metrics
+        previous, self._metrics_event = self._metrics_event, event
+        start, cpu = time.perf_counter(), time.thread_time()
+        try:
+            slot(*args)
+        finally:
+            metrics.observe('handler_seconds', event, time.perf_counter() - start)
+            metrics.observe('handler_cpu_seconds', event, time.thread_time() - cpu)
+            self._metrics_event = previous
+
+    def _metered_event_connect(self, err_code):
+        self._metered('connect', self._event_connect, err_code)
+
+    def _metered_tr_data(self, screen_no, rqname, trcode, *args):
+        pending = self._pending_tr.get(rqname)
+        if pending is not None and pending.sent_at is not None:
+            self.metrics.observe('tr_queue_seconds', trcode, pending.sent_at - pending.submitted)
+            self.metrics.observe('tr_server_seconds', trcode, time.perf_counter() - pending.sent_at)
+        self._metered('tr:' + trcode, self._receive_tr_data, screen_no, rqname, trcode, *args)
+        if pending is not None:
+            self.metrics.observe('tr_total_seconds', trcode, time.perf_counter() - pending.submitted)
+
+    def _metered_chejan_data(self, gubun, item_cnt, fid_list):
+        self._metered('chejan:' + gubun, self._receive_chejan_data, gubun, item_cnt, fid_list)
+
+    def _metered_real_data(self, code, real_type, real_data):
+        self.metrics.inc('real_ticks', code)
+        self._metered('real:' + real_type, self._receive_real_data, code, real_type, real_data)
+
     def comm_connect(self):
         """
         키움증권 API에 로그인하는 메소드
+        로그인에 실패하면 KiwoomError를 발생시키고, 성공하면 auto_reconnect일 때 접속 감시를 시작한다.
         """
+        self._connect_error = None
         self.ocx.dynamicCall("CommConnect()")
         self.login_event_loop = QEventLoop()
         self.login_event_loop.exec_()
+        self.login_event_loop = None
+
+        if self._connect_error:
+            raise KiwoomError('로그인에 실패하였습니다. (에러코드: {0})'.format(self._connect_error),
+                              self._connect_error)
+        if self.auto_reconnect:
+            self.supervisor.start()
 
     def _event_connect(self, err_code):
         """
@@ -53,11 +279,15 @@ class API(QObject):
         """
         if err_code == 0:
             print("connected")
+            self.realtime.on_connected()
         else:
             print("disconnected")
-            raise Exception()
+            self.realtime.on_disconnected()
+        self.supervisor.on_event_connect(err_code)
 
-        self.login_event_loop.exit()
+        if self.login_event_loop is not None:
+            self._connect_error = err_code
+            self.login_event_loop.exit()
 
     def get_code_list_by_market(self, market_no):
         """
@@ -105,14 +335,8 @@ class API(QObject):
         state = self.ocx.dynamicCall("GetConnectState()")
         return state
 
-    def _request_order_result(self, rqname, trcode):
-        ret = self._comm_get_data(trcode, "", rqname, 0, '주문번호')
-        if ret == '':
-            print('주문이 실패하였습니다. 보유 현금 이상으로 주문을 하셨는지, 기존에 들어가 있는 주문이 없는지 확인해주세요.')
-        else:
-            print('주문번호: {0} 주문 성공적으로 이루어졌습니다.'.format(ret))
-
-    def send_order(self, rqname, screen_no, acc_no, order_class, code, quantity, price, order_type, org_order_no):
+    def send_order(self, rqname, screen_no, acc_no, order_class, code, quantity, price, order_type, org_order_no,
+                   validate=True):
         """
         주문신호를 보내는 메소드
 
@@ -121,7 +345,7 @@ class API(QObject):
         rqname: string
             요청명
         screen_no: string
-            화면번호 (4자리)
+            화면번호 (4자리), None이면 주문용 화면번호 중 하나를 사용
         acc_no: str
             계좌번호
         order_class: integer
@@ -137,9 +361,16 @@ class API(QObject):
                      '최유리IOC': '16', '지정가FOK': '20', '시장가FOK': '23','최유리FOK': '26', '장전시간외종가': '61', '시간외단일가': '62', '장후시간외종가': '81'}
         org_order_no: string
             원주문번호
+        validate: bool
+            보내기 전에 호가단위, 상한가/하한가(self.orders.limits에 있을 때)를 검사할지 여부
+
+        Returns
+        ----------------------
+        handle: OrderHandle
+            handle.accepted는 주문번호를 받으면 완료되고, 이후 체결 통보마다 handle의 상태가 갱신됨
         """
-        self.ocx.dynamicCall("SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
-                     [rqname, screen_no, acc_no, order_class, code, quantity, price, order_type, org_order_no])
+        return self.orders.submit(acc_no, order_class, code, quantity, price, order_type, org_order_no, screen_no,
+                                  rqname, validate)
 
 
     def get_server_gubun(self):
@@ -158,6 +389,7 @@ class API(QObject):
     def set_input_value(self, item, value):
         """
         TR의 Input값을 입력하는 메소드
+        입력값은 모아두었다가 요청이 실제로 전송될 때 OCX에 입력된다.
 
         Parameters
         ---------------------
@@ -166,12 +398,12 @@ class API(QObject):
         value: str
             입력값
         """
-        self.ocx.dynamicCall("SetInputValue(QString, QString)", item, value)
+        self._inputs[item] = value
 
-    def comm_rq_data(self, rqname, trcode, next, screen_no):
+    def comm_rq_data(self, rqname, trcode, next, screen_no, priority=PRIORITY_QUERY):
         """
-        서버로 TR 요청을 보내는 메소드
-        데이터를 받으면 이벤트 발생
+        서버로 TR 요청을 보내고 응답을 받을 때까지 기다리는 메소드
+        요청은 스케줄러를 거쳐 조회 제한에 맞춰 전송되고, 받은 데이터는 스키마에 정의된 속성에 저장된다.
 
         Parameters
         -----------------------
@@ -182,379 +414,416 @@ class API(QObject):
             연속조회 유무 0: 조회 / 2: 연속
         screen_no: str
             화면번호 (임의의 4자리 숫자)
+        priority: int
+            스케줄러 우선순위 (PRIORITY_ORDER, PRIORITY_ACCOUNT, PRIORITY_QUERY, PRIORITY_BULK)
+
+        Returns
+        -----------------------
+        result: TRResult
+            연속조회 여부는 result.remained
         """
-        self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)",
-                            rqname, trcode, next, screen_no)
-        self.tr_event_loop = QEventLoop()
-        self.tr_event_loop.exec_()
+        inputs, self._inputs = self._inputs, {}
+        future = self._submit_tr(rqname, trcode, inputs, next, screen_no, priority, True)
+        return self.wait(future)
 
-    def _comm_get_data(self, trcode, real_type, rqname, index, item_name):
+    def request_tr(self, trcode, inputs=None, next=0, screen_no=None, priority=PRIORITY_QUERY):
         """
-        요청한 TR 데이터 반환 메소드
+        TR 요청을 보내고 응답을 기다리지 않고 바로 Future를 리턴하는 메소드
+        요청마다 고유한 요청명과 화면번호를 사용하므로 여러 요청을 동시에 보낼 수 있다.
+
+        Future는 OCX 이벤트가 처리될 때 완료되므로, Qt 스레드에서 future.result()로 기다리면 안되고
+        wait(), add_done_callback() 또는 Qt 이벤트 루프와 연동된 asyncio 루프에서 request_tr_async()를 사용한다.
 
         Parameters
         -----------------------
         trcode: str
-        real_type: str
-            빈문자열: ''
-        rqname: str
-        index: int
-            반복인덱스 0: 조회 / 2: 연속
-        item_name: str
+        inputs: dict
+            {입력항목: 값}
+        next: int
+            연속조회 유무 0: 조회 / 2: 연속 (이전 응답의 screen_no를 같이 넘겨야 함)
+        screen_no: str
+            None이면 화면번호 풀에서 할당
+        priority: int
 
         Returns
         -----------------------
-        data: str
+        future: concurrent.futures.Future
+            결과는 TRResult
         """
-        data = self.ocx.dynamicCall("CommGetData(QString, QString, QString, int, QString)",
-                                trcode, real_type, rqname, index, item_name)
-        return data.strip()
+        return self._submit_tr(trcode, trcode, dict(inputs or {}), next, screen_no, priority, False)
 
-    def _get_repeat_cnt(self, trcode, rqname):
+    async def request_tr_async(self, trcode, inputs=None, next=0, screen_no=None, priority=PRIORITY_QUERY):
         """
-        받은 데이터의 개수를 반환하는 메소드
-
-        Parameters
-        -----------------------
-        trcode: str
-        rqname: str
+        request_tr의 asyncio 버전 (qasync 등 Qt와 연동된 asyncio 이벤트 루프에서 사용)
 
         Returns
         -----------------------
-        cnt: int
+        result: TRResult
         """
-        cnt = self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
-        return cnt
+        return await asyncio.wrap_future(self.request_tr(trcode, inputs, next, screen_no, priority))
 
-    def _receive_tr_data(self, screen_no, rqname, trcode, record_name, next, unused1, unused2, unused3, unused4):
+    def request_pages(self, trcode, inputs=None, pages=1, priority=PRIORITY_BULK):
         """
-        OnReceiveTrData이벤트 발생시 호출되는 메소드
+        연속조회를 최대 pages번까지 이어서 요청하고 모든 응답을 Future로 리턴하는 메소드
+        연속조회는 같은 화면번호에서 이루어진다.
 
-        Parameters
-        --------------------
-        screen_no: str
-        rqname: str
-        trcode: str
-        record_name: str
-        next: 연속조회 유무 - 조회(0) / 연속(2)
+        Returns
+        -----------------------
+        future: concurrent.futures.Future
+            결과는 TRResult의 리스트
         """
+        inputs = dict(inputs or {})
+        future = Future()
+        results = []
+        screen_no = self.screens.acquire()
+
+        def on_page(page):
+            try:
+                result = page.result()
+            except Exception as e:
+                self.screens.release(screen_no)
+                future.set_exception(e)
+                return
+
+            results.append(result)
+            if result.remained and len(results) < pages:
+                self._submit_tr(trcode, trcode, inputs, 2, screen_no, priority, False).add_done_callback(on_page)
+            else:
+                self.screens.release(screen_no)
+                future.set_result(results)
 
-        if next == '2': ## 연속 데이터 조회 확인
-            self.remained_data = True
-        else:
-            self.remained_data = False
-
-        opt_type = {
-            'price_info': ['opt10081_req', 'opt20006_req', 'opt10080_req', 'opt10082_req', 'opt10083_req', 'opt20007_req',
-                            'opt20008_req' ]
-        }
-
-        tr_dict = {'opt10081_req': self._request_price_info, 'opt20006_req': self._request_price_info,
-                   'opt10080_req': self._request_price_info, 'opw00001_req': self._request_deposit_detail,
-                   'opw00018_req': self._request_account_balance, 'opt10075_req': self._request_unexcuted,
-                   'opt10077_req': self._request_today_realized_pnl, 'opt10001_req': self._request_stock_info,
-                   'opt10016_req': self._request_new_high_and_low, 'opt10017_req': self._request_limit_high_low,
-                   'opt10085_req': self._request_holding_stock_pnl, 'opw00007_req': self._request_trading_info,
-                   'opt10082_req': self._request_price_info, 'opt10083_req': self._request_price_info,
-                   'opt20007_req': self._request_price_info, 'opt20008_req': self._request_price_info,
-                   'send_order_req': self._request_order_result
-                   }
-        try:
-            tr_dict[rqname](rqname, trcode)
-        except KeyError:
-            print(trcode)
-            print(rqname + ' error')
-
-        try:
-            self.tr_event_loop.exit()
-        except AttributeError:
-            pass
+        self._submit_tr(trcode, trcode, inputs, 0, screen_no, priority, False).add_done_callback(on_page)
+        return future
 
-    def _request_holding_stock_pnl(self, rqname, trcode):
+    def wait(self, futures):
         """
-        보유종목들의 손익정보 요청
+        Qt 이벤트를 처리하면서 Future가 완료될 때까지 기다리는 메소드
 
-        Paramenters
-        ---------
-        rqname: string
-        trcode: string
-        """
-
-        self.holding_stocks_pnl = []
-
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
+        Parameters
+        -----------------------
+        futures: Future or list
 
-        item_list = output_list = ('일자', '종목코드', '종목명', '현재가', '매입가',
-                                   '매입금액', '보유수량', '당일매도손익',
-                                   '당일매도수수료', '당일매매세금', '신용구분',
-                                   '대출일', '결제잔고', '청산가능수량', '신용금액',
-                                   '신용이자', '만기일')
+        Returns
+        -----------------------
+        result:
+            Future 하나면 그 결과, 리스트면 결과의 리스트
+        """
+        single = isinstance(futures, Future)
+        if single:
+            futures = [futures]
 
-        for i in range(data_cnt):
-            temp_dict = {}
-            for item in output_list:
-                data = self._comm_get_data(trcode, "", rqname, i, item)
-                if item == '현재가':
-                    if data[0] in ('+', '-'):
-                        data = data[1:]
-                elif item not in ('일자', '종목코드', '종목명', '신용구분', '대출일', '보유수량', '결제잔고', '만기일', '청산가능수량'):
-                    data = to_float(data)
-                elif item in ('보유수량', '결제잔고', '청산가능수량'):
-                    data = int(data)
+        remaining = [future for future in futures if not future.done()]
+        if remaining:
+            loop = QEventLoop()
+            count = [len(remaining)]
 
-                temp_dict[item] = data
+            def done(future):
+                count[0] -= 1
+                if not count[0]:
+                    loop.exit()
 
-            self.holding_stocks_pnl.append(temp_dict)
+            for future in remaining:
+                future.add_done_callback(done)
+            loop.exec_()
 
+        results = [future.result() for future in futures]
+        return results[0] if single else results
 
-    def _request_stock_info(self, rqname, trcode):
+    def _submit_tr(self, rqname, trcode, inputs, next, screen_no, priority, store):
         """
-        주식기본정보요청시 호출되는 메소드
+        TR 요청을 스케줄러에 등록하고 Future를 리턴하는 메소드
 
         Parameters
         -----------------------
-        rqname: string
-        trcode: string
+        store: bool
+            True이면 응답을 스키마에 정의된 API 속성에도 저장
         """
-        output_list = ('종목코드', '종목명', '결산월', '액면가', '자본금', '상장주식', '신용비율', '연중최고', '연중최저',
-                     '시가총액', '시가총액비중', '외인소진률', '대용가', 'PER', 'EPS', 'ROE', 'PBR', 'EV', '매출액', '영업이익',
-                     '당기순이익', '250최고', '250최저', '시가', '고가', '저가', '상한가', '하한가', '기준가', '예상체결가', '예상체결수량',
-                     '250최고가일', '250최고가대비율', '250최저가일', '250최저가대비율', '현재가', '대비기호', '전일대비', '등락율', '거래량',
-                     '거래대비', '액면가단위')
-
-        self.stock_info = {}
-        for item in output_list:
-            data = self._comm_get_data(trcode, "", rqname, 0, item)
-            if item in ('250최고', '250최저', '시가', '고가', '저가', '상한가', '하한가', '기준가', '연중최저', '연중최고', '예상체결가'):
-                if data[0] in ('+', '-'):
-                    data = data[1:]
-            if item not in ('종목코드', '종목명', '결산월', '액면가단위', '250최고가일', '250최저가일'):
-                data = to_float(data)
-            self.stock_info[item] = data
+        rqname = self._unique_rqname(rqname)
+        future = Future()
+        future.set_running_or_notify_cancel()
+        dispatch = partial(self._send_rq_data, inputs, rqname, trcode, next)
+        self._pending_tr[rqname] = _PendingTR(future, trcode, screen_no, store, next, priority, dispatch)
+        self.scheduler.submit(dispatch, priority, rqname, partial(self._tr_failed, rqname))
+        return future
+
+    def requeue_in_flight(self):
+        """
+        보냈지만 응답을 받지 못한 TR을 다시 큐에 넣는 메소드 (재접속 후 ConnectionSupervisor가 호출)
+        서버의 연속조회 상태는 재접속하면 사라지므로 연속조회(next=2) 요청은 TRError로 실패시킨다.
 
-    def _request_new_high_and_low(self, rqname, trcode):
+        Returns
+        -----------------------
+        count: int
+            다시 큐에 넣은 요청 수
         """
-        신고/저가요청시 호출되는 메소드
+        count = 0
+        for rqname, pending in list(self._pending_tr.items()):
+            if not pending.sent:
+                continue
+            pending.sent = False
+            if int(pending.next) == 2:
+                del self._pending_tr[rqname]
+                if pending.pooled:
+                    self.screens.release(pending.screen_no)
+                pending.future.set_exception(TRError('{0} 연속조회가 재접속으로 끊겼습니다.'.format(rqname)))
+                continue
+            self.scheduler.submit(pending.dispatch, pending.priority, rqname, partial(self._tr_failed, rqname))
+            count += 1
+        return count
+
+    def _unique_rqname(self, rqname):
+        # 같은 TR을 동시에 여러번 요청해도 응답을 구분할 수 있도록 일련번호를 붙임
+        return '{0}#{1}'.format(rqname, next(self._tr_seq))
+
+    def _send_rq_data(self, inputs, rqname, trcode, next):
         """
-        if not hasattr(self, '_opt10016'): #ohlcv 필드를 가지고 있지 않으면 생성
-            self._opt10016 = {'종목코드': [], '종목명': [], '현재가': [], '전일대비': [], '등락률': [], '거래량': [],
-                              '전일거래량대비율': [], '매도호가': [], '매수호가': [], '고가': [], '저가': []}
-
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
+        입력값을 넣고 CommRqData를 호출하는 메소드 (스케줄러에서 호출)
+        """
+        pending = self._pending_tr[rqname]
+        if pending.screen_no is None:
+            pending.screen_no = self.screens.acquire()
+
+        for item, value in inputs.items():
+            self.ocx.dynamicCall("SetInputValue(QString, QString)", item, value)
+        ret = self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)",
+                                   rqname, trcode, next, pending.screen_no)
+        pending.sent = ret in (0, None)
+        pending.sent_at = time.perf_counter()
+        return ret
 
-        for i in range(data_cnt):
-            for key in self._opt10016.copy().keys():
-                if key in ('종목코드', '종목명'):
-                    self._opt10016[key].append(self._comm_get_data(trcode, "", rqname, i, key))
-                else:
-                    data = self._comm_get_data(trcode, "", rqname, i, key)
-                    if data.startswith('+'):
-                        data = data.lstrip('+')
-                    self._opt10016[key].append(float(data))
+    def _tr_failed(self, rqname, err_code, cause=None):
+        pending = self._pending_tr.pop(rqname)
+        if pending.pooled:
+            self.screens.release(pending.screen_no)
+        if cause is not None:
+            error = TRError('{0} 요청을 보내는 중 오류가 발생하였습니다. ({1!r})'.format(rqname, cause))
+            error.__cause__ = cause
+        else:
+            error = TRError('{0} 요청이 실패하였습니다. (에러코드: {1})'.format(rqname, err_code), err_code)
+        pending.future.set_exception(error)
 
-    def _request_limit_high_low(self, rqname, trcode):
-        """
-        신고/저가요청시 호출되는 메소드
+    def _comm_get_data(self, trcode, real_type, rqname, index, item_name):
         """
-        if not hasattr(self, '_opt10017'): #ohlcv 필드를 가지고 있지 않으면 생성
-            self._opt10017 = {'종목코드': [], '종목명': [], '현재가': [], '전일대비': [], '등락률': [], '거래량': [],
-                              '전일거래량': [], '매도호가': [], '매수호가': [], '매도잔량': [], '매수잔량': []}
+        요청한 TR 데이터 반환 메소드
 
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
+        Parameters
+        -----------------------
+        trcode: str
+        real_type: str
+            빈문자열: ''
+        rqname: str
+        index: int
+            반복인덱스 0: 조회 / 2: 연속
+        item_name: str
 
-        for i in range(data_cnt):
-            for key in self._opt10017.copy().keys():
-                if key in ('종목코드', '종목명'):
-                    self._opt10017[key].append(self._comm_get_data(trcode, "", rqname, i, key))
-                else:
-                    data = self._comm_get_data(trcode, "", rqname, i, key)
-                    if data.startswith('+'):
-                        data = data.lstrip('+')
-                    self._opt10017[key].append(float(data))
+        Returns
+        -----------------------
+        data: str
+        """
+        data = self.ocx.dynamicCall("CommGetData(QString, QString, QString, int, QString)",
+                                trcode, real_type, rqname, index, item_name)
+        return data.strip()
 
-    def _request_deposit_detail(self, rqname, trcode):
+    def _comm_get_data_ex(self, trcode, record_name):
         """
-        예수금상세현황요청시 호출되는 메소드
+        멀티데이터 레코드 전체를 2차원 리스트로 반환하는 메소드
 
         Parameters
         -----------------------
-        rqname: string
-        trcode: string
-        """
-
-        deposit = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "예수금")))
-        d1_deposit = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "d+1추정예수금")))
-        d2_deposit = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "d+2추정예수금")))
+        trcode: str
+        record_name: str
+            멀티데이터 레코드명
 
-        withdrawable = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "출금가능금액")))
-        d1_withdrawable = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "d+1출금가능금액")))
-        d2_withdrawable = int(change_format(self._comm_get_data(trcode, "", rqname, 0, "d+2출금가능금액")))
-        self._deposit = {"예수금": deposit, "d+1추정예수금": d1_deposit, "d+2추정예수금": d2_deposit, '출금가능금액': withdrawable,
-                        'd+1출금가능금액': d1_withdrawable, 'd+2출금가능금액': d2_withdrawable}
+        Returns
+        -----------------------
+        data: list
+            [[행0 항목0, 행0 항목1, ...], [행1 항목0, ...], ...]
+        """
+        data = self.ocx.dynamicCall("GetCommDataEx(QString, QString)", trcode, record_name)
+        return data
 
-    def _request_today_realized_pnl(self, rqname, trcode):
+    def _get_multi_data(self, schema, trcode, rqname):
         """
-        당일실현손익상세요청시 호출되는 메소드
+        멀티데이터에서 스키마의 항목들을 모든 행에 대해 한번에 가져오는 메소드
+        레코드 구성이 정의된 TR은 GetCommDataEx 한번으로 가져오고, 아니면 CommGetData로 한칸씩 가져온다.
 
         Parameters
         -----------------------
-        rqname: string
-        trcode: string
+        schema: TRSchema
+        trcode: str
+        rqname: str
+
+        Returns
+        -----------------------
+        rows: list
+            [[schema.multi_items 순서의 값들], ...]
         """
+        index = schema.column_index
+        if index is not None:
+            table = self._comm_get_data_ex(trcode, schema.record)
+            if table:
+                return [[row[i].strip() for i in index] for row in table]
 
         data_cnt = self._get_repeat_cnt(trcode, rqname)
-        item_list = ('종목코드', '종목명', '체결량', '매입단가', '체결가',
-                    '당일매도손익', '당일매매수수료', '당일매매세금', '손익률')
-
-        self.today_realized_pnl = self._comm_get_data(trcode, "", rqname, 0, '당일실현손익')
-
-        self.today_realized_pnl_list = []
+        items = schema.multi_items
+        return [[self._comm_get_data(trcode, "", rqname, i, item) for item in items] for i in range(data_cnt)]
 
-        for i in range(data_cnt):
-            temp_dict = {}
-            for item in item_list:
-                if item in ['종목코드', '종목명']:
-                    temp_dict[item] = self._comm_get_data(trcode, "", rqname, i, item)
-                else:
-                    temp_dict[item] = to_float(change_format(self._comm_get_data(trcode, "", rqname, i, item)))
-            self.today_realized_pnl_list.append(temp_dict)
-    
-    def _request_trading_info(self, rqname, trcode):
+    def _get_repeat_cnt(self, trcode, rqname):
         """
-        계좌별 주문체결 내역 요청시 호출되는 메서드
+        받은 데이터의 개수를 반환하는 메소드
 
-        parameters
+        Parameters
         -----------------------
-        rqname: str
         trcode: str
-        """
-        
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
-
-        item_list = ('주문번호','종목번호','매매구분','신용구분','주문수량','주문단가','확인수량','접수구분','반대여부','주문시간',
-                        '원주문','종목명','주문구분','대출일','체결수량','체결단가','주문잔량','통신구분','정정취소','확인시간')
-        
-        self.today_trading_info = []
-        for i in range(data_cnt):
-            temp_dict = {}
-            for item in item_list:
-                data = self._comm_get_data(trcode, "", rqname, i, item)
-                temp_dict[item]=data
-            self.today_trading_info.append(temp_dict)
+        rqname: str
 
+        Returns
+        -----------------------
+        cnt: int
+        """
+        cnt = self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
+        return cnt
 
+    @property
+    def remained_data(self):
+        """
+        (deprecated) 마지막으로 받은 TR 응답에 연속조회할 데이터가 남아있는지 여부
+        여러 TR이 동시에 처리되면 다른 TR의 값일 수 있으므로 comm_rq_data/request_tr 결과의 TRResult.remained를 사용한다.
+        """
+        warnings.warn('API.remained_data는 더 이상 사용하지 않습니다. TRResult.remained를 사용하세요.',
+                      DeprecationWarning, stacklevel=2)
+        return self._remained_data
 
-    def _request_unexcuted(self, rqname, trcode):
+    def _receive_tr_data(self, screen_no, rqname, trcode, record_name, next, unused1, unused2, unused3, unused4):
         """
-        실시간미체결정보요청시 호출되는 메소드
+        OnReceiveTrData이벤트 발생시 호출되는 메소드
 
         Parameters
-        -----------------------
+        --------------------
+        screen_no: str
         rqname: str
         trcode: str
+        record_name: str
+        next: 연속조회 유무 - 조회(0) / 연속(2)
         """
 
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
-
-
-        item_list = ('계좌번호', '주문번호', '관리사번', '종목코드',
-                     '업무구분', '주문상태', '종목명', '주문수량',
-                     '주문가격', '미체결수량', '체결누계금액', '원주문번호',
-                     '주문구분', '매매구분', '시간', '체결번호', '체결가',
-                     '체결량',' 현재가', '매도호가', '매수호가', '단위체결가',
-                     '단위체결량', '당일매매수수료', '당일매매세금', '개인투자자')
+        remained = next == '2' # 연속 데이터 조회 확인
+        self._remained_data = remained
 
-        self.current_orders = []
+        handler = self._tr_handlers.get(rqname)
+        if handler is not None:
+            handler(rqname, trcode)
+            return
 
-        for i in range(data_cnt):
-            temp_dict = {}
-            for item in item_list:
-                if item in ['종목코드', '종목명']:
-                    temp_dict[item] = self._comm_get_data(trcode, "", rqname, i, item)
-                else:
-                    temp_dict[item] = change_format(self._comm_get_data(trcode, "", rqname, i, item))
-            self.current_orders.append(temp_dict)
+        pending = self._pending_tr.pop(rqname, None)
+        if pending is None:
+            print(trcode)
+            print(rqname + ' error')
+            return
+        if pending.pooled:
+            self.screens.release(pending.screen_no)
 
+        schema = get_schema(trcode)
+        if schema is None:
+            pending.future.set_exception(TRError('{0}의 스키마가 등록되어 있지 않습니다.'.format(trcode)))
+            return
 
-    def _request_price_info(self, rqname, trcode):
+        try:
+            single, multi = self._decode_tr(schema, trcode, rqname)
+            if pending.store:
+                self._store_tr(schema, single, multi)
+            result = TRResult(trcode, rqname, screen_no, single, self._tr_multi(schema, multi), remained)
+        except Exception as e: # 변환 실패를 Future로 넘겨서 기다리는 쪽이 멈추지 않게 함
+            error = TRError('{0} 응답을 변환하지 못했습니다: {1!r}'.format(trcode, e))
+            error.__cause__ = e
+            pending.future.set_exception(error)
+            return
+        pending.future.set_result(result)
+
+    def _decode_tr(self, schema, trcode, rqname):
         """
-        주식/업종 일봉차트조회요청시 호출되는 메소드
+        TR 스키마에 따라 싱글/멀티데이터를 가져와서 변환하는 메소드
 
         Parameters
-        -----------------------
-        rqname: str
+        --------------------
+        schema: TRSchema
         trcode: str
-        """
-        if not hasattr(self, 'ohlcv'): #ohlcv 필드를 가지고 있지 않으면 생성
-            self.ohlcv = {
-            'date': [], 'open': [], 'high': [], 'low': [], 'close': [], 'volume': []
-            }
-        
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
-        item_list = {'일자': 'date', '체결시간': 'date', '시가': 'open', '고가': 'high',
-                     '저가': 'low', '현재가': 'close', '거래량': 'volume'}
-        for i in range(data_cnt):
-            for key, item in item_list.items():
-                if key == '일자':
-                    if not trcode == 'opt10080':
-                        self.ohlcv[item].append(datetime.strptime(self._comm_get_data(trcode, "", rqname, i, key), '%Y%m%d'))
-                elif key == '체결시간':
-                    if trcode == 'opt10080':
-                        self.ohlcv[item].append(datetime.strptime(self._comm_get_data(trcode, "", rqname, i, key), '%Y%m%d%H%M%S'))
-                elif key == '일자':
-                    if trcode == 'opt10082':
-                        self.ohlcv[item].append(datetime.strptime(self._comm_get_data(trcode, "", rqname, i, key), '%Y%m%d'))
-                elif key == '일자':
-                    if trcode == 'opt10083':
-                        self.ohlcv[item].append(datetime.strptime(self._comm_get_data(trcode, "", rqname, i, key), '%Y%m%d'))
-                else:
-                    self.ohlcv[item].append(round(float(self._comm_get_data(trcode, "", rqname, i, key)), 1))
-
-    def _request_account_balance(self, rqname, trcode):
-        """
-        계좌평가잔고내역요청시 호출되는 메소드
-
-        Parameters
-        -----------------------
         rqname: str
-        trcode: str
 
+        Returns
+        --------------------
+        single: dict
+            {저장 키: 값}
+        multi: list
+            [[schema.multi_keys 순서의 값들], ...]
         """
-
-        self.account_balance = {}
-        item_list = ['총매입금액', '총평가금액', '총평가손익금액', '총수익률(%)', '추정예탁자산',
-                        '총대출금', '총융자금액', '총대주금액', '조회건수']
-        for item in item_list:
-            if item == '조회건수':
-                self.account_balance[item] = int(change_format(self._comm_get_data(trcode, "", rqname, 0, item)))
+        single = {}
+        for item, convert, key in zip(schema.single_items, schema.single_converters, schema.single_keys):
+            single[key] = convert(self._comm_get_data(trcode, "", rqname, 0, item))
+
+        multi = []
+        if schema.multi_items:
+            converters = schema.multi_converters
+            rows = self._get_multi_data(schema, trcode, rqname)
+            if schema.multi_mode == 'array':
+                columns = list(zip(*rows)) or [()] * len(converters)
+                multi = [convert(column) for convert, column in zip(converters, columns)]
             else:
-                self.account_balance[item] = to_float(change_format(self._comm_get_data(trcode, "", rqname, 0, item)))
-
-        if not hasattr(self, 'portfolio_positions'):
-            self.portfolio_positions = {}
+                multi = [[convert(data) for convert, data in zip(converters, row)] for row in rows]
+        return single, multi
 
-        data_cnt = self._get_repeat_cnt(trcode, rqname)
-
-        item_list = ('종목명', '보유수량', '매입가', '현재가',
-                     '평가손익', '수익률(%)', '전일종가', '매매가능수량',
-                     '전일매수수량', '전일매도수량', '금일매수수량', '금일매도수량',
-                     '매입금액', '매입수수료', '평가금액', '평가수수료', '세금', '수수료합',
-                     '보유비중(%)', '신용구분', '신용구분명', '대출일')
-        for i in range(data_cnt):
-            temp_dict = {}
-            code = self._comm_get_data(trcode, "", rqname, i, '종목번호')[1:] #remove A
-            for item in item_list:
-                if item == '종목명':
-                    temp_dict[item] = self._comm_get_data(trcode, "", rqname, i, item)
-                else:
-                    if item in ('신용구분', '신용구분명', '대출일'):
-                        temp_dict[item] = self._comm_get_data(trcode, "", rqname, i, item)
-                    if item in ('보유수량', '매매가능수량', '전일매수수량', '전일매도수량', '금일매수수량', '금일매도수량'):
-                        temp_dict[item] = int(change_format(self._comm_get_data(trcode, "", rqname, i, item)))
-                    else:
-                        temp_dict[item] = to_float(change_format(self._comm_get_data(trcode, "", rqname, i, item)))
-            self.portfolio_positions[code] = temp_dict
+    def _tr_multi(self, schema, multi):
+        """
+        변환된 멀티데이터를 TRResult에 넣을 형식으로 바꾸는 메소드
+        """
+        keys = schema.multi_keys
+        if schema.multi_mode == 'array':
+            return dict(zip(keys, multi))
+        return [dict(zip(keys, row)) for row in multi]
 
+    def _store_tr(self, schema, single, multi):
+        """
+        변환된 TR 데이터를 스키마에 정의된 속성에 저장하는 메소드
+        """
+        if schema.single_attr is not None:
+            if schema.scalar:
+                single = single[schema.single_keys[0]]
+            setattr(self, schema.single_attr, single)
+
+        if schema.multi_attr is None:
+            return
+
+        keys = schema.multi_keys
+        mode = schema.multi_mode
+        if mode == 'columns':
+            store = getattr(self, schema.multi_attr, None)
+            if store is None:
+                store = {key: [] for key in keys}
+                setattr(self, schema.multi_attr, store)
+            for key, column in zip(keys, zip(*multi)):
+                store.setdefault(key, []).extend(column)
+        elif mode == 'array':
+            store = getattr(self, schema.multi_attr, None)
+            if store is None:
+                store = schema.factory()
+                setattr(self, schema.multi_attr, store)
+            store.append(dict(zip(keys, multi)))
+        elif mode == 'keyed':
+            store = getattr(self, schema.multi_attr, None)
+            if store is None:
+                store = {}
+                setattr(self, schema.multi_attr, store)
+            for row in multi:
+                row = dict(zip(keys, row))
+                store[row.pop(schema.key)] = row
+        elif mode == 'append':
+            store = getattr(self, schema.multi_attr, None)
+            if store is None:
+                store = []
+                setattr(self, schema.multi_attr, store)
+            store.extend(dict(zip(keys, row)) for row in multi)
+        else:
+            setattr(self, schema.multi_attr, [dict(zip(keys, row)) for row in multi])
 
     def _get_chejan_data(self, fid):
         """
@@ -581,6 +850,9 @@ class API(QObject):
             아이템 개수
         fid_list: str
         """
+        if gubun == '1':
+            self._receive_balance()
+            return
 
         fid_dict = collections.OrderedDict({
                     '원주문번호': 904, '주문번호': 9203 , '주문구분': 905, '종목코드': 9001, '종목명': 302,
@@ -617,6 +889,34 @@ class API(QObject):
         if not temp_dict['주문/체결시간'] == '':
             self.chejan_received.emit(temp_dict)
 
+        self.orders.receive_chejan(self._get_chejan_data)
+
+        unit_quantity = self._get_chejan_data(915).strip() # 단위체결량
+        if unit_quantity and int(unit_quantity):
+            quantity = int(unit_quantity)
+            self.portfolio.on_execution(to_code(self._get_chejan_data(9001).strip()),
+                                        -quantity if '매도' in ordertype else quantity,
+                                        to_price(self._get_chejan_data(914).strip()),
+                                        self._get_chejan_data(302).strip())
+
+    def _receive_balance(self):
+        """
+        잔고통보(체결구분 1)를 처리하는 메소드
+        self.portfolio의 해당 종목을 서버 값으로 갱신하고 balance_received 시그널을 보낸다.
+        """
+        fid_dict = {'종목코드': 9001, '종목명': 302, '현재가': 10, '보유수량': 930, '매입단가': 931, '총매입가': 932,
+                    '주문가능수량': 933, '당일순매수량': 945, '매도매수구분': 946, '예수금': 951, '기준가': 307}
+        converters = {'종목코드': to_code, '종목명': to_str, '매도매수구분': to_str}
+
+        balance = {}
+        for key, fid in fid_dict.items():
+            value = self._get_chejan_data(fid).strip()
+            balance[key] = converters.get(key, to_price)(value) if value else None
+
+        self.portfolio.on_balance(balance['종목코드'], int(balance['보유수량'] or 0), balance['매입단가'] or 0.0,
+                                  int(balance['주문가능수량'] or 0), balance['예수금'], balance['현재가'], balance['종목명'])
+        self.balance_received.emit(balance)
+
 
 
     """
@@ -625,18 +925,38 @@ class API(QObject):
     -------------------
     """
 
-    def request_real_data(self, codes, add_list=False):
+    def request_real_data(self, codes, add_list=False, fids=STOCK_TRADE_FIDS):
+        """
+        실시간 데이터를 등록하는 메소드
+        종목이 많으면 화면번호를 나눠서 등록하고, 재접속하면 자동으로 다시 등록된다.
+
+        Parameters
+        ------------------------
+        codes: list
+        add_list: bool
+            True이면 기존 종목에 추가, False이면 기존 종목을 해제하고 새로 등록
+        fids: tuple
+            받을 FID (add_list가 True이면 기존 등록의 FID를 그대로 사용)
+
+        Returns
+        ------------------------
+        subscription: RealTimeSubscription
+        """
+        subscription = self._real_subscription
+        if subscription is not None and not add_list:
+            subscription.close()
 
-        if add_list:
-            add_list = '1'
+        if subscription is None or subscription.closed:
+            subscription = self._real_subscription = self.realtime.subscribe(codes, fids, 'request_real_data')
         else:
-            add_list = '0'
-        self.real = RealTimeMannager(self.ocx, codes, add_list)
-        self.real.start()
+            subscription.add(codes)
+        return subscription
 
     def _receive_real_data(self, code, real_type, real_data):
         """
         실시간데이터를 받은 시점을 알려준다.
+        구독이 요청한 FID만 읽어서 실시간 타입별 테이블(self.real_tables)의 해당 종목 행에 변환된 값으로 저장한다.
+        주식체결은 self.quotes에 저장된다.
 
         입력값
         code: str
@@ -646,33 +966,244 @@ class API(QObject):
         realData: str
             - 실시간 데이터전문
         """
-        if real_type == '주식체결':
-            if not hasattr(self, 'real_data'):
-                self.real_data = {}
-            temp_dict = {}
-            temp_dict['체결시간'] = self._get_comm_real_data(real_type, 20)
-            temp_dict['현재가'] = self._get_comm_real_data(real_type, 10)
-            temp_dict['전일대비'] = self._get_comm_real_data(real_type, 11)
-            temp_dict['등락율'] = self._get_comm_real_data(real_type, 12)
-            temp_dict['(최우선)매도호가'] = self._get_comm_real_data(real_type, 27)
-            temp_dict['(최우선)매수호가'] = self._get_comm_real_data(real_type, 28)
-            temp_dict['거래량'] = self._get_comm_real_data(real_type, 15)
-            temp_dict['누적거래량'] = self._get_comm_real_data(real_type, 13)
-            temp_dict['누적거래대금'] = self._get_comm_real_data(real_type, 14)
-            temp_dict['시가'] = self._get_comm_real_data(real_type, 16)
-            temp_dict['고가'] = self._get_comm_real_data(real_type, 17)
-            temp_dict['저가'] = self._get_comm_real_data(real_type, 18)
-            temp_dict['전일대비기호'] = self._get_comm_real_data(real_type, 25)
-            temp_dict['전일거래량대비(계약,주)'] = self._get_comm_real_data(real_type, 26)
-            temp_dict['거래대금증감'] = self._get_comm_real_data(real_type, 29)
-            temp_dict['전일거래량대비(비율)'] = self._get_comm_real_data(real_type, 30)
-            temp_dict['거래회전율'] = self._get_comm_real_data(real_type, 31)
-            temp_dict['거래비용'] = self._get_comm_real_data(real_type, 32)
-            temp_dict['체결강도'] = self._get_comm_real_data(real_type, 228)
-            temp_dict['시가총액(억)'] = self._get_comm_real_data(real_type, 311)
-            temp_dict['장구분'] = self._get_comm_real_data(real_type, 290)
-            self.real_data[code] = temp_dict
-            #print(self.real_data)
+        if self._real_plan_version != self.realtime.version:
+            self._compile_real_plans()
+
+        plan = self._real_plans.get(real_type)
+        if not plan: # 등록하지 않은 타입이거나 요청된 FID가 없음
+            return
+
+        get_value = self._real_getters[real_type]
+        worker = self.real_worker
+        if worker is not None and worker.running:
+            # 문자열 값만 읽어서 워커에 넘기고 바로 리턴 (변환과 전달은 워커 스레드에서)
+            strings = tuple([get_value(fid) for i, fid, parse in plan])
+            worker.push(code, real_type, plan, strings)
+            if real_type == '주식체결' and code in self.portfolio: # 장부는 Qt 스레드에서만 갱신
+                slot = self._real_price_slot # 이미 읽은 현재가(FID 10) 문자열을 다시 사용
+                if slot is not None:
+                    self.portfolio.mark(code, parse_price(strings[slot].strip()))
+            return
+
+        row = self.real_tables[real_type].update_raw(code, get_value, plan)
+        if real_type == '주식체결' and code in self.portfolio:
+            self.portfolio.mark(code, self.quotes.value(row, self._bar_index[1]))
+        if self.tick_streams or self.bar_aggregators or self.real_consumers:
+            self._publish_real(code, real_type, row, time.perf_counter())
+
+    def _publish_real(self, code, real_type, row, received):
+        """
+        갱신된 실시간 테이블 행을 TickStream, BarAggregator, RealTimeConsumer로 전달
+        RealTimeWorker를 쓰면 워커 스레드에서 호출된다.
+        """
+        if real_type == '주식체결' and (self.tick_streams or self.bar_aggregators):
+            values = self.quotes.values(row)
+            for stream in self.tick_streams:
+                if stream.wants(code):
+                    stream.publish(code, values)
+
+            if self.bar_aggregators:
+                time_index, price_index, volume_index = self._bar_index
+                hhmmss, price, volume = int(values[time_index]), int(values[price_index]), int(values[volume_index])
+                for aggregator in self.bar_aggregators:
+                    if aggregator.wants(code):
+                        aggregator.update(code, hhmmss, price, volume)
+
+        values = None
+        for consumer in self.real_consumers:
+            if consumer.wants(code, real_type):
+                if values is None:
+                    values = self.real_tables[real_type].values(row)
+                consumer.put(code, received, (code, real_type, values))
+
+    def _compile_real_plans(self):
+        """
+        구독들이 요청한 FID로 실시간 타입별 디코딩 계획을 다시 만든다.
+        구독이 하나도 없으면 (직접 SetRealReg를 호출한 경우 등) 모든 항목을 읽는다.
+        """
+        fids = self.realtime.requested_fids() if self.realtime.subscriptions else None
+        self._real_plans = {real_type: schema.plan(fids) for real_type, schema in REAL_SCHEMAS.items()}
+        slots = [slot for slot, (i, fid, parse) in enumerate(self._real_plans.get('주식체결', ())) if fid == 10]
+        self._real_price_slot = slots[0] if slots else None
+        self._real_getters = {real_type: partial(self.ocx.dynamicCall, "GetCommRealData(QString, int)", real_type)
+                              for real_type in REAL_SCHEMAS}
+        self._real_plan_version = self.realtime.version
+
+    def open_tick_stream(self, capacity=65536, overflow=DROP_OLDEST, codes=None, block_timeout=1.0):
+        """
+        주식체결 틱을 모두 담는 TickStream을 만들어 등록하는 메소드
+        self.quotes는 종목별 마지막 틱만 가지고 있으므로 중간 체결이 모두 필요하면 이 스트림을 사용한다.
+
+        Parameters
+        -----------------------
+        capacity: int
+            링버퍼 크기 (틱 수)
+        overflow: str
+            DROP_OLDEST, DROP_NEWEST, BLOCK
+        codes: list
+            담을 종목코드, None이면 전체
+        block_timeout: float
+
+        Returns
+        -----------------------
+        stream: TickStream
+            stream.subscribe()로 소비자를 만들어 읽는다.
+            start_realtime_worker()로 워커를 켜면 틱은 워커 스레드에서 스트림에 들어간다.
+        """
+        stream = TickStream(capacity, self.quotes.fields, overflow, codes, block_timeout)
+        self.tick_streams.append(stream)
+        return stream
+
+    def close_tick_stream(self, stream):
+        if stream in self.tick_streams:
+            self.tick_streams.remove(stream)
+
+    def open_bar_aggregator(self, specs=('minute1', 'minute3', 'minute5', 'minute15', 'minute60'), on_bar=None,
+                            codes=None, date=None):
+        """
+        주식체결 틱으로 봉을 만드는 BarAggregator를 만들어 등록하는 메소드
+        체결시간, 현재가, 거래량(FID 20, 10, 15)이 디코딩되도록 해당 FID로 실시간 등록이 되어 있어야 한다.
+
+        Parameters
+        -----------------------
+        specs: tuple
+            'minute{분}', 'tick{틱 수}', 'volume{거래량}'
+        on_bar: callable
+            on_bar(code, spec, bar) - 봉이 마감될 때 호출
+            start_realtime_worker()로 워커를 켜면 Qt 스레드가 아니라 워커 스레드에서 호출되므로
+            on_bar 안에서 API/EasyAPI 메소드를 직접 호출하지 말고 Qt 스레드로 넘겨야 한다 (예: pyqtSignal로 emit).
+        codes: list
+            집계할 종목코드, None이면 전체
+        date: datetime.date
+
+        Returns
+        -----------------------
+        aggregator: BarAggregator
+        """
+        aggregator = BarAggregator(specs, on_bar, codes, date)
+        self.bar_aggregators.append(aggregator)
+        return aggregator
+
+    def close_bar_aggregator(self, aggregator):
+        if aggregator in self.bar_aggregators:
+            self.bar_aggregators.remove(aggregator)
+
+    def start_realtime_worker(self, capacity=65536):
+        """
+        실시간 데이터의 변환과 전달을 워커 스레드로 옮기는 메소드
+        켜면 _receive_real_data는 FID 문자열 값을 큐에 넣기만 하고, 실시간 테이블(self.quotes 등), TickStream,
+        BarAggregator, RealTimeConsumer는 워커 스레드에서 갱신된다.
+
+        Parameters
+        -----------------------
+        capacity: int
+            워커 큐 크기 (이벤트 수), 가득 차면 새 이벤트를 버림
+
+        Returns
+        -----------------------
+        worker: RealTimeWorker
+        """
+        if self.real_worker is None:
+            self.real_worker = RealTimeWorker(self, capacity)
+        self.real_worker.start()
+        return self.real_worker
+
+    def stop_realtime_worker(self):
+        """
+        남은 이벤트를 처리하고 워커를 멈추는 메소드 (이후에는 Qt 스레드에서 처리)
+        콜백이 끝나지 않아 워커 스레드가 아직 살아 있으면 self.real_worker를 남겨두므로 나중에 다시 호출한다.
+
+        Returns
+        -----------------------
+        stopped: bool
+            워커 스레드가 끝났는지 여부
+        """
+        if self.real_worker is not None and self.real_worker.stop():
+            self.real_worker = None
+        return self.real_worker is None
+
+    def add_consumer(self, callback, kind='real', codes=None, real_types=('주식체결',), threads=1, capacity=65536,
+                     executor=None, name=None):
+        """
+        실시간 이벤트나 주문 상태 변경을 별도 스레드(또는 executor)에서 처리하는 소비자를 등록하는 메소드
+        콜백이 느려도 실시간 수신, TR 응답, 다른 소비자가 밀리지 않는다. 인자는 RealTimeConsumer 참고
+
+        Returns
+        -----------------------
+        consumer: RealTimeConsumer
+            consumer.stats()로 받은 시점부터 콜백 완료까지의 지연시간을 확인
+        """
+        consumer = RealTimeConsumer(callback, kind, codes, real_types, threads, capacity, executor, name)
+        consumer.start()
+        (self.real_consumers if kind == 'real' else self.order_consumers).append(consumer)
+        return consumer
+
+    def remove_consumer(self, consumer):
+        for consumers in (self.real_consumers, self.order_consumers):
+            if consumer in consumers:
+                consumers.remove(consumer)
+        consumer.stop()
+
+    def _publish_order(self, handle):
+        if self.order_consumers:
+            received = time.perf_counter()
+            for consumer in self.order_consumers:
+                if consumer.wants(handle.code):
+                    consumer.put(handle.code, received, (handle,))
+
+    def open_tick_archive(self, root, codes=None, interval=1.0, capacity=1 << 18):
+        """
+        주식체결 틱을 날짜별 틱 아카이브(TickArchiveWriter)에 쌓기 시작하는 메소드
+        TickStream으로 받은 틱을 interval초마다 모아서 파일에 덧붙인다.
+
+        Parameters
+        -----------------------
+        root: str
+            아카이브 디렉토리
+        codes: list
+            쌓을 종목코드, None이면 전체
+        interval: float
+            파일에 쓰는 주기(초)
+        capacity: int
+            interval 동안 들어오는 틱을 담을 링버퍼 크기
+            파일에 쓰기 전에 덮어써진 틱 수는 writer.dropped에 센다 (Qt 스레드에서 쓰므로 BLOCK은 쓸 수 없음)
+
+        Returns
+        -----------------------
+        writer: TickArchiveWriter
+        """
+        stream = self.open_tick_stream(capacity, DROP_OLDEST, codes)
+        writer = TickArchiveWriter(root)
+        timer = QTimer(self)
+        timer.timeout.connect(partial(self._drain_tick_archive, writer))
+        timer.start(int(interval * 1000))
+        self.tick_archives[writer] = (stream, stream.subscribe(), timer)
+        return writer
+
+    def _drain_tick_archive(self, writer):
+        stream, consumer, timer = self.tick_archives[writer]
+        writer.write(consumer.read())
+        writer.flush()
+        writer.dropped = consumer.missed
+
+    def close_tick_archive(self, writer, finalize=True):
+        """
+        남은 틱을 쓰고 아카이브를 닫는 메소드
+
+        Parameters
+        -----------------------
+        writer: TickArchiveWriter
+        finalize: bool
+            True이면 오늘 쌓은 틱을 정렬해서 조회용 파일을 만듦 (장 마감 후)
+        """
+        if writer not in self.tick_archives:
+            return
+        self._drain_tick_archive(writer)
+        stream, consumer, timer = self.tick_archives.pop(writer)
+        timer.stop()
+        self.close_tick_stream(stream)
+        if finalize:
+            writer.finalize()
 
 
     def _get_comm_real_data(self, real_type, fid):
@@ -702,40 +1233,11 @@ class API(QObject):
      -------------------
     """
 
-    def reset_ohlcv(self):
-        self.ohlcv = {
-        'date': [], 'open': [], 'high': [], 'low': [], 'close': [],'volume': []
-        }
+    def reset_ohlcv(self, capacity=0):
+        self.ohlcv = OHLCVBuffer(capacity)
 
     def reset_opt10016(self): #신고저가
-        self._opt10016 = {'종목코드': [], '종목명': [], '현재가': [], '등락률': [], '거래량': [],
-                          '전일거래량대비율': [], '매도호가': [], '매수호가': [], '고가': [], '저가': []}
+        self._opt10016 = {key: [] for key in get_schema('opt10016').multi_keys}
 
     def reset_opt10017(self): #상하한가
-        self._opt10017 = {'종목코드': [], '종목명': [], '현재가': [], '전일대비': [], '등락률': [], '거래량': [],
-                          '전일거래량': [], '매도호가': [], '매수호가': [], '매도잔량': [], '매수잔량': []}
-
-
-class RealTimeMannager(QThread):
-
-    def __init__(self, ocx, codes, add_list):
-        super().__init__()
-        self.ocx = ocx
-        self.codes = codes
-        self.add_list = add_list
-
-    def run(self):
-
-        if not self.ocx.dynamicCall("GetConnectState()"):
-            raise Exception("서버에 연결되어있지 않습니다.")
-
-        if isinstance(self.codes, list):
-            codes = ';'.join(self.codes)
-
-        self.ocx.dynamicCall("SetRealReg(QString, QString, QString, QString)",
-                         '0120', codes, '10', self.add_list)
-        self.real_event = QEventLoop()
-        self.real_event.exec_()
-
-    def __del__(self):
-        self.wait()
+        self._opt10017 = {key: [] for key in get_schema('opt10017').multi_keys}
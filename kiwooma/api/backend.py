@@ -0,0 +1,100 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+try:
+    from PyQt5.QAxContainer import QAxWidget
+except ImportError: # QAxContainer는 윈도우에서만 제공됨
+    QAxWidget = None
+
+
+def create_ocx():
+    """
+    키움 OpenAPI+ OCX 컨트롤을 생성하는 함수
+
+    Returns
+    ---------------------
+    ocx: QAxWidget
+    """
+    if QAxWidget is None:
+        raise ImportError('QAxContainer를 사용할 수 없습니다. 윈도우가 아닌 환경에서는 '
+                          'SimulatedOCX 같은 백엔드를 API(ocx=...)로 넘겨주세요.')
+    ocx = QAxWidget()
+    ocx.setControl("KHOPENAPI.KHOpenAPICtrl.1")
+    return ocx
+
+
+class OCXBackend(QObject):
+    """
+    API가 사용하는 OCX 백엔드의 기본 클래스
+
+    QAxWidget과 같은 이벤트 시그널을 가지고 있으며, dynamicCall("CommRqData(QString, ...)", ...) 형태의
+    호출을 같은 이름의 메소드(CommRqData)로 전달한다.
+    하위 클래스는 사용하는 OpenAPI 함수만 구현하면 된다.
+    """
+
+    OnEventConnect = pyqtSignal(int)
+    OnReceiveTrData = pyqtSignal(str, str, str, str, str, int, str, str, str)
+    OnReceiveRealData = pyqtSignal(str, str, str)
+    OnReceiveChejanData = pyqtSignal(str, int, str)
+    OnReceiveMsg = pyqtSignal(str, str, str, str)
+
+    def dynamicCall(self, signature, *args):
+        """
+        QAxWidget.dynamicCall과 같은 방식으로 호출을 받아 메소드를 실행한다.
+
+        Parameters
+        ---------------------
+        signature: str
+            "CommRqData(QString, QString, int, QString)" 형식의 함수 시그니처
+        args:
+            인자들 (SendOrder처럼 리스트 하나로 넘겨도 됨)
+        """
+        name = signature.split('(', 1)[0].strip()
+        if len(args) == 1 and isinstance(args[0], list):
+            args = args[0]
+        try:
+            method = getattr(self, name)
+        except AttributeError:
+            raise NotImplementedError('{0}은(는) {1}에서 지원하지 않는 함수입니다.'.format(name, type(self).__name__))
+        return method(*args)
+
+    """
+    ------------------------------
+    | 백엔드가 구현해야 하는 함수들 |
+    ------------------------------
+    """
+
+    def CommConnect(self):
+        raise NotImplementedError
+
+    def GetConnectState(self):
+        raise NotImplementedError
+
+    def GetLoginInfo(self, tag):
+        raise NotImplementedError
+
+    def SetInputValue(self, item, value):
+        raise NotImplementedError
+
+    def CommRqData(self, rqname, trcode, next, screen_no):
+        raise NotImplementedError
+
+    def CommGetData(self, trcode, real_type, rqname, index, item_name):
+        raise NotImplementedError
+
+    def GetRepeatCnt(self, trcode, rqname):
+        raise NotImplementedError
+
+    def SetRealReg(self, screen_no, codes, fids, opt_type):
+        raise NotImplementedError
+
+    def SetRealRemove(self, screen_no, code):
+        raise NotImplementedError
+
+    def GetCommRealData(self, real_type, fid):
+        raise NotImplementedError
+
+    def GetChejanData(self, fid):
+        raise NotImplementedError
+
+    def SendOrder(self, rqname, screen_no, acc_no, order_type, code, quantity, price, hoga, org_order_no):
+        raise NotImplementedError
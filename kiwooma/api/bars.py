@@ -0,0 +1,306 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from kiwooma.api.ohlcv import OHLCV_DTYPE
+
+
+# 봉 집계에 필요한 주식체결 FID (체결시간, 현재가, 거래량)
+BAR_FIDS = ('20', '10', '15')
+
+
+def parse_bar_spec(spec):
+    """
+    봉 종류 문자열을 (종류, 크기)로 변환
+
+    'minute5' -> ('time', 300), 'tick100' -> ('tick', 100), 'volume10000' -> ('volume', 10000)
+    """
+    for prefix, kind in (('minute', 'time'), ('tick', 'tick'), ('volume', 'volume')):
+        if spec.startswith(prefix):
+            size = int(spec[len(prefix):])
+            return kind, size * 60 if kind == 'time' else size
+    raise ValueError('unknown bar spec: {0}'.format(spec))
+
+
+class BarSeries(object):
+    """
+    종목 하나, 봉 종류 하나의 봉을 미리 할당한 배열에 쌓는 클래스
+
+    마감된 봉은 records[:count]에 날짜 오름차순으로 들어가고, 진행중인 봉은 current에 따로 둔다.
+    분봉의 날짜는 키움 분봉과 같이 봉이 끝나는 시각이다. (09:00:30 체결은 09:01 봉)
+    이미 마감된 분의 체결이 늦게 오면 새 봉을 만들지 않고 마지막으로 마감된 봉에 합치며(merged),
+    그보다 이전 분의 체결은 버린다(dropped). 합친 봉은 records에만 반영되고 on_bar로 다시 전달하지 않는다.
+
+    Parameters
+    ---------------------
+    spec: str
+        'minute{분}', 'tick{틱 수}', 'volume{거래량}'
+    base: np.datetime64
+        체결 시각(초)의 기준 날짜
+    capacity: int
+        미리 할당할 봉 개수 (부족하면 두배씩 늘어남)
+
+    Attributes
+    ---------------------
+    merged: int
+        마지막으로 마감된 분봉에 합친 늦은 체결 수
+    dropped: int
+        그보다 이전 분이라서 버린 체결 수
+    """
+
+    def __init__(self, spec, base, capacity=512):
+        self.spec = spec
+        self.kind, self.size = parse_bar_spec(spec)
+        self.base = base
+        self.records = np.zeros(capacity, dtype=OHLCV_DTYPE)
+        self.count = 0
+        self.current = None # [끝 시각(초), 시가, 고가, 저가, 종가, 거래량, 틱 수]
+        self.closed_end = -1 # 마지막으로 마감된 봉의 끝 시각(초)
+        self.merged = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def update(self, seconds, price, volume):
+        """
+        체결 하나를 반영
+
+        Parameters
+        ---------------------
+        seconds: int
+            base 기준 체결 시각(초)
+        price: int
+        volume: int
+
+        Returns
+        ---------------------
+        closed: list
+            이번 체결로 마감된 봉 [(끝 시각(초), 시가, 고가, 저가, 종가, 거래량), ...]
+        """
+        closed = []
+        current = self.current
+        if self.kind == 'time':
+            end = (seconds // self.size + 1) * self.size
+            if end <= self.closed_end or current is not None and end < current[0]: # 이미 지나간 분의 늦은 체결
+                self._late(end, price, volume)
+                return closed
+            if current is not None and current[0] != end:
+                closed.append(self._close())
+                current = None
+            if current is None:
+                self.current = [end, price, price, price, price, volume, 1]
+                return closed
+        elif current is None:
+            current = self.current = [seconds, price, price, price, price, 0, 0]
+        else:
+            current[0] = seconds # 틱봉/거래량봉의 시각은 마지막 체결 시각
+
+        if price > current[2]:
+            current[2] = price
+        if price < current[3]:
+            current[3] = price
+        current[4] = price
+        current[5] += volume
+        current[6] += 1
+
+        if self.kind == 'tick' and current[6] >= self.size or self.kind == 'volume' and current[5] >= self.size:
+            closed.append(self._close())
+        return closed
+
+    def _late(self, end, price, volume):
+        if self.count and end == self.closed_end and (self.current is None or self.current[0] > end):
+            i = self.count - 1
+            records = self.records
+            records['high'][i] = max(records['high'][i], price)
+            records['low'][i] = min(records['low'][i], price)
+            records['close'][i] = price
+            records['volume'][i] += volume
+            self.merged += 1
+        else:
+            self.dropped += 1
+
+    def close_due(self, seconds):
+        """
+        seconds 시각 기준으로 끝난 분봉을 마감 (체결이 없어서 마감되지 않은 봉 처리용)
+        """
+        if self.kind == 'time' and self.current is not None and self.current[0] <= seconds:
+            return [self._close()]
+        return []
+
+    def _close(self):
+        bar = tuple(self.current[:6])
+        if self.count == len(self.records):
+            grown = np.zeros(max(len(self.records) * 2, 64), dtype=OHLCV_DTYPE)
+            grown[:self.count] = self.records
+            self.records = grown
+        self.records[self.count] = (self.base + np.timedelta64(bar[0], 's'),) + bar[1:]
+        self.count += 1
+        self.closed_end = bar[0]
+        self.current = None
+        return bar
+
+    def seed(self, records):
+        """
+        캐시된 분봉(OHLCV_DTYPE, 날짜 오름차순)으로 채운다.
+        마지막 봉은 아직 끝나지 않았을 수 있으므로 진행중인 봉으로 둔다.
+        """
+        records = np.asarray(records)
+        if not len(records):
+            return
+        closed, last = records[:-1], records[-1]
+        if len(closed) > len(self.records):
+            self.records = np.zeros(len(closed) * 2, dtype=OHLCV_DTYPE)
+        self.records[:len(closed)] = closed
+        self.count = len(closed)
+        if len(closed):
+            self.closed_end = int((closed[-1]['date'] - self.base) / np.timedelta64(1, 's'))
+        end = int((last['date'] - self.base) / np.timedelta64(1, 's'))
+        self.current = [end, int(last['open']), int(last['high']), int(last['low']), int(last['close']),
+                        int(last['volume']), 0]
+
+    def to_records(self, include_current=True):
+        """
+        날짜 오름차순 OHLCV_DTYPE 배열 (include_current이면 진행중인 봉 포함)
+        """
+        records = self.records[:self.count]
+        if include_current and self.current is not None:
+            current = np.zeros(1, dtype=OHLCV_DTYPE)
+            current[0] = (self.base + np.timedelta64(int(self.current[0]), 's'),) + tuple(self.current[1:6])
+            records = np.concatenate([records, current])
+        return records
+
+
+class BarAggregator(object):
+    """
+    주식체결 틱으로 종목별 분봉/틱봉/거래량봉을 만드는 클래스
+
+    틱마다 종목의 BarSeries들을 갱신하고, 봉이 마감되면 on_bar(code, spec, bar)를 호출한다.
+    bar는 (date, open, high, low, close, volume)이고 date는 봉이 끝나는 시각(datetime64[s])이다.
+
+    Parameters
+    ---------------------
+    specs: tuple
+        만들 봉 종류 ('minute1', 'minute5', 'tick100', 'volume10000', ...)
+    on_bar: callable
+        on_bar(code, spec, bar) - 봉이 마감될 때 호출
+    codes: iterable
+        집계할 종목코드, None이면 전체
+    date: datetime.date
+        체결시간(HHMMSS)에 붙일 날짜, None이면 오늘
+    capacity: int
+        종목/봉 종류별 미리 할당할 봉 개수
+    """
+
+    def __init__(self, specs=('minute1', 'minute3', 'minute5', 'minute15', 'minute60'), on_bar=None, codes=None,
+                 date=None, capacity=512):
+        for spec in specs:
+            parse_bar_spec(spec)
+        self.specs = tuple(specs)
+        self.on_bar = on_bar
+        self.codes = None if codes is None else set(codes)
+        self.capacity = capacity
+        date = date or datetime.today().date()
+        self.base = np.datetime64(date.strftime('%Y-%m-%d'), 's')
+        self.series = {} # {code: {spec: BarSeries}}
+        self._next_minute = 0 # 다음 분 경계(초), 이 시각이 지난 체결이 오면 다른 종목의 끝난 분봉도 마감
+
+    def wants(self, code):
+        return self.codes is None or code in self.codes
+
+    def _series(self, code):
+        series = self.series.get(code)
+        if series is None:
+            series = self.series[code] = {}
+            for spec in self.specs:
+                series[spec] = BarSeries(spec, self.base, self.capacity)
+        return series
+
+    def update(self, code, hhmmss, price, volume):
+        """
+        체결 하나를 반영
+
+        Parameters
+        ---------------------
+        code: str
+        hhmmss: int
+            체결시간
+        price: int
+        volume: int
+            체결량 (매도체결이 음수여도 됨)
+        """
+        seconds = hhmmss // 10000 * 3600 + hhmmss // 100 % 100 * 60 + hhmmss % 100
+        if seconds >= self._next_minute:
+            # 체결이 뜸한 종목의 분봉도 장 시각이 지나면 마감되도록 함
+            self._next_minute = (seconds // 60 + 1) * 60
+            self._close_due(seconds)
+
+        volume = abs(volume)
+        for spec, bar_series in self._series(code).items():
+            for bar in bar_series.update(seconds, price, volume):
+                self._emit(code, spec, bar)
+
+    def close_due(self, hhmmss):
+        """
+        hhmmss 시각까지 끝난 분봉을 모두 마감
+        체결이 들어올 때 분이 바뀌면 자동으로 호출되므로, 장 마감 후 마지막 봉을 닫을 때 등에 사용
+        """
+        self._close_due(hhmmss // 10000 * 3600 + hhmmss // 100 % 100 * 60 + hhmmss % 100)
+
+    def _close_due(self, seconds):
+        for code, series in self.series.items():
+            for spec, bar_series in series.items():
+                for bar in bar_series.close_due(seconds):
+                    self._emit(code, spec, bar)
+
+    def _emit(self, code, spec, bar):
+        if self.on_bar is not None:
+            self.on_bar(code, spec, (self.base + np.timedelta64(int(bar[0]), 's'),) + bar[1:])
+
+    def seed(self, code, spec, records):
+        """
+        code 종목의 spec 봉을 과거 분봉으로 채운다. 오늘 봉만 사용한다.
+
+        Parameters
+        ---------------------
+        records: np.ndarray
+            OHLCV_DTYPE 배열 (날짜 오름차순), OHLCVCache.load()의 결과 등
+        """
+        records = np.asarray(records)
+        today = records[(records['date'] > self.base) & (records['date'] <= self.base + np.timedelta64(1, 'D'))]
+        self._series(code)[spec].seed(today)
+
+    def seed_from_cache(self, cache, code, adj_close=1):
+        """
+        OHLCVCache에 저장된 분봉으로 code 종목의 분봉들을 채운다. (캐시가 없는 봉 종류는 건너뜀)
+
+        Returns
+        ---------------------
+        seeded: list
+            채운 봉 종류
+        """
+        seeded = []
+        for spec in self.specs:
+            if not spec.startswith('minute'):
+                continue
+            records = cache.load(code, spec, adj_close)
+            if records is not None:
+                self.seed(code, spec, records)
+                seeded.append(spec)
+        return seeded
+
+    def get_bars(self, code, spec, include_current=True):
+        """
+        code 종목의 spec 봉을 DataFrame으로 리턴
+
+        Returns
+        ---------------------
+        df: pd.DataFrame
+            index: date, columns: open, high, low, close, volume
+        """
+        series = self.series.get(code)
+        if series is None:
+            records = np.zeros(0, dtype=OHLCV_DTYPE)
+        else:
+            records = series[spec].to_records(include_current)
+        data = {column: records[column] for column in ('open', 'high', 'low', 'close', 'volume')}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(records['date'], name='date'))
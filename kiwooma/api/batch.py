@@ -0,0 +1,100 @@
+from PyQt5.QtCore import QEventLoop
+
+
+class BatchRunner(object):
+    """
+    여러 종목에 대해 같은 TR 조회를 이어서 보내는 클래스
+
+    최대 max_in_flight개의 요청을 동시에 걸어두고 하나가 끝날 때마다 다음 종목을 요청한다.
+    요청 간격은 API의 스케줄러가 조회 제한에 맞춰 조절하므로 여기서는 따로 쉬지 않는다.
+    종목별 에러는 failures에 모아두고 나머지 종목은 계속 조회한다.
+
+    Parameters
+    ---------------------
+    api: API
+    submit: callable
+        submit(code) - 종목 하나를 요청하고 Future를 리턴
+    convert: callable
+        convert(code, result) - Future의 결과를 저장할 형태로 변환
+    checkpoint: BatchCheckpoint
+        진행상황 기록, None이면 메모리에만 보관
+    max_in_flight: int
+        동시에 걸어둘 최대 요청 수
+    progress: callable
+        progress(done, total, code, error) - 종목 하나가 끝날 때마다 호출 (성공이면 error는 None)
+    """
+
+    def __init__(self, api, submit, convert, checkpoint=None, max_in_flight=10, progress=None):
+        self.api = api
+        self.submit = submit
+        self.convert = convert
+        self.checkpoint = checkpoint
+        self.max_in_flight = max_in_flight
+        self.progress = progress
+
+    def run(self, codes):
+        """
+        codes를 모두 조회할 때까지 Qt 이벤트를 처리하면서 기다린다.
+
+        Returns
+        ---------------------
+        results: dict
+            {code: 결과} codes 순서
+        failures: dict
+            {code: 에러 메세지}
+        """
+        checkpoint = self.checkpoint
+        results = {}
+        failures = {}
+        if checkpoint is not None:
+            results.update((code, checkpoint.results[code]) for code in codes if checkpoint.is_done(code))
+
+        todo = [code for code in codes if code not in results]
+        total = len(codes)
+        state = {'next': 0, 'in_flight': 0, 'done': len(results)}
+        loop = QEventLoop()
+
+        def launch():
+            while state['in_flight'] < self.max_in_flight and state['next'] < len(todo):
+                code = todo[state['next']]
+                state['next'] += 1
+                state['in_flight'] += 1
+                try:
+                    future = self.submit(code)
+                except Exception as e:
+                    finish(code, None, e)
+                    continue
+                future.add_done_callback(lambda future, code=code: finish(code, future, None))
+
+        def finish(code, future, error):
+            state['in_flight'] -= 1
+            state['done'] += 1
+            if error is None:
+                try:
+                    result = self.convert(code, future.result())
+                except Exception as e:
+                    error = e
+
+            if error is None:
+                results[code] = result
+                if checkpoint is not None:
+                    checkpoint.save(code, result)
+            else:
+                failures[code] = str(error)
+                if checkpoint is not None:
+                    checkpoint.fail(code, error)
+
+            if self.progress is not None:
+                self.progress(state['done'], total, code, error)
+
+            if state['in_flight'] or state['next'] < len(todo):
+                launch()
+            else:
+                loop.exit()
+
+        if todo:
+            launch()
+            if state['in_flight'] or state['next'] < len(todo):
+                loop.exec_()
+
+        return {code: results[code] for code in codes if code in results}, failures
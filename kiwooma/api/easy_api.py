@@ -1,17 +1,78 @@
+import numpy as np
 import pandas as pd
 from kiwooma.api.api import API
+from kiwooma.api.scheduler import PRIORITY_ORDER, PRIORITY_ACCOUNT, PRIORITY_BULK
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.ohlcv import OHLCVBuffer, OHLCV_DTYPE
+from kiwooma.api.batch import BatchRunner
+from kiwooma.api.real_schema import STOCK_TRADE_FIDS
+from kiwooma.api.bars import BAR_FIDS
+from kiwooma.api.master import InstrumentMaster, MARKETS
+from kiwooma.api.metrics import Metrics, StatsSink
+from kiwooma.storage.ohlcv_cache import OHLCVCache
+from kiwooma.storage.checkpoint import BatchCheckpoint
+from kiwooma.storage.tick_archive import ARCHIVE_FIDS
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from datetime import datetime
 import threading
+import os
 import sys
 import time
 
+
+ORDER_TYPES = {
+    '지정가': '00', '시장가': '03', '조건부지정가': '05', '최유리지정가': '06', '최우선지정가': '07', '지정가IOC': '10',
+    '시장가IOC': '13', '최유리IOC': '16', '지정가FOK': '20', '시장가FOK': '23', '최유리FOK': '26', '장전시간외종가': '61',
+    '시간외단일가': '62', '장후시간외종가': '81'
+    }
+
+TRANS_TYPES = {'신규매수': 1, '신규매도': 2, '매수취소': 3, '매도취소': 4, '매수정정': 5, '매도정정': 6}
+
+_app = None
+
+
+def get_application():
+    """
+    프로세스에 하나뿐인 QApplication을 리턴하는 함수, 없으면 새로 만듦
+    모듈에서 참조를 쥐고 있어서 EasyAPI 인스턴스가 사라져도 QApplication이 같이 파괴되지 않음
+
+    Returns
+    ---------------------
+    QApplication
+    """
+    global _app
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
 class EasyAPI(object):
 
-    def __init__(self):
-        self.app = QApplication(sys.argv)
-        self.api = API()
-        self.api.comm_connect() #연결        
+    def __init__(self, ocx=None, cache_dir=None):
+        """
+        Parameters
+        ---------------------
+        ocx: OCXBackend
+            API에 넘겨줄 백엔드, None이면 키움 OCX 컨트롤을 사용
+        cache_dir: str
+            OHLCV 캐시 디렉토리, 지정하면 get_*_ohlcv가 캐시 이후의 봉만 받아옴
+            종목 마스터도 이 디렉토리에 저장해서 같은 날에는 다시 읽지 않음
+        """
+        self.app = get_application()
+        self.api = API(ocx)
+        self.ohlcv_cache = OHLCVCache(cache_dir) if cache_dir else None
+        self.master_path = os.path.join(cache_dir, 'instruments.json') if cache_dir else None
+        self._master = None
+        self.api.supervisor.reconnected.connect(self._on_reconnected)
+        self.api.comm_connect() #연결
+
+    def _on_reconnected(self):
+        """
+        재접속 후 끊긴 동안 놓친 체결을 반영하도록 보유종목 장부를 서버 잔고로 바로잡음
+        """
+        if self.api.portfolio.seeded and hasattr(self, 'accno'):
+            self.reconcile_portfolio()
 
     def register_account_no(self, accno):
         """
@@ -44,23 +105,140 @@ class EasyAPI(object):
         userid = self.api.get_login_info("USER_ID")
         return userid
 
-    def send_order(self, code, quantity, price, trans_type, order_type, org_order_no=''):
+    def send_order(self, code, quantity, price, trans_type, order_type, org_order_no='', validate=True):
         """
         주문을 보내는 메소드
+
+        Parameters
+        ---------------------
+        validate: bool
+            보내기 전에 호가단위, 상한가/하한가(load_price_limits로 받아둔 종목)를 검사할지 여부
+
+        Returns
+        ---------------------
+        handle: OrderHandle
+            handle.accepted.result()로 주문번호를 기다릴 수 있고, handle.state/filled/remaining은 체결 통보마다 갱신됨
         """
 
         if not hasattr(self, "accno"):
-            raise Excepton('Please register your account_no using register_account_no method')
+            raise Exception('Please register your account_no using register_account_no method')
 
-        order_type_dict = {
-            '지정가': '00', '시장가': '03', '조건부지정가': '05', '최유리지정가': '06', '최우선지정가': '07', '지정가IOC': '10',
-            '시장가IOC': '13', '최유리IOC': '16', '지정가FOK': '20', '시장가FOK': '23', '최유리FOK': '26', '장전시간외종가': '61',
-            '시간외단일가': '62', '장후시간외종가': '81'
-            }
+        return self.api.send_order("send_order_req", None, self.accno, TRANS_TYPES[trans_type], code, quantity, price,
+                                   ORDER_TYPES[order_type], org_order_no, validate)
 
-        trans_type_dict = {'신규매수': 1, '신규매도': 2, '매수취소': 3, '매도취소': 4, '매수정정': 5, '매도정정': 6}
+    def send_orders(self, orders, validate=True, wait=False):
+        """
+        여러 주문을 한번에 보내는 메소드
 
-        self.api.send_order("send_order_req", "0011", self.accno, trans_type_dict[trans_type], code, quantity, price, order_type_dict[order_type], org_order_no)
+        주문 전에 필요한 종목의 상한가/하한가를 한번에 받아두고, 검사를 통과한 주문만 주문 제한(초당 5회)에 맞춰
+        화면번호를 나눠가며 보낸다.
+
+        Parameters
+        ---------------------
+        orders: list
+            [{'code', 'quantity', 'price', 'trans_type', 'order_type'(기본 '지정가'), 'org_order_no'}, ...]
+        validate: bool
+        wait: bool
+            True이면 모든 주문의 접수 결과(주문번호 또는 실패)가 나올 때까지 기다림
+
+        Returns
+        ---------------------
+        handles: list
+            주문 순서대로 OrderHandle, 검사에 실패한 주문은 보내지 않고 state가 'rejected'
+        """
+        if validate:
+            self.load_price_limits([order['code'] for order in orders if TRANS_TYPES[order['trans_type']] in (1, 2, 5, 6)])
+
+        handles = [self.send_order(order['code'], order['quantity'], order.get('price', 0), order['trans_type'],
+                                   order.get('order_type', '지정가'), order.get('org_order_no', ''), validate)
+                   for order in orders]
+        if wait:
+            futures = [handle.accepted for handle in handles]
+            try:
+                self.api.wait(futures)
+            except KiwoomError:
+                pass # 실패한 주문은 handle.accepted.exception()으로 확인
+        return handles
+
+    def load_price_limits(self, codes):
+        """
+        주문 검사에 쓸 종목별 상한가/하한가를 opt10001로 받아두는 메소드 (오늘 이미 받은 종목은 건너뜀)
+
+        Returns
+        ---------------------
+        failures: dict
+            {code: 에러 메세지}
+        """
+        limits = self.api.orders.limits
+        missing = limits.missing(codes)
+        futures = [self.api.request_tr("opt10001", {"종목코드": code}, priority=PRIORITY_ORDER) for code in missing]
+
+        failures = {}
+        for code, future in zip(missing, futures):
+            try:
+                limits.update(code, self.api.wait(future).single)
+            except KiwoomError as e:
+                failures[code] = str(e)
+        return failures
+
+    def cancel_order(self, handle, quantity=0):
+        """
+        주문을 취소하는 메소드
+
+        Parameters
+        ---------------------
+        handle: OrderHandle or str
+            취소할 주문 (또는 주문번호)
+        quantity: int
+            취소수량, 0이면 미체결수량 전부
+
+        Returns
+        ---------------------
+        handle: OrderHandle
+            취소 주문
+        """
+        handle = self._order(handle)
+        trans_type = '매수취소' if handle.is_buy else '매도취소'
+        return self.send_order(handle.code, quantity or handle.remaining, 0, trans_type, '지정가', handle.order_no)
+
+    def modify_order(self, handle, price, quantity=0):
+        """
+        주문 가격을 정정하는 메소드
+
+        Parameters
+        ---------------------
+        handle: OrderHandle or str
+            정정할 주문 (또는 주문번호)
+        quantity: int
+            정정수량, 0이면 미체결수량 전부
+
+        Returns
+        ---------------------
+        handle: OrderHandle
+            정정 주문 (정정된 수량은 이 주문으로 체결됨)
+        """
+        handle = self._order(handle)
+        trans_type = '매수정정' if handle.is_buy else '매도정정'
+        return self.send_order(handle.code, quantity or handle.remaining, price, trans_type, '지정가', handle.order_no)
+
+    def _order(self, handle):
+        if isinstance(handle, str):
+            order = self.api.orders.get(handle)
+            if order is None:
+                raise KeyError('unknown order_no: {0}'.format(handle))
+            return order
+        return handle
+
+    def get_open_orders(self, code=None):
+        """
+        이번 세션에서 보낸 주문 중 미체결수량이 남은 주문 (opt10075 조회 없이 체결 통보로 유지됨)
+
+        Returns
+        ---------------------
+        handles: list
+            [OrderHandle, ...]
+        """
+        return self.api.orders.live_orders(code)
 
     def get_deposit_detail(self):
         """
@@ -71,7 +249,7 @@ class EasyAPI(object):
         ret:
         """
         self.api.set_input_value("계좌번호", self.accno)
-        self.api.comm_rq_data("opw00001_req", "opw00001", 0, "0012")
+        self.api.comm_rq_data("opw00001_req", "opw00001", 0, "0012", PRIORITY_ACCOUNT)
 
         ret = self.api._deposit
         return ret
@@ -83,9 +261,10 @@ class EasyAPI(object):
         Returns
         ----------
         ret: list
+            종목별 dict, '현재가'는 부호를 뗀 float
         """
         self.api.set_input_value("계좌번호", self.accno)
-        self.api.comm_rq_data("opt10085_req", "opt10085", 0, "0345")
+        self.api.comm_rq_data("opt10085_req", "opt10085", 0, "0345", PRIORITY_ACCOUNT)
         ret = self.api.holding_stocks_pnl
         return ret
 
@@ -100,7 +279,7 @@ class EasyAPI(object):
         self.api.set_input_value("계좌번호", self.accno)
         self.api.set_input_value("비밀번호", '')
         self.api.set_input_value("종목코드", scode)
-        self.api.comm_rq_data("opt10077_req", "opt10077", 0, "0013")
+        self.api.comm_rq_data("opt10077_req", "opt10077", 0, "0013", PRIORITY_ACCOUNT)
 
         ret = self.api.today_realized_pnl
         return ret
@@ -112,11 +291,12 @@ class EasyAPI(object):
         Returns
         ---------------------------------
         ret: list
+            종목별 dict, '손익률' 키의 값은 TR 항목 '손익율'을 float로 변환한 값
         """
         self.api.set_input_value("계좌번호", self.accno)
         self.api.set_input_value("비밀번호", '')
         self.api.set_input_value("종목코드", scode)
-        self.api.comm_rq_data("opt10077_req", "opt10077", 0, "0013")
+        self.api.comm_rq_data("opt10077_req", "opt10077", 0, "0013", PRIORITY_ACCOUNT)
 
         ret =self.api.today_realized_pnl_list
         return ret
@@ -132,7 +312,7 @@ class EasyAPI(object):
         self.api.set_input_value('계좌번호', self.accno)
         self.api.set_input_value('체결구분', 1)
         self.api.set_input_value('매매구분', 0)
-        self.api.comm_rq_data("opt10075_req", "opt10075", 0, "0341")
+        self.api.comm_rq_data("opt10075_req", "opt10075", 0, "0341", PRIORITY_ACCOUNT)
 
         ret = self.api.current_orders
         return ret
@@ -149,7 +329,7 @@ class EasyAPI(object):
         self.api.set_input_value('계좌번호', self.accno)
         self.api.set_input_value('조회구분', 4)
         self.api.set_input_value('매도수구분', 0)
-        self.api.comm_rq_data("opw00007_req", "opw00007", 0, "0351")    
+        self.api.comm_rq_data("opw00007_req", "opw00007", 0, "0351", PRIORITY_ACCOUNT)
 
         ret = self.api.today_trading_info    
 
@@ -166,7 +346,7 @@ class EasyAPI(object):
         self.api.set_input_value('계좌번호', self.accno)
         self.api.set_input_value('체결구분', 2)
         self.api.set_input_value('매매구분', 0)
-        self.api.comm_rq_data("opt10075_req", "opt10075", 0, "0341")
+        self.api.comm_rq_data("opt10075_req", "opt10075", 0, "0341", PRIORITY_ACCOUNT)
 
         ret = self.api.current_orders
         return ret
@@ -176,7 +356,7 @@ class EasyAPI(object):
         계좌 평가 잔고를 리턴하는 메소드
         """
         self.api.set_input_value("계좌번호", self.accno)
-        self.api.comm_rq_data("opw00018_req", "opw00018", 0, "2000")
+        self.api.comm_rq_data("opw00018_req", "opw00018", 0, "2000", PRIORITY_ACCOUNT)
 
 
         ret = self.api.account_balance
@@ -187,10 +367,68 @@ class EasyAPI(object):
         포트폴리오의 구성종목에 대한 정보를 불러우는 메소드
         """
         self.api.set_input_value("계좌번호", self.accno)
-        self.api.comm_rq_data("opw00018_req", "opw00018", 0, "2000")
+        self.api.comm_rq_data("opw00018_req", "opw00018", 0, "2000", PRIORITY_ACCOUNT)
 
         ret = self.api.portfolio_positions
         return ret
+    def sync_portfolio(self):
+        """
+        opw00018로 보유종목 장부(self.api.portfolio)를 채우는 메소드
+        이후에는 체결/잔고통보와 실시간 시세로 장부가 갱신되므로 get_live_positions/get_live_balance는 TR을 쓰지 않는다.
+        보유종목의 평가금액을 실시간으로 갱신하려면 해당 종목이 실시간 등록되어 있어야 한다.
+        """
+        self.api.portfolio.seed(self.get_portfolio_positions())
+
+    def reconcile_portfolio(self):
+        """
+        opw00018로 서버 잔고를 조회해서 장부와 다른 종목을 바로잡는 메소드
+
+        Returns
+        ---------------------
+        drift: dict
+            {종목코드: ((장부 보유수량, 장부 매입가), (서버 보유수량, 서버 매입가))}
+        """
+        return self.api.portfolio.reconcile(self.get_portfolio_positions())
+
+    def start_portfolio_reconciliation(self, interval=300):
+        """
+        interval초마다 reconcile_portfolio를 호출하는 타이머를 시작하는 메소드
+        """
+        if not hasattr(self, '_reconcile_timer'):
+            self._reconcile_timer = QTimer()
+            self._reconcile_timer.timeout.connect(self.reconcile_portfolio)
+        self._reconcile_timer.start(int(interval * 1000))
+
+    def stop_portfolio_reconciliation(self):
+        if hasattr(self, '_reconcile_timer'):
+            self._reconcile_timer.stop()
+
+    def get_live_positions(self):
+        """
+        장부에서 보유종목 정보를 리턴하는 메소드 (TR 조회 없음)
+
+        Returns
+        ---------------------
+        ret: dict
+            {종목코드: {'종목명', '보유수량', '매입가', '현재가', '평가손익', '수익률(%)', '매매가능수량', ...}}
+        """
+        if not self.api.portfolio.seeded:
+            self.sync_portfolio()
+        return self.api.portfolio.get_positions()
+
+    def get_live_balance(self):
+        """
+        장부에서 계좌 평가 합계를 리턴하는 메소드 (TR 조회 없음)
+
+        Returns
+        ---------------------
+        ret: dict
+            {'총매입금액', '총평가금액', '총평가손익금액', '총수익률(%)', '실현손익', '예수금'}
+        """
+        if not self.api.portfolio.seeded:
+            self.sync_portfolio()
+        return self.api.portfolio.get_balance()
+
     def get_new_high_low(self, market='all', high_or_low=1, criteria=2, condition=0, include_limit=0, period=250):
         """
         신고저가를 갱신한 종목을 리턴하는 메소드
@@ -224,10 +462,9 @@ class EasyAPI(object):
         self.api.set_input_value("신용조건", '0')
         self.api.set_input_value("상하한포함", include_limit)
         self.api.set_input_value("기간", period)
-        self.api.comm_rq_data("opt10016_req", "opt10016", 0, "0015")
+        result = self.api.comm_rq_data("opt10016_req", "opt10016", 0, "0015")
 
-        while self.api.remained_data:
-            time.sleep(0.2)
+        while result.remained:
             self.api.set_input_value("시장구분", market_no)
             self.api.set_input_value("신고저구분", high_or_low)
             self.api.set_input_value("고저종구분", criteria)
@@ -236,7 +473,7 @@ class EasyAPI(object):
             self.api.set_input_value("신용조건", '0')
             self.api.set_input_value("상하한포함", include_limit)
             self.api.set_input_value("기간", period)
-            self.api.comm_rq_data("opt10016_req", "opt10016", 0, "0015")
+            result = self.api.comm_rq_data("opt10016_req", "opt10016", 2, "0015")
 
         ret = pd.DataFrame(self.api._opt10016, columns =['종목코드', '종목명', '현재가', '고가', '저가', '등락률', '거래량',
                           '전일거래량대비율', '매도호가', '매수호가'])
@@ -261,7 +498,7 @@ class EasyAPI(object):
             6:증100만 보기, 7:증40만 보기, 8:증30만 보기, 9:증20만 보기, 10:우선주+관리종목+환기종목제외
         """
         if hasattr(self.api, '_opt10017'):
-            self.api.reset_opt10016()
+            self.api.reset_opt10017()
 
         market_dict = {'all': '000', 'kospi': '001', 'kosdaq': '101'}
         market_no = market_dict[market.lower()]
@@ -272,10 +509,9 @@ class EasyAPI(object):
         self.api.set_input_value("거래량구분", '00000')
         self.api.set_input_value("신용조건", '0')
         self.api.set_input_value("매매금구분",'0')
-        self.api.comm_rq_data("opt10017_req", "opt10017", 0, "0016")
+        result = self.api.comm_rq_data("opt10017_req", "opt10017", 0, "0016")
 
-        while self.api.remained_data:
-            time.sleep(0.5)
+        while result.remained:
             self.api.set_input_value("시장구분", market_no)
             self.api.set_input_value("상하한구분", high_or_low)
             self.api.set_input_value("정렬구분", criteria)
@@ -283,7 +519,7 @@ class EasyAPI(object):
             self.api.set_input_value("거래량구분", '00000')
             self.api.set_input_value("신용조건", '0')
             self.api.set_input_value("매매금구분",'0')
-            self.api.comm_rq_data("opt10017_req", "opt10017", 0, "0016")
+            result = self.api.comm_rq_data("opt10017_req", "opt10017", 2, "0016")
 
         ret = pd.DataFrame(self.api._opt10017, columns =['종목코드', '종목명', '현재가', '전일대비', '등락률', '거래량',
                           '전일거래량', '매도호가', '매수호가', '매도잔량', '매수잔량'])
@@ -300,19 +536,8 @@ class EasyAPI(object):
 
         '''
         base_date = datetime.today().date().strftime('%Y%m%d')
-        self.api.reset_ohlcv()
-
-        ohlcv = self._request_daily_ohlcv(code, base_date, adj_close, 0)
-
-        for i in range(repeat-1):
-            time.sleep(0.25)
-            if self.api.remained_data == True:
-                self._request_daily_ohlcv(code, base_date, adj_close, 2)
-        # Return DataFrame
-        df = pd.DataFrame(self.api.ohlcv, columns=list(self.api.ohlcv.keys()))
-        df.set_index('date', inplace=True)
-        df.insert(0, 'code', code)
-        return df.iloc[::-1]
+        request = lambda next_type: self._request_daily_ohlcv(code, base_date, adj_close, next_type)
+        return self._get_ohlcv(request, code, 'day', repeat, adj_close, 600)
 
     def _request_daily_ohlcv(self, code, base_date, adj_close, next_type):
         # Request TR and get data
@@ -330,7 +555,7 @@ class EasyAPI(object):
             req, trcode = "opt10081_req", "opt10081"
 
         self.api.set_input_value("수정주가구분", adj_close)
-        self.api.comm_rq_data(req, trcode, next_type, "0001")
+        return self.api.comm_rq_data(req, trcode, next_type, "0001", PRIORITY_BULK)
 
     def get_weekly_ohlcv(self, code, repeat=0, adj_close=1):
         '''
@@ -343,20 +568,8 @@ class EasyAPI(object):
 
         '''
         base_date = datetime.today().date().strftime('%Y%m%d')
-        self.api.reset_ohlcv()
-
-        ohlcv = self._request_weekly_ohlcv(code, base_date, adj_close, 0)
-
-        for i in range(repeat-1):
-            time.sleep(0.25)
-            if self.api.remained_data == True:
-                self._request_weekly_ohlcv(code, base_date, adj_close, 2)
-        # Return DataFrame
-        df = pd.DataFrame(self.api.ohlcv, columns=list(self.api.ohlcv.keys()))
-        df.set_index('date', inplace=True)
-        df.insert(0, 'code', code)
-        return df.iloc[::-1]
-
+        request = lambda next_type: self._request_weekly_ohlcv(code, base_date, adj_close, next_type)
+        return self._get_ohlcv(request, code, 'week', repeat, adj_close, 600)
 
     def _request_weekly_ohlcv(self, code, base_date, adj_close, next_type):
         # Request TR and get data
@@ -374,8 +587,8 @@ class EasyAPI(object):
             req, trcode = "opt10082_req", "opt10082"
 
         self.api.set_input_value("수정주가구분", adj_close)
-        self.api.comm_rq_data(req, trcode, next_type, "0001")
-        
+        return self.api.comm_rq_data(req, trcode, next_type, "0001", PRIORITY_BULK)
+
     def get_monthly_ohlcv(self, code, repeat=0, adj_close=1):
         '''
         월봉 정보를 리턴하는 메소드
@@ -387,20 +600,8 @@ class EasyAPI(object):
 
         '''
         base_date = datetime.today().date().strftime('%Y%m%d')
-        self.api.reset_ohlcv()
-
-        ohlcv = self._request_weekly_ohlcv(code, base_date, adj_close, 0)
-
-        for i in range(repeat-1):
-            time.sleep(0.25)
-            if self.api.remained_data == True:
-                self._request_weekly_ohlcv(code, base_date, adj_close, 2)
-        # Return DataFrame
-        df = pd.DataFrame(self.api.ohlcv, columns=list(self.api.ohlcv.keys()))
-        df.set_index('date', inplace=True)
-        df.insert(0, 'code', code)
-        return df.iloc[::-1]
-
+        request = lambda next_type: self._request_monthly_ohlcv(code, base_date, adj_close, next_type)
+        return self._get_ohlcv(request, code, 'month', repeat, adj_close, 600)
 
     def _request_monthly_ohlcv(self, code, base_date, adj_close, next_type):
         # Request TR and get data
@@ -418,9 +619,7 @@ class EasyAPI(object):
             req, trcode = "opt10083_req", "opt10083"
 
         self.api.set_input_value("수정주가구분", adj_close)
-        self.api.comm_rq_data(req, trcode, next_type, "0001")
-
-
+        return self.api.comm_rq_data(req, trcode, next_type, "0001", PRIORITY_BULK)
 
     def get_minutely_ohlcv(self, code, tick, repeat=0, adj_close=1):
         '''
@@ -432,23 +631,8 @@ class EasyAPI(object):
         adj_close: integer
             0: 실제주가, 1: 수정주가
         '''
-
-        base_date = datetime.today().date().strftime('%Y%m%d')
-        self.api.reset_ohlcv()
-
-        ohlcv = self._request_minutely_ohlcv(code, tick, adj_close, 0)
-
-        for i in range(repeat-1):
-            time.sleep(0.25)
-            if self.api.remained_data == True:
-                self._request_minutely_ohlcv(code, tick, adj_close, 2)
-
-        # Return DataFrame
-        df = pd.DataFrame(self.api.ohlcv, columns=list(self.api.ohlcv.keys()))
-        df.set_index('date', inplace=True)
-        df = df.abs()
-        df.insert(0, 'code', code)
-        return df.iloc[::-1]
+        request = lambda next_type: self._request_minutely_ohlcv(code, tick, adj_close, next_type)
+        return self._get_ohlcv(request, code, 'minute{0}'.format(tick), repeat, adj_close, 900)
 
     def _request_minutely_ohlcv(self, code, tick, adj_close, next_type):
         # Request TR and get data
@@ -457,7 +641,78 @@ class EasyAPI(object):
         req, trcode = "opt10080_req", "opt10080"
         self.api.set_input_value("틱범위", tick)
         self.api.set_input_value("수정주가구분", adj_close)
-        self.api.comm_rq_data(req, trcode, next_type, "0002")
+        return self.api.comm_rq_data(req, trcode, next_type, "0002", PRIORITY_BULK)
+
+    def _get_ohlcv(self, request, code, timeframe, repeat, adj_close, page_size):
+        """
+        차트 TR을 연속조회하여 날짜 오름차순 DataFrame을 리턴하는 메소드
+
+        캐시가 있으면 캐시된 마지막 봉과 겹칠 때까지만 연속조회하고 캐시에 이어붙인다.
+        겹치는 구간의 가격이 캐시와 다르면(수정주가 반영 등) 캐시를 버리고 캐시에 있던 기간을 모두 덮을 때까지 (최소 repeat번) 다시 받는다.
+
+        Parameters
+        ---------------------
+        request: callable
+            request(next_type) - TR 요청 함수, TRResult를 리턴
+        code: str
+        timeframe: str
+            캐시 구분용 봉 종류 ('day', 'week', 'month', 'minute1', ...)
+        repeat: int
+            캐시가 없을 때 연속조회 횟수
+        adj_close: int
+        page_size: int
+            TR 한번에 받는 봉 개수
+        """
+        cache = self.ohlcv_cache
+        cached = cache.load(code, timeframe, adj_close) if cache is not None else None
+
+        self.api.reset_ohlcv(max(repeat, 1) * page_size)
+        remained = request(0).remained
+
+        if cached is None:
+            for i in range(repeat-1):
+                if remained:
+                    remained = request(2).remained
+            records = None
+        else:
+            last_date = cached['date'][-1]
+            pages = 1
+            while remained and not self._ohlcv_reached(last_date):
+                remained = request(2).remained
+                pages += 1
+
+            if not len(self.api.ohlcv): # 받은 봉이 없으면 캐시를 그대로 사용
+                records = np.array(cached)
+            elif not self._ohlcv_reached(last_date): # 서버 데이터를 모두 받음
+                records = None
+            elif cache.is_consistent(cached, self.api.ohlcv):
+                records = cache.merge(cached, self.api.ohlcv)
+            else: # 과거 가격이 바뀜: 캐시에 있던 기간까지 (최소 repeat번) 이어서 다시 받음
+                first_date = cached['date'][0]
+                while remained and (pages < repeat or self.api.ohlcv.first_date() > first_date):
+                    remained = request(2).remained
+                    pages += 1
+                records = None
+            cached = None # 메모리맵을 닫은 후 저장
+
+        if records is None:
+            ohlcv = self.api.ohlcv
+            records = ohlcv.to_records() if cache is not None else None
+        else:
+            ohlcv = OHLCVBuffer.from_records(records)
+
+        if cache is not None and len(records):
+            cache.save(code, timeframe, adj_close, records)
+
+        # Return DataFrame
+        return ohlcv.to_frame(code)
+
+    def _ohlcv_reached(self, date):
+        """
+        지금까지 받은 봉 중 가장 과거 봉이 date보다 과거인지 확인
+        """
+        first_date = self.api.ohlcv.first_date()
+        return first_date is not None and first_date < date
 
     def basic_info(self, code):
         """
@@ -466,27 +721,355 @@ class EasyAPI(object):
         self.api.set_input_value("종목코드", code)
         self.api.comm_rq_data("opt10001_req", "opt10001", 0, "0003")
 
+        self.api.orders.limits.update(code, self.api.stock_info)
         return self.api.stock_info
 
+    def batch_basic_info(self, codes, checkpoint_dir=None, max_in_flight=10, progress=None, reset_checkpoint=False):
+        """
+        여러 종목의 주식 기본 정보를 한번에 조회하는 메소드
+
+        Parameters
+        ---------------------
+        codes: list
+        checkpoint_dir: str
+            진행상황을 기록할 디렉토리, 지정하면 중간에 끊겨도 다시 실행했을 때 남은 종목만 조회함
+        max_in_flight: int
+            동시에 걸어둘 최대 요청 수
+        progress: callable
+            progress(done, total, code, error)
+        reset_checkpoint: bool
+            checkpoint_dir가 다른 조회에 쓰였던 디렉토리면 True일 때 지우고 새로 시작, False면 ValueError
+
+        Returns
+        ---------------------
+        df: pd.DataFrame
+            index: 종목코드, columns: opt10001 항목
+        failures: dict
+            {code: 에러 메세지}
+        """
+        submit = lambda code: self.api.request_tr("opt10001", {"종목코드": code}, priority=PRIORITY_BULK)
+        convert = lambda code, result: result.single
+        params = {'tr': 'opt10001'}
+        results, failures = self._run_batch(codes, submit, convert, checkpoint_dir, max_in_flight, progress,
+                                            params, reset_checkpoint)
+
+        df = pd.DataFrame(list(results.values()), index=pd.Index(list(results.keys()), name='code'))
+        return df, failures
+
+    def batch_ohlcv(self, codes, timeframe='day', repeat=1, adj_close=1, checkpoint_dir=None, max_in_flight=10,
+                    progress=None, reset_checkpoint=False):
+        """
+        여러 종목의 OHLCV를 한번에 조회하는 메소드
+
+        Parameters
+        ---------------------
+        codes: list
+        timeframe: str
+            'day', 'week', 'month', 'minute{틱범위}' (예: 'minute5')
+        repeat: int
+            종목별 연속조회 횟수
+        adj_close: int
+            0: 실제주가, 1: 수정주가
+        checkpoint_dir: str
+            진행상황을 기록할 디렉토리, 지정하면 중간에 끊겨도 다시 실행했을 때 남은 종목만 조회함
+            timeframe, repeat, adj_close, 조회한 날짜가 다른 조회의 기록은 이어서 쓰지 않음
+        max_in_flight: int
+            동시에 걸어둘 최대 요청 수
+        progress: callable
+            progress(done, total, code, error)
+        reset_checkpoint: bool
+            checkpoint_dir가 다른 조건으로 쓰였던 디렉토리면 True일 때 지우고 새로 시작, False면 ValueError
+
+        Returns
+        ---------------------
+        df: pd.DataFrame
+            index: date, columns: code, open, high, low, close, volume (종목별로 날짜 오름차순)
+        failures: dict
+            {code: 에러 메세지}
+        """
+        chart_trs = {'day': 'opt10081', 'week': 'opt10082', 'month': 'opt10083'}
+        base_date = datetime.today().date().strftime('%Y%m%d')
+        inputs = {"수정주가구분": adj_close}
+        if timeframe.startswith('minute'):
+            trcode = 'opt10080'
+            inputs["틱범위"] = int(timeframe[len('minute'):])
+        else:
+            trcode = chart_trs[timeframe]
+            inputs["기준일자"] = base_date
+
+        def submit(code):
+            return self.api.request_pages(trcode, dict(inputs, 종목코드=code), max(repeat, 1), PRIORITY_BULK)
+
+        def convert(code, pages):
+            ohlcv = OHLCVBuffer(sum(len(page.multi['date']) for page in pages))
+            for page in pages:
+                ohlcv.append(page.multi)
+            return ohlcv.to_records()
+
+        params = {'tr': trcode, 'timeframe': timeframe, 'repeat': max(repeat, 1), 'adj_close': adj_close,
+                  'base_date': base_date}
+        results, failures = self._run_batch(codes, submit, convert, checkpoint_dir, max_in_flight, progress,
+                                            params, reset_checkpoint)
+
+        if results:
+            records = np.concatenate(list(results.values()))
+            code_column = np.repeat(list(results.keys()), [len(r) for r in results.values()])
+        else:
+            records = np.empty(0, dtype=OHLCV_DTYPE)
+            code_column = []
+        data = {'code': code_column}
+        for column in OHLCVBuffer.columns:
+            data[column] = records[column]
+        df = pd.DataFrame(data, index=pd.DatetimeIndex(records['date'], name='date'))
+        return df, failures
+
+    def _run_batch(self, codes, submit, convert, checkpoint_dir, max_in_flight, progress, params, reset_checkpoint):
+        checkpoint = BatchCheckpoint(checkpoint_dir, params, reset_checkpoint) if checkpoint_dir else None
+        runner = BatchRunner(self.api, submit, convert, checkpoint, max_in_flight, progress)
+        return runner.run(list(codes))
+
+    @property
+    def master(self):
+        """
+        종목 마스터 (InstrumentMaster), 처음 사용할 때 한번 읽음
+        """
+        if self._master is None:
+            self.refresh_master(force=False)
+        return self._master
+
+    def refresh_master(self, force=True):
+        """
+        종목 마스터를 다시 읽는 메소드
+
+        Parameters
+        ---------------------
+        force: bool
+            False이면 오늘 저장된 파일이 있을 때 파일에서 읽음
+        """
+        today = datetime.today().strftime('%Y%m%d')
+        master = None
+        if not force and self.master_path:
+            master = InstrumentMaster.load(self.master_path, today)
+        if master is None:
+            master = InstrumentMaster.from_api(self.api, MARKETS, today)
+            if self.master_path:
+                master.save(self.master_path)
+        self._master = master
+        return master
+
     def get_code_list_by_market(self, market):
         assert isinstance(market, str)
-        market = market.lower()
-        market_dict = {'kospi': 0, 'elw': 3, 'mutual': 4, 'sinju': 5, 'reits': 6,
-                    'etf': 8, 'highyieldfund': 9, 'kosdaq': 10, '3rd': 30}
-
-        market_no = market_dict[market]
-        ret = self.api.get_code_list_by_market(market_no)
-        return ret
+        return self.master.get_codes(market.lower())
 
     def get_code_name(self, code):
-        ret = self.api.get_master_code_name(code)
-        return ret
+        name = self.master.get_name(code)
+        if name is None: # 마스터를 읽은 후 상장된 종목
+            name = self.api.get_master_code_name(code)
+        return name
+
+    def get_code(self, name):
+        """
+        종목명으로 종목코드를 찾는 메소드 (띄어쓰기, 대소문자 무시)
+
+        Returns
+        ---------------------
+        code: str
+            없으면 None
+        """
+        return self.master.get_code(name)
+
+    def get_market(self, code):
+        """
+        종목이 속한 시장 리스트를 리턴하는 메소드 (예: ['kospi'], ['etf'])
+        """
+        return list(self.master.market_of.get(code, []))
+
+    def search_code(self, query, limit=10, fuzzy=True):
+        """
+        종목명으로 종목을 검색하는 메소드
+
+        Returns
+        ---------------------
+        results: list
+            [(종목코드, 종목명), ...] 정확히 일치, 접두어, 포함, 비슷한 이름 순
+        """
+        return self.master.search(query, limit, fuzzy)
+
+    def enable_metrics(self, sinks=None, export_interval=0):
+        """
+        TR 지연시간, 이벤트 처리시간, dynamicCall 횟수 등의 측정을 켜는 메소드 (API.enable_metrics 참고)
+
+        Parameters
+        ---------------------
+        sinks: list
+            StatsSink, PrometheusSink, JSONLogSink 등, None이면 StatsSink
+        export_interval: float
+            0보다 크면 이 주기(초)마다 sink로 내보냄
+
+        Returns
+        ---------------------
+        metrics: Metrics
+        """
+        return self.api.enable_metrics(Metrics(sinks or [StatsSink()]), export_interval)
+
+    def disable_metrics(self):
+        self.api.disable_metrics()
+
+    def get_metrics(self):
+        """
+        측정값 스냅샷을 리턴하는 메소드 (측정이 꺼져 있으면 None)
+        """
+        if self.api.metrics is None:
+            return None
+        return self.api.metrics.snapshot()
 
     def get_connect_state(self):
-        ret = self.api.get_connect_state
+        return self.api.get_connect_state()
+
+    def request_real_data(self, codes, add_list=False, fids=STOCK_TRADE_FIDS):
+        """
+        실시간 데이터를 등록하는 메소드
+
+        Parameters
+        ---------------------
+        codes: list
+        add_list: bool
+            True이면 기존 종목에 추가, False이면 기존 종목을 해제하고 새로 등록
+        fids: tuple
+            받을 FID, 요청한 FID만 읽어서 저장함 (기본값은 주식체결 전체 항목)
+
+        Returns
+        ---------------------
+        subscription: RealTimeSubscription
+            add(), remove(), close()로 등록 종목을 바꿀 수 있음
+        """
+        return self.api.request_real_data(codes, add_list, fids)
+
+    def subscribe_real_data(self, codes, fids, name=''):
+        """
+        request_real_data와 별개로 관리되는 실시간 등록을 추가하는 메소드
+        받은 데이터는 self.api.real_tables[실시간 타입]에 저장됨 (예: 호가는 '주식호가잔량', 장 상태는 '장시작시간')
 
-    def request_real_data(self, codes, add_list=False):
-        self.api.request_real_data(codes, add_list)
+        Returns
+        ---------------------
+        subscription: RealTimeSubscription
+        """
+        return self.api.realtime.subscribe(codes, fids, name)
+
+    def open_tick_stream(self, capacity=65536, overflow='drop_oldest', codes=None):
+        """
+        주식체결 틱을 빠짐없이 받는 스트림을 여는 메소드
+
+        Parameters
+        ---------------------
+        capacity: int
+            링버퍼 크기 (틱 수)
+        overflow: str
+            'drop_oldest', 'drop_newest', 'block'
+        codes: list
+            담을 종목코드, None이면 전체
+
+        Returns
+        ---------------------
+        stream: TickStream
+            stream.subscribe()로 소비자를 만들어 read(), wait(), read_async()로 읽는다.
+        """
+        return self.api.open_tick_stream(capacity, overflow, codes)
+
+    def open_tick_archive(self, root, codes, interval=1.0):
+        """
+        codes 종목의 주식체결 틱을 날짜별 틱 아카이브에 쌓기 시작하는 메소드
+        아카이브 컬럼에 필요한 FID로 실시간 등록한다. 장 마감 후 close_tick_archive(writer)로 닫으면
+        TickArchive(root)로 종목/시간 범위를 조회할 수 있다.
+
+        Parameters
+        ---------------------
+        root: str
+            아카이브 디렉토리
+        codes: list
+        interval: float
+            파일에 쓰는 주기(초)
+
+        Returns
+        ---------------------
+        writer: TickArchiveWriter
+        """
+        writer = self.api.open_tick_archive(root, codes, interval)
+        writer.subscription = self.api.realtime.subscribe(codes, ARCHIVE_FIDS, 'tick_archive')
+        return writer
+
+    def close_tick_archive(self, writer, finalize=True):
+        """
+        open_tick_archive()로 시작한 아카이브의 실시간 등록을 해제하고 남은 틱을 써서 닫는 메소드
+
+        Parameters
+        ---------------------
+        writer: TickArchiveWriter
+        finalize: bool
+            True이면 오늘 쌓은 틱을 정렬해서 조회용 파일을 만듦 (장 마감 후)
+        """
+        subscription = getattr(writer, 'subscription', None)
+        if subscription is not None:
+            subscription.close()
+            writer.subscription = None
+        self.api.close_tick_archive(writer, finalize)
+
+    def open_bars(self, codes, specs=('minute1', 'minute3', 'minute5', 'minute15', 'minute60'), on_bar=None,
+                  adj_close=1):
+        """
+        실시간 체결로 봉을 만들기 시작하는 메소드
+        codes를 봉 집계에 필요한 FID로 실시간 등록하고, OHLCV 캐시에 오늘 분봉이 있으면 그것으로 먼저 채운다.
+
+        Parameters
+        ---------------------
+        codes: list
+        specs: tuple
+            'minute{분}', 'tick{틱 수}', 'volume{거래량}'
+        on_bar: callable
+            on_bar(code, spec, bar) - 봉이 마감될 때 호출, bar는 (date, open, high, low, close, volume)
+            실시간 워커(api.start_realtime_worker())를 켜면 워커 스레드에서 호출된다. API.open_bar_aggregator 참고
+        adj_close: int
+            캐시에서 읽을 분봉의 수정주가 여부
+
+        Returns
+        ---------------------
+        aggregator: BarAggregator
+            aggregator.get_bars(code, spec)로 봉을 DataFrame으로 읽는다.
+        """
+        aggregator = self.api.open_bar_aggregator(specs, on_bar, codes)
+        if self.ohlcv_cache is not None:
+            for code in codes:
+                aggregator.seed_from_cache(self.ohlcv_cache, code, adj_close)
+        aggregator.subscription = self.api.realtime.subscribe(codes, BAR_FIDS, 'bars')
+        return aggregator
+
+    def get_quote(self, code):
+        """
+        code 종목의 최신 실시간 시세를 리턴하는 메소드
+
+        Returns
+        ---------------------
+        ret: dict
+            {항목: 값}, 아직 받은 틱이 없으면 None
+        """
+        return self.api.quotes.get(code)
+
+    def get_quotes(self, names=None):
+        """
+        실시간 시세를 받은 전 종목의 시세를 리턴하는 메소드
+        전 종목의 한 항목만 필요하면 복사 없이 self.api.quotes.column(항목)을 사용
+
+        Parameters
+        ---------------------
+        names: list
+            포함할 항목 (예: ['현재가', '체결강도']), None이면 전체
+
+        Returns
+        ---------------------
+        ret: pd.DataFrame
+            index: 종목코드
+        """
+        return self.api.quotes.to_frame(names)
 
 
 
@@ -0,0 +1,27 @@
+class KiwoomError(Exception):
+    """
+    키움 OpenAPI 호출이 실패했을 때 발생하는 예외
+
+    Parameters
+    ---------------------
+    message: str
+    err_code: int
+        OpenAPI 에러코드 (없으면 None)
+    """
+
+    def __init__(self, message, err_code=None):
+        super().__init__(message)
+        self.err_code = err_code
+
+
+class TRError(KiwoomError):
+    """
+    TR 요청이 실패했을 때 발생하는 예외
+    """
+
+
+class OrderStateUnknownError(KiwoomError):
+    """
+    주문을 보낸 후 주문번호를 받기 전에 연결이 끊겨서 접수 여부를 알 수 없을 때 발생하는 예외
+    미체결/잔고 조회(get_unexecuted, reconcile_portfolio 등)로 확인해야 한다.
+    """
@@ -0,0 +1,177 @@
+import bisect
+import difflib
+import json
+import os
+from datetime import datetime
+
+
+# get_code_list_by_market의 시장 구분
+MARKETS = {'kospi': 0, 'elw': 3, 'mutual': 4, 'sinju': 5, 'reits': 6,
+           'etf': 8, 'highyieldfund': 9, 'kosdaq': 10, '3rd': 30}
+
+
+def _normalize(name):
+    return name.replace(' ', '').lower()
+
+
+class InstrumentMaster(object):
+    """
+    전체 시장의 종목코드/종목명을 한번에 읽어두고 조회하는 종목 마스터
+
+    세션당 한번 GetCodeListByMarket/GetMasterCodeName으로 읽은 후에는 종목명, 시장 조회와
+    종목명 검색을 COM 호출 없이 dict로 처리한다. 날짜를 기록해서 디스크에 저장해두고
+    같은 날에는 파일에서 읽는다.
+
+    Parameters
+    ---------------------
+    names: dict
+        {종목코드: 종목명}
+    markets: dict
+        {시장: [종목코드, ...]}
+    date: str
+        종목 목록을 읽은 날짜 (YYYYMMDD)
+    """
+
+    def __init__(self, names, markets, date):
+        self.names = dict(names)
+        self.markets = {market: list(codes) for market, codes in markets.items()}
+        self.date = date
+        self.market_of = {} # {종목코드: [시장, ...]}
+        for market, codes in self.markets.items():
+            for code in codes:
+                self.market_of.setdefault(code, []).append(market)
+        self._members = {market: set(codes) for market, codes in self.markets.items()}
+
+        self.codes = {} # {정규화한 종목명: 종목코드}
+        for code, name in self.names.items():
+            self.codes.setdefault(_normalize(name), code)
+        self._sorted = sorted(self.codes) # 접두어 검색용
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, code):
+        return code in self.names
+
+    @classmethod
+    def from_api(cls, api, markets=MARKETS, date=None):
+        """
+        API로 시장별 종목 목록과 종목명을 읽어서 만든다.
+
+        Parameters
+        ---------------------
+        api: API
+        markets: dict
+            {시장: 시장번호}
+        date: str
+            YYYYMMDD, None이면 오늘
+        """
+        names, codes = {}, {}
+        for market, market_no in markets.items():
+            codes[market] = api.get_code_list_by_market(market_no)
+            for code in codes[market]:
+                if code not in names:
+                    names[code] = api.get_master_code_name(code)
+        return cls(names, codes, date or datetime.today().strftime('%Y%m%d'))
+
+    @classmethod
+    def load(cls, path, date=None):
+        """
+        저장된 종목 마스터를 읽는다.
+
+        Parameters
+        ---------------------
+        date: str
+            YYYYMMDD, 저장된 날짜가 이 날짜와 다르면 None을 리턴 (None이면 날짜를 확인하지 않음)
+
+        Returns
+        ---------------------
+        master: InstrumentMaster
+            파일이 없거나 날짜가 다르면 None
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError: # 저장 도중 끊긴 파일
+            return None
+        if date is not None and data['date'] != date:
+            return None
+        return cls(data['names'], data['markets'], data['date'])
+
+    def save(self, path):
+        """
+        날짜와 함께 저장 (임시파일에 쓴 후 교체)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'date': self.date, 'names': self.names, 'markets': self.markets}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def get_name(self, code):
+        """
+        종목명, 없는 종목이면 None
+        """
+        return self.names.get(code)
+
+    def get_code(self, name):
+        """
+        종목명(띄어쓰기, 대소문자 무시)으로 종목코드를 찾는다. 없으면 None
+        """
+        return self.codes.get(_normalize(name))
+
+    def get_codes(self, market):
+        """
+        시장의 종목코드 리스트 (GetCodeListByMarket 순서)
+        """
+        return list(self.markets[market])
+
+    def in_market(self, code, market):
+        return code in self._members.get(market, ())
+
+    def search(self, query, limit=10, fuzzy=True, cutoff=0.6):
+        """
+        종목명 검색
+
+        정확히 같은 이름, 접두어가 같은 이름, 이름에 포함된 경우 순서로 찾고,
+        fuzzy이면 비슷한 이름(difflib)으로 나머지를 채운다.
+
+        Parameters
+        ---------------------
+        query: str
+        limit: int
+            최대 결과 수
+        fuzzy: bool
+        cutoff: float
+            비슷한 이름으로 볼 최소 유사도 (0~1)
+
+        Returns
+        ---------------------
+        results: list
+            [(종목코드, 종목명), ...]
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        found = dict.fromkeys([query] if query in self.codes else [])
+        start = bisect.bisect_left(self._sorted, query)
+        for key in self._sorted[start:]:
+            if not key.startswith(query) or len(found) >= limit:
+                break
+            found[key] = None
+
+        if len(found) < limit:
+            found.update(dict.fromkeys(key for key in self._sorted if query in key))
+        if fuzzy and len(found) < limit:
+            found.update(dict.fromkeys(difflib.get_close_matches(query, self._sorted, limit, cutoff)))
+
+        results = []
+        for key in found:
+            code = self.codes[key]
+            results.append((code, self.names[code]))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,271 @@
+import bisect
+import json
+import os
+import sys
+import time
+
+
+# 히스토그램 구간 경계(초)
+DEFAULT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                  10.0, 30.0)
+
+
+class Histogram(object):
+    """
+    고정 구간 히스토그램 (값 하나를 기록할 때 이진탐색 한번)
+
+    Parameters
+    ---------------------
+    bounds: tuple
+        오름차순 구간 경계, 마지막 구간은 +Inf
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds=DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        q 분위수의 근사값 (해당 구간의 상한, 마지막 구간이면 최대값)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max, 'p50': self.quantile(0.5), 'p90': self.quantile(0.9), 'p99': self.quantile(0.99),
+                'buckets': list(zip(self.bounds + (float('inf'),), self.counts))}
+
+
+class Metrics(object):
+    """
+    카운터, 히스토그램, 게이지를 모아두고 sink로 내보내는 클래스
+
+    API.enable_metrics()로 켜면 TR 지연시간, 이벤트 처리시간, 이벤트별 dynamicCall 횟수,
+    종목별 실시간 수신 횟수가 기록된다. 켜지 않으면 API의 이벤트 처리 경로에는 아무 코드도 추가되지 않는다.
+
+    Parameters
+    ---------------------
+    sinks: list
+        export()할 때 스냅샷을 넘겨받을 sink (StatsSink, PrometheusSink, JSONLogSink 등)
+    bounds: tuple
+        히스토그램 구간 경계(초)
+    rate_counters: tuple
+        스냅샷에 초당 증가율을 같이 넣을 카운터 이름
+    """
+
+    def __init__(self, sinks=(), bounds=DEFAULT_BOUNDS, rate_counters=('real_ticks',)):
+        self.sinks = list(sinks)
+        self.bounds = bounds
+        self.rate_counters = rate_counters
+        self.counters = {} # {이름: {라벨: 값}}
+        self.histograms = {} # {이름: {라벨: Histogram}}
+        self.gauges = {} # {이름: callable}
+        self.started = time.time()
+        self._last_rates = (time.monotonic(), {}) # (시각, {(이름, 라벨): 값})
+
+    def inc(self, name, label='', n=1):
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = {}
+        counter[label] = counter.get(label, 0) + n
+
+    def observe(self, name, label, value):
+        histograms = self.histograms.get(name)
+        if histograms is None:
+            histograms = self.histograms[name] = {}
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram(self.bounds)
+        histogram.observe(value)
+
+    def register_gauge(self, name, func):
+        """
+        스냅샷을 만들 때 func()를 호출해서 값을 읽는 게이지 (숫자 또는 {라벨: 숫자})
+        """
+        self.gauges[name] = func
+
+    def rates(self, advance=False):
+        """
+        rate_counters의 지난 구간(마지막 export() 또는 advance=True 호출) 이후 초당 증가율
+
+        Parameters
+        ---------------------
+        advance: bool
+            True이면 지금 시각과 값으로 구간을 넘김 (export()에서만 사용, False면 상태를 바꾸지 않음)
+
+        Returns
+        ---------------------
+        rates: dict
+            {이름: {라벨: 초당 증가량}}
+        """
+        now = time.monotonic()
+        last_time, last = self._last_rates
+        elapsed = max(now - last_time, 1e-9)
+        rates, current = {}, {}
+        for name in self.rate_counters:
+            for label, value in self.counters.get(name, {}).items():
+                current[(name, label)] = value
+                rates.setdefault(name, {})[label] = (value - last.get((name, label), 0)) / elapsed
+        if advance:
+            self._last_rates = (now, current)
+        return rates
+
+    def snapshot(self, advance=False):
+        """
+        Parameters
+        ---------------------
+        advance: bool
+            True이면 rates의 구간을 넘김 (rates() 참고)
+
+        Returns
+        ---------------------
+        snapshot: dict
+            time, uptime, counters, histograms({이름: {라벨: Histogram.to_dict()}}), gauges, rates
+        """
+        gauges = {}
+        for name, func in self.gauges.items():
+            gauges[name] = func()
+        return {
+            'time': time.time(), 'uptime': time.time() - self.started,
+            'counters': {name: dict(counter) for name, counter in self.counters.items()},
+            'histograms': {name: {label: histogram.to_dict() for label, histogram in histograms.items()}
+                           for name, histograms in self.histograms.items()},
+            'gauges': gauges, 'rates': self.rates(advance),
+        }
+
+    def export(self):
+        """
+        스냅샷을 만들어서 모든 sink로 내보냄, rates는 지난 export() 이후 구간으로 계산하고 구간을 넘김
+        """
+        snapshot = self.snapshot(advance=True)
+        for sink in self.sinks:
+            sink.export(snapshot)
+        return snapshot
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._last_rates = (time.monotonic(), {})
+
+
+class StatsSink(object):
+    """
+    마지막 스냅샷을 메모리에 들고 있는 sink
+    """
+
+    def __init__(self):
+        self.last = None
+
+    def export(self, snapshot):
+        self.last = snapshot
+
+
+class PrometheusSink(object):
+    """
+    스냅샷을 Prometheus 텍스트 형식으로 만드는 sink
+
+    path를 지정하면 node_exporter textfile collector 등에서 읽을 수 있도록 파일로 쓴다.
+
+    Parameters
+    ---------------------
+    path: str
+    prefix: str
+        메트릭 이름 앞에 붙일 문자열
+    """
+
+    def __init__(self, path=None, prefix='kiwooma_'):
+        self.path = path
+        self.prefix = prefix
+        self.text = ''
+
+    def export(self, snapshot):
+        self.text = self.render(snapshot)
+        if self.path:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.text)
+            os.replace(temp_path, self.path)
+
+    def render(self, snapshot):
+        lines = []
+        for name, counter in sorted(snapshot['counters'].items()):
+            metric = self.prefix + name + '_total'
+            lines.append('# TYPE {0} counter'.format(metric))
+            lines.extend('{0}{1} {2}'.format(metric, _labels(label=label), value) for label, value in sorted(counter.items()))
+
+        for name, histograms in sorted(snapshot['histograms'].items()):
+            metric = self.prefix + name
+            lines.append('# TYPE {0} histogram'.format(metric))
+            for label, histogram in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in histogram['buckets']:
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append('{0}_bucket{1} {2}'.format(metric, _labels(label=label, le=le), cumulative))
+                lines.append('{0}_sum{1} {2!r}'.format(metric, _labels(label=label), histogram['sum']))
+                lines.append('{0}_count{1} {2}'.format(metric, _labels(label=label), histogram['count']))
+
+        for name, value in sorted(snapshot['gauges'].items()):
+            metric = self.prefix + name
+            lines.append('# TYPE {0} gauge'.format(metric))
+            values = value.items() if isinstance(value, dict) else (('', value),)
+            lines.extend('{0}{1} {2}'.format(metric, _labels(label=label), v) for label, v in sorted(values))
+        return '\n'.join(lines) + '\n'
+
+
+class JSONLogSink(object):
+    """
+    스냅샷을 한 줄의 JSON으로 덧붙이는 sink (히스토그램 구간은 빼고 요약값만 기록)
+
+    Parameters
+    ---------------------
+    path: str
+        None이면 stream에 씀
+    stream: file
+        기본값 sys.stdout
+    """
+
+    def __init__(self, path=None, stream=None):
+        self.path = path
+        self.stream = stream
+
+    def export(self, snapshot):
+        record = dict(snapshot)
+        record['histograms'] = {name: {label: {key: value for key, value in histogram.items() if key != 'buckets'}
+                                       for label, histogram in histograms.items()}
+                                for name, histograms in snapshot['histograms'].items()}
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        else:
+            (self.stream or sys.stdout).write(line)
+
+
+def _labels(**labels):
+    labels = {key: value for key, value in labels.items() if value != ''}
+    if not labels:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for key, value in labels.items()) + '}'
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+
+def to_int_array(column):
+    """
+    문자열 컬럼을 int64 배열로 변환 (빈 문자열은 0, 소수는 소수점 이하를 버림)
+    """
+    try:
+        return np.array(column, dtype=np.int64)
+    except ValueError: # 빈 문자열이나 소수가 섞여 있으면 하나씩 변환
+        return np.array([_to_int(value) for value in column], dtype=np.int64)
+
+
+def to_price_array(column):
+    """
+    부호(+, -)가 붙은 가격 문자열 컬럼을 양수 int64 배열로 변환 (빈 문자열은 0)
+    """
+    return np.abs(to_int_array(column))
+
+
+def _to_int(value):
+    value = value.strip()
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+
+def to_date_array(column):
+    """
+    YYYYMMDD 또는 YYYYMMDDHHMMSS 문자열 컬럼을 datetime64[s] 배열로 변환 (빈 문자열은 NaT)
+    """
+    try:
+        values = np.array(column, dtype=np.int64)
+        blank = None
+    except ValueError: # 빈 문자열이 섞여 있으면 해당 행은 NaT
+        column = [value.strip() for value in column]
+        blank = np.array([not value for value in column], dtype=bool)
+        values = np.array([value or 0 for value in column], dtype=np.int64)
+
+    sample = next((value.strip() for value in column if value.strip()), '')
+    if len(sample) > 8:
+        values, seconds = np.divmod(values, 1000000)
+        seconds = seconds // 10000 * 3600 + seconds // 100 % 100 * 60 + seconds % 100
+    else:
+        seconds = 0
+
+    year, month_day = np.divmod(values, 10000)
+    month, day = np.divmod(month_day, 100)
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[s]') + ((day - 1) * 86400 + seconds).astype('timedelta64[s]')
+    if blank is not None:
+        dates[blank] = np.datetime64('NaT')
+    return dates
+
+
+OHLCV_DTYPE = np.dtype([('date', 'datetime64[s]'), ('open', np.int64), ('high', np.int64), ('low', np.int64),
+                        ('close', np.int64), ('volume', np.int64)])
+
+
+class OHLCVBuffer(object):
+    """
+    차트 TR 결과를 날짜 오름차순으로 담는 컬럼형 버퍼
+
+    TR은 최신 봉부터 과거 순서로 내려오므로 배열의 뒤쪽부터 거꾸로 채워나간다.
+    연속조회를 모두 받은 후에는 [start:] 구간이 그대로 날짜 오름차순 데이터가 되어 뒤집거나 복사할 필요가 없다.
+
+    Parameters
+    ---------------------
+    capacity: int
+        미리 할당할 봉 개수 (부족하면 두배씩 늘어남)
+    """
+
+    columns = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity=0):
+        self._start = capacity
+        self.date = np.empty(capacity, dtype='datetime64[s]')
+        self._values = {column: np.empty(capacity, dtype=np.int64) for column in self.columns}
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        OHLCV_DTYPE 구조체 배열(날짜 오름차순)로 버퍼를 만든다.
+        """
+        buffer = cls(0)
+        buffer.date = np.array(records['date'])
+        buffer._values = {column: np.array(records[column]) for column in cls.columns}
+        return buffer
+
+    def to_records(self):
+        """
+        날짜 오름차순 OHLCV_DTYPE 구조체 배열로 변환
+        """
+        records = np.empty(len(self), dtype=OHLCV_DTYPE)
+        for column in self.keys():
+            records[column] = self[column]
+        return records
+
+    def __len__(self):
+        return len(self.date) - self._start
+
+    def __getitem__(self, column):
+        if column == 'date':
+            return self.date[self._start:]
+        return self._values[column][self._start:]
+
+    def keys(self):
+        return ('date',) + self.columns
+
+    def append(self, page):
+        """
+        TR 한 페이지(최신 봉부터 과거 순서)를 버퍼 앞쪽에 추가
+
+        Parameters
+        ---------------------
+        page: dict
+            {'date': datetime64 배열, 'open': int64 배열, ...}, 날짜가 NaT인 행(빈 행)은 버림
+        """
+        valid = ~np.isnat(page['date'])
+        if not valid.all():
+            page = {key: values[valid] for key, values in page.items()}
+        n = len(page['date'])
+        if n > self._start:
+            self._grow(n)
+        end, self._start = self._start, self._start - n
+        self.date[self._start:end] = page['date'][::-1]
+        for column, values in self._values.items():
+            values[self._start:end] = page[column][::-1]
+
+    def _grow(self, n):
+        size = len(self)
+        capacity = max(len(self.date) * 2, size + n, 64)
+        start = capacity - size
+
+        date = np.empty(capacity, dtype='datetime64[s]')
+        date[start:] = self['date']
+        for column, values in self._values.items():
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[start:] = values[self._start:]
+            self._values[column] = grown
+        self.date, self._start = date, start
+
+    def first_date(self):
+        """
+        가장 과거 봉의 날짜 (비어있으면 None)
+        """
+        if not len(self):
+            return None
+        return self.date[self._start]
+
+    def last_date(self):
+        """
+        가장 최근 봉의 날짜 (비어있으면 None)
+        """
+        if not len(self):
+            return None
+        return self.date[-1]
+
+    def to_frame(self, code=None):
+        """
+        날짜 오름차순 DataFrame으로 변환
+
+        Parameters
+        ---------------------
+        code: str
+            값을 주면 맨 앞에 'code' 컬럼을 추가
+
+        Returns
+        ---------------------
+        df: pd.DataFrame
+            index: date, columns: [code,] open, high, low, close, volume
+        """
+        data = {} if code is None else {'code': code}
+        for column in self.columns:
+            data[column] = self[column]
+        return pd.DataFrame(data, index=pd.DatetimeIndex(self['date'], name='date'), copy=False)
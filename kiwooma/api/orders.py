@@ -0,0 +1,454 @@
+import collections
+import itertools
+import time
+from datetime import date
+from functools import partial
+from concurrent.futures import Future
+from kiwooma.api.errors import KiwoomError, OrderStateUnknownError
+from kiwooma.api.scheduler import TRScheduler, RateLimiter, DEFAULT_ORDER_LIMITS, PRIORITY_ORDER
+from kiwooma.api.screen import ScreenPool
+from kiwooma.utils import to_code, to_price, tick_size
+
+
+# 주문 상태
+PENDING = 'pending' # 주문을 보냈고 주문번호를 기다리는 중
+ACCEPTED = 'accepted' # 접수
+PARTIAL = 'partial' # 일부 체결
+FILLED = 'filled' # 전량 체결
+CANCELLED = 'cancelled' # 취소 (일부 체결 후 취소 포함)
+REPLACED = 'replaced' # 정정되어 남은 수량이 새 주문으로 넘어감
+CONFIRMED = 'confirmed' # 취소/정정 주문이 확인됨
+REJECTED = 'rejected' # 주문 실패
+UNKNOWN = 'unknown' # 주문번호를 받기 전에 연결이 끊겨서 접수 여부를 알 수 없음
+
+TERMINAL_STATES = (FILLED, CANCELLED, REPLACED, CONFIRMED, REJECTED, UNKNOWN)
+
+# 상태별로 옮겨갈 수 있는 상태
+TRANSITIONS = {
+    PENDING: (ACCEPTED, PARTIAL, FILLED, CONFIRMED, REJECTED, UNKNOWN),
+    ACCEPTED: (PARTIAL, FILLED, CANCELLED, REPLACED, CONFIRMED), # 취소/정정 주문은 접수 후 확인
+    PARTIAL: (PARTIAL, FILLED, CANCELLED, REPLACED),
+}
+
+ORDER_CLASS = {1: '신규매수', 2: '신규매도', 3: '매수취소', 4: '매도취소', 5: '매수정정', 6: '매도정정'}
+
+# 주문번호를 받기 전에 온 체결 통보를 보관할 최대 주문 수와 시간(초)
+EARLY_LIMIT = 256
+EARLY_TTL = 30.0
+
+# 가격을 지정하지 않는 거래구분 (시장가, 최유리, 최우선, 시간외종가)
+MARKET_HOGA = ('03', '06', '07', '13', '16', '23', '26', '61', '81')
+
+
+class PriceLimits(object):
+    """
+    종목별 상한가/하한가/기준가 캐시 (opt10001 결과)
+
+    주문 전 검증에 사용하며, 가격 제한은 하루 동안만 유효하므로 날짜가 바뀌면 비운다.
+    """
+
+    def __init__(self, today=date.today):
+        self.today = today
+        self.limits = {} # {종목코드: (상한가, 하한가, 기준가)}
+        self._date = today()
+
+    def _expire(self):
+        today = self.today()
+        if today != self._date:
+            self.limits = {}
+            self._date = today
+
+    def update(self, code, info):
+        """
+        Parameters
+        ---------------------
+        info: dict
+            opt10001 결과 (상한가, 하한가, 기준가)
+        """
+        self._expire()
+        self.limits[code] = (int(info['상한가']), int(info['하한가']), int(info['기준가']))
+
+    def get(self, code):
+        """
+        Returns
+        ---------------------
+        limits: tuple
+            (상한가, 하한가, 기준가), 캐시가 없으면 None
+        """
+        self._expire()
+        return self.limits.get(code)
+
+    def missing(self, codes):
+        self._expire()
+        return [code for code in dict.fromkeys(codes) if code not in self.limits]
+
+
+def check_order(order_class, code, quantity, price, hoga, limits=None):
+    """
+    주문을 보내기 전에 수량과 가격을 검사
+
+    지정가 주문은 호가단위와 상한가/하한가(limits에 있을 때)를 검사한다.
+    ETF/ETN처럼 호가단위가 다른 종목은 검사하지 않도록 주문할 때 validate=False를 사용한다.
+
+    Parameters
+    ---------------------
+    limits: PriceLimits
+
+    Returns
+    ---------------------
+    error: str
+        문제가 없으면 None
+    """
+    if order_class not in ORDER_CLASS:
+        return '알 수 없는 주문구분입니다. ({0})'.format(order_class)
+    if quantity < 0 or (order_class in (1, 2) and quantity == 0):
+        return '주문수량이 올바르지 않습니다. ({0})'.format(quantity)
+    if order_class in (3, 4) or hoga in MARKET_HOGA:
+        return None
+
+    if price <= 0:
+        return '지정가 주문의 가격이 올바르지 않습니다. ({0})'.format(price)
+    tick = tick_size(price)
+    if price % tick:
+        return '주문가격 {0}이 호가단위 {1}에 맞지 않습니다.'.format(price, tick)
+    bounds = limits.get(code) if limits is not None else None
+    if bounds is not None and not bounds[1] <= price <= bounds[0]:
+        return '주문가격 {0}이 하한가 {1} ~ 상한가 {2} 범위를 벗어났습니다.'.format(price, bounds[1], bounds[0])
+    return None
+
+
+class OrderHandle(object):
+    """
+    주문 하나의 진행 상태
+
+    Attributes
+    ---------------------
+    order_no: str
+        주문번호 (접수 전에는 None)
+    state: str
+        PENDING, ACCEPTED, PARTIAL, FILLED, CANCELLED, REPLACED, CONFIRMED, REJECTED, UNKNOWN
+    filled: int
+        체결수량
+    remaining: int
+        미체결수량
+    avg_fill_price: float
+        평균 체결가
+    accepted: concurrent.futures.Future
+        주문번호를 받으면 주문번호로 완료, 주문이 실패하면 KiwoomError
+        (주문번호를 받기 전에 연결이 끊기면 OrderStateUnknownError)
+    done: concurrent.futures.Future
+        전량 체결/취소/정정/실패 등 더 이상 바뀌지 않는 상태가 되면 OrderHandle로 완료
+    """
+
+    def __init__(self, rqname, order_class, code, quantity, price, hoga, org_order_no=''):
+        self.rqname = rqname
+        self.order_class = order_class
+        self.code = code
+        self.quantity = quantity
+        self.price = price
+        self.hoga = hoga
+        self.org_order_no = org_order_no
+        self.screen_no = None
+        self.sent = False # SendOrder가 성공해서 주문번호를 기다리는 중
+        self.order_no = None
+        self.state = PENDING
+        self.filled = 0
+        self.remaining = quantity
+        self.avg_fill_price = 0.0
+        self.fills = [] # [(체결시간, 체결수량, 체결가), ...]
+        self.accepted = Future()
+        self.done = Future()
+
+    def __repr__(self):
+        return '<OrderHandle {0} {1} {2} {3}/{4} {5}>'.format(self.order_no, ORDER_CLASS.get(self.order_class),
+                                                               self.code, self.filled, self.quantity, self.state)
+
+    @property
+    def is_live(self):
+        return self.state not in TERMINAL_STATES
+
+    @property
+    def is_buy(self):
+        return self.order_class in (1, 3, 5)
+
+    def _move(self, state):
+        if state != self.state and state not in TRANSITIONS.get(self.state, ()):
+            return False
+        self.state = state
+        if state in TERMINAL_STATES and not self.done.done():
+            self.done.set_result(self)
+        return True
+
+    def _fill(self, time, quantity, price):
+        self.avg_fill_price = (self.avg_fill_price * self.filled + price * quantity) / (self.filled + quantity)
+        self.filled += quantity
+        self.fills.append((time, quantity, price))
+
+
+class OrderManager(object):
+    """
+    주문을 보내고 주문번호/체결 통보로 주문 상태를 추적하는 클래스
+
+    주문마다 고유한 요청명을 써서 SendOrder 응답의 주문번호를 해당 주문에 연결하고,
+    이후 주문체결 통보(체결구분 0)는 주문번호로 바로 찾아서 상태를 바꾼다.
+    진행중인 주문은 주문번호와 종목코드로 색인해두므로 미체결 조회 TR(opt10075)이 필요 없다.
+
+    주문은 보내기 전에 check_order로 검사하고, 주문 제한(초당 5회)을 지키도록 별도의 스케줄러로 보낸다.
+    화면번호를 지정하지 않은 주문은 주문용 화면번호를 돌아가면서 사용한다.
+
+    Parameters
+    ---------------------
+    api: API
+    scheduler: TRScheduler
+        주문 전송용 스케줄러, None이면 DEFAULT_ORDER_LIMITS로 만듦
+    """
+
+    def __init__(self, api, scheduler=None):
+        self.api = api
+        self.scheduler = scheduler or TRScheduler(RateLimiter(DEFAULT_ORDER_LIMITS))
+        self.screens = ScreenPool(7000, 20) # 주문용 화면번호
+        self.limits = PriceLimits()
+        self.orders = {} # {주문번호: OrderHandle}
+        self.live_by_code = {} # {종목코드: {주문번호: OrderHandle}}
+        self.listeners = [] # listener(handle) - 주문 상태가 바뀔 때마다 호출
+        self._pending = {} # {요청명: OrderHandle}
+        self._early = collections.OrderedDict() # {주문번호: (받은 시각, [통보])} 주문번호를 받기 전에 도착한 체결 통보
+        self.unmatched = 0 # 이 세션에서 보내지 않은 주문(HTS, 이전 세션 등)의 체결 통보 수
+        self._seq = itertools.count(1)
+
+    def submit(self, acc_no, order_class, code, quantity, price, hoga, org_order_no='', screen_no=None,
+               rqname='send_order_req', validate=True):
+        """
+        주문을 검사한 후 스케줄러에 등록하고 OrderHandle을 리턴
+
+        Parameters
+        ---------------------
+        order_class: int
+            1: 신규매수, 2: 신규매도, 3: 매수취소, 4: 매도취소, 5: 매수정정, 6: 매도정정
+        hoga: str
+            거래구분 ('00': 지정가, '03': 시장가, ...)
+        screen_no: str
+            화면번호, None이면 주문용 화면번호 중 하나를 사용
+        validate: bool
+            보내기 전에 check_order로 검사할지 여부
+
+        Returns
+        ---------------------
+        handle: OrderHandle
+            검사에 실패하면 주문을 보내지 않고 accepted에 KiwoomError가 설정된 상태로 리턴
+        """
+        rqname = '{0}#{1}'.format(rqname, next(self._seq))
+        handle = OrderHandle(rqname, order_class, code, quantity, price, hoga, org_order_no)
+        if validate:
+            error = check_order(order_class, code, quantity, price, hoga, self.limits)
+            if error is not None:
+                self._reject(handle, KiwoomError(error))
+                return handle
+
+        self._pending[rqname] = handle
+        self.api._tr_handlers[rqname] = self._receive_order_no
+        self.scheduler.submit(partial(self._send_order, handle, acc_no, screen_no), PRIORITY_ORDER, rqname,
+                              partial(self._send_failed, handle))
+        return handle
+
+    def _send_order(self, handle, acc_no, screen_no):
+        handle.screen_no = screen_no or self.screens.acquire()
+        ret = self.api.ocx.dynamicCall("SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
+                                       [handle.rqname, handle.screen_no, acc_no, handle.order_class, handle.code,
+                                        handle.quantity, handle.price, handle.hoga, handle.org_order_no])
+        handle.sent = ret in (0, None)
+        if not handle.sent: # 스케줄러 큐로 돌아가거나(접속 끊김) _send_failed로 실패 처리됨
+            self.screens.release(handle.screen_no)
+            handle.screen_no = None
+        return ret
+
+    def _send_failed(self, handle, err_code, cause=None):
+        self.screens.release(handle.screen_no) # SendOrder 호출 중 예외가 발생했으면 화면번호가 남아있음
+        handle.screen_no = None
+        if cause is not None:
+            error = KiwoomError('주문 전송 중 오류가 발생하였습니다. ({0!r})'.format(cause))
+            error.__cause__ = cause
+        else:
+            error = KiwoomError('주문 전송이 실패하였습니다. (에러코드: {0})'.format(err_code), err_code)
+        self._reject(handle, error)
+
+    def _receive_order_no(self, rqname, trcode):
+        """
+        SendOrder의 TR 응답(주문번호)을 처리
+        """
+        self.api._tr_handlers.pop(rqname, None)
+        handle = self._pending.pop(rqname, None)
+        if handle is None:
+            return
+        self.screens.release(handle.screen_no)
+
+        order_no = self.api._comm_get_data(trcode, "", rqname, 0, '주문번호').strip()
+        if not order_no:
+            self._reject(handle, KiwoomError('주문이 실패하였습니다. 보유 현금 이상으로 주문을 하셨는지, '
+                                             '기존에 들어가 있는 주문이 없는지 확인해주세요.'))
+            return
+
+        handle.order_no = order_no
+        self.orders[order_no] = handle
+        if handle.order_class in (1, 2, 5, 6):
+            self.live_by_code.setdefault(handle.code, {})[order_no] = handle
+        handle.accepted.set_result(order_no)
+
+        early = self._early.pop(order_no, None)
+        if not self._pending:
+            self._early.clear() # 남은 통보는 이 세션의 주문이 아님
+        for event in early[1] if early is not None else ():
+            self._apply(handle, event)
+
+    def abandon_in_flight(self):
+        """
+        SendOrder를 보냈지만 주문번호를 받기 전에 연결이 끊긴 주문을 OrderStateUnknownError로 실패시킴
+        (재접속 후 ConnectionSupervisor가 호출, 아직 보내지 않은 주문은 스케줄러가 재개되면 보내짐)
+        서버에 접수되었는지 알 수 없으므로 다시 보내지 않는다.
+
+        Returns
+        ---------------------
+        count: int
+            실패시킨 주문 수
+        """
+        count = 0
+        for handle in list(self._pending.values()):
+            if not handle.sent: # 스케줄러 큐에서 기다리는 중
+                continue
+            self.screens.release(handle.screen_no)
+            self._reject(handle, OrderStateUnknownError(
+                '{0} 주문번호를 받기 전에 연결이 끊겼습니다. 미체결/잔고를 조회해서 접수 여부를 확인해주세요.'.format(
+                    handle.rqname)), UNKNOWN)
+            count += 1
+        return count
+
+    def _reject(self, handle, error, state=REJECTED):
+        self.api._tr_handlers.pop(handle.rqname, None)
+        self._pending.pop(handle.rqname, None)
+        if not self._pending:
+            self._early.clear()
+        handle._move(state)
+        handle.accepted.set_exception(error)
+        self._notify(handle)
+
+    def receive_chejan(self, get_value):
+        """
+        주문체결 통보(체결구분 0)를 반영
+
+        Parameters
+        ---------------------
+        get_value: callable
+            get_value(fid) - GetChejanData 값
+        """
+        event = {
+            'order_no': get_value(9203).strip(), 'state': get_value(913).strip(),
+            'code': to_code(get_value(9001).strip()), 'org_order_no': get_value(904).strip(),
+            'order_quantity': _int(get_value(900)), 'remaining': _int(get_value(902)),
+            'unit_quantity': _int(get_value(915)), 'unit_price': to_price(get_value(914).strip()),
+            'time': get_value(908).strip(),
+        }
+        handle = self.orders.get(event['order_no'])
+        if handle is None:
+            self._buffer_early(event)
+            return
+        self._apply(handle, event)
+
+    def _buffer_early(self, event):
+        """
+        SendOrder 응답보다 체결 통보가 먼저 온 경우에 대비해 보관
+        주문번호를 기다리는 주문이 없으면 이 세션의 주문이 아니므로 버리고,
+        EARLY_TTL초가 지났거나 EARLY_LIMIT개를 넘은 오래된 통보도 버린다.
+        """
+        if not self._pending:
+            self.unmatched += 1
+            return
+        now = time.monotonic()
+        early = self._early
+        while early:
+            order_no, (received, events) = next(iter(early.items()))
+            if now - received < EARLY_TTL and len(early) < EARLY_LIMIT:
+                break
+            del early[order_no]
+            self.unmatched += len(events)
+        entry = early.get(event['order_no'])
+        if entry is None:
+            entry = early[event['order_no']] = (now, [])
+        entry[1].append(event)
+
+    def _apply(self, handle, event):
+        state = event['state']
+        if state == '접수':
+            handle.remaining = event['remaining']
+            handle._move(ACCEPTED)
+        elif state == '체결':
+            if event['unit_quantity']:
+                handle._fill(event['time'], event['unit_quantity'], event['unit_price'])
+            handle.remaining = event['remaining']
+            handle._move(PARTIAL if handle.remaining else FILLED)
+        elif state == '확인':
+            self._confirm(handle, event)
+        self._update_index(handle)
+        self._notify(handle)
+
+    def _confirm(self, handle, event):
+        """
+        취소/정정 주문의 확인 통보 처리
+        """
+        original = self.orders.get(handle.org_order_no or event['org_order_no'])
+        quantity = event['order_quantity'] or handle.quantity
+        if original is not None:
+            quantity = min(quantity, original.remaining)
+
+        if handle.order_class in (5, 6): # 정정: 정정된 수량이 이 주문으로 넘어옴
+            handle.remaining = quantity
+            handle._move(ACCEPTED)
+        else:
+            handle.remaining = 0
+            handle._move(CONFIRMED)
+
+        if original is not None and original.is_live:
+            original.remaining -= quantity
+            if not original.remaining:
+                original._move(REPLACED if handle.order_class in (5, 6) else CANCELLED)
+            self._update_index(original)
+            self._notify(original)
+
+    def _update_index(self, handle):
+        if handle.is_live or handle.order_no is None:
+            return
+        live = self.live_by_code.get(handle.code)
+        if live is not None:
+            live.pop(handle.order_no, None)
+            if not live:
+                del self.live_by_code[handle.code]
+
+    def _notify(self, handle):
+        for listener in self.listeners:
+            listener(handle)
+
+    def stats(self):
+        """
+        주문 스케줄러 상태 (TRScheduler.stats())
+        """
+        return self.scheduler.stats()
+
+    def get(self, order_no):
+        return self.orders.get(order_no)
+
+    def live_orders(self, code=None):
+        """
+        진행중인(미체결이 남은) 주문
+
+        Returns
+        ---------------------
+        handles: list
+        """
+        if code is not None:
+            return list(self.live_by_code.get(code, {}).values())
+        return [handle for live in self.live_by_code.values() for handle in live.values()]
+
+
+def _int(value):
+    value = value.strip()
+    return int(value) if value else 0
+
@@ -0,0 +1,207 @@
+class Position(object):
+    """
+    종목 하나의 보유 정보
+
+    Attributes
+    ---------------------
+    code: str
+    name: str
+    quantity: int
+        보유수량
+    available: int
+        매매가능수량
+    avg_price: float
+        매입단가
+    last_price: float
+        현재가 (실시간 시세로 갱신)
+    realized_pnl: float
+        오늘 매도로 실현된 손익 (수수료, 세금 제외)
+    """
+
+    __slots__ = ('code', 'name', 'quantity', 'available', 'avg_price', 'last_price', 'realized_pnl')
+
+    def __init__(self, code, name='', quantity=0, available=0, avg_price=0.0, last_price=0.0):
+        self.code = code
+        self.name = name
+        self.quantity = quantity
+        self.available = available
+        self.avg_price = avg_price
+        self.last_price = last_price
+        self.realized_pnl = 0.0
+
+    @property
+    def cost(self):
+        return self.quantity * self.avg_price
+
+    @property
+    def value(self):
+        return self.quantity * self.last_price
+
+    def to_dict(self):
+        """
+        opw00018의 portfolio_positions와 같은 키의 dict
+        """
+        cost, value = self.cost, self.value
+        return {'종목명': self.name, '보유수량': self.quantity, '매입가': self.avg_price, '현재가': self.last_price,
+                '평가손익': value - cost, '수익률(%)': round((value - cost) * 100.0 / cost, 2) if cost else 0.0,
+                '매매가능수량': self.available, '매입금액': cost, '평가금액': value, '실현손익': self.realized_pnl}
+
+
+class Portfolio(object):
+    """
+    체결/잔고 통보와 실시간 시세로 갱신되는 보유종목 장부
+
+    opw00018로 한번 채운 후에는 체결(주문체결 통보), 잔고통보, 주식체결 시세가 들어올 때마다
+    해당 종목과 합계만 바꾸므로 잔고/손익 조회에 TR을 쓰지 않는다.
+    합계(총매입금액, 총평가금액)는 종목 값이 바뀐 만큼만 더하고 빼서 유지한다.
+    주기적으로 reconcile()로 서버 잔고와 비교하여 어긋난 종목을 바로잡는다.
+    seed() 전에 들어온 체결은 기준이 되는 보유수량을 모르므로 반영하지 않는다.
+    """
+
+    def __init__(self):
+        self.positions = {} # {code: Position}
+        self.cash = None # 예수금 (잔고통보로 갱신)
+        self.realized_pnl = 0.0
+        self.total_cost = 0.0
+        self.total_value = 0.0
+        self.seeded = False
+
+    def __contains__(self, code):
+        return code in self.positions
+
+    def seed(self, positions):
+        """
+        opw00018 결과로 장부를 새로 채운다.
+
+        Parameters
+        ---------------------
+        positions: dict
+            API.portfolio_positions {종목코드: {'종목명', '보유수량', '매입가', '현재가', '매매가능수량', ...}}
+        """
+        self.positions = {}
+        self.total_cost = self.total_value = 0.0
+        for code, row in positions.items():
+            self._set(code, row['보유수량'], row['매입가'], row.get('매매가능수량', row['보유수량']),
+                      row.get('현재가'), row.get('종목명', ''))
+        self.seeded = True
+
+    def _set(self, code, quantity, avg_price, available=None, last_price=None, name=None):
+        position = self.positions.get(code)
+        if position is None:
+            if not quantity:
+                return None
+            position = self.positions[code] = Position(code, name or '')
+
+        self.total_cost -= position.cost
+        self.total_value -= position.value
+        position.quantity = quantity
+        position.avg_price = avg_price if quantity else 0.0
+        position.available = quantity if available is None else available
+        if last_price:
+            position.last_price = last_price
+        if name:
+            position.name = name
+        self.total_cost += position.cost
+        self.total_value += position.value
+
+        if not quantity and not position.realized_pnl:
+            del self.positions[code]
+        return position
+
+    def on_execution(self, code, quantity, price, name=''):
+        """
+        체결 하나를 반영
+
+        Parameters
+        ---------------------
+        quantity: int
+            체결수량, 매수는 양수, 매도는 음수
+        price: float
+            체결가
+        """
+        if not self.seeded:
+            return
+        position = self.positions.get(code)
+        held, avg_price = (position.quantity, position.avg_price) if position is not None else (0, 0.0)
+
+        if quantity > 0:
+            avg_price = (held * avg_price + quantity * price) / (held + quantity)
+            position = self._set(code, held + quantity, avg_price, last_price=price, name=name)
+        else:
+            # 장부에 없는 수량의 매도(장부 밖에서 산 주식 등)는 잔고통보/reconcile로 바로잡히므로 반영하지 않음
+            sold = min(-quantity, max(held, 0))
+            if not sold:
+                return
+            pnl = sold * (price - avg_price)
+            position = self._set(code, held - sold, avg_price, max(min(position.available, held - sold), 0), price,
+                                 name)
+            if position is not None:
+                position.realized_pnl += pnl
+            self.realized_pnl += pnl
+
+    def on_balance(self, code, quantity, avg_price, available, cash=None, last_price=None, name=''):
+        """
+        잔고통보를 반영 (서버 값으로 종목을 덮어씀)
+        """
+        self._set(code, quantity, avg_price, available, last_price, name)
+        if cash is not None:
+            self.cash = cash
+
+    def mark(self, code, price):
+        """
+        실시간 시세로 평가금액을 갱신
+        """
+        position = self.positions.get(code)
+        if position is not None and price:
+            price = float(price)
+            self.total_value += position.quantity * (price - position.last_price)
+            position.last_price = price
+
+    def get_positions(self):
+        """
+        Returns
+        ---------------------
+        positions: dict
+            {종목코드: dict} 보유수량이 0인 종목은 제외
+        """
+        return {code: position.to_dict() for code, position in self.positions.items() if position.quantity}
+
+    def get_balance(self):
+        """
+        Returns
+        ---------------------
+        balance: dict
+            총매입금액, 총평가금액, 총평가손익금액, 총수익률(%), 실현손익, 예수금
+        """
+        pnl = self.total_value - self.total_cost
+        return {'총매입금액': self.total_cost, '총평가금액': self.total_value, '총평가손익금액': pnl,
+                '총수익률(%)': round(pnl * 100.0 / self.total_cost, 2) if self.total_cost else 0.0,
+                '실현손익': self.realized_pnl, '예수금': self.cash}
+
+    def reconcile(self, positions):
+        """
+        서버 잔고(opw00018)와 비교해서 다른 종목을 서버 값으로 바로잡는다.
+
+        Returns
+        ---------------------
+        drift: dict
+            {종목코드: ((장부 보유수량, 장부 매입가), (서버 보유수량, 서버 매입가))}
+        """
+        drift = {}
+        for code in set(self.positions) | set(positions):
+            position = self.positions.get(code)
+            local = (position.quantity, position.avg_price) if position is not None else (0, 0.0)
+            row = positions.get(code)
+            server = (row['보유수량'], row['매입가']) if row is not None else (0, 0.0)
+            if local[0] != server[0] or abs(local[1] - server[1]) >= 1:
+                drift[code] = (local, server)
+                if row is None:
+                    self._set(code, 0, 0.0)
+                else:
+                    self._set(code, row['보유수량'], row['매입가'], row.get('매매가능수량'), row.get('현재가'),
+                              row.get('종목명'))
+
+        # 부동소수점 오차가 쌓이지 않도록 합계를 다시 계산
+        self.total_cost = sum(position.cost for position in self.positions.values())
+        self.total_value = sum(position.value for position in self.positions.values())
+        return drift
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from kiwooma.api.real_schema import STOCK_TRADE_FIELDS
+
+
+class QuoteTable(object):
+    """
+    종목별 최신 실시간 시세를 컬럼별 NumPy 배열에 담는 테이블
+
+    종목마다 행 번호를 하나씩 할당하고, 틱이 들어오면 해당 행의 값만 제자리에서 바꾼다.
+    틱마다 dict를 새로 만들지 않으므로 종목이 많아도 가비지가 생기지 않고,
+    column('현재가')처럼 전 종목의 값을 복사 없이 배열로 읽을 수 있다.
+
+    Parameters
+    ---------------------
+    fields: tuple
+        ((이름, FID, dtype, 변환함수), ...)
+    capacity: int
+        미리 할당할 종목 수 (부족하면 두배씩 늘어남)
+    """
+
+    def __init__(self, fields=STOCK_TRADE_FIELDS, capacity=1024):
+        self.fields = tuple(fields)
+        self.names = tuple(field[0] for field in self.fields)
+        self.fids = tuple(field[1] for field in self.fields)
+        self.plan = tuple((i, field[1], field[3]) for i, field in enumerate(self.fields))
+        self.codes = [] # 행 번호 순서의 종목코드
+        self.rows = {} # {code: 행 번호}
+        self._columns = [np.zeros(capacity, dtype=field[2]) for field in self.fields]
+        self._updates = np.zeros(capacity, dtype=np.int64) # 행별 갱신 횟수
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.rows
+
+    def row(self, code):
+        """
+        code 종목의 행 번호 (없으면 새로 할당)
+        """
+        row = self.rows.get(code)
+        if row is None:
+            row = len(self.codes)
+            if row == len(self._updates):
+                self._grow()
+            self.rows[code] = row
+            self.codes.append(code)
+        return row
+
+    def _grow(self):
+        capacity = max(len(self._updates) * 2, 64)
+        for i, column in enumerate(self._columns):
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[i] = grown
+        updates = np.zeros(capacity, dtype=np.int64)
+        updates[:len(self._updates)] = self._updates
+        self._updates = updates
+
+    def update(self, code, values):
+        """
+        code 종목의 행을 변환된 값으로 갱신
+
+        Parameters
+        ---------------------
+        values: sequence
+            fields 순서의 변환된 값
+        """
+        row = self.row(code)
+        for column, value in zip(self._columns, values):
+            column[row] = value
+        self._updates[row] += 1
+        return row
+
+    def update_raw(self, code, get_value, plan=None):
+        """
+        실시간 문자열 값을 변환하여 code 종목의 행을 갱신
+
+        Parameters
+        ---------------------
+        get_value: callable
+            get_value(fid) - FID의 실시간 문자열 값을 리턴
+        plan: tuple
+            RealSchema.plan()의 결과, 계획에 있는 항목만 읽고 나머지는 그대로 둔다. None이면 전체
+        """
+        row = self.row(code)
+        if plan is None:
+            plan = self.plan
+        columns = self._columns
+        for i, fid, parse in plan:
+            columns[i][row] = parse(get_value(fid).strip())
+        self._updates[row] += 1
+        return row
+
+    def update_strings(self, code, plan, strings):
+        """
+        update_raw와 같지만 계획 순서로 미리 읽어둔 문자열 값으로 갱신 (RealTimeWorker에서 사용)
+
+        Parameters
+        ---------------------
+        plan: tuple
+            RealSchema.plan()의 결과
+        strings: tuple
+            plan 순서의 실시간 문자열 값
+        """
+        row = self.row(code)
+        columns = self._columns
+        for (i, fid, parse), value in zip(plan, strings):
+            columns[i][row] = parse(value.strip())
+        self._updates[row] += 1
+        return row
+
+    def values(self, row):
+        """
+        row 행의 값들 (fields 순서)
+        """
+        return tuple(column[row] for column in self._columns)
+
+    def value(self, row, index):
+        """
+        row 행의 index번째 항목 값
+        """
+        return self._columns[index][row].item()
+
+    def column(self, name):
+        """
+        전 종목의 name 항목 배열 (행 번호 순서, 복사하지 않은 view)
+        """
+        return self._columns[self.names.index(name)][:len(self.codes)]
+
+    def updates(self):
+        """
+        전 종목의 갱신 횟수 배열 (0이면 아직 틱을 받지 못한 종목)
+        """
+        return self._updates[:len(self.codes)]
+
+    def get(self, code):
+        """
+        code 종목의 최신 시세를 dict로 리턴 (없으면 None)
+        """
+        row = self.rows.get(code)
+        if row is None:
+            return None
+        return {name: column[row].item() for name, column in zip(self.names, self._columns)}
+
+    def to_frame(self, names=None):
+        """
+        전 종목의 시세를 DataFrame으로 복사
+
+        Parameters
+        ---------------------
+        names: list
+            포함할 항목, None이면 전체
+
+        Returns
+        ---------------------
+        df: pd.DataFrame
+            index: 종목코드
+        """
+        names = self.names if names is None else names
+        data = {name: self.column(name).copy() for name in names}
+        return pd.DataFrame(data, index=pd.Index(self.codes, name='code'))
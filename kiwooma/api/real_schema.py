@@ -0,0 +1,129 @@
+import numpy as np
+
+
+REAL_SCHEMAS = {}
+
+
+def parse_int(value):
+    """
+    부호가 붙은 실시간 정수 문자열을 int로 변환 (빈 문자열은 0)
+    """
+    return int(value) if value else 0
+
+
+def parse_price(value):
+    """
+    부호(+, -)가 붙은 실시간 가격 문자열을 양수 int로 변환
+    """
+    return abs(int(value)) if value else 0
+
+
+def parse_float(value):
+    return float(value) if value else 0.0
+
+
+def parse_str(value):
+    return value
+
+
+class RealSchema(object):
+    """
+    실시간 타입 하나의 항목(FID)과 항목별 dtype, 변환함수를 정의하는 클래스
+
+    plan(fids)으로 요청된 FID만 골라낸 디코딩 계획을 만들어두고, API는 실시간 이벤트마다
+    계획에 있는 FID만 GetCommRealData로 읽는다.
+
+    Parameters
+    ---------------------
+    real_type: str
+        실시간 타입 (예: '주식체결')
+    fields: tuple
+        ((이름, FID, dtype, 변환함수), ...)
+    """
+
+    def __init__(self, real_type, fields):
+        self.real_type = real_type
+        self.fields = tuple(fields)
+        self.fids = tuple(field[1] for field in self.fields)
+
+    def plan(self, fids=None):
+        """
+        요청된 FID만 읽는 디코딩 계획
+
+        Parameters
+        ---------------------
+        fids: set
+            요청된 FID, None이면 전체
+
+        Returns
+        ---------------------
+        plan: tuple
+            ((fields 안의 위치, FID, 변환함수), ...), 요청된 FID가 없으면 빈 tuple
+        """
+        return tuple((i, field[1], field[3]) for i, field in enumerate(self.fields)
+                     if fids is None or field[1] in fids)
+
+
+def register_real_schema(schema):
+    REAL_SCHEMAS[schema.real_type] = schema
+    return schema
+
+
+def get_real_schema(real_type):
+    return REAL_SCHEMAS.get(real_type)
+
+
+STOCK_TRADE_FIELDS = (
+    ('체결시간', 20, np.int32, parse_int),
+    ('현재가', 10, np.int64, parse_price),
+    ('전일대비', 11, np.int64, parse_int),
+    ('등락율', 12, np.float64, parse_float),
+    ('(최우선)매도호가', 27, np.int64, parse_price),
+    ('(최우선)매수호가', 28, np.int64, parse_price),
+    ('거래량', 15, np.int64, parse_int), # +: 매수체결, -: 매도체결
+    ('누적거래량', 13, np.int64, parse_int),
+    ('누적거래대금', 14, np.int64, parse_int),
+    ('시가', 16, np.int64, parse_price),
+    ('고가', 17, np.int64, parse_price),
+    ('저가', 18, np.int64, parse_price),
+    ('전일대비기호', 25, np.int8, parse_int),
+    ('전일거래량대비(계약,주)', 26, np.int64, parse_int),
+    ('거래대금증감', 29, np.int64, parse_int),
+    ('전일거래량대비(비율)', 30, np.float64, parse_float),
+    ('거래회전율', 31, np.float64, parse_float),
+    ('거래비용', 32, np.int64, parse_int),
+    ('체결강도', 228, np.float64, parse_float),
+    ('시가총액(억)', 311, np.int64, parse_int),
+    ('장구분', 290, np.int8, parse_int),
+)
+
+# 매도호가1~10: 41~50, 매수호가1~10: 51~60, 매도호가수량: 61~70, 매수호가수량: 71~80
+ORDER_BOOK_FIELDS = (
+    (('호가시간', 21, np.int32, parse_int),) +
+    tuple(('매도호가{0}'.format(i), 40 + i, np.int64, parse_price) for i in range(1, 11)) +
+    tuple(('매수호가{0}'.format(i), 50 + i, np.int64, parse_price) for i in range(1, 11)) +
+    tuple(('매도호가수량{0}'.format(i), 60 + i, np.int64, parse_int) for i in range(1, 11)) +
+    tuple(('매수호가수량{0}'.format(i), 70 + i, np.int64, parse_int) for i in range(1, 11)) +
+    (('매도호가총잔량', 121, np.int64, parse_int), ('매수호가총잔량', 125, np.int64, parse_int),
+     ('예상체결가', 23, np.int64, parse_price), ('예상체결수량', 24, np.int64, parse_int))
+)
+
+BEST_QUOTE_FIELDS = (
+    ('(최우선)매도호가', 27, np.int64, parse_price),
+    ('(최우선)매수호가', 28, np.int64, parse_price),
+)
+
+# 장운영구분 0: 장시작전, 2: 장마감전(동시호가), 3: 장시작, 4: 장종료(15:30), 8: 장마감, 9: 장종료(시간외 포함),
+# a: 시간외종가매매 시작, b: 시간외종가매매 종료, c: 시간외단일가매매 시작, d: 시간외단일가매매 종료, s: 선옵 장마감전 동시호가
+MARKET_STATUS_FIELDS = (
+    ('장운영구분', 215, 'U1', parse_str),
+    ('체결시간', 20, np.int32, parse_int),
+    ('장시작예상잔여시간', 214, np.int32, parse_int),
+)
+
+register_real_schema(RealSchema('주식체결', STOCK_TRADE_FIELDS))
+register_real_schema(RealSchema('주식호가잔량', ORDER_BOOK_FIELDS))
+register_real_schema(RealSchema('주식우선호가', BEST_QUOTE_FIELDS))
+register_real_schema(RealSchema('장시작시간', MARKET_STATUS_FIELDS))
+
+STOCK_TRADE_FIDS = tuple(str(field[1]) for field in STOCK_TRADE_FIELDS)
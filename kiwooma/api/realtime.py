@@ -0,0 +1,280 @@
+import collections
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.screen import ScreenPool
+
+
+class RealTimeSubscription(object):
+    """
+    RealTimeManager.subscribe()로 만든 실시간 등록 하나
+
+    Attributes
+    ---------------------
+    codes: set
+        등록된 종목코드
+    fids: str
+        요청한 FID (';'로 구분)
+    """
+
+    def __init__(self, manager, fids, name):
+        self.manager = manager
+        self.fids = fids
+        self.name = name
+        self.codes = set()
+        self.closed = False
+
+    def add(self, codes):
+        """
+        종목을 추가 등록
+        """
+        codes = [code for code in _code_list(codes) if code not in self.codes]
+        self.manager._register(self.fids, codes) # 등록에 실패하면 예외가 나고 codes에는 추가되지 않음
+        self.codes.update(codes)
+
+    def remove(self, codes):
+        """
+        종목을 등록 해제
+        """
+        codes = [code for code in _code_list(codes) if code in self.codes]
+        self.codes.difference_update(codes)
+        self.manager._unregister(self.fids, codes)
+
+    def close(self):
+        """
+        모든 종목을 등록 해제
+        """
+        if not self.closed:
+            self.remove(list(self.codes))
+            self.manager.subscriptions.remove(self)
+            self.closed = True
+
+
+class _FIDGroup(object):
+    """
+    같은 FID로 등록한 종목들과 그 종목들이 나뉘어 들어간 화면번호
+    """
+
+    def __init__(self, fids):
+        self.fids = fids
+        self.screens = collections.OrderedDict() # {screen_no: set(codes)}
+        self.where = {} # {code: screen_no}
+        self.refs = collections.Counter() # {code: 등록한 구독 수}
+
+
+class RealTimeManager(object):
+    """
+    실시간 등록을 화면번호별로 나눠서 관리하는 클래스
+
+    키움은 화면번호 하나에 등록할 수 있는 종목 수가 제한되어 있으므로 codes_per_screen개씩 화면번호를 나눠서 등록한다.
+    같은 FID를 요청한 구독들은 화면번호를 공유하고, 종목별로 몇 개의 구독이 등록했는지 세어서
+    마지막 구독이 해제할 때만 SetRealRemove를 호출한다.
+    등록 상태를 모두 기억하고 있으므로 재접속 후 resubscribe()로 그대로 다시 등록할 수 있다.
+
+    Parameters
+    ---------------------
+    ocx: OCXBackend
+    screen_start: int
+        실시간 등록에 사용할 첫 화면번호
+    screen_count: int
+        사용할 화면번호 개수
+    codes_per_screen: int
+        화면번호 하나에 등록할 최대 종목 수
+    """
+
+    def __init__(self, ocx, screen_start=6000, screen_count=100, codes_per_screen=100):
+        self.ocx = ocx
+        self.screens = ScreenPool(screen_start, screen_count)
+        self.codes_per_screen = codes_per_screen
+        self.subscriptions = []
+        self.live = False # 서버에 등록할 수 있는 상태인지 여부
+        self.version = 0 # 요청된 FID 구성이 바뀔 때마다 증가
+        self._groups = {} # {fid 문자열: _FIDGroup}
+        self.failed_screens = {} # {화면번호: KiwoomError} 마지막 resubscribe()에서 등록에 실패한 화면번호
+
+    def subscribe(self, codes, fids=('10',), name=''):
+        """
+        실시간 데이터를 등록
+
+        Parameters
+        ---------------------
+        codes: list or str
+            종목코드 리스트 또는 ';'로 구분한 문자열 (장시작시간처럼 종목이 없는 실시간은 [''])
+        fids: tuple
+            받을 FID (예: ('10', '15', '228'))
+        name: str
+
+        Returns
+        ---------------------
+        subscription: RealTimeSubscription
+        """
+        subscription = RealTimeSubscription(self, ';'.join(str(fid) for fid in fids), name)
+        subscription.add(codes)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe_all(self):
+        for subscription in list(self.subscriptions):
+            subscription.close()
+
+    def requested_fids(self):
+        """
+        모든 구독이 요청한 FID
+
+        Returns
+        ---------------------
+        fids: set
+            int FID의 set
+        """
+        return {int(fid) for fids in self._groups for fid in fids.split(';') if fid}
+
+    def registered_codes(self):
+        """
+        현재 등록된 모든 종목코드
+        """
+        codes = set()
+        for group in self._groups.values():
+            codes.update(group.where)
+        return codes
+
+    def screen_map(self):
+        """
+        Returns
+        ---------------------
+        screens: dict
+            {screen_no: (fids, [codes])}
+        """
+        return {screen_no: (group.fids, sorted(codes))
+                for group in self._groups.values() for screen_no, codes in group.screens.items()}
+
+    def on_connected(self):
+        """
+        로그인/재접속 후 호출, 기억하고 있는 등록을 모두 다시 등록한다.
+        """
+        self.live = True
+        self.resubscribe()
+
+    def on_disconnected(self):
+        """
+        접속이 끊겼을 때 호출, 서버 쪽 등록은 사라졌으므로 재접속 전까지 등록 요청을 보내지 않는다.
+        """
+        self.live = False
+
+    def resubscribe(self):
+        """
+        모든 화면번호의 등록을 다시 요청
+        등록에 실패한 화면번호가 있어도 나머지 화면번호는 계속 등록하고, 실패는 self.failed_screens에 기록한다.
+
+        Returns
+        ---------------------
+        failed: dict
+            {screen_no: KiwoomError}
+        """
+        self.failed_screens = {}
+        if not self.live:
+            return self.failed_screens
+        for group in self._groups.values():
+            for screen_no, codes in group.screens.items():
+                try:
+                    self._set_real_reg(screen_no, codes, group.fids, '0')
+                except KiwoomError as e:
+                    self.failed_screens[screen_no] = e
+        return self.failed_screens
+
+    def _register(self, fids, codes):
+        if not codes:
+            return
+
+        group = self._groups.get(fids)
+        if group is None:
+            group = self._groups[fids] = _FIDGroup(fids)
+            self.version += 1
+
+        counted = [] # refs를 올린 종목
+        added = collections.OrderedDict() # {screen_no: [codes]}
+        registered = [] # 서버에 등록한 화면번호
+        try:
+            for code in codes:
+                group.refs[code] += 1
+                counted.append(code)
+                if group.refs[code] > 1:
+                    continue
+                screen_no = self._screen_with_room(group)
+                group.screens[screen_no].add(code)
+                group.where[code] = screen_no
+                added.setdefault(screen_no, []).append(code)
+
+            if self.live:
+                for screen_no, screen_codes in added.items():
+                    # 화면번호에 처음 등록하는 종목들이면 '0'(새로 등록), 이미 등록된 종목이 있으면 '1'(추가)
+                    opt_type = '0' if len(group.screens[screen_no]) == len(screen_codes) else '1'
+                    self._set_real_reg(screen_no, screen_codes, fids, opt_type)
+                    registered.append(screen_no)
+        except Exception:
+            self._rollback(group, counted, added, registered)
+            raise
+
+    def _rollback(self, group, counted, added, registered):
+        """
+        _register 도중 실패했을 때 이번 호출에서 바꾼 상태를 되돌림 (이미 서버에 등록한 화면번호의 종목은 등록 해제)
+        """
+        for screen_no, screen_codes in added.items():
+            for code in screen_codes:
+                if screen_no in registered:
+                    self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+                group.screens[screen_no].discard(code)
+                del group.where[code]
+        for screen_no, screen_codes in list(group.screens.items()):
+            if not screen_codes:
+                del group.screens[screen_no]
+                self.screens.release(screen_no)
+        for code in counted:
+            group.refs[code] -= 1
+            if group.refs[code] <= 0:
+                del group.refs[code]
+        if not group.refs and self._groups.get(group.fids) is group:
+            del self._groups[group.fids]
+            self.version += 1
+
+    def _unregister(self, fids, codes):
+        group = self._groups.get(fids)
+        if group is None:
+            return
+
+        for code in codes:
+            group.refs[code] -= 1
+            if group.refs[code] > 0:
+                continue
+            del group.refs[code]
+            screen_no = group.where.pop(code)
+            group.screens[screen_no].discard(code)
+            if self.live:
+                self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+            if not group.screens[screen_no]:
+                del group.screens[screen_no]
+                self.screens.release(screen_no)
+
+        if not group.refs:
+            del self._groups[fids]
+            self.version += 1
+
+    def _screen_with_room(self, group):
+        for screen_no, codes in group.screens.items():
+            if len(codes) < self.codes_per_screen:
+                return screen_no
+
+        if len(self.screens.in_use) >= len(self.screens.screens):
+            raise KiwoomError('실시간 등록에 사용할 화면번호가 부족합니다.')
+        screen_no = self.screens.acquire()
+        group.screens[screen_no] = set()
+        return screen_no
+
+    def _set_real_reg(self, screen_no, codes, fids, opt_type):
+        ret = self.ocx.dynamicCall("SetRealReg(QString, QString, QString, QString)",
+                                   screen_no, ';'.join(sorted(codes)), fids, opt_type)
+        if ret not in (0, None):
+            raise KiwoomError('실시간 등록에 실패하였습니다. (화면번호: {0})'.format(screen_no), ret)
+
+
+def _code_list(codes):
+    if isinstance(codes, str):
+        codes = [code for code in codes.split(';') if code]
+    return list(dict.fromkeys(codes))
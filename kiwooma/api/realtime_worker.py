@@ -0,0 +1,299 @@
+import threading
+import time
+import traceback
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.metrics import Histogram
+
+
+class SPSCQueue(object):
+    """
+    생산자 스레드 하나, 소비자 스레드 하나가 쓰는 고정 크기 큐
+
+    슬롯 리스트를 미리 만들어두고 생산자는 tail, 소비자는 head만 올리므로 넣고 뺄 때 락을 잡지 않는다.
+    소비자가 기다리는 중일 때만 생산자가 Event로 깨운다.
+
+    Parameters
+    ---------------------
+    capacity: int
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.head = 0 # 다음에 읽을 위치 (소비자만 씀)
+        self.tail = 0 # 다음에 쓸 위치 (생산자만 씀)
+        self.dropped = 0
+        self._waiting = False
+        self._event = threading.Event()
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def push(self, item):
+        """
+        Returns
+        ---------------------
+        ret: bool
+            가득 차서 버렸으면 False
+        """
+        tail = self.tail
+        if tail - self.head >= self.capacity:
+            self.dropped += 1
+            return False
+        self._slots[tail % self.capacity] = item
+        self.tail = tail + 1 # 슬롯을 다 쓴 후에 공개
+        if self._waiting:
+            self._event.set()
+        return True
+
+    def pop_all(self, max_count=1024):
+        """
+        쌓인 항목을 최대 max_count개 꺼냄 (기다리지 않음)
+        """
+        head, tail = self.head, self.tail
+        if tail == head:
+            return ()
+        end = min(tail, head + max_count)
+        slots, capacity = self._slots, self.capacity
+        items = []
+        for seq in range(head, end):
+            index = seq % capacity
+            items.append(slots[index])
+            slots[index] = None
+        self.head = end
+        return items
+
+    def wait(self, timeout=None):
+        """
+        항목이 들어올 때까지 기다림
+
+        Returns
+        ---------------------
+        ret: bool
+            항목이 있으면 True
+        """
+        self._waiting = True
+        try:
+            if self.tail != self.head:
+                return True
+            self._event.wait(timeout)
+            self._event.clear()
+            return self.tail != self.head
+        finally:
+            self._waiting = False
+
+    def wake(self):
+        self._event.set()
+
+
+class RealTimeConsumer(object):
+    """
+    실시간/주문 이벤트를 자기 스레드(또는 executor)에서 처리하는 소비자
+
+    API가 이벤트를 큐에 넣기만 하므로 콜백이 느려도 실시간 수신이나 다른 소비자가 밀리지 않는다.
+    threads가 2 이상이면 종목코드로 스레드를 나눠서 같은 종목의 이벤트 순서는 유지된다.
+    executor(ProcessPoolExecutor 등)를 주면 콜백을 executor에 넘기고 완료 시점으로 지연시간을 잰다.
+
+    Parameters
+    ---------------------
+    callback: callable
+        kind가 'real'이면 callback(code, real_type, values), 'order'이면 callback(handle)
+        values는 해당 실시간 타입 테이블의 fields 순서의 값
+    kind: str
+        'real' 또는 'order'
+    codes: iterable
+        받을 종목코드, None이면 전체
+    real_types: tuple
+        받을 실시간 타입 (kind가 'real'일 때)
+    threads: int
+    capacity: int
+        스레드별 큐 크기, 가득 차면 새 이벤트를 버림
+    executor: concurrent.futures.Executor
+    name: str
+
+    Attributes
+    ---------------------
+    latency: Histogram
+        이벤트를 받은 시점부터 콜백이 끝날 때까지의 시간(초)
+    """
+
+    def __init__(self, callback, kind='real', codes=None, real_types=('주식체결',), threads=1, capacity=65536,
+                 executor=None, name=None):
+        if kind not in ('real', 'order'):
+            raise ValueError("kind must be 'real' or 'order'")
+        self.callback = callback
+        self.kind = kind
+        self.codes = None if codes is None else set(codes)
+        self.real_types = None if real_types is None else set(real_types)
+        self.executor = executor
+        self.name = name or getattr(callback, '__name__', 'consumer')
+        self.latency = Histogram()
+        self.errors = 0
+        self.last_error = None
+        self.running = False
+        self._lock = threading.Lock() # latency는 여러 스레드에서 기록
+        self._queues = [SPSCQueue(capacity) for i in range(max(threads, 1))]
+        self._threads = []
+
+    def wants(self, code, real_type=None):
+        return ((self.codes is None or code in self.codes) and
+                (real_type is None or self.real_types is None or real_type in self.real_types))
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._threads = [threading.Thread(target=self._run, args=(queue,), name='kiwooma-{0}-{1}'.format(self.name, i),
+                                          daemon=True)
+                         for i, queue in enumerate(self._queues)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        for queue in self._queues:
+            queue.wake()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def put(self, code, received, args):
+        """
+        생산자 스레드에서 호출 (이벤트 하나당 한 스레드만 호출해야 함)
+        """
+        queues = self._queues
+        queue = queues[hash(code) % len(queues)] if len(queues) > 1 else queues[0]
+        return queue.push((received, args))
+
+    def _run(self, queue):
+        while self.running:
+            items = queue.pop_all()
+            if not items:
+                queue.wait(0.1)
+                continue
+            for received, args in items:
+                if self.executor is not None:
+                    future = self.executor.submit(self.callback, *args)
+                    future.add_done_callback(lambda future, received=received: self._done(future, received))
+                    continue
+                try:
+                    self.callback(*args)
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+                    traceback.print_exc()
+                self._observe(received)
+
+    def _done(self, future, received):
+        error = future.exception()
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+        self._observe(received)
+
+    def _observe(self, received):
+        elapsed = time.perf_counter() - received
+        with self._lock:
+            self.latency.observe(elapsed)
+
+    def stats(self):
+        """
+        Returns
+        ---------------------
+        stats: dict
+            name, backlog(큐에 남은 이벤트 수), dropped, errors, latency(Histogram.to_dict()에서 구간 제외)
+        """
+        with self._lock:
+            latency = self.latency.to_dict()
+        latency.pop('buckets')
+        return {'name': self.name, 'backlog': sum(len(queue) for queue in self._queues),
+                'dropped': sum(queue.dropped for queue in self._queues), 'errors': self.errors, 'latency': latency}
+
+
+class RealTimeWorker(object):
+    """
+    실시간 데이터의 디코딩과 소비자 전달을 Qt(COM) 스레드 밖에서 하는 스레드
+
+    API._receive_real_data는 디코딩 계획에 있는 FID의 문자열 값만 GetCommRealData로 읽어서
+    이 워커의 큐에 넣고 바로 리턴한다. 워커 스레드 하나가 받은 순서대로 변환해서 실시간 테이블,
+    TickStream, BarAggregator를 갱신하고 RealTimeConsumer들의 큐에 넣는다.
+    큐가 가득 차면 새 이벤트를 버리고 dropped를 센다 (COM 스레드는 기다리지 않음).
+
+    Parameters
+    ---------------------
+    api: API
+    capacity: int
+        큐 크기 (이벤트 수)
+    """
+
+    def __init__(self, api, capacity=65536):
+        self.api = api
+        self.queue = SPSCQueue(capacity)
+        self.running = False
+        self.processed = 0
+        self.errors = 0
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            raise KiwoomError('이전 워커 스레드가 아직 끝나지 않았습니다.')
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name='kiwooma-realtime', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        남은 이벤트를 처리한 후 스레드를 멈춤
+
+        Returns
+        ---------------------
+        stopped: bool
+            timeout 안에 스레드가 끝났는지 여부, False면 남은 이벤트는 그 스레드가 끝나면서 처리
+        """
+        self.running = False
+        self.queue.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive(): # 콜백이 끝나지 않음
+                return False
+            self._thread = None
+        self._drain()
+        return True
+
+    def push(self, code, real_type, plan, strings):
+        """
+        COM 스레드에서 호출
+        """
+        return self.queue.push((code, real_type, plan, strings, time.perf_counter()))
+
+    def _run(self):
+        queue = self.queue
+        while self.running:
+            if not self._drain():
+                queue.wait(0.1)
+        self._drain() # stop()이 기다리다 돌아간 뒤에 들어온 이벤트
+
+    def _drain(self):
+        items = self.queue.pop_all()
+        api = self.api
+        for code, real_type, plan, strings, received in items:
+            try:
+                row = api.real_tables[real_type].update_strings(code, plan, strings)
+                api._publish_real(code, real_type, row, received)
+            except Exception:
+                self.errors += 1
+                traceback.print_exc()
+        self.processed += len(items)
+        return len(items)
+
+    def stats(self):
+        """
+        Returns
+        ---------------------
+        stats: dict
+            running, backlog, processed, dropped, errors
+        """
+        return {'running': self.running, 'backlog': len(self.queue), 'processed': self.processed,
+                'dropped': self.queue.dropped, 'errors': self.errors}
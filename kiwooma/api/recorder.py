@@ -0,0 +1,417 @@
+"""
+OCX 이벤트를 기록하고 다시 재생하는 백엔드
+
+기록: 실제 OCX(또는 SimulatedOCX)를 RecordingOCX로 감싸서 API에 넘긴다.
+
+    ocx = RecordingOCX(create_ocx(), 'session.evlog')
+    easy = EasyAPI(ocx)
+    ...
+    ocx.close()
+
+재생: ReplayOCX를 API에 넘기면 기록한 이벤트가 같은 API 핸들러(_receive_real_data 등)로 전달된다.
+
+    ocx = ReplayOCX('session.evlog', speed=10) # 기록 속도의 10배, speed=None이면 최대한 빠르게
+    easy = EasyAPI(ocx)
+    ocx.run()
+
+실시간/체결 이벤트는 기록된 시각 순서대로 재생되고, TR 응답은 재생 중에 같은 TR(trcode, 입력값, 연속조회)을
+요청하면 기록된 응답으로 돌려준다. 주문은 서버로 보내지 않는다.
+"""
+import time
+from collections import defaultdict
+from datetime import date
+import numpy as np
+from PyQt5.QtCore import QEventLoop, QTimer, pyqtSignal
+from kiwooma.api.backend import OCXBackend
+from kiwooma.api.real_schema import STOCK_TRADE_FIELDS
+from kiwooma.storage.tick_archive import TickArchiveWriter, TICK_COLUMNS
+from kiwooma.storage.event_log import (EventLogWriter, EventLogReader, EVENT_CONNECT, EVENT_TR, EVENT_REAL,
+                                       EVENT_CHEJAN, EVENT_MSG, EVENT_SESSION)
+
+
+# 이벤트 처리 중에 핸들러가 읽는 함수 (이벤트와 같이 기록)
+EVENT_READS = ('GetCommRealData', 'CommGetData', 'GetCommDataEx', 'GetRepeatCnt', 'GetChejanData')
+# 이벤트 밖에서 읽는 로그인/종목 정보 (키마다 처음 한번 기록)
+SESSION_READS = ('GetLoginInfo', 'GetCodeListByMarket', 'GetMasterCodeName', 'KOA_Functions')
+READ_DEFAULTS = {'GetRepeatCnt': 0, 'GetCommDataEx': None}
+
+SIGNALS = ((EVENT_CONNECT, 'OnEventConnect'), (EVENT_TR, 'OnReceiveTrData'), (EVENT_REAL, 'OnReceiveRealData'),
+           (EVENT_CHEJAN, 'OnReceiveChejanData'), (EVENT_MSG, 'OnReceiveMsg'))
+SIGNAL_NAMES = dict(SIGNALS)
+REPLAY_TYPES = (EVENT_REAL, EVENT_CHEJAN, EVENT_MSG) # 시각 순서대로 재생하는 이벤트
+
+OP_ERR_NO_DATA = -203 # 기록된 TR 응답이 없음
+
+
+def _pack_reads(reads):
+    """
+    {(함수, 인자..., 마지막 인자): 값}을 {(함수, 인자...): (마지막 인자들, 값들)}로 묶어서 크기를 줄임
+    (실시간 이벤트는 같은 (GetCommRealData, 실시간 타입)으로 FID 수십개를 읽음)
+    """
+    groups = {}
+    for key, value in reads.items():
+        group = groups.get(key[:-1])
+        if group is None:
+            group = groups[key[:-1]] = ([], [])
+        group[0].append(key[-1])
+        group[1].append(value)
+    return {prefix: (tuple(lasts), tuple(values)) for prefix, (lasts, values) in groups.items()}
+
+
+def _unpack_reads(packed):
+    reads = {}
+    for prefix, (lasts, values) in packed.items():
+        for last, value in zip(lasts, values):
+            reads[prefix + (last,)] = value
+    return reads
+
+
+def _call_name(signature, args):
+    name = signature.split('(', 1)[0].strip()
+    if len(args) == 1 and isinstance(args[0], list):
+        args = args[0]
+    return name, tuple(args)
+
+
+class RecordingOCX(OCXBackend):
+    """
+    다른 OCX 백엔드를 감싸서 모든 이벤트를 EventLogWriter로 기록하는 백엔드
+
+    이벤트 시그널을 그대로 다시 보내면서, 이벤트 인자와 그 이벤트를 처리하는 동안 핸들러가 읽은 값
+    (GetCommRealData, CommGetData, GetCommDataEx, GetRepeatCnt, GetChejanData)을 레코드 하나로 기록한다.
+    TR 응답에는 요청할 때의 (trcode, 입력값, 연속조회)를 같이 기록해서 재생할 때 같은 요청에 응답할 수 있게 한다.
+    감싼 백엔드의 다른 속성은 그대로 읽을 수 있다 (ocx.emit_ticks 등).
+
+    Parameters
+    ---------------------
+    ocx: QAxWidget 또는 OCXBackend
+    path: str
+        로그 파일 경로, 파일이 있으면 이어서 기록
+    index_every: int
+        색인 블록을 쓰는 레코드 간격
+    """
+
+    def __init__(self, ocx, path, index_every=4096):
+        super().__init__()
+        self.ocx = ocx
+        self.writer = EventLogWriter(path, index_every)
+        self.recording = True
+        self._reads = None # 처리 중인 이벤트에서 읽은 값 {(함수, 인자...): 값}
+        self._inputs = [] # CommRqData 전까지 SetInputValue로 넣은 값
+        self._requests = {} # {rqname: (trcode, 입력값, 연속조회)}
+        self._session_keys = set()
+        for event_type, name in SIGNALS:
+            getattr(ocx, name).connect(getattr(self, '_on_' + name))
+
+    def __getattr__(self, name):
+        ocx = self.__dict__.get('ocx')
+        if ocx is None:
+            raise AttributeError(name)
+        return getattr(ocx, name)
+
+    def dynamicCall(self, signature, *args):
+        result = self.ocx.dynamicCall(signature, *args)
+        if not self.recording:
+            return result
+        name, call_args = _call_name(signature, args)
+        if self._reads is not None and name in EVENT_READS:
+            self._reads[(name,) + call_args] = result
+        elif name == 'SetInputValue':
+            self._inputs.append(call_args)
+        elif name == 'CommRqData':
+            rqname, trcode, next = call_args[:3]
+            self._requests[rqname] = (trcode, tuple(sorted(self._inputs)), int(next))
+            self._inputs = []
+        elif name in SESSION_READS:
+            key = (name,) + call_args
+            if key not in self._session_keys:
+                self._session_keys.add(key)
+                self.writer.write(EVENT_SESSION, (key, result))
+        return result
+
+    def _record(self, event_type, signal, args, request=None):
+        if not self.recording:
+            signal.emit(*args)
+            return
+        timestamp = self.writer.now()
+        outer, self._reads = self._reads, {}
+        reads = self._reads
+        try:
+            signal.emit(*args)
+        finally:
+            self._reads = outer
+            self.writer.write(event_type, (args, _pack_reads(reads), request), timestamp)
+
+    def _on_OnEventConnect(self, err_code):
+        self._record(EVENT_CONNECT, self.OnEventConnect, (err_code,))
+
+    def _on_OnReceiveTrData(self, *args):
+        self._record(EVENT_TR, self.OnReceiveTrData, args, self._requests.pop(args[1], None))
+
+    def _on_OnReceiveRealData(self, code, real_type, real_data):
+        self._record(EVENT_REAL, self.OnReceiveRealData, (code, real_type, real_data))
+
+    def _on_OnReceiveChejanData(self, gubun, item_cnt, fid_list):
+        self._record(EVENT_CHEJAN, self.OnReceiveChejanData, (gubun, item_cnt, fid_list))
+
+    def _on_OnReceiveMsg(self, screen_no, rqname, trcode, msg):
+        self._record(EVENT_MSG, self.OnReceiveMsg, (screen_no, rqname, trcode, msg))
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        """
+        기록을 멈추고 마지막 색인 블록을 쓴 후 파일을 닫음
+        """
+        self.recording = False
+        self.writer.close()
+
+
+class ReplayOCX(OCXBackend):
+    """
+    RecordingOCX로 기록한 로그를 재생하는 백엔드
+
+    실시간/체결/메시지 이벤트는 기록된 시각 간격을 speed로 나눈 간격으로 시그널을 보내고,
+    핸들러가 읽는 값은 기록된 값으로 돌려준다. TR 요청은 같은 (trcode, 입력값, 연속조회)로 기록된 응답을
+    순서대로 돌려주고, 기록된 응답이 없으면 OP_ERR_NO_DATA(-203)를 리턴한다.
+    재생은 Qt 이벤트 루프에서 진행되므로 재생 중에도 API의 TR 요청, 타이머 등이 동작한다.
+
+    Parameters
+    ---------------------
+    path: str
+    speed: float
+        재생 속도 배율 (1: 기록 속도), None 또는 0이면 기다리지 않고 최대한 빠르게
+    types: tuple
+        시각 순서대로 재생할 이벤트 종류 (기본값 실시간, 체결, 메시지)
+    start: float
+        재생을 시작할 시각 (기록 시작 후 경과 시간, 초)
+    end: float
+        재생을 멈출 시각
+    login_info: dict
+        기록에 없는 GetLoginInfo 값
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self, path, speed=1.0, types=REPLAY_TYPES, start=None, end=None, login_info=None):
+        super().__init__()
+        self.reader = EventLogReader(path)
+        self.speed = speed
+        self.types = types
+        self.start_time = start
+        self.end_time = end
+        self.connected = 0
+        self.running = False
+        self.replayed = 0
+        self.elapsed = 0.0
+        self._reads = {}
+        self._events = None
+        self._next = None
+        self._origin = None # (재생 시작 perf_counter, 첫 이벤트 기록 시각)
+        self._pumping = False
+        self._started_at = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._pump)
+
+        self.session = {('GetLoginInfo', tag): value for tag, value in (login_info or {}).items()}
+        self._tr_responses = defaultdict(list) # {(trcode, 입력값, 연속조회): [(args, reads), ...]}
+        self._tr_cursor = {}
+        self._inputs = []
+        for event_type, timestamp, payload in self.reader.read(types=(EVENT_TR, EVENT_SESSION)):
+            if event_type == EVENT_SESSION:
+                key, value = payload
+                self.session[tuple(key)] = value
+            elif payload[2] is not None:
+                self._tr_responses[payload[2]].append((payload[0], _unpack_reads(payload[1])))
+
+    def dynamicCall(self, signature, *args):
+        name, call_args = _call_name(signature, args)
+        if name in EVENT_READS:
+            return self._reads.get((name,) + call_args, READ_DEFAULTS.get(name, ''))
+        if name in SESSION_READS:
+            return self.session.get((name,) + call_args, '')
+        return super().dynamicCall(signature, *call_args)
+
+    """
+    ------------------------------
+    | 재생                        |
+    ------------------------------
+    """
+
+    def start(self):
+        """
+        재생을 시작 (이벤트 루프가 돌고 있어야 진행됨)
+        """
+        self._events = self.reader.read(self.start_time, self.end_time, self.types)
+        self._next = next(self._events, None)
+        self._origin = None
+        self._started_at = time.perf_counter()
+        self.running = True
+        self._timer.start(0)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._timer.stop()
+        self._events = self._next = None
+        self.elapsed = time.perf_counter() - self._started_at
+        self.finished.emit()
+
+    def run(self):
+        """
+        재생이 끝날 때까지 이벤트 루프를 돌림
+
+        Returns
+        ---------------------
+        replayed: int
+            재생한 이벤트 수
+        """
+        loop = QEventLoop()
+        self.finished.connect(loop.quit)
+        self.start()
+        if self.running:
+            loop.exec_()
+        self.finished.disconnect(loop.quit)
+        return self.replayed
+
+    def _pump(self, slice_seconds=0.02):
+        """
+        시각이 된 이벤트를 보내고 다음 이벤트 시각에 타이머를 맞춤
+        slice_seconds마다 이벤트 루프로 돌아가서 다른 이벤트가 처리될 수 있게 함
+        """
+        if self._pumping or not self.running:
+            return
+        self._pumping = True
+        try:
+            deadline = time.perf_counter() + slice_seconds
+            while self._next is not None:
+                event_type, timestamp, payload = self._next
+                if self.speed:
+                    now = time.perf_counter()
+                    if self._origin is None:
+                        self._origin = (now, timestamp)
+                    wait = self._origin[0] + (timestamp - self._origin[1]) / self.speed - now
+                    if wait > 0:
+                        self._timer.start(int(wait * 1000))
+                        return
+                self._emit(event_type, payload[0], _unpack_reads(payload[1]))
+                self.replayed += 1
+                if not self.running:
+                    return
+                self._next = next(self._events, None)
+                if time.perf_counter() > deadline:
+                    self._timer.start(0)
+                    return
+        finally:
+            self._pumping = False
+        self.stop()
+
+    def _emit(self, event_type, args, reads):
+        outer, self._reads = self._reads, reads
+        try:
+            getattr(self, SIGNAL_NAMES[event_type]).emit(*args)
+        finally:
+            self._reads = outer
+
+    def stats(self):
+        """
+        Returns
+        ---------------------
+        stats: dict
+            replayed, elapsed, rate(초당 재생한 이벤트 수), running
+        """
+        elapsed = time.perf_counter() - self._started_at if self.running else self.elapsed
+        return {'replayed': self.replayed, 'elapsed': elapsed, 'rate': self.replayed / elapsed if elapsed else 0.0,
+                'running': self.running}
+
+    """
+    ------------------------------
+    | OpenAPI 함수                |
+    ------------------------------
+    """
+
+    def CommConnect(self):
+        self.connected = 1
+        QTimer.singleShot(0, lambda: self.OnEventConnect.emit(0))
+        return 0
+
+    def GetConnectState(self):
+        return self.connected
+
+    def SetInputValue(self, item, value):
+        self._inputs.append((item, value))
+
+    def CommRqData(self, rqname, trcode, next, screen_no):
+        key = (trcode, tuple(sorted(self._inputs)), int(next))
+        self._inputs = []
+        responses = self._tr_responses.get(key)
+        if not responses:
+            return OP_ERR_NO_DATA
+        # 같은 요청이 기록된 것보다 많으면 마지막 응답을 반복
+        cursor = self._tr_cursor.get(key, 0)
+        self._tr_cursor[key] = cursor + 1
+        recorded, reads = responses[min(cursor, len(responses) - 1)]
+        args = (screen_no, rqname) + tuple(recorded[2:])
+        # 핸들러는 이번 rqname으로 읽으므로 기록할 때의 rqname을 바꿔둠
+        reads = {tuple(rqname if value == recorded[1] else value for value in read_key): value
+                 for read_key, value in reads.items()}
+        QTimer.singleShot(0, lambda: self._emit(EVENT_TR, args, reads))
+        return 0
+
+    def SetRealReg(self, screen_no, codes, fids, opt_type):
+        return 0
+
+    def SetRealRemove(self, screen_no, code):
+        return 0
+
+    def SendOrder(self, rqname, screen_no, acc_no, order_type, code, quantity, price, hoga, org_order_no):
+        return 0
+
+
+def archive_event_log(path, root, batch=65536):
+    """
+    RecordingOCX로 기록한 로그의 주식체결 틱을 틱 아카이브(TickArchiveWriter)로 옮기는 함수
+    기록한 날짜별로 finalize까지 하므로 TickArchive(root)로 바로 조회할 수 있다.
+
+    Parameters
+    ---------------------
+    path: str
+        이벤트 로그 파일
+    root: str
+        아카이브 디렉토리
+    batch: int
+        한번에 쓰는 틱 수
+
+    Returns
+    ---------------------
+    count: int
+        옮긴 틱 수
+    """
+    reader = EventLogReader(path)
+    names = set(column[2] for column in TICK_COLUMNS)
+    fields = tuple(field for field in STOCK_TRADE_FIELDS if field[0] in names)
+    dtype = np.dtype([('code', 'U8'), ('recv_time', np.float64)] + [(field[0], field[2]) for field in fields])
+    day = [None]
+    writer = TickArchiveWriter(root, today=lambda: day[0])
+    rows = []
+    for event_type, timestamp, payload in reader.read(types=(EVENT_REAL,)):
+        (code, real_type, real_data), packed = payload[0], payload[1]
+        if real_type != '주식체결':
+            continue
+        recv_time = reader.started + timestamp
+        tick_day = date.fromtimestamp(recv_time)
+        if tick_day != day[0] or len(rows) >= batch:
+            if rows:
+                writer.write(np.array(rows, dtype=dtype))
+                rows = []
+            day[0] = tick_day
+        fids, values = packed.get(('GetCommRealData', real_type), ((), ()))
+        values = dict(zip(fids, values))
+        rows.append((code, recv_time) + tuple(convert(values.get(fid, '')) for name, fid, field_dtype, convert in fields))
+    if rows:
+        writer.write(np.array(rows, dtype=dtype))
+    writer.finalize()
+    return writer.count
@@ -0,0 +1,225 @@
+import heapq
+import itertools
+import time
+import traceback
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_ORDER = 0 # 주문 관련
+PRIORITY_ACCOUNT = 1 # 잔고, 예수금, 미체결 조회
+PRIORITY_QUERY = 2 # 일반 조회
+PRIORITY_BULK = 3 # 차트 등 대량 조회
+
+# 키움 서버의 TR 조회 제한 ((횟수, 초), ...)
+DEFAULT_TR_LIMITS = ((5, 1.0), (100, 60.0), (1000, 3600.0))
+
+# 키움 서버의 주문 제한
+DEFAULT_ORDER_LIMITS = ((5, 1.0),)
+
+OP_ERR_SISE_OVERFLOW = -200 # 시세조회 과부하
+OP_ERR_CONNECT = -101 # 서버 접속 실패
+
+
+class RateLimiter(object):
+    """
+    여러 시간 구간의 요청 횟수 제한을 동시에 지키도록 요청 시점을 계산하는 클래스
+
+    각 구간마다 최근 요청 시각을 기록해두고, 모든 구간에서 횟수가 남아있을 때만 요청을 허용한다.
+
+    Parameters
+    ---------------------
+    limits: tuple
+        ((횟수, 초), ...) 예) ((5, 1.0), (100, 60.0))
+    margin: float
+        서버와의 시간차를 고려해 각 구간에 더해주는 여유시간(초)
+    clock: callable
+        현재 시각(초)을 리턴하는 함수
+    """
+
+    def __init__(self, limits=DEFAULT_TR_LIMITS, margin=0.05, clock=time.monotonic):
+        self.limits = tuple(limits)
+        self.margin = margin
+        self.clock = clock
+        self._history = deque(maxlen=max(count for count, seconds in self.limits))
+        self._blocked_until = 0.0
+
+    def wait_time(self):
+        """
+        다음 요청이 가능할 때까지 남은 시간(초), 지금 가능하면 0
+        """
+        now = self.clock()
+        wait = self._blocked_until - now
+        history = self._history
+        for count, seconds in self.limits:
+            if len(history) >= count:
+                wait = max(wait, history[-count] + seconds + self.margin - now)
+        return max(wait, 0.0)
+
+    def record(self):
+        """
+        요청을 보냈음을 기록
+        """
+        self._history.append(self.clock())
+
+    def penalize(self, seconds):
+        """
+        서버에서 과부하 응답을 받았을 때 seconds 동안 요청을 멈춤
+        """
+        self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+
+
+class TRJob(object):
+    """
+    스케줄러에 등록된 TR 요청 하나
+    """
+
+    def __init__(self, dispatch, priority, name, on_error, submitted):
+        self.dispatch = dispatch
+        self.priority = priority
+        self.name = name
+        self.on_error = on_error
+        self.submitted = submitted
+        self.dispatched = None
+
+
+class TRScheduler(QObject):
+    """
+    TR 요청을 우선순위 큐에 쌓아두고 조회 제한을 지키면서 순서대로 보내는 스케줄러
+
+    주문/잔고 조회처럼 우선순위가 높은 요청은 대기중인 차트 조회보다 먼저 나간다.
+    큐는 Qt 타이머로 처리되므로 대기하는 동안에도 실시간 이벤트는 계속 처리된다.
+
+    Parameters
+    ---------------------
+    limiter: RateLimiter
+    overflow_penalty: float
+        서버가 과부하(-200)를 돌려줬을 때 요청을 멈출 시간(초)
+
+    hold_on_disconnect가 True이면 접속 끊김(-101)을 돌려받은 요청을 실패시키지 않고 큐에 되돌린 후
+    스케줄러를 멈추고 connection_lost 시그널을 보낸다. (ConnectionSupervisor가 재접속 후 resume()을 호출)
+    """
+
+    connection_lost = pyqtSignal()
+
+    def __init__(self, limiter=None, overflow_penalty=1.0):
+        super().__init__()
+        self.limiter = limiter or RateLimiter()
+        self.overflow_penalty = overflow_penalty
+        self.hold_on_disconnect = False
+        self.paused = False
+        self._queue = []
+        self._counter = itertools.count()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+
+        self.dispatched = 0
+        self.overflows = 0
+        self.errors = 0
+        self.wait_times = {} # {우선순위: [건수, 합계, 최대]}
+
+    def submit(self, dispatch, priority=PRIORITY_QUERY, name='', on_error=None):
+        """
+        TR 요청을 큐에 등록
+
+        Parameters
+        ---------------------
+        dispatch: callable
+            실제로 요청을 보내는 함수, CommRqData의 리턴값을 리턴해야 함
+        priority: int
+        name: str
+        on_error: callable
+            on_error(err_code, cause) - 요청이 실패했을 때 호출
+            (dispatch에서 예외가 발생하면 err_code는 None, cause는 그 예외)
+
+        Returns
+        ---------------------
+        job: TRJob
+        """
+        job = TRJob(dispatch, priority, name, on_error, self.limiter.clock())
+        heapq.heappush(self._queue, (priority, next(self._counter), job))
+        self._wake(0)
+        return job
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def pause(self):
+        """
+        큐에 쌓인 요청을 보내지 않고 멈춤 (새 요청은 계속 큐에 등록됨)
+        """
+        self.paused = True
+        self._timer.stop()
+
+    def resume(self):
+        self.paused = False
+        self._wake(0)
+
+    def _wake(self, delay):
+        if self.paused:
+            return
+        msec = int(delay * 1000 + 0.999)
+        if not self._timer.isActive() or self._timer.remainingTime() > msec:
+            self._timer.start(msec)
+
+    def _run(self):
+        while self._queue and not self.paused:
+            wait = self.limiter.wait_time()
+            if wait > 0:
+                self._wake(wait)
+                return
+
+            priority, seq, job = heapq.heappop(self._queue)
+            self.limiter.record()
+            try:
+                ret = job.dispatch()
+            except Exception as e: # 이 요청만 실패시키고 나머지는 계속 보냄
+                self.errors += 1
+                if job.on_error is not None:
+                    job.on_error(None, e)
+                else:
+                    traceback.print_exc()
+                continue
+            if ret == OP_ERR_SISE_OVERFLOW:
+                self.overflows += 1
+                self.limiter.penalize(self.overflow_penalty)
+                heapq.heappush(self._queue, (priority, seq, job))
+                continue
+            if ret == OP_ERR_CONNECT and self.hold_on_disconnect:
+                heapq.heappush(self._queue, (priority, seq, job))
+                self.pause()
+                self.connection_lost.emit()
+                return
+
+            job.dispatched = self.limiter.clock()
+            self.dispatched += 1
+            self._record_wait(job)
+            if ret not in (0, None):
+                self.errors += 1
+                if job.on_error is not None:
+                    job.on_error(ret, None)
+
+    def _record_wait(self, job):
+        wait = job.dispatched - job.submitted
+        stats = self.wait_times.setdefault(job.priority, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += wait
+        stats[2] = max(stats[2], wait)
+
+    def stats(self):
+        """
+        스케줄러 상태를 리턴
+
+        Returns
+        ---------------------
+        stats: dict
+            queue_depth, dispatched, overflows, errors, paused,
+            wait: {우선순위: {'count', 'mean', 'max'}} - 등록부터 전송까지 대기시간(초)
+        """
+        wait = {}
+        for priority, (count, total, maximum) in self.wait_times.items():
+            wait[priority] = {'count': count, 'mean': total / count, 'max': maximum}
+        return {'queue_depth': len(self._queue), 'dispatched': self.dispatched, 'overflows': self.overflows,
+                'errors': self.errors, 'paused': self.paused, 'wait': wait}
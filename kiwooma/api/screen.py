@@ -0,0 +1,44 @@
+class ScreenPool(object):
+    """
+    화면번호를 돌아가면서 할당하는 클래스
+
+    키움은 화면번호 단위로 TR 응답, 연속조회, 실시간 등록을 관리하므로 동시에 진행중인 요청들이
+    서로 다른 화면번호를 쓰도록 한다. 모든 화면번호가 사용중이면 가장 오래전에 할당한 번호부터 다시 쓴다.
+
+    Parameters
+    ---------------------
+    start: int
+        첫 화면번호
+    count: int
+        사용할 화면번호 개수
+    """
+
+    def __init__(self, start, count):
+        self.screens = ['{0:04d}'.format(screen_no) for screen_no in range(start, start + count)]
+        self.in_use = set()
+        self._cursor = 0
+
+    def acquire(self):
+        """
+        사용하지 않는 화면번호를 하나 할당
+
+        Returns
+        ---------------------
+        screen_no: str
+        """
+        size = len(self.screens)
+        index = self._cursor
+        for i in range(size):
+            if self.screens[(self._cursor + i) % size] not in self.in_use:
+                index = (self._cursor + i) % size
+                break
+        self._cursor = (index + 1) % size
+        screen_no = self.screens[index]
+        self.in_use.add(screen_no)
+        return screen_no
+
+    def release(self, screen_no):
+        self.in_use.discard(screen_no)
+
+    def __contains__(self, screen_no):
+        return screen_no in self.screens
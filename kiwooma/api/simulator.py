@@ -0,0 +1,688 @@
+import random
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from functools import partial
+from PyQt5.QtCore import QTimer
+from kiwooma.api.backend import OCXBackend
+from kiwooma.api.tr_schema import get_schema
+from kiwooma.utils import tick_size
+
+
+DEFAULT_CODES = {
+    '005930': ('삼성전자', 0), '000660': ('SK하이닉스', 0), '035420': ('NAVER', 0),
+    '035720': ('카카오', 0), '051910': ('LG화학', 0), '005380': ('현대차', 0),
+    '247540': ('에코프로비엠', 10), '091990': ('셀트리온헬스케어', 10), '293490': ('카카오게임즈', 10),
+    '069500': ('KODEX 200', 8),
+}
+
+INDEX_CODES = {'001', '002', '003', '004', '101', '201', '302', '701'}
+
+# 차트 TR별 (날짜 필드, 봉 간격, 한 페이지 행 개수)
+CHART_TRS = {
+    'opt10081': ('일자', 'day', 600), 'opt10082': ('일자', 'week', 600), 'opt10083': ('일자', 'month', 600),
+    'opt20006': ('일자', 'day', 600), 'opt20007': ('일자', 'week', 600), 'opt20008': ('일자', 'month', 600),
+    'opt10080': ('체결시간', 'minute', 900),
+}
+
+ORDER_CLASS = {1: '+매수', 2: '-매도', 3: '매수취소', 4: '매도취소', 5: '매수정정', 6: '매도정정'}
+
+HOGA_NAME = {'00': '보통', '03': '시장가', '05': '조건부지정가', '06': '최유리지정가', '07': '최우선지정가'}
+
+MAX_REAL_CODES_PER_SCREEN = 100 # 화면번호 하나에 실시간 등록할 수 있는 최대 종목 수
+OP_ERR_REAL_OVERFLOW = -1 # 실시간 등록 종목 수 초과
+OP_ERR_CONNECT = -101 # 서버 접속 실패
+OP_ERR_LOGIN = -100 # 사용자정보교환 실패
+
+
+def make_universe(n, market_no=0, start=900000):
+    """
+    벤치마크용 가상 종목 n개를 만드는 함수
+
+    Returns
+    ---------------------
+    codes: dict
+        {종목코드: (종목명, 시장번호)}
+    """
+    return {'{0:06d}'.format(start + i): ('가상종목{0}'.format(i), market_no) for i in range(n)}
+
+
+class SimulatedOCX(OCXBackend):
+    """
+    키움 서버를 흉내내는 결정적(deterministic) 시뮬레이터 백엔드
+
+    윈도우/키움 단말 없이 API와 EasyAPI를 구동하여 프로파일링, 부하 테스트를 할 수 있게 한다.
+    같은 seed와 설정이면 항상 같은 TR 데이터, 틱, 체결 이벤트가 만들어진다.
+
+    Parameters
+    ---------------------
+    codes: dict
+        {종목코드: (종목명, 시장번호)}, 기본값은 DEFAULT_CODES
+    latency: float
+        TR 요청 후 OnReceiveTrData 이벤트까지의 지연시간(초)
+    order_latency: float
+        주문 후 OnReceiveChejanData 이벤트까지의 지연시간(초)
+    tick_rate: float
+        초당 발생시키는 주식체결 틱 수 (0이면 emit_ticks를 직접 호출할 때만 발생)
+    tr_payloads: dict
+        {trcode: dict or callable}, TR 응답을 직접 지정
+        dict: {'single': {항목: 값}, 'multi': [{항목: 값}, ...]}
+        callable: payload(inputs, next) -> 위와 같은 dict ('next': '2'를 넣으면 연속조회)
+    history: int
+        차트 TR이 돌려주는 전체 봉 개수
+    auto_fill: bool
+        True이면 주문을 즉시 전량 체결시킴, False이면 fill_order로 직접 체결
+    tr_limits: tuple
+        ((횟수, 초), ...) 조회 제한, 넘으면 CommRqData가 -200(조회과부하)을 리턴
+    today: datetime.date
+        시뮬레이터의 기준일 (기본값: 오늘)
+    seed: int
+    """
+
+    def __init__(self, codes=None, latency=0.0, order_latency=0.0, tick_rate=0, tr_payloads=None,
+                 history=2000, auto_fill=True, tr_limits=None, today=None, cash=100000000,
+                 account_no='8000000011', user_id='simuser', seed=0):
+        super().__init__()
+        self.codes = dict(DEFAULT_CODES if codes is None else codes)
+        self.latency = latency
+        self.order_latency = order_latency
+        self.tr_payloads = dict(tr_payloads or {})
+        self.history = history
+        self.auto_fill = auto_fill
+        self.tr_limits = tuple(tr_limits or ())
+        self.today = today or datetime.today().date()
+        self.cash = cash
+        self.account_no = account_no
+        self.user_id = user_id
+        self.seed = seed
+
+        self.connected = 0
+        self.session = 0 # 접속할 때마다 증가, 끊기기 전 세션의 TR 응답은 버림
+        self.fail_connects = 0 # 다음 CommConnect 중 실패시킬 횟수 (재접속 테스트용)
+        self.positions = {} # {종목코드: [보유수량, 매입단가]}
+        self.orders = {} # {주문번호: dict}
+        self.tr_count = 0
+        self.real_call_count = 0 # GetCommRealData 호출 수
+        self.overflow_count = 0
+        self.order_count = 0
+
+        self._inputs = {}
+        self._tr_times = deque(maxlen=max([count for count, seconds in self.tr_limits] or [1]))
+        self._continuation = {} # {(trcode, screen_no): (inputs, 다음 행 위치)}
+        self._responses = {} # {rqname: {'single': dict, 'multi': list}}
+        self._current = {} # 이벤트를 처리중인 TR의 응답
+        self._charts = {}
+        self._quotes = {}
+        self._real_reg = {} # {screen_no: {code: [fids]}}
+        self._real_codes = []
+        self._real_cursor = 0
+        self._real_values = {}
+        self._chejan_values = {}
+        self._clock = 9 * 3600 # 장 시작 이후 경과 시간(초)
+
+        self._tick_timer = QTimer()
+        self._tick_timer.timeout.connect(self._on_tick_timer)
+        self.set_tick_rate(tick_rate)
+
+    def _rng(self, *keys):
+        """
+        seed와 키값으로 결정되는 난수 생성기
+        """
+        key = '|'.join(str(k) for k in keys)
+        return random.Random(zlib.crc32(key.encode('utf-8')) ^ self.seed)
+
+    def _schedule(self, delay, func, *args):
+        QTimer.singleShot(int(delay * 1000), partial(func, *args))
+
+    def base_price(self, code):
+        """
+        종목의 기준가격 (시뮬레이션 시작가격)
+        """
+        if code in INDEX_CODES:
+            return 200000 + zlib.crc32(code.encode('utf-8')) % 100000
+        price = 1000 + zlib.crc32(code.encode('utf-8')) % 200000
+        return price - price % tick_size(price)
+
+    """
+    -------------------
+    | 로그인, 기본정보 |
+    -------------------
+    """
+
+    def CommConnect(self):
+        if self.fail_connects:
+            self.fail_connects -= 1
+            self._schedule(self.latency, self.OnEventConnect.emit, OP_ERR_LOGIN)
+            return 0
+        self.connected = 1
+        self.session += 1
+        self._schedule(self.latency, self.OnEventConnect.emit, 0)
+        return 0
+
+    def disconnect(self, notify=True):
+        """
+        서버 연결 끊김을 흉내낸다.
+
+        Parameters
+        ---------------------
+        notify: bool
+            False이면 OnEventConnect 없이 끊김 (GetConnectState로만 알 수 있음)
+        """
+        self.connected = 0
+        self._real_reg = {}
+        self._real_codes = []
+        if notify:
+            self._schedule(0, self.OnEventConnect.emit, -106)
+
+    def GetConnectState(self):
+        return self.connected
+
+    def GetLoginInfo(self, tag):
+        info = {'ACCOUNT_CNT': '1', 'ACCNO': self.account_no + ';', 'USER_ID': self.user_id,
+                'USER_NAME': '시뮬레이터', 'GetServerGubun': '1'}
+        return info.get(tag, '')
+
+    def KOA_Functions(self, name, param):
+        if name == 'GetServerGubun':
+            return '1'
+        return ''
+
+    def GetCodeListByMarket(self, market):
+        market = int(market)
+        return ''.join(code + ';' for code, (name, market_no) in self.codes.items() if market_no == market)
+
+    def GetMasterCodeName(self, code):
+        return self.codes.get(code, ('', None))[0]
+
+    """
+    -----------
+    | TR 조회 |
+    -----------
+    """
+
+    def SetInputValue(self, item, value):
+        self._inputs[item] = str(value)
+
+    def CommRqData(self, rqname, trcode, next, screen_no):
+        inputs, self._inputs = self._inputs, {}
+        if not self.connected:
+            return OP_ERR_CONNECT
+        now = time.monotonic()
+        for count, seconds in self.tr_limits:
+            if len(self._tr_times) >= count and now - self._tr_times[-count] < seconds:
+                self.overflow_count += 1
+                return -200
+        self._tr_times.append(now)
+        self.tr_count += 1
+        response = self._make_response(trcode, inputs, int(next), screen_no)
+        self._schedule(self.latency, self._emit_tr, screen_no, rqname, trcode, response, self.session)
+        return 0
+
+    def _emit_tr(self, screen_no, rqname, trcode, response, session=None):
+        if session is not None and session != self.session or not self.connected:
+            return # 응답 전에 접속이 끊김
+        self._responses[rqname] = self._current = response
+        self.OnReceiveTrData.emit(screen_no, rqname, trcode, '', response.get('next', '0'), 0, '', '', '')
+
+    def CommGetData(self, trcode, real_type, rqname, index, item_name):
+        response = self._responses.get(rqname)
+        if response is None:
+            return ''
+        if index == 0 and item_name in response['single']:
+            return response['single'][item_name]
+        try:
+            return response['multi'][index].get(item_name, '')
+        except IndexError:
+            return ''
+
+    def GetCommDataEx(self, trcode, record_name):
+        multi = self._current.get('multi')
+        schema = get_schema(trcode)
+        if not multi or schema is None or not schema.columns:
+            return None
+        return [[row.get(item, '') for item in schema.columns] for row in multi]
+
+    def GetRepeatCnt(self, trcode, rqname):
+        response = self._responses.get(rqname)
+        if response is None:
+            return 0
+        return len(response['multi'])
+
+    def _make_response(self, trcode, inputs, next, screen_no):
+        if trcode in self.tr_payloads:
+            payload = self.tr_payloads[trcode]
+            if callable(payload):
+                payload = payload(inputs, next)
+            return {'single': payload.get('single', {}), 'multi': payload.get('multi', []),
+                    'next': payload.get('next', '0')}
+
+        if trcode in CHART_TRS:
+            return self._chart_response(trcode, inputs, next, screen_no)
+
+        handler = getattr(self, '_tr_' + trcode, None)
+        if handler is None:
+            return {'single': {}, 'multi': [], 'next': '0'}
+        return handler(inputs)
+
+    def _chart_response(self, trcode, inputs, next, screen_no):
+        key = (trcode, screen_no)
+        if next == 2 and key in self._continuation:
+            inputs, start = self._continuation[key]
+        else:
+            start = 0
+
+        date_item, interval, page_size = CHART_TRS[trcode]
+        code = inputs.get('업종코드') if trcode.startswith('opt2') else inputs.get('종목코드')
+        base_date = inputs.get('기준일자', self.today.strftime('%Y%m%d'))
+        rows = self.chart(code, interval, base_date, inputs.get('틱범위', '1'))
+
+        page = rows[start:start + page_size]
+        if start + page_size < len(rows):
+            self._continuation[key] = (inputs, start + page_size)
+            prev_next = '2'
+        else:
+            self._continuation.pop(key, None)
+            prev_next = '0'
+
+        single = {'종목코드': code or ''} if date_item == '일자' else {}
+        return {'single': single, 'multi': page, 'next': prev_next}
+
+    def chart(self, code, interval, base_date, tick='1'):
+        """
+        최신 봉부터 과거 순서로 정렬된 차트 데이터를 리턴 (TR 응답 문자열 형식)
+        """
+        key = (code, interval, base_date, str(tick))
+        if key in self._charts:
+            return self._charts[key]
+
+        rng = self._rng('chart', code, interval)
+        is_index = code in INDEX_CODES
+        minutely = interval == 'minute'
+        date_item = '체결시간' if minutely else '일자'
+
+        dates = self._chart_dates(interval, datetime.strptime(base_date, '%Y%m%d'), int(tick))
+        close = self.base_price(code)
+        rows = []
+        for i, date in enumerate(dates):
+            step = close * rng.gauss(0, 0.003 if minutely else 0.02)
+            prev_close = max(1, int(close - step))
+            open_ = max(1, int(prev_close + rng.gauss(0, abs(step) + 1)))
+            high = max(open_, close, prev_close) + int(abs(rng.gauss(0, close * 0.005)))
+            low = max(1, min(open_, close, prev_close) - int(abs(rng.gauss(0, close * 0.005))))
+            if not is_index:
+                open_, high, low = (p - p % tick_size(p) for p in (open_, high, low))
+                low = max(low, tick_size(low))
+            volume = int(rng.expovariate(1.0) * (3000 if minutely else 300000))
+
+            row = {date_item: date, '시가': open_, '고가': high, '저가': low, '현재가': close, '거래량': volume}
+            if minutely: # 분봉은 전일 대비 부호가 붙어서 내려옴
+                sign = '-' if close < prev_close else '+'
+                for item in ('시가', '고가', '저가', '현재가'):
+                    row[item] = sign + str(row[item])
+            row = {item: str(value) for item, value in row.items()}
+            row['거래대금'] = str(volume * close // 1000000)
+            rows.append(row)
+            close = prev_close if is_index else max(tick_size(prev_close), prev_close - prev_close % tick_size(prev_close))
+
+        self._charts[key] = rows
+        return rows
+
+    def _chart_dates(self, interval, base, tick):
+        dates = []
+        if interval == 'minute':
+            day = base.replace(hour=15, minute=30)
+            current = day
+            while len(dates) < self.history:
+                if current.weekday() < 5:
+                    dates.append(current.strftime('%Y%m%d%H%M%S'))
+                current -= timedelta(minutes=tick)
+                if current.hour < 9:
+                    day -= timedelta(days=1)
+                    current = day
+            return dates
+
+        step = {'day': 1, 'week': 7, 'month': 30}[interval]
+        current = base
+        while len(dates) < self.history:
+            if current.weekday() < 5 or interval != 'day':
+                dates.append(current.strftime('%Y%m%d'))
+            current -= timedelta(days=step)
+        return dates
+
+    def _tr_opt10001(self, inputs):
+        code = inputs.get('종목코드', '')
+        price = self.quote(code)['price']
+        base = self.base_price(code)
+        single = {
+            '종목코드': code, '종목명': self.GetMasterCodeName(code), '결산월': '12', '액면가': '100', '자본금': '7780',
+            '상장주식': '5969783', '신용비율': '+0.15', '연중최고': '+' + str(base * 12 // 10),
+            '연중최저': '-' + str(base * 8 // 10), '시가총액': str(price * 59697 // 1000000), '시가총액비중': '',
+            '외인소진률': '+52.31', '대용가': str(base * 7 // 10), 'PER': '12.34', 'EPS': '5777', 'ROE': '9.2',
+            'PBR': '1.41', 'EV': '4.12', '매출액': '2589355', '영업이익': '65670', '당기순이익': '154873',
+            '250최고': '+' + str(base * 13 // 10), '250최저': '-' + str(base * 7 // 10), '시가': '+' + str(base),
+            '고가': '+' + str(max(base, price)), '저가': '-' + str(min(base, price)), '상한가': '+' + str(self.limit_price(code, 1)),
+            '하한가': '-' + str(self.limit_price(code, -1)), '기준가': str(base), '예상체결가': '-0', '예상체결수량': '0',
+            '250최고가일': '20260115', '250최고가대비율': '-8.42', '250최저가일': '20251104', '250최저가대비율': '+31.07',
+            '현재가': '{0:+d}'.format(price), '대비기호': '2' if price >= base else '5', '전일대비': '{0:+d}'.format(price - base),
+            '등락율': '{0:+.2f}'.format((price - base) * 100.0 / base), '거래량': str(self.quote(code)['acc_volume']),
+            '거래대비': '+85.23', '액면가단위': '원',
+        }
+        return {'single': single, 'multi': [], 'next': '0'}
+
+    def limit_price(self, code, direction):
+        """
+        상한가(direction=1) / 하한가(direction=-1)
+        """
+        base = self.base_price(code)
+        price = int(base * (1 + 0.3 * direction))
+        return price - price % tick_size(price)
+
+    def _tr_opw00001(self, inputs):
+        cash = '{0:015d}'.format(self.cash)
+        single = {'예수금': cash, 'd+1추정예수금': cash, 'd+2추정예수금': cash, '출금가능금액': cash,
+                  'd+1출금가능금액': cash, 'd+2출금가능금액': cash}
+        return {'single': single, 'multi': [], 'next': '0'}
+
+    def _tr_opw00018(self, inputs):
+        multi = []
+        total_buy = total_eval = 0
+        for code, (quantity, avg_price) in self.positions.items():
+            if quantity == 0:
+                continue
+            price = self.quote(code)['price']
+            buy, evaluation = quantity * avg_price, quantity * price
+            total_buy += buy
+            total_eval += evaluation
+            multi.append({
+                '종목번호': 'A' + code, '종목명': self.GetMasterCodeName(code), '보유수량': '{0:015d}'.format(quantity),
+                '매입가': '{0:015d}'.format(avg_price), '현재가': '{0:015d}'.format(price),
+                '평가손익': '{0:015d}'.format(evaluation - buy), '수익률(%)': '{0:.2f}'.format((price - avg_price) * 100.0 / avg_price if avg_price else 0),
+                '전일종가': '{0:015d}'.format(self.base_price(code)), '매매가능수량': '{0:015d}'.format(quantity),
+                '매입금액': '{0:015d}'.format(buy), '평가금액': '{0:015d}'.format(evaluation),
+            })
+        single = {'총매입금액': '{0:015d}'.format(total_buy), '총평가금액': '{0:015d}'.format(total_eval),
+                  '총평가손익금액': '{0:015d}'.format(total_eval - total_buy),
+                  '총수익률(%)': '{0:.2f}'.format((total_eval - total_buy) * 100.0 / total_buy if total_buy else 0),
+                  '추정예탁자산': '{0:015d}'.format(self.cash + total_eval), '조회건수': '{0:04d}'.format(len(multi))}
+        return {'single': single, 'multi': multi, 'next': '0'}
+
+    def _tr_opt10075(self, inputs):
+        executed = inputs.get('체결구분') == '2'
+        multi = []
+        for order in self.orders.values():
+            if executed != (order['remained'] == 0):
+                continue
+            multi.append({
+                '계좌번호': self.account_no, '주문번호': order['order_no'], '종목코드': order['code'],
+                '주문상태': order['state'], '종목명': self.GetMasterCodeName(order['code']),
+                '주문수량': str(order['quantity']), '주문가격': str(order['price']), '미체결수량': str(order['remained']),
+                '원주문번호': order['org_order_no'], '주문구분': ORDER_CLASS[order['order_type']],
+                '체결가': str(order['exec_price']), '체결량': str(order['quantity'] - order['remained']),
+            })
+        return {'single': {}, 'multi': multi, 'next': '0'}
+
+    """
+    -------------
+    | 실시간 시세 |
+    -------------
+    """
+
+    def quote(self, code):
+        """
+        종목의 현재 시세 상태
+        """
+        if code not in self._quotes:
+            price = self.base_price(code)
+            self._quotes[code] = {'price': price, 'open': price, 'high': price, 'low': price,
+                                  'acc_volume': 0, 'acc_value': 0, 'buy_volume': 1, 'sell_volume': 1,
+                                  'rng': self._rng('tick', code)}
+        return self._quotes[code]
+
+    def SetRealReg(self, screen_no, codes, fids, opt_type):
+        codes = [code for code in codes.split(';') if code]
+        fids = [int(fid) for fid in str(fids).split(';') if fid]
+        if str(opt_type) == '0':
+            self._real_reg[screen_no] = {}
+        registered = self._real_reg.setdefault(screen_no, {})
+        if len(set(registered) | set(codes)) > MAX_REAL_CODES_PER_SCREEN:
+            return OP_ERR_REAL_OVERFLOW
+        for code in codes:
+            registered[code] = fids
+        self._update_real_codes()
+        return 0
+
+    def SetRealRemove(self, screen_no, code):
+        screens = list(self._real_reg) if screen_no == 'ALL' else [screen_no]
+        for screen in screens:
+            if code == 'ALL':
+                self._real_reg.pop(screen, None)
+            elif code in self._real_reg.get(screen, {}):
+                del self._real_reg[screen][code]
+        self._update_real_codes()
+
+    def _update_real_codes(self):
+        codes = []
+        for registered in self._real_reg.values():
+            codes.extend(code for code in registered if code not in codes)
+        self._real_codes = codes
+
+    def set_tick_rate(self, tick_rate):
+        """
+        초당 자동으로 발생시킬 틱 수를 설정 (0이면 중지)
+        """
+        self.tick_rate = tick_rate
+        if tick_rate > 0:
+            self._tick_timer.start(max(1, int(1000 / tick_rate)))
+        else:
+            self._tick_timer.stop()
+
+    def _on_tick_timer(self):
+        interval = self._tick_timer.interval()
+        self.emit_ticks(max(1, int(round(self.tick_rate * interval / 1000.0))))
+
+    def emit_ticks(self, n=1):
+        """
+        등록된 종목들에 대해 돌아가면서 주식체결 틱 n개를 발생시킨다.
+        """
+        if not self._real_codes:
+            return 0
+        for _ in range(n):
+            code = self._real_codes[self._real_cursor % len(self._real_codes)]
+            self._real_cursor += 1
+            self.emit_tick(code)
+        return n
+
+    def emit_tick(self, code, price=None, volume=None):
+        """
+        code 종목의 주식체결 틱 하나를 발생시킨다.
+        """
+        quote = self.quote(code)
+        rng = quote['rng']
+        last = quote['price']
+        if price is None:
+            price = max(tick_size(last), last + tick_size(last) * rng.choice((-1, 0, 0, 1)))
+        if volume is None:
+            volume = int(rng.expovariate(1.0) * 50) + 1
+        side = 1 if price >= last else -1
+
+        quote['price'] = price
+        quote['high'] = max(quote['high'], price)
+        quote['low'] = min(quote['low'], price)
+        quote['acc_volume'] += volume
+        quote['acc_value'] += price * volume
+        quote['buy_volume' if side > 0 else 'sell_volume'] += volume
+        self._clock += 1.0 / max(1, len(self._real_codes))
+
+        base = self.base_price(code)
+        clock = int(self._clock)
+        values = {
+            20: '{0:02d}{1:02d}{2:02d}'.format(clock // 3600, clock // 60 % 60, clock % 60),
+            10: '{0:+d}'.format(price), 11: '{0:+d}'.format(price - base),
+            12: '{0:+.2f}'.format((price - base) * 100.0 / base),
+            27: '{0:+d}'.format(price + tick_size(price)), 28: '{0:+d}'.format(price),
+            15: '{0:+d}'.format(volume * side), 13: str(quote['acc_volume']), 14: str(quote['acc_value'] // 1000000),
+            16: '{0:+d}'.format(quote['open']), 17: '{0:+d}'.format(quote['high']), 18: '{0:+d}'.format(quote['low']),
+            25: '2' if price >= base else '5', 26: '+0', 29: '+0', 30: '+0.00', 31: '0.00', 32: '0',
+            228: '{0:.2f}'.format(quote['buy_volume'] * 100.0 / quote['sell_volume']),
+            311: str(price * 59697 // 1000000), 290: '2',
+        }
+        self._real_values = values
+        self.OnReceiveRealData.emit(code, '주식체결', '\t'.join(values.values()))
+
+    def emit_order_book(self, code, depth=10):
+        """
+        code 종목의 현재가 주변으로 주식호가잔량 이벤트 하나를 발생시킨다.
+        """
+        quote = self.quote(code)
+        rng = quote['rng']
+        price = quote['price']
+        tick = tick_size(price)
+        clock = int(self._clock)
+        values = {21: '{0:02d}{1:02d}{2:02d}'.format(clock // 3600, clock // 60 % 60, clock % 60)}
+        ask_total = bid_total = 0
+        for i in range(1, depth + 1):
+            ask_qty, bid_qty = rng.randint(1, 5000), rng.randint(1, 5000)
+            ask_total += ask_qty
+            bid_total += bid_qty
+            values[40 + i] = '{0:+d}'.format(price + tick * i)
+            values[50 + i] = '{0:+d}'.format(price - tick * (i - 1))
+            values[60 + i] = str(ask_qty)
+            values[70 + i] = str(bid_qty)
+        values.update({121: str(ask_total), 125: str(bid_total), 23: '{0:+d}'.format(price), 24: '0'})
+        self._real_values = values
+        self.OnReceiveRealData.emit(code, '주식호가잔량', '\t'.join(values.values()))
+
+    def emit_best_quote(self, code):
+        """
+        code 종목의 주식우선호가 이벤트 하나를 발생시킨다.
+        """
+        price = self.quote(code)['price']
+        values = {27: '{0:+d}'.format(price + tick_size(price)), 28: '{0:+d}'.format(price)}
+        self._real_values = values
+        self.OnReceiveRealData.emit(code, '주식우선호가', '\t'.join(values.values()))
+
+    def emit_market_status(self, status, remaining=0):
+        """
+        장시작시간 이벤트를 발생시킨다.
+
+        Parameters
+        ---------------------
+        status: str
+            장운영구분 ('0': 장시작전, '3': 장시작, '2': 장마감전 동시호가, '4': 장종료 ...)
+        remaining: int
+            장시작예상잔여시간 (HHMMSS)
+        """
+        clock = int(self._clock)
+        values = {215: str(status), 20: '{0:02d}{1:02d}{2:02d}'.format(clock // 3600, clock // 60 % 60, clock % 60),
+                  214: '{0:06d}'.format(remaining)}
+        self._real_values = values
+        self.OnReceiveRealData.emit('', '장시작시간', '\t'.join(values.values()))
+
+    def GetCommRealData(self, real_type, fid):
+        self.real_call_count += 1
+        return self._real_values.get(fid, '')
+
+    """
+    ---------
+    | 주문 |
+    ---------
+    """
+
+    def SendOrder(self, rqname, screen_no, acc_no, order_type, code, quantity, price, hoga, org_order_no):
+        if not self.connected:
+            return OP_ERR_CONNECT
+        order_type, quantity, price = int(order_type), int(quantity), int(price)
+        if order_type not in ORDER_CLASS or (order_type in (1, 2) and quantity <= 0):
+            return -308 # 주문입력값 오류
+
+        self.order_count += 1
+        order_no = '{0:07d}'.format(self.order_count)
+        response = {'single': {'주문번호': order_no}, 'multi': [], 'next': '0'}
+        self._schedule(self.latency, self._emit_tr, screen_no, rqname, '', response, self.session)
+
+        if order_type in (1, 2):
+            if hoga == '03' or price == 0:
+                price = self.quote(code)['price']
+            order = {'order_no': order_no, 'org_order_no': org_order_no, 'code': code, 'order_type': order_type,
+                     'quantity': quantity, 'price': price, 'remained': quantity, 'exec_price': 0,
+                     'state': '접수', 'hoga': hoga}
+            self.orders[order_no] = order
+            self._schedule(self.order_latency, self._emit_order, order_no, '접수')
+            if self.auto_fill:
+                self._schedule(self.order_latency, self.fill_order, order_no)
+        else:
+            original = self.orders.get(org_order_no)
+            if original is None:
+                return -308
+            order = {'order_no': order_no, 'org_order_no': org_order_no, 'code': code, 'order_type': order_type,
+                     'quantity': quantity or original['remained'], 'price': price, 'remained': 0, 'exec_price': 0,
+                     'state': '접수', 'hoga': hoga}
+            self.orders[order_no] = order
+            self._schedule(self.order_latency, self._cancel_or_modify, order_no)
+        return 0
+
+    def _cancel_or_modify(self, order_no):
+        order = self.orders[order_no]
+        self._emit_order(order_no, '접수') # 실서버처럼 취소/정정 주문도 접수 후 확인
+        original = self.orders[order['org_order_no']]
+        quantity = min(order['quantity'], original['remained'])
+        original['remained'] -= quantity
+        order['state'] = '확인'
+        if order['order_type'] in (5, 6): # 정정은 남은 수량을 새 주문으로 이어받음
+            order['remained'] = quantity
+        self._emit_order(order_no, '확인')
+        if order['order_type'] in (5, 6) and self.auto_fill:
+            order['order_type'] -= 4 # 체결은 원래 매수/매도로 처리
+            self.fill_order(order_no)
+
+    def fill_order(self, order_no, quantity=None, price=None):
+        """
+        주문을 체결시키고 체결/잔고 통보를 발생시킨다.
+        """
+        order = self.orders[order_no]
+        quantity = order['remained'] if quantity is None else min(quantity, order['remained'])
+        if quantity <= 0:
+            return
+        price = order['price'] if price is None else price
+        order['remained'] -= quantity
+        order['exec_price'] = price
+        order['state'] = '체결'
+
+        code = order['code']
+        held, avg_price = self.positions.get(code, [0, 0])
+        if order['order_type'] == 1:
+            avg_price = (held * avg_price + quantity * price) // (held + quantity)
+            held += quantity
+            self.cash -= quantity * price
+        else:
+            held -= quantity
+            self.cash += quantity * price
+        self.positions[code] = [held, avg_price if held else 0]
+
+        self._emit_order(order_no, '체결', quantity, price)
+        self._chejan_values = {
+            9201: self.account_no, 9001: 'A' + code, 302: self.GetMasterCodeName(code), 10: str(self.quote(code)['price']),
+            930: str(held), 931: str(avg_price), 932: str(held * avg_price), 933: str(held), 945: str(held),
+            946: '2' if order['order_type'] == 1 else '1', 951: str(self.cash), 307: str(self.base_price(code)),
+        }
+        self.OnReceiveChejanData.emit('1', len(self._chejan_values), ';'.join(str(fid) for fid in self._chejan_values))
+
+    def _emit_order(self, order_no, state, quantity=0, price=0):
+        order = self.orders[order_no]
+        clock = int(self._clock)
+        self._chejan_values = {
+            9201: self.account_no, 9203: order_no, 9001: 'A' + order['code'], 913: state,
+            302: self.GetMasterCodeName(order['code']), 900: str(order['quantity']), 901: str(order['price']),
+            902: str(order['remained']), 903: str(order['exec_price'] * (order['quantity'] - order['remained'])),
+            904: order['org_order_no'] or '0000000', 905: ORDER_CLASS[order['order_type']],
+            906: HOGA_NAME.get(order['hoga'], '보통'), 907: '2' if order['order_type'] in (1, 3, 5) else '1',
+            908: '{0:02d}{1:02d}{2:02d}'.format(clock // 3600, clock // 60 % 60, clock % 60),
+            909: str(self.order_count) if quantity else '', 910: str(price) if quantity else '',
+            911: str(quantity) if quantity else '', 10: str(self.quote(order['code'])['price']),
+            914: str(price) if quantity else '', 915: str(quantity) if quantity else '', 938: '0', 939: '0',
+        }
+        self.OnReceiveChejanData.emit('0', len(self._chejan_values), ';'.join(str(fid) for fid in self._chejan_values))
+
+    def GetChejanData(self, fid):
+        return self._chejan_values.get(fid, '')
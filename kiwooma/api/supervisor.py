@@ -0,0 +1,179 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+# 접속 상태
+CONNECTED = 'connected'
+DISCONNECTED = 'disconnected'
+RECONNECTING = 'reconnecting'
+
+
+class ConnectionSupervisor(QObject):
+    """
+    접속 상태를 감시하다가 끊기면 재접속하고 세션 상태를 되살리는 클래스
+
+    OnEventConnect의 에러코드, 스케줄러가 받은 접속 끊김(-101), 주기적인 GetConnectState 확인으로
+    끊김을 감지한다. 끊기면 TR/주문 스케줄러를 멈추고, backoff(초)부터 두배씩 늘려가며 max_backoff까지
+    CommConnect를 다시 시도한다. 재접속되면 실시간 등록을 다시 하고(RealTimeManager.resubscribe),
+    보냈지만 응답을 못받은 TR을 다시 큐에 넣은 후 스케줄러를 재개한다.
+
+    주문은 서버에 전달되었는지 알 수 없으므로 다시 보내지 않는다. 재접속 후 reconnected 시그널에서
+    잔고/미체결을 다시 조회한다.
+
+    Parameters
+    ---------------------
+    api: API
+    check_interval: float
+        GetConnectState를 확인하는 주기(초), 0이면 확인하지 않음
+    backoff: float
+        첫 재접속 대기시간(초)
+    max_backoff: float
+        최대 재접속 대기시간(초)
+    connect_timeout: float
+        CommConnect 후 OnEventConnect를 기다리는 시간(초), 지나면 실패로 보고 다시 시도
+    max_attempts: int
+        최대 재접속 시도 횟수, None이면 무제한
+    """
+
+    disconnected = pyqtSignal(int) # 에러코드
+    reconnecting = pyqtSignal(int, float) # 시도 횟수, 대기시간(초)
+    reconnected = pyqtSignal()
+    gave_up = pyqtSignal()
+
+    def __init__(self, api, check_interval=5.0, backoff=1.0, max_backoff=60.0, connect_timeout=30.0,
+                 max_attempts=None):
+        super().__init__()
+        self.api = api
+        self.check_interval = check_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.max_attempts = max_attempts
+        self.state = DISCONNECTED
+        self.active = False
+        self.attempts = 0
+        self.disconnects = 0
+        self.reconnects = 0
+
+        self._check_timer = QTimer(self)
+        self._check_timer.timeout.connect(self._check_state)
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._connect)
+        self._timeout_timer = QTimer(self)
+        self._timeout_timer.setSingleShot(True)
+        self._timeout_timer.timeout.connect(lambda: self._connect_failed(None))
+
+    @property
+    def schedulers(self):
+        return (self.api.scheduler, self.api.orders.scheduler)
+
+    def start(self):
+        """
+        감시를 시작 (로그인 후 호출)
+        """
+        if self.active:
+            return
+        self.active = True
+        self.state = CONNECTED
+        for scheduler in self.schedulers:
+            scheduler.hold_on_disconnect = True
+            scheduler.connection_lost.connect(self._connection_lost)
+        if self.check_interval:
+            self._check_timer.start(int(self.check_interval * 1000))
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        for scheduler in self.schedulers:
+            scheduler.hold_on_disconnect = False
+            scheduler.connection_lost.disconnect(self._connection_lost)
+        for timer in (self._check_timer, self._retry_timer, self._timeout_timer):
+            timer.stop()
+
+    def on_event_connect(self, err_code):
+        """
+        API._event_connect에서 호출
+        """
+        if not self.active:
+            return
+        if err_code == 0:
+            if self.state != CONNECTED:
+                self._connected()
+        elif self.state == RECONNECTING:
+            self._connect_failed(err_code)
+        else:
+            self._lost(err_code)
+
+    def _check_state(self):
+        if self.state == CONNECTED and not self.api.get_connect_state():
+            self._lost(0)
+
+    def _connection_lost(self):
+        if self.state == CONNECTED:
+            self._lost(0)
+
+    def _lost(self, err_code):
+        """
+        접속이 끊겼을 때: 스케줄러를 멈추고 재접속을 예약
+        """
+        if self.state != CONNECTED:
+            return
+        self.state = DISCONNECTED
+        self.disconnects += 1
+        self.attempts = 0
+        for scheduler in self.schedulers:
+            scheduler.pause()
+        self.api.realtime.on_disconnected()
+        self.disconnected.emit(err_code)
+        self._schedule_retry()
+
+    def _schedule_retry(self):
+        if self.max_attempts is not None and self.attempts >= self.max_attempts:
+            self.state = DISCONNECTED
+            self.gave_up.emit()
+            return
+        delay = min(self.backoff * 2 ** self.attempts, self.max_backoff)
+        self.attempts += 1
+        self.state = RECONNECTING
+        self.reconnecting.emit(self.attempts, delay)
+        self._retry_timer.start(int(delay * 1000))
+
+    def _connect(self):
+        if self.connect_timeout:
+            self._timeout_timer.start(int(self.connect_timeout * 1000))
+        ret = self.api.ocx.dynamicCall("CommConnect()")
+        if ret not in (0, None):
+            self._connect_failed(ret)
+
+    def _connect_failed(self, err_code):
+        if self.state != RECONNECTING or self._retry_timer.isActive():
+            return
+        self._timeout_timer.stop()
+        self._schedule_retry()
+
+    def _connected(self):
+        """
+        재접속 후: 실시간 재등록(API._event_connect에서 처리됨), 응답을 못받은 TR 재요청,
+        주문번호를 못받은 주문 실패 처리(OrderStateUnknownError), 스케줄러 재개
+        """
+        self._timeout_timer.stop()
+        self._retry_timer.stop()
+        self.state = CONNECTED
+        self.attempts = 0
+        self.reconnects += 1
+        self.api.requeue_in_flight()
+        self.api.orders.abandon_in_flight()
+        for scheduler in self.schedulers:
+            scheduler.resume()
+        self.reconnected.emit()
+
+    def stats(self):
+        """
+        Returns
+        ---------------------
+        stats: dict
+            state, disconnects, reconnects, attempts
+        """
+        return {'state': self.state, 'disconnects': self.disconnects, 'reconnects': self.reconnects,
+                'attempts': self.attempts}
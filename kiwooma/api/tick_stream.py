@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+import numpy as np
+from kiwooma.api.real_schema import STOCK_TRADE_FIELDS
+
+
+# 버퍼가 가득 찼을 때의 처리 방식
+DROP_OLDEST = 'drop_oldest' # 새 틱을 쓰고, 읽지 못한 오래된 틱은 느린 소비자에게서 버려짐
+DROP_NEWEST = 'drop_newest' # 가장 느린 소비자가 읽을 때까지 새 틱을 버림
+BLOCK = 'block' # 가장 느린 소비자가 읽을 때까지 기다림 (block_timeout이 지나면 새 틱을 버림)
+
+
+class TickStream(object):
+    """
+    실시간 틱을 빠짐없이 순서대로 담는 고정 크기 링버퍼
+
+    틱마다 일련번호(seq)를 붙여 구조체 배열에 쓰고, 소비자(TickConsumer)는 각자 읽은 위치를 따로 관리한다.
+    생산자(Qt 스레드)는 슬롯을 다 쓴 후에 head를 올리고, 소비자는 복사한 후 head를 다시 확인해서
+    그 사이 덮어써진 틱을 걸러내므로 틱마다 락을 잡지 않는다.
+
+    Parameters
+    ---------------------
+    capacity: int
+        버퍼에 담을 틱 수
+    fields: tuple
+        ((이름, FID, dtype, 변환함수), ...) QuoteTable과 같은 형식
+    overflow: str
+        DROP_OLDEST, DROP_NEWEST, BLOCK
+    codes: iterable
+        담을 종목코드, None이면 전체
+    block_timeout: float
+        BLOCK일 때 기다릴 최대 시간(초), None이면 무한정 기다림
+    """
+
+    def __init__(self, capacity=65536, fields=STOCK_TRADE_FIELDS, overflow=DROP_OLDEST, codes=None, block_timeout=1.0):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError('overflow must be one of {0}, {1}, {2}'.format(DROP_OLDEST, DROP_NEWEST, BLOCK))
+
+        self.capacity = capacity
+        self.overflow = overflow
+        self.codes = None if codes is None else set(codes)
+        self.block_timeout = block_timeout
+        self.names = tuple(field[0] for field in fields)
+        self.dtype = np.dtype([('seq', np.int64), ('code', 'U8'), ('recv_time', np.float64)] +
+                              [(field[0], field[2]) for field in fields])
+        self.buffer = np.zeros(capacity, dtype=self.dtype)
+
+        self.head = 0 # 다음에 쓸 일련번호
+        self.dropped = 0 # DROP_NEWEST/BLOCK으로 버린 틱 수
+        self.consumers = []
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    def wants(self, code):
+        return self.codes is None or code in self.codes
+
+    def publish(self, code, values):
+        """
+        틱 하나를 버퍼에 쓴다.
+
+        Parameters
+        ---------------------
+        code: str
+        values: sequence
+            fields 순서의 변환된 값
+
+        Returns
+        ---------------------
+        seq: int
+            틱의 일련번호, 버렸으면 -1
+        """
+        seq = self.head
+        if self.overflow != DROP_OLDEST and self.consumers and seq - self._slowest() >= self.capacity:
+            if self.overflow == DROP_NEWEST or not self._wait_for_space(seq):
+                self.dropped += 1
+                return -1
+
+        self.buffer[seq % self.capacity] = (seq, code, time.time()) + tuple(values)
+        self.head = seq + 1 # 슬롯을 다 쓴 후에 공개
+
+        if self._waiting:
+            with self._cond:
+                self._cond.notify_all()
+        return seq
+
+    def _slowest(self):
+        return min(consumer.cursor for consumer in self.consumers)
+
+    def _wait_for_space(self, seq):
+        deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+        with self._cond:
+            while self.consumers and seq - self._slowest() >= self.capacity:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self._waiting += 1
+                try:
+                    self._cond.wait(timeout)
+                finally:
+                    self._waiting -= 1
+        return True
+
+    def subscribe(self, from_start=False):
+        """
+        소비자를 등록
+
+        Parameters
+        ---------------------
+        from_start: bool
+            True이면 버퍼에 남아있는 가장 오래된 틱부터, False이면 다음 틱부터 읽음
+
+        Returns
+        ---------------------
+        consumer: TickConsumer
+        """
+        cursor = max(self.head - self.capacity, 0) if from_start else self.head
+        consumer = TickConsumer(self, cursor)
+        self.consumers.append(consumer)
+        return consumer
+
+    def unsubscribe(self, consumer):
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+        self._notify()
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        return {'head': self.head, 'capacity': self.capacity, 'dropped': self.dropped,
+                'consumers': [{'cursor': consumer.cursor, 'lag': self.head - consumer.cursor,
+                               'missed': consumer.missed} for consumer in self.consumers]}
+
+
+class TickConsumer(object):
+    """
+    TickStream에서 틱을 읽어가는 소비자 (스레드 하나에서만 사용)
+
+    Attributes
+    ---------------------
+    cursor: int
+        다음에 읽을 일련번호
+    missed: int
+        읽기 전에 덮어써져서 놓친 틱 수 (DROP_OLDEST)
+    """
+
+    def __init__(self, stream, cursor):
+        self.stream = stream
+        self.cursor = cursor
+        self.missed = 0
+
+    def read(self, max_count=None):
+        """
+        지금까지 들어온 새 틱을 읽는다. (기다리지 않음)
+
+        Returns
+        ---------------------
+        ticks: np.ndarray
+            TickStream.dtype 구조체 배열 (seq 오름차순 복사본), 새 틱이 없으면 빈 배열
+        """
+        stream = self.stream
+        capacity = stream.capacity
+        head = stream.head
+        start = max(self.cursor, head - capacity)
+        end = head if max_count is None else min(head, start + max_count)
+        if end <= start:
+            return stream.buffer[:0].copy()
+
+        first = start % capacity
+        if first + end - start <= capacity:
+            ticks = stream.buffer[first:first + end - start].copy()
+        else:
+            ticks = np.concatenate([stream.buffer[first:], stream.buffer[:first + end - start - capacity]])
+
+        # 복사하는 동안 덮어써진 틱은 버림
+        overwritten = stream.head - capacity - start
+        if overwritten > 0:
+            ticks = ticks[overwritten:]
+            start += overwritten
+
+        self.missed += start - self.cursor
+        self.cursor = end
+        if stream.overflow == BLOCK and stream._waiting:
+            stream._notify()
+        return ticks
+
+    def wait(self, timeout=None):
+        """
+        새 틱이 들어올 때까지 기다린다. (Qt 스레드가 아닌 스레드에서 사용)
+
+        Returns
+        ---------------------
+        ret: bool
+            새 틱이 있으면 True
+        """
+        stream = self.stream
+        if stream.head > self.cursor:
+            return True
+
+        with stream._cond:
+            stream._waiting += 1
+            try:
+                return stream._cond.wait_for(lambda: stream.head > self.cursor, timeout)
+            finally:
+                stream._waiting -= 1
+
+    def __iter__(self):
+        """
+        틱을 하나씩 기다리면서 읽는다. (Qt 스레드가 아닌 스레드에서 사용)
+        """
+        while True:
+            self.wait()
+            for tick in self.read():
+                yield tick
+
+    async def read_async(self, max_count=None, timeout=None):
+        """
+        새 틱이 들어올 때까지 asyncio 루프를 막지 않고 기다린 후 읽는다.
+        """
+        if self.stream.head <= self.cursor:
+            await asyncio.get_running_loop().run_in_executor(None, self.wait, timeout)
+        return self.read(max_count)
+
+    def close(self):
+        self.stream.unsubscribe(self)
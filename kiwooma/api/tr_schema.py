@@ -0,0 +1,221 @@
+from kiwooma.utils import change_format, to_float, to_str, to_int, to_price, to_code
+from kiwooma.api.ohlcv import OHLCVBuffer, to_int_array, to_price_array, to_date_array
+
+
+TR_SCHEMAS = {}
+
+
+class TRSchema(object):
+    """
+    TR 하나의 출력 항목과 항목별 변환함수, 저장 방식을 정의하는 클래스
+    생성할 때 항목명/변환함수/열 위치 리스트를 미리 만들어두고, API._decode_tr이 이를 사용해 모든 TR을 같은 방식으로 처리한다.
+
+    Parameters
+    ---------------------
+    trcode: str
+    single: tuple
+        싱글데이터 항목 ((항목명, 변환함수), ...) 또는 ((항목명, 변환함수, 저장할 키), ...)
+    multi: tuple
+        멀티데이터 항목, single과 같은 형식
+    record: str
+        멀티데이터 레코드명 (GetCommDataEx에 사용)
+    columns: tuple
+        멀티데이터 레코드의 전체 항목 (KOA Studio의 항목 순서 = GetCommDataEx 결과의 열 순서)
+    single_attr: str
+        싱글데이터를 저장할 API 속성명
+    multi_attr: str
+        멀티데이터를 저장할 API 속성명
+    multi_mode: str
+        'list': 행별 dict의 리스트로 교체
+        'append': 행별 dict를 기존 리스트에 이어붙임 (연속조회)
+        'columns': {키: [값, ...]} 형식으로 기존 값에 이어붙임 (연속조회)
+        'keyed': {key 항목값: 행 dict} 형식으로 갱신
+        'array': 변환함수를 열 단위로 적용하고 {키: 배열}을 저장 객체의 append로 넘김 (연속조회)
+    key: str
+        multi_mode가 'keyed'일 때 키로 사용할 항목의 저장 키
+    scalar: bool
+        True이면 싱글데이터 dict 대신 첫번째 항목의 값만 저장
+    factory: callable
+        multi_mode가 'array'일 때 저장 객체가 없으면 만들어주는 함수
+    """
+
+    def __init__(self, trcode, single=(), multi=(), record='', columns=(), single_attr=None, multi_attr=None,
+                 multi_mode='list', key=None, scalar=False, factory=None):
+        self.trcode = trcode
+        self.record = record
+        self.columns = tuple(columns)
+        self.single_attr = single_attr
+        self.multi_attr = multi_attr
+        self.multi_mode = multi_mode
+        self.key = key
+        self.scalar = scalar
+        self.factory = factory
+
+        self.single_items, self.single_converters, self.single_keys = self._compile(single)
+        self.multi_items, self.multi_converters, self.multi_keys = self._compile(multi)
+
+        if self.columns and all(item in self.columns for item in self.multi_items):
+            self.column_index = [self.columns.index(item) for item in self.multi_items]
+        else:
+            self.column_index = None
+
+    def _compile(self, fields):
+        items, converters, keys = [], [], []
+        for field in fields:
+            items.append(field[0])
+            converters.append(field[1])
+            keys.append(field[2] if len(field) > 2 else field[0])
+        return tuple(items), converters, tuple(keys)
+
+
+def register_schema(schema):
+    """
+    TR 스키마를 등록하는 함수
+    """
+    TR_SCHEMAS[schema.trcode] = schema
+    return schema
+
+
+def get_schema(trcode):
+    return TR_SCHEMAS.get(trcode)
+
+
+"""
+---------------
+| 차트 조회 TR |
+---------------
+"""
+
+_CHART_ADJUST = ('수정주가구분', '수정비율', '대업종구분', '소업종구분', '종목정보', '수정주가이벤트', '전일종가')
+
+_CHART_RECORDS = {
+    'opt10080': ('주식분봉차트조회', ('현재가', '거래량', '체결시간', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10081': ('주식일봉차트조회', ('종목코드', '현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10082': ('주식주봉차트조회', ('현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10083': ('주식월봉차트조회', ('현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt20006': ('업종일봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금') + _CHART_ADJUST[2:]),
+    'opt20007': ('업종주봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금') + _CHART_ADJUST[2:]),
+    'opt20008': ('업종월봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금') + _CHART_ADJUST[2:]),
+}
+
+for _trcode, (_record, _columns) in _CHART_RECORDS.items():
+    register_schema(TRSchema(
+        _trcode, record=_record, columns=_columns, multi_attr='ohlcv', multi_mode='array', factory=OHLCVBuffer,
+        multi=(('체결시간' if _trcode == 'opt10080' else '일자', to_date_array, 'date'),
+               ('시가', to_price_array, 'open'), ('고가', to_price_array, 'high'), ('저가', to_price_array, 'low'),
+               ('현재가', to_price_array, 'close'), ('거래량', to_int_array, 'volume'))
+    ))
+
+"""
+-------------
+| 종목정보 TR |
+-------------
+"""
+
+register_schema(TRSchema(
+    'opt10001', single_attr='stock_info',
+    single=(('종목코드', to_str), ('종목명', to_str), ('결산월', to_str), ('액면가', to_float), ('자본금', to_float),
+            ('상장주식', to_float), ('신용비율', to_float), ('연중최고', to_price), ('연중최저', to_price),
+            ('시가총액', to_float), ('시가총액비중', to_float), ('외인소진률', to_float), ('대용가', to_float),
+            ('PER', to_float), ('EPS', to_float), ('ROE', to_float), ('PBR', to_float), ('EV', to_float),
+            ('매출액', to_float), ('영업이익', to_float), ('당기순이익', to_float), ('250최고', to_price),
+            ('250최저', to_price), ('시가', to_price), ('고가', to_price), ('저가', to_price), ('상한가', to_price),
+            ('하한가', to_price), ('기준가', to_price), ('예상체결가', to_price), ('예상체결수량', to_float),
+            ('250최고가일', to_str), ('250최고가대비율', to_float), ('250최저가일', to_str),
+            ('250최저가대비율', to_float), ('현재가', to_float), ('대비기호', to_float), ('전일대비', to_float),
+            ('등락율', to_float), ('거래량', to_float), ('거래대비', to_float), ('액면가단위', to_str))
+))
+
+register_schema(TRSchema(
+    'opt10016', record='신고저가', multi_attr='_opt10016', multi_mode='columns',
+    columns=('종목코드', '종목명', '현재가', '전일대비기호', '전일대비', '등락률', '거래량', '전일거래량대비율',
+             '매도호가', '매수호가', '고가', '저가'),
+    multi=(('종목코드', to_str), ('종목명', to_str), ('현재가', to_float), ('전일대비', to_float), ('등락률', to_float),
+           ('거래량', to_float), ('전일거래량대비율', to_float), ('매도호가', to_float), ('매수호가', to_float),
+           ('고가', to_float), ('저가', to_float))
+))
+
+register_schema(TRSchema(
+    'opt10017', record='상하한가', multi_attr='_opt10017', multi_mode='columns',
+    columns=('종목코드', '종목정보', '종목명', '전일대비기호', '현재가', '전일대비', '등락률', '거래량', '전일거래량',
+             '매도잔량', '매도호가', '매수호가', '매수잔량', '횟수'),
+    multi=(('종목코드', to_str), ('종목명', to_str), ('현재가', to_float), ('전일대비', to_float), ('등락률', to_float),
+           ('거래량', to_float), ('전일거래량', to_float), ('매도호가', to_float), ('매수호가', to_float),
+           ('매도잔량', to_float), ('매수잔량', to_float))
+))
+
+"""
+------------
+| 계좌 TR |
+------------
+"""
+
+register_schema(TRSchema(
+    'opw00001', single_attr='_deposit',
+    single=(('예수금', to_int), ('d+1추정예수금', to_int), ('d+2추정예수금', to_int), ('출금가능금액', to_int),
+            ('d+1출금가능금액', to_int), ('d+2출금가능금액', to_int))
+))
+
+register_schema(TRSchema(
+    'opw00018', record='계좌평가잔고개별합산', single_attr='account_balance', multi_attr='portfolio_positions',
+    multi_mode='keyed', key='종목번호',
+    columns=('종목번호', '종목명', '평가손익', '수익률(%)', '매입가', '전일종가', '보유수량', '매매가능수량', '현재가',
+             '전일매수수량', '전일매도수량', '금일매수수량', '금일매도수량', '매입금액', '매입수수료', '평가금액',
+             '평가수수료', '세금', '수수료합', '보유비중(%)', '신용구분', '신용구분명', '대출일'),
+    single=(('총매입금액', to_float), ('총평가금액', to_float), ('총평가손익금액', to_float), ('총수익률(%)', to_float),
+            ('추정예탁자산', to_float), ('총대출금', to_float), ('총융자금액', to_float), ('총대주금액', to_float),
+            ('조회건수', to_int)),
+    multi=(('종목번호', to_code), ('종목명', to_str), ('보유수량', to_int), ('매입가', to_float), ('현재가', to_float),
+           ('평가손익', to_float), ('수익률(%)', to_float), ('전일종가', to_float), ('매매가능수량', to_int),
+           ('전일매수수량', to_int), ('전일매도수량', to_int), ('금일매수수량', to_int), ('금일매도수량', to_int),
+           ('매입금액', to_float), ('매입수수료', to_float), ('평가금액', to_float), ('평가수수료', to_float),
+           ('세금', to_float), ('수수료합', to_float), ('보유비중(%)', to_float), ('신용구분', to_str),
+           ('신용구분명', to_str), ('대출일', to_str))
+))
+
+register_schema(TRSchema(
+    'opt10075', record='미체결', multi_attr='current_orders',
+    columns=('계좌번호', '주문번호', '관리사번', '종목코드', '업무구분', '주문상태', '종목명', '주문수량', '주문가격',
+             '미체결수량', '체결누계금액', '원주문번호', '주문구분', '매매구분', '시간', '체결번호', '체결가',
+             '체결량', '현재가', '매도호가', '매수호가', '단위체결가', '단위체결량', '당일매매수수료',
+             '당일매매세금', '개인투자자'),
+    multi=(('계좌번호', change_format), ('주문번호', change_format), ('관리사번', change_format), ('종목코드', to_str),
+           ('업무구분', change_format), ('주문상태', change_format), ('종목명', to_str), ('주문수량', change_format),
+           ('주문가격', change_format), ('미체결수량', change_format), ('체결누계금액', change_format),
+           ('원주문번호', change_format), ('주문구분', change_format), ('매매구분', change_format),
+           ('시간', change_format), ('체결번호', change_format), ('체결가', change_format), ('체결량', change_format),
+           ('현재가', change_format), ('매도호가', change_format), ('매수호가', change_format),
+           ('단위체결가', change_format), ('단위체결량', change_format), ('당일매매수수료', change_format),
+           ('당일매매세금', change_format), ('개인투자자', change_format))
+))
+
+register_schema(TRSchema(
+    'opt10077', record='당일실현손익상세', single_attr='today_realized_pnl', scalar=True,
+    multi_attr='today_realized_pnl_list',
+    columns=('종목명', '체결량', '매입단가', '체결가', '당일매도손익', '손익율', '당일매매수수료', '당일매매세금', '종목코드'),
+    single=(('당일실현손익', to_float),),
+    multi=(('종목코드', to_str), ('종목명', to_str), ('체결량', to_float), ('매입단가', to_float), ('체결가', to_float),
+           ('당일매도손익', to_float), ('당일매매수수료', to_float), ('당일매매세금', to_float),
+           ('손익율', to_float, '손익률')) # TR 항목명은 '손익율', 저장 키는 '손익률'
+))
+
+register_schema(TRSchema(
+    'opt10085', record='계좌수익률', multi_attr='holding_stocks_pnl',
+    columns=('일자', '종목코드', '종목명', '현재가', '매입가', '매입금액', '보유수량', '당일매도손익', '당일매매수수료',
+             '당일매매세금', '신용구분', '대출일', '결제잔고', '청산가능수량', '신용금액', '신용이자', '만기일'),
+    multi=(('일자', to_str), ('종목코드', to_str), ('종목명', to_str), ('현재가', to_price), ('매입가', to_float),
+           ('매입금액', to_float), ('보유수량', to_int), ('당일매도손익', to_float), ('당일매매수수료', to_float),
+           ('당일매매세금', to_float), ('신용구분', to_str), ('대출일', to_str), ('결제잔고', to_int),
+           ('청산가능수량', to_int), ('신용금액', to_float), ('신용이자', to_float), ('만기일', to_str))
+))
+
+register_schema(TRSchema(
+    'opw00007', record='계좌별주문체결내역상세', multi_attr='today_trading_info',
+    columns=('주문번호', '종목번호', '매매구분', '신용구분', '주문수량', '주문단가', '확인수량', '접수구분', '반대여부',
+             '주문시간', '원주문', '종목명', '주문구분', '대출일', '체결수량', '체결단가', '주문잔량', '통신구분',
+             '정정취소', '확인시간'),
+    multi=tuple((item, to_str) for item in ('주문번호', '종목번호', '매매구분', '신용구분', '주문수량', '주문단가',
+                                            '확인수량', '접수구분', '반대여부', '주문시간', '원주문', '종목명',
+                                            '주문구분', '대출일', '체결수량', '체결단가', '주문잔량', '통신구분',
+                                            '정정취소', '확인시간'))
+))
@@ -0,0 +1,289 @@
+"""
+SimulatedOCX를 상대로 API의 주요 경로를 측정하는 벤치마크
+
+    python -m kiwooma.benchmark --out result.json
+    python -m kiwooma.benchmark --quick --compare baseline.json --tolerance 0.2
+
+결과는 {'meta': 실행 환경, 'results': [{'name', 'value', 'unit', 'higher_is_better', 'params'}, ...]} 형식의 JSON이고,
+--compare로 이전 결과와 비교해서 tolerance 이상 나빠진 항목이 있으면 종료코드 1을 리턴한다.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from kiwooma import utils
+from kiwooma.api.easy_api import EasyAPI, get_application
+from kiwooma.api.simulator import SimulatedOCX, make_universe
+from kiwooma.api.scheduler import RateLimiter
+from kiwooma.api.tr_schema import get_schema
+from kiwooma.api.ohlcv import OHLCVBuffer, OHLCV_DTYPE
+
+
+UNLIMITED = ((10 ** 9, 1.0),) # 벤치마크에서는 조회/주문 제한을 두지 않음
+
+
+class BenchmarkResult(object):
+
+    def __init__(self, name, value, unit, higher_is_better=True, **params):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+        self.params = params
+
+    def to_dict(self):
+        return {'name': self.name, 'value': self.value, 'unit': self.unit, 'higher_is_better': self.higher_is_better,
+                'params': self.params}
+
+
+def _timeit(func, min_time):
+    """
+    min_time초가 지날 때까지 func()를 반복
+
+    Returns
+    ---------------------
+    (반복 횟수, 걸린 시간(초))
+    """
+    count, start = 0, time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count, elapsed
+
+
+def _make_easy(**ocx_kwargs):
+    get_application()
+    ocx = SimulatedOCX(**ocx_kwargs)
+    easy = EasyAPI(ocx)
+    easy.api.scheduler.limiter = RateLimiter(UNLIMITED)
+    easy.api.orders.scheduler.limiter = RateLimiter(UNLIMITED)
+    easy.register_account_no(easy.get_account_no())
+    return easy, ocx
+
+
+def bench_tr_decode(min_time):
+    """
+    TR 종류별 초당 변환하는 행 수 (서버 응답을 받은 후 스키마로 변환하는 부분만)
+    """
+    easy, ocx = _make_easy()
+    api = easy.api
+    for code in ('005930', '000660', '035420'):
+        ocx.positions[code] = [10, ocx.base_price(code)]
+
+    today = ocx.today.strftime('%Y%m%d')
+    requests = (
+        ('opt10081', {'종목코드': '005930', '기준일자': today, '수정주가구분': '1'}),
+        ('opt10080', {'종목코드': '005930', '틱범위': '1', '수정주가구분': '1'}),
+        ('opt10001', {'종목코드': '005930'}),
+        ('opw00018', {'계좌번호': ocx.account_no, '비밀번호입력매체구분': '00', '조회구분': '2'}),
+    )
+    results = []
+    for trcode, inputs in requests:
+        result = api.wait(api.request_tr(trcode, inputs))
+        schema = get_schema(trcode)
+        rows = max(ocx.GetRepeatCnt(trcode, result.rqname), 1)
+        ocx._current = ocx._responses[result.rqname] # GetCommDataEx가 읽을 응답
+        count, elapsed = _timeit(lambda: api._decode_tr(schema, trcode, result.rqname), min_time)
+        results.append(BenchmarkResult('tr_decode.' + trcode, rows * count / elapsed, 'rows/s', rows=rows))
+    return results
+
+
+def bench_utils(min_time):
+    """
+    utils 변환함수의 초당 호출 수
+    """
+    values = ['+12345', '-000123', '0000567890', '', '-98765'] * 200
+    results = []
+    for name in ('change_format', 'to_float', 'to_price'):
+        func = getattr(utils, name)
+        if name == 'change_format':
+            args = [value for value in values if value]
+        else:
+            args = values
+        count, elapsed = _timeit(lambda: [func(value) for value in args], min_time)
+        results.append(BenchmarkResult('utils.' + name, len(args) * count / elapsed, 'calls/s'))
+    return results
+
+
+def bench_real_time(min_time, code_counts=(10, 100, 1000)):
+    """
+    종목 수별 실시간 처리량
+
+    real.{n}: 시뮬레이터가 틱을 만드는 비용까지 포함한 초당 틱 수
+    real.{n}.api_us: 틱 하나당 API가 쓰는 시간(µs) (API 슬롯을 연결했을 때와 뗐을 때의 차이)
+    real_full.{n}: TickStream과 BarAggregator까지 연결했을 때 초당 틱 수
+    """
+    results = []
+    for n in code_counts:
+        easy, ocx = _make_easy(codes=make_universe(n))
+        api = easy.api
+        easy.request_real_data(list(ocx.codes))
+        batch = max(n, 100)
+
+        count, elapsed = _timeit(lambda: ocx.emit_ticks(batch), min_time)
+        with_api = elapsed / (count * batch)
+        results.append(BenchmarkResult('real.{0}'.format(n), 1 / with_api, 'ticks/s', codes=n))
+
+        ocx.OnReceiveRealData.disconnect(api._receive_real_data)
+        count, elapsed = _timeit(lambda: ocx.emit_ticks(batch), min_time)
+        ocx.OnReceiveRealData.connect(api._receive_real_data)
+        results.append(BenchmarkResult('real.{0}.api_us'.format(n), max(with_api - elapsed / (count * batch), 0) * 1e6,
+                                       'us/tick', False, codes=n))
+
+        stream = api.open_tick_stream(capacity=1 << 16)
+        consumer = stream.subscribe()
+        api.open_bar_aggregator(('minute1', 'tick100'))
+        def emit():
+            ocx.emit_ticks(batch)
+            consumer.read()
+        count, elapsed = _timeit(emit, min_time)
+        results.append(BenchmarkResult('real_full.{0}'.format(n), count * batch / elapsed, 'ticks/s', codes=n))
+    return results
+
+
+def bench_ohlcv(min_time, repeat=5):
+    """
+    get_daily_ohlcv(repeat) 전체 경로 (연속조회, 변환, DataFrame 생성)의 초당 봉 수
+    """
+    easy, ocx = _make_easy(history=repeat * 600)
+    rows = [0]
+    def run():
+        rows[0] = len(easy.get_daily_ohlcv('005930', repeat))
+    count, elapsed = _timeit(run, min_time)
+    return [BenchmarkResult('ohlcv.daily', rows[0] * count / elapsed, 'bars/s', pages=repeat, rows=rows[0])]
+
+
+def bench_ohlcv_memory(bars=1000000):
+    """
+    봉 100만개의 메모리 사용량 (구조체 배열, DataFrame, DataFrame을 만들 때의 최대 할당량)
+    """
+    records = np.zeros(bars, dtype=OHLCV_DTYPE)
+    records['date'] = np.datetime64('2000-01-01T09:00:00', 's') + np.arange(bars) * np.timedelta64(60, 's')
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        records[column] = np.arange(bars)
+
+    scale = 1000000.0 / bars / 2 ** 20
+    tracemalloc.start()
+    df = OHLCVBuffer.from_records(records).to_frame('000000')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return [BenchmarkResult('memory.records', records.nbytes * scale, 'MiB/1M bars', False),
+            BenchmarkResult('memory.frame', int(df.memory_usage(deep=True).sum()) * scale, 'MiB/1M bars', False),
+            BenchmarkResult('memory.frame_peak', peak * scale, 'MiB/1M bars', False)]
+
+
+def bench_order_latency(orders=200):
+    """
+    주문부터 전량 체결 통보까지 걸리는 시간 (시뮬레이터 지연 0, 이벤트 루프 처리 비용)
+    """
+    easy, ocx = _make_easy()
+    latencies = []
+    for i in range(orders):
+        start = time.perf_counter()
+        handle = easy.send_order('005930', 1, 0, '신규매수', '시장가')
+        handle.done.add_done_callback(lambda future, start=start: latencies.append(time.perf_counter() - start))
+        easy.api.wait(handle.done)
+    latencies = np.array(latencies) * 1e6
+    return [BenchmarkResult('order_chejan.p50', float(np.percentile(latencies, 50)), 'us', False, orders=orders),
+            BenchmarkResult('order_chejan.p99', float(np.percentile(latencies, 99)), 'us', False, orders=orders)]
+
+
+def run_benchmarks(quick=False, only=None):
+    """
+    벤치마크를 실행
+
+    Parameters
+    ---------------------
+    quick: bool
+        측정 시간과 규모를 줄임
+    only: list
+        이 이름으로 시작하는 항목만 실행 (예: ['tr_decode', 'real'])
+
+    Returns
+    ---------------------
+    report: dict
+        {'meta': dict, 'results': [dict, ...]}
+    """
+    min_time = 0.2 if quick else 1.0
+    suites = (
+        ('tr_decode', lambda: bench_tr_decode(min_time)),
+        ('utils', lambda: bench_utils(min_time)),
+        ('real', lambda: bench_real_time(min_time, (10, 100) if quick else (10, 100, 1000))),
+        ('ohlcv', lambda: bench_ohlcv(min_time)),
+        ('memory', lambda: bench_ohlcv_memory(100000 if quick else 1000000)),
+        ('order_chejan', lambda: bench_order_latency(50 if quick else 200)),
+    )
+    results = []
+    for name, suite in suites:
+        if only and not any(name.startswith(prefix) or prefix.startswith(name) for prefix in only):
+            continue
+        results.extend(result for result in suite()
+                       if not only or any(result.name.startswith(prefix) for prefix in only))
+
+    meta = {'time': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'numpy': np.__version__, 'pandas': pd.__version__, 'quick': quick}
+    return {'meta': meta, 'results': [result.to_dict() for result in results]}
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    baseline보다 tolerance 비율 이상 나빠진 항목
+
+    Returns
+    ---------------------
+    regressions: list
+        [(이름, baseline 값, 현재 값), ...]
+    """
+    base = {result['name']: result['value'] for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = base.get(result['name'])
+        if old is None:
+            continue
+        value = result['value']
+        if result['higher_is_better']:
+            worse = value < old * (1 - tolerance)
+        else:
+            worse = value > old * (1 + tolerance)
+        if worse:
+            regressions.append((result['name'], old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='kiwooma benchmark (SimulatedOCX)')
+    parser.add_argument('--quick', action='store_true', help='짧게 실행')
+    parser.add_argument('--only', nargs='*', help='이 이름으로 시작하는 항목만 실행')
+    parser.add_argument('--out', help='결과 JSON 파일')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='허용하는 성능 저하 비율')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.quick, args.only)
+    for result in report['results']:
+        print('{0:<28} {1:>16,.2f} {2}'.format(result['name'], result['value'], result['unit']))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, old, value in regressions:
+            print('REGRESSION {0}: {1:,.2f} -> {2:,.2f}'.format(name, old, value))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+from kiwooma.gateway.dispatch import *
+from kiwooma.gateway.shm import *
+from kiwooma.gateway.server import *
@@ -0,0 +1,129 @@
+import collections
+import os
+import traceback
+from concurrent.futures import Future
+from functools import partial
+from PyQt5.QtCore import QObject, pyqtSignal
+from kiwooma.api.orders import OrderHandle
+
+
+# 게이트웨이에서 호출할 수 있는 메소드 ('request_tr'은 API.request_tr, 나머지는 EasyAPI)
+QUERY_METHODS = (
+    'request_tr', 'basic_info', 'get_daily_ohlcv', 'get_weekly_ohlcv', 'get_monthly_ohlcv', 'get_minutely_ohlcv',
+    'get_new_high_low', 'get_limit_high_low', 'get_deposit_detail', 'get_holding_stocks_pnl', 'get_today_realized_pnl',
+    'get_today_realized_pnl_list', 'get_unexecuted', 'get_trading_info', 'get_executed', 'get_account_balance',
+    'get_portfolio_positions', 'get_live_positions', 'get_live_balance', 'get_open_orders', 'get_code_list_by_market',
+    'get_code_name', 'get_code', 'get_market', 'search_code', 'get_connect_state', 'get_quote',
+    )
+ORDER_METHODS = ('send_order', 'cancel_order', 'modify_order')
+REALTIME_METHODS = ('subscribe_real_data',)
+DEFAULT_METHODS = QUERY_METHODS + ORDER_METHODS + REALTIME_METHODS
+
+
+class EasyAPIDispatcher(QObject):
+    """
+    다른 스레드에서 받은 EasyAPI 호출을 Qt 스레드에서 하나씩 실행하는 디스패처
+
+    EasyAPI의 조회 메소드는 API의 공유 상태(api.ohlcv, api.stock_info 등)에 응답을 받고 이벤트 루프를 돌며 기다리므로,
+    기다리는 동안 들어온 다른 호출은 큐에 넣어두고 앞의 호출이 끝난 후에 실행한다.
+
+    Parameters
+    ---------------------
+    easy: EasyAPI
+    methods: tuple
+        호출할 수 있는 메소드 이름, 주문을 막으려면 QUERY_METHODS + REALTIME_METHODS
+    """
+
+    _submitted = pyqtSignal(object) # 다른 스레드에서 Qt 스레드로
+
+    def __init__(self, easy, methods=DEFAULT_METHODS):
+        super().__init__()
+        self.easy = easy
+        self.api = easy.api
+        self.methods = frozenset(methods)
+        self.calls = 0
+        self._jobs = collections.deque()
+        self._running = False
+        self._submitted.connect(self._run)
+
+    def submit(self, method, args, kwargs, callback):
+        """
+        EasyAPI 메소드(또는 'request_tr'이면 API.request_tr) 호출을 예약 (아무 스레드에서나 호출 가능)
+
+        Parameters
+        ---------------------
+        callback: callable
+            Qt 스레드에서 callback(ok, result)로 호출됨
+            결과가 Future면 완료된 결과, OrderHandle이면 주문번호를 받은 후의 OrderHandle
+        """
+        self._submitted.emit(partial(self._call, method, args, kwargs, callback))
+
+    def post(self, function):
+        """
+        function()을 Qt 스레드에서 다른 호출들과 순서대로 실행
+        """
+        self._submitted.emit(function)
+
+    def _run(self, job):
+        self._jobs.append(job)
+        if self._running: # 앞의 호출이 이벤트 루프를 돌며 기다리는 중
+            return
+        self._running = True
+        try:
+            while self._jobs:
+                try:
+                    self._jobs.popleft()()
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            self._running = False
+
+    def _call(self, method, args, kwargs, callback):
+        self.calls += 1
+        try:
+            if method not in self.methods:
+                raise AttributeError('{0}은(는) 게이트웨이에서 호출할 수 없는 메소드입니다.'.format(method))
+            if method == 'request_tr':
+                result = self.api.request_tr(*args, **kwargs)
+            elif not callable(getattr(self.easy, method, None)):
+                raise AttributeError('{0}은(는) 게이트웨이에서 호출할 수 없는 메소드입니다.'.format(method))
+            else:
+                result = getattr(self.easy, method)(*args, **kwargs)
+        except Exception as e:
+            callback(False, e)
+            return
+
+        if isinstance(result, OrderHandle):
+            result.accepted.add_done_callback(partial(_resolved, callback, result))
+        elif isinstance(result, Future):
+            result.add_done_callback(partial(_resolved, callback, None))
+        else:
+            callback(True, result)
+
+
+def _resolved(callback, handle, future):
+    error = future.exception()
+    if error is not None:
+        callback(False, error)
+    else:
+        callback(True, future.result() if handle is None else handle)
+
+
+def _write_secret(path, data):
+    """
+    소유자만 읽을 수 있는 파일에 토큰/인증키를 씀
+    """
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    if hasattr(os, 'fchmod'): # 이미 있던 파일의 권한도 바꿈
+        os.fchmod(fd, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+
+
+def _read_secret(path):
+    with open(os.path.expanduser(path), 'rb') as f:
+        return f.read().strip()
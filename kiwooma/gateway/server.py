@@ -0,0 +1,631 @@
+"""
+Qt나 OCX 없이 다른 프로세스(다른 언어 포함)에서 EasyAPI 조회와 주문을 쓸 수 있게 하는 로컬 HTTP 게이트웨이
+
+게이트웨이 프로세스
+
+    easy = EasyAPI()
+    easy.register_account_no(easy.get_account_no())
+    gateway = RestGateway(easy, port=8700, token_file='~/.kiwooma/gateway.token')
+    gateway.start()
+    easy.app.exec_()
+
+클라이언트
+
+    client = RestClient(port=8700, token_file='~/.kiwooma/gateway.token')
+    client.get('/basic_info/005930')
+    client.get('/ohlcv/005930', timeframe='day', repeat=2)
+    client.get('/balance')
+    client.post('/orders', code='005930', quantity=1, price=0, trans_type='신규매수', order_type='시장가')
+    client.post('/tr/opt10001', inputs={'종목코드': '005930'})
+
+    curl -H "Authorization: Bearer $(cat ~/.kiwooma/gateway.token)" http://127.0.0.1:8700/basic_info/005930
+
+모든 요청은 게이트웨이마다 만든 토큰을 Authorization 헤더로 보내야 하고, 본문은 application/json이어야 하며,
+Origin 헤더가 있거나 Host가 로컬 주소가 아닌 요청(브라우저에서 보낸 요청, DNS rebinding)은 거부한다.
+
+같은 TR과 입력값의 조회가 처리 중이면 새로 요청하지 않고 그 응답을 같이 받고(coalescing),
+TR별 TTL 동안은 받은 응답을 그대로 돌려준다. 주문 상태가 바뀌면 계좌 조회 캐시는 지운다.
+"""
+import asyncio
+import hmac
+import http.client
+import json
+import re
+import secrets
+import socket
+import threading
+import time
+from datetime import date, datetime
+from functools import partial
+from urllib.parse import urlsplit, parse_qsl, urlencode, quote
+import numpy as np
+import pandas as pd
+from kiwooma.api.api import TRResult
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.orders import OrderHandle
+from kiwooma.gateway.dispatch import EasyAPIDispatcher, DEFAULT_METHODS, _write_secret, _read_secret
+from kiwooma.gateway.shm import order_snapshot
+
+
+# TR별 응답 캐시 시간(초), 없는 TR은 처리 중인 요청끼리만 합침
+DEFAULT_TTL = {
+    'opt10001': 10.0, # 주식기본정보
+    'opt10080': 5.0, 'opt10081': 60.0, 'opt10082': 60.0, 'opt10083': 60.0, # 분/일/주/월봉
+    'opt20006': 60.0, 'opt20007': 60.0, 'opt20008': 60.0, # 업종 일/주/월봉
+    'opw00001': 1.0, 'opw00018': 1.0, 'opt10085': 1.0, 'opt10075': 1.0, # 계좌
+    }
+
+ACCOUNT_TRS = ('opw00001', 'opw00018', 'opt10085', 'opt10075', 'opt10074', 'opt10077') # 주문 상태가 바뀌면 지움
+
+OHLCV_METHODS = {'day': ('get_daily_ohlcv', 'opt10081'), 'week': ('get_weekly_ohlcv', 'opt10082'),
+                 'month': ('get_monthly_ohlcv', 'opt10083')}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large', 415: 'Unsupported Media Type',
+               500: 'Internal Server Error', 502: 'Bad Gateway'}
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+
+
+class GatewayError(KiwoomError):
+    """
+    RestClient 요청이 실패했을 때 발생하는 예외
+
+    Attributes
+    ---------------------
+    status: int
+        HTTP 상태코드
+    error: str
+        게이트웨이에서 발생한 예외 이름
+    """
+
+    def __init__(self, message, status, error=None):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+def _default(obj):
+    if isinstance(obj, pd.DataFrame):
+        frame = obj.reset_index() if obj.index.name is not None else obj
+        return frame.to_dict('records')
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, OrderHandle):
+        return order_snapshot(obj)
+    if isinstance(obj, TRResult):
+        return vars(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError('{0}은(는) JSON으로 변환할 수 없습니다.'.format(type(obj).__name__))
+
+
+def to_json(obj):
+    """
+    EasyAPI 결과를 JSON bytes로 변환 (DataFrame은 행별 dict의 리스트, OrderHandle은 주문 상태 dict)
+    """
+    return json.dumps(obj, default=_default, ensure_ascii=False).encode('utf-8')
+
+
+class TRCoalescer(object):
+    """
+    같은 키의 요청을 하나로 합치고 TR별 TTL 동안 응답을 캐시하는 객체 (asyncio 루프 하나에서만 사용)
+
+    Parameters
+    ---------------------
+    ttl: dict
+        {TR코드: 캐시 시간(초)}, DEFAULT_TTL에 덮어씀
+    default_ttl: float
+        ttl에 없는 TR의 캐시 시간, 0이면 처리 중인 요청끼리만 합침
+    max_entries: int
+        캐시 항목 수가 이보다 많아지면 만료된 항목을 지움
+
+    Attributes
+    ---------------------
+    upstream: int
+        실제로 보낸 요청 수
+    hits: int
+        캐시에서 응답한 수
+    coalesced: int
+        처리 중인 요청에 합쳐진 수
+    """
+
+    def __init__(self, ttl=None, default_ttl=0.0, max_entries=4096):
+        self.ttl = dict(DEFAULT_TTL)
+        self.ttl.update(ttl or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.upstream = self.hits = self.coalesced = 0
+        self._cache = {} # {key: (만료 시각, TR코드, 응답)}
+        self._inflight = {} # {key: asyncio.Future}
+
+    async def get(self, key, trcode, fetch):
+        """
+        Parameters
+        ---------------------
+        key: hashable
+            같은 TR과 입력값이면 같은 키
+        trcode: str
+            TTL을 정할 TR코드
+        fetch: callable
+            fetch() - 실제 요청을 보내고 asyncio.Future를 리턴
+
+        Returns
+        ---------------------
+        result:
+            fetch()의 결과
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self.hits += 1
+                return cached[2]
+            del self._cache[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.upstream += 1
+            future = fetch()
+            self._inflight[key] = future
+            future.add_done_callback(partial(self._done, key, trcode))
+        return await asyncio.shield(future) # 기다리던 클라이언트가 끊겨도 다른 클라이언트는 받음
+
+    def _done(self, key, trcode, future):
+        self._inflight.pop(key, None)
+        ttl = self.ttl.get(trcode, self.default_ttl)
+        if ttl <= 0 or future.cancelled() or future.exception() is not None:
+            return
+        now = time.monotonic()
+        if len(self._cache) >= self.max_entries:
+            self._cache = {key: entry for key, entry in self._cache.items() if entry[0] > now}
+        self._cache[key] = (now + ttl, trcode, future.result())
+
+    def invalidate(self, trcodes=None):
+        """
+        trcodes의 캐시를 지움 (None이면 전체)
+        """
+        if trcodes is None:
+            self._cache.clear()
+        else:
+            self._cache = {key: entry for key, entry in self._cache.items() if entry[1] not in trcodes}
+
+    def stats(self):
+        return {'upstream': self.upstream, 'hits': self.hits, 'coalesced': self.coalesced,
+                'inflight': len(self._inflight), 'entries': len(self._cache)}
+
+
+class _HTTPError(Exception):
+
+    def __init__(self, status, message, error=None):
+        super().__init__(message)
+        self.status = status
+        self.error = error or STATUS_TEXT.get(status, 'Error')
+
+
+class RestGateway(object):
+    """
+    EasyAPI를 로컬 HTTP(JSON)로 제공하는 게이트웨이
+
+    asyncio 서버가 별도 스레드에서 요청을 받고, EasyAPI 호출은 EasyAPIDispatcher로 Qt 스레드에서 하나씩 실행한다.
+    조회는 TRCoalescer로 합치고 캐시하며, 응답은 Qt 스레드에서 JSON으로 변환해둔 것을 그대로 보낸다.
+    Qt 이벤트 루프(easy.app.exec_() 등)가 돌고 있어야 요청이 처리된다.
+
+    경로 (응답은 JSON, POST/PUT 본문도 JSON)
+        GET /balance, /deposit, /holdings, /unexecuted      계좌 조회 (opw00018, opw00001, opt10085, opt10075)
+        GET /basic_info/<code>                              주식기본정보 (opt10001)
+        GET /ohlcv/<code>?timeframe=day&repeat=1&adj_close=1  day, week, month, minute<N>
+        POST /tr/<trcode> {"inputs": {...}, "next": 0}      임의의 TR (API.request_tr)
+        GET /orders?code=                                   미체결 주문
+        POST /orders {"code", "quantity", "price", "trans_type", "order_type", "org_order_no"}
+        PUT /orders/<order_no> {"price", "quantity"}        정정
+        DELETE /orders/<order_no>?quantity=0                취소
+        GET /stats
+
+    Parameters
+    ---------------------
+    easy: EasyAPI
+    host: str
+    port: int
+        0이면 빈 포트를 사용 (start() 후 self.port)
+    path: str
+        지정하면 TCP 대신 유닉스 도메인 소켓으로 받음
+    ttl: dict
+        {TR코드: 캐시 시간(초)}, DEFAULT_TTL에 덮어씀
+    default_ttl: float
+        ttl에 없는 TR의 캐시 시간
+    max_body: int
+        요청 본문 최대 크기 (bytes)
+    token: str
+        클라이언트가 'Authorization: Bearer <token>'으로 보낼 토큰, None이면 임의로 만듦 (self.token)
+    token_file: str
+        지정하면 start()할 때 토큰을 이 파일에 씀 (소유자만 읽을 수 있게)
+    methods: tuple
+        호출할 수 있는 EasyAPI 메소드, 주문 경로를 막으려면 QUERY_METHODS
+    """
+
+    def __init__(self, easy, host='127.0.0.1', port=8700, path=None, ttl=None, default_ttl=0.0, max_body=1 << 20,
+                 token=None, token_file=None, methods=DEFAULT_METHODS):
+        self.easy = easy
+        self.api = easy.api
+        self.token = token or secrets.token_urlsafe(32)
+        self.token_file = token_file
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_body = max_body
+        self.coalescer = TRCoalescer(ttl, default_ttl)
+        self.dispatcher = EasyAPIDispatcher(easy, methods)
+        self.requests = 0
+        self.running = False
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self.routes = [
+            ('GET', r'/balance', self._query, ('get_account_balance', 'opw00018')),
+            ('GET', r'/deposit', self._query, ('get_deposit_detail', 'opw00001')),
+            ('GET', r'/holdings', self._query, ('get_holding_stocks_pnl', 'opt10085')),
+            ('GET', r'/unexecuted', self._query, ('get_unexecuted', 'opt10075')),
+            ('GET', r'/basic_info/(?P<code>\w+)', self._basic_info, ()),
+            ('GET', r'/ohlcv/(?P<code>\w+)', self._ohlcv, ()),
+            ('POST', r'/tr/(?P<trcode>\w+)', self._tr, ()),
+            ('GET', r'/orders', self._open_orders, ()),
+            ('POST', r'/orders', self._send_order, ()),
+            ('PUT', r'/orders/(?P<order_no>\w+)', self._modify_order, ()),
+            ('DELETE', r'/orders/(?P<order_no>\w+)', self._cancel_order, ()),
+            ('GET', r'/stats', self._stats, ()),
+            ]
+        self.routes = [(method, re.compile(pattern + '$'), handler, extra)
+                       for method, pattern, handler, extra in self.routes]
+
+    def start(self):
+        """
+        서버 스레드를 시작하고 소켓이 열릴 때까지 기다림
+        """
+        if self.running:
+            return
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run, args=(ready, errors), name='kiwooma-rest', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            raise errors[0]
+        if self.token_file is not None:
+            _write_secret(self.token_file, self.token.encode('ascii'))
+        self.running = True
+        self.api.orders.listeners.append(self._order_changed)
+
+    def close(self, timeout=5.0):
+        if not self.running:
+            return
+        self.running = False
+        self.api.orders.listeners.remove(self._order_changed)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    def _run(self, ready, errors):
+        loop = self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            if self.path is not None:
+                self._server = loop.run_until_complete(asyncio.start_unix_server(self._connection, self.path))
+            else:
+                self._server = loop.run_until_complete(asyncio.start_server(self._connection, self.host, self.port))
+                self.port = self._server.sockets[0].getsockname()[1]
+        except Exception as e:
+            errors.append(e)
+            ready.set()
+            loop.close()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            loop.run_until_complete(self._server.wait_closed())
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+
+    def _order_changed(self, handle):
+        """
+        Qt 스레드에서 주문 상태가 바뀔 때 계좌 조회 캐시를 지움
+        """
+        self.loop.call_soon_threadsafe(self.coalescer.invalidate, ACCOUNT_TRS)
+
+    # Qt 스레드 호출
+    def _call(self, method, *args, **kwargs):
+        """
+        EasyAPI 메소드를 Qt 스레드에서 실행하고 JSON 응답을 받을 asyncio.Future를 리턴
+        """
+        future = self.loop.create_future()
+        self.dispatcher.submit(method, args, kwargs, partial(self._resolve, future))
+        return future
+
+    def _resolve(self, future, ok, result):
+        if ok:
+            try:
+                result = to_json(result) # 공유 상태(api.stock_info 등)가 바뀌기 전에 Qt 스레드에서 변환
+            except Exception as e:
+                ok, result = False, e
+        self.loop.call_soon_threadsafe(_set_future, future, ok, result)
+
+    def _coalesced(self, trcode, method, *args):
+        return self.coalescer.get((trcode, method) + args, trcode, partial(self._call, method, *args))
+
+    # 경로별 처리 (JSON bytes를 리턴)
+    async def _query(self, match, query, body, method, trcode):
+        return await self._coalesced(trcode, method)
+
+    async def _basic_info(self, match, query, body):
+        return await self._coalesced('opt10001', 'basic_info', match['code'])
+
+    async def _ohlcv(self, match, query, body):
+        code = match['code']
+        timeframe = query.get('timeframe', 'day')
+        repeat, adj_close = _int(query, 'repeat', 1), _int(query, 'adj_close', 1)
+        if timeframe in OHLCV_METHODS:
+            method, trcode = OHLCV_METHODS[timeframe]
+            return await self._coalesced(trcode, method, code, repeat, adj_close)
+        if timeframe.startswith('minute') and timeframe[6:].isdigit():
+            return await self._coalesced('opt10080', 'get_minutely_ohlcv', code, int(timeframe[6:]), repeat,
+                                         adj_close)
+        raise _HTTPError(400, 'timeframe은 day, week, month, minute<N> 중 하나여야 합니다.')
+
+    async def _tr(self, match, query, body):
+        trcode = match['trcode']
+        inputs = body.get('inputs') or {}
+        if not isinstance(inputs, dict):
+            raise _HTTPError(400, 'inputs는 {입력항목: 값} 이어야 합니다.')
+        inputs = tuple(sorted((str(name), str(value)) for name, value in inputs.items()))
+        next = int(body.get('next', 0))
+        if next: # 연속조회는 화면번호에 묶이므로 합치지 않음
+            return await self._call('request_tr', trcode, dict(inputs), next, body.get('screen_no'))
+        return await self.coalescer.get((trcode, 'request_tr', inputs), trcode,
+                                        partial(self._call, 'request_tr', trcode, dict(inputs)))
+
+    async def _open_orders(self, match, query, body):
+        return await self._call('get_open_orders', query.get('code'))
+
+    async def _send_order(self, match, query, body):
+        try:
+            args = [body[name] for name in ('code', 'quantity', 'price', 'trans_type', 'order_type')]
+        except KeyError as e:
+            raise _HTTPError(400, '{0} 항목이 없습니다.'.format(e.args[0]))
+        return await self._call('send_order', *args, body.get('org_order_no', ''))
+
+    async def _modify_order(self, match, query, body):
+        if 'price' not in body:
+            raise _HTTPError(400, 'price 항목이 없습니다.')
+        return await self._call('modify_order', match['order_no'], body['price'], int(body.get('quantity', 0)))
+
+    async def _cancel_order(self, match, query, body):
+        return await self._call('cancel_order', match['order_no'], _int(query, 'quantity', 0))
+
+    async def _stats(self, match, query, body):
+        return to_json(self.stats())
+
+    def stats(self):
+        stats = self.coalescer.stats()
+        stats.update(requests=self.requests, calls=self.dispatcher.calls)
+        return stats
+
+    # HTTP
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self._dispatch(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(b''.join([
+                    'HTTP/1.1 {0} {1}\r\n'.format(status, STATUS_TEXT.get(status, '')).encode('ascii'),
+                    b'Content-Type: application/json; charset=utf-8\r\n',
+                    'Content-Length: {0}\r\n'.format(len(payload)).encode('ascii'),
+                    b'Connection: keep-alive\r\n\r\n' if keep_alive else b'Connection: close\r\n\r\n',
+                    payload]))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _HTTPError as e:
+            payload = json.dumps({'error': e.error, 'message': str(e)}).encode('utf-8')
+            writer.write('HTTP/1.1 {0} {1}\r\nContent-Type: application/json\r\nContent-Length: {2}\r\n'
+                         'Connection: close\r\n\r\n'.format(e.status, STATUS_TEXT.get(e.status, ''),
+                                                            len(payload)).encode('ascii') + payload)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise _HTTPError(400, '잘못된 요청입니다.')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise _HTTPError(400, 'Content-Length 헤더가 올바르지 않습니다.')
+        if length > self.max_body:
+            raise _HTTPError(413, '요청 본문이 너무 큽니다.')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    def _authorize(self, headers, body):
+        """
+        브라우저에서 온 요청(Origin, 로컬이 아닌 Host)과 토큰이 틀린 요청, JSON이 아닌 본문을 거부
+        """
+        if 'origin' in headers:
+            raise _HTTPError(403, '브라우저 요청(Origin: {0})은 받지 않습니다.'.format(headers['origin']))
+        host = headers.get('host', 'localhost')
+        host = host[:host.index(']') + 1] if host.startswith('[') and ']' in host else host.split(':')[0]
+        if host.lower() not in LOCAL_HOSTS + (self.host,):
+            raise _HTTPError(403, 'Host {0}은(는) 로컬 주소가 아닙니다.'.format(headers.get('host')))
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            raise _HTTPError(401, '토큰이 없거나 틀렸습니다.')
+        if body and headers.get('content-type', '').split(';')[0].strip().lower() != 'application/json':
+            raise _HTTPError(415, '본문은 application/json이어야 합니다.')
+
+    async def _dispatch(self, method, target, headers, body):
+        self.requests += 1
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        allowed = False
+        try:
+            self._authorize(headers, body)
+            for route_method, pattern, handler, extra in self.routes:
+                match = pattern.match(url.path)
+                if match is None:
+                    continue
+                if route_method != method:
+                    allowed = True
+                    continue
+                try:
+                    body = json.loads(body.decode('utf-8')) if body else {}
+                except ValueError:
+                    raise _HTTPError(400, '본문이 JSON이 아닙니다.')
+                if not isinstance(body, dict):
+                    raise _HTTPError(400, '본문은 JSON 객체여야 합니다.')
+                return 200, await handler(match.groupdict(), query, body, *extra)
+            if allowed:
+                raise _HTTPError(405, '{0} {1}은(는) 지원하지 않습니다.'.format(method, url.path))
+            raise _HTTPError(404, '{0}은(는) 없는 경로입니다.'.format(url.path))
+        except _HTTPError as e:
+            status, error, message = e.status, e.error, str(e)
+        except KiwoomError as e:
+            status, error, message = 502, type(e).__name__, str(e)
+        except (AttributeError, TypeError, ValueError, KeyError) as e:
+            status, error, message = 400, type(e).__name__, str(e)
+        except Exception as e:
+            status, error, message = 500, type(e).__name__, str(e)
+        return status, json.dumps({'error': error, 'message': message}, ensure_ascii=False).encode('utf-8')
+
+
+def _set_future(future, ok, result):
+    if future.done():
+        return
+    if ok:
+        future.set_result(result)
+    else:
+        future.set_exception(result)
+
+
+def _int(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise _HTTPError(400, '{0}은(는) 정수여야 합니다.'.format(name))
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class RestClient(object):
+    """
+    RestGateway 클라이언트 (표준 라이브러리만 사용, 스레드 하나에서 사용)
+
+    Parameters
+    ---------------------
+    host: str
+    port: int
+    path: str
+        RestGateway를 유닉스 도메인 소켓으로 열었으면 그 경로
+    timeout: float
+        응답을 기다릴 시간(초), 연속조회가 많은 OHLCV 요청은 길게 잡아야 함
+    token: str
+        RestGateway.token
+    token_file: str
+        token 대신 RestGateway의 token_file에서 토큰을 읽음
+    """
+
+    def __init__(self, host='127.0.0.1', port=8700, path=None, timeout=60.0, token=None, token_file=None):
+        if token is None:
+            if token_file is None:
+                raise ValueError('token 또는 token_file을 지정해야 합니다.')
+            token = _read_secret(token_file).decode('ascii')
+        self.token = token
+        if path is not None:
+            self.conn = _UnixHTTPConnection(path, timeout)
+        else:
+            self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, params=None, body=None):
+        """
+        Returns
+        ---------------------
+        result:
+            JSON 응답을 변환한 값 (DataFrame은 행별 dict의 리스트)
+
+        Raises
+        ---------------------
+        GatewayError
+            게이트웨이가 오류를 응답하면
+        """
+        path = quote(path)
+        if params:
+            path += '?' + urlencode(params)
+        payload = None if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = {'Authorization': 'Bearer ' + self.token}
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            self.conn.close() # 다음 요청에서 다시 연결
+            raise
+        result = json.loads(data.decode('utf-8')) if data else None
+        if response.status != 200:
+            result = result or {}
+            raise GatewayError(result.get('message', response.reason), response.status, result.get('error'))
+        return result
+
+    def get(self, path, **params):
+        return self.request('GET', path, params)
+
+    def post(self, path, **body):
+        return self.request('POST', path, body=body)
+
+    def put(self, path, **body):
+        return self.request('PUT', path, body=body)
+
+    def delete(self, path, **params):
+        return self.request('DELETE', path, params)
+
+    def close(self):
+        self.conn.close()
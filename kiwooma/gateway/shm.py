@@ -0,0 +1,549 @@
+"""
+OCX를 가진 프로세스 하나(게이트웨이)가 시세/틱/주문 상태를 공유메모리에 쓰고,
+여러 전략 프로세스(GatewayClient)가 복사 없이 읽는 구조
+
+게이트웨이 프로세스
+
+    easy = EasyAPI()
+    gateway = SharedMemoryGateway(easy, address=('127.0.0.1', 7700), authkey_file='~/.kiwooma/gateway.key')
+    gateway.start()
+    easy.app.exec_()
+
+전략 프로세스
+
+    client = GatewayClient(('127.0.0.1', 7700), authkey_file='~/.kiwooma/gateway.key')
+    client.subscribe(['005930', '000660'])
+    ticks = client.tick_reader()
+    while True:
+        if ticks.wait(1.0):
+            for tick in ticks.read(): ...
+    client.call('get_deposit_detail')
+    client.call('send_order', '005930', 1, 0, '신규매수', '시장가')
+
+TR 조회와 주문 등 EasyAPI 메소드 호출은 multiprocessing.connection 채널로 게이트웨이에 보내고,
+게이트웨이의 Qt 스레드에서 실행한 결과를 돌려받는다. 채널은 pickle을 주고받으므로 인증키는 게이트웨이마다
+임의로 만들고(또는 직접 지정) 소유자만 읽을 수 있는 파일로 클라이언트에 넘긴다.
+"""
+import itertools
+import os
+import threading
+import time
+from functools import partial
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+import numpy as np
+from kiwooma.api.real_schema import STOCK_TRADE_FIELDS, STOCK_TRADE_FIDS
+from kiwooma.api.orders import OrderHandle
+from kiwooma.api.realtime import RealTimeSubscription
+from kiwooma.gateway.dispatch import EasyAPIDispatcher, DEFAULT_METHODS, _write_secret, _read_secret
+
+
+HEADER_SIZE = 64 # int64 [head(쓴 레코드 수), capacity, 행 수(시세 테이블)]
+
+TICK_DTYPE = np.dtype([('seq', np.int64), ('code', 'U8'), ('recv_time', np.float64)] +
+                      [(field[0], field[2]) for field in STOCK_TRADE_FIELDS])
+QUOTE_DTYPE = np.dtype([('version', np.int64), ('code', 'U8'), ('recv_time', np.float64)] +
+                       [(field[0], field[2]) for field in STOCK_TRADE_FIELDS])
+ORDER_DTYPE = np.dtype([('seq', np.int64), ('time', np.float64), ('order_no', 'U10'), ('org_order_no', 'U10'),
+                        ('code', 'U8'), ('order_class', np.int8), ('state', 'U10'), ('quantity', np.int64),
+                        ('price', np.int64), ('filled', np.int64), ('remaining', np.int64),
+                        ('avg_fill_price', np.float64), ('rqname', 'U32')])
+
+
+def _attach(name):
+    """
+    다른 프로세스가 만든 공유메모리에 연결
+    (3.12 이하의 POSIX에서는 연결한 프로세스가 끝날 때 resource_tracker가 공유메모리를 지우지 않도록 등록을 해제)
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class ShmRing(object):
+    """
+    공유메모리 위의 고정 크기 레코드 링버퍼 (쓰는 프로세스 하나, 읽는 프로세스 여럿)
+
+    쓰는 쪽은 슬롯을 다 쓴 후에 head를 올리고, 읽는 쪽(ShmRingReader)은 각자 읽은 위치를 관리한다.
+
+    Parameters
+    ---------------------
+    dtype: np.dtype
+        'seq' 필드가 있는 구조체 dtype
+    capacity: int
+    name: str
+        None이면 새로 만듦 (create=True), 있으면 그 이름의 공유메모리에 연결
+    """
+
+    def __init__(self, dtype, capacity=None, name=None, create=True):
+        self.dtype = np.dtype(dtype)
+        if create:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + capacity * self.dtype.itemsize)
+        else:
+            self.shm = _attach(name)
+        self.header = np.ndarray((3,), np.int64, self.shm.buf)
+        if create:
+            self.header[:] = (0, capacity, 0)
+        self.capacity = int(self.header[1])
+        self.records = np.ndarray((self.capacity,), self.dtype, self.shm.buf, HEADER_SIZE)
+        self.owner = create
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self.header[0])
+
+    def publish(self, record):
+        """
+        레코드 하나를 씀 ('seq' 필드는 여기서 채움)
+        """
+        seq = int(self.header[0])
+        index = seq % self.capacity
+        self.records[index] = record
+        self.records['seq'][index] = seq
+        self.header[0] = seq + 1 # 슬롯을 다 쓴 후에 공개
+        return seq
+
+    def reader(self, from_start=False):
+        return ShmRingReader(self, from_start)
+
+    def close(self):
+        """
+        공유메모리 연결을 끊음 (만든 쪽이면 삭제)
+        """
+        self.records = self.header = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShmRingReader(object):
+    """
+    ShmRing을 읽는 쪽 (스레드 하나에서 사용)
+
+    Attributes
+    ---------------------
+    cursor: int
+        다음에 읽을 일련번호
+    missed: int
+        읽기 전에 덮어써져서 놓친 레코드 수
+    """
+
+    def __init__(self, ring, from_start=False):
+        self.ring = ring
+        head = ring.head
+        self.cursor = max(head - ring.capacity, 0) if from_start else head
+        self.missed = 0
+
+    def read(self, max_count=None, copy=False):
+        """
+        새 레코드를 읽는다. (기다리지 않음)
+
+        copy=False이면 공유메모리를 그대로 가리키는 view를 리턴하므로 링의 끝에서 한번 끊어서 리턴하고,
+        쓰는 쪽이 한바퀴 돌아 덮어쓸 수 있으므로 다 사용한 후 intact(view)로 확인한다.
+
+        Returns
+        ---------------------
+        records: np.ndarray
+            seq 오름차순, 새 레코드가 없으면 빈 배열
+        """
+        ring = self.ring
+        capacity = ring.capacity
+        head = ring.head
+        start = max(self.cursor, head - capacity)
+        self.missed += start - self.cursor
+        end = head if max_count is None else min(head, start + max_count)
+        first = start % capacity
+        if not copy:
+            end = min(end, start + capacity - first)
+            self.cursor = max(end, start)
+            return ring.records[first:first + max(end - start, 0)]
+
+        if end <= start:
+            return ring.records[:0].copy()
+        if first + end - start <= capacity:
+            records = ring.records[first:first + end - start].copy()
+        else:
+            records = np.concatenate([ring.records[first:], ring.records[:first + end - start - capacity]])
+        overwritten = ring.head - capacity - start # 복사하는 동안 덮어써진 레코드는 버림
+        if overwritten > 0:
+            records = records[overwritten:]
+            self.missed += overwritten
+        self.cursor = end
+        return records
+
+    def intact(self, view):
+        """
+        read(copy=False)로 받은 view가 아직 덮어써지지 않았는지 확인
+        """
+        return not len(view) or self.ring.head - self.ring.capacity <= int(view['seq'][0]) == \
+            self.cursor - len(view)
+
+    def wait(self, timeout=None, interval=0.001):
+        """
+        새 레코드가 들어올 때까지 interval초 간격으로 확인하며 기다림
+
+        Returns
+        ---------------------
+        ret: bool
+            새 레코드가 있으면 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.ring.head <= self.cursor:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+
+class ShmQuoteTable(object):
+    """
+    종목별 최신 주식체결 시세를 담는 공유메모리 테이블 (QuoteTable의 공유메모리 버전)
+
+    행마다 version 필드로 seqlock을 걸어서 (쓰는 중이면 홀수) 읽는 쪽이 쓰는 중인 행을 읽지 않게 한다.
+    종목은 처음 들어온 순서대로 행을 할당하고 행이 모자라면 새 종목은 담지 않는다.
+
+    Parameters
+    ---------------------
+    capacity: int
+        최대 종목 수
+    name: str
+    create: bool
+    """
+
+    def __init__(self, capacity=None, name=None, create=True):
+        if create:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + capacity * QUOTE_DTYPE.itemsize)
+        else:
+            self.shm = _attach(name)
+        self.header = np.ndarray((3,), np.int64, self.shm.buf)
+        if create:
+            self.header[:] = (0, capacity, 0)
+        self.capacity = int(self.header[1])
+        self.table = np.ndarray((self.capacity,), QUOTE_DTYPE, self.shm.buf, HEADER_SIZE)
+        self.names = QUOTE_DTYPE.names[3:]
+        self.owner = create
+        self.rows = {}
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __len__(self):
+        return int(self.header[2])
+
+    def _refresh(self):
+        count = int(self.header[2])
+        if count != len(self.rows):
+            self.rows = {str(code): row for row, code in enumerate(self.table['code'][:count])}
+
+    def update(self, code, recv_time, values):
+        """
+        쓰는 쪽(게이트웨이)에서 호출
+        """
+        row = self.rows.get(code)
+        if row is None:
+            row = len(self.rows)
+            if row >= self.capacity:
+                return -1
+            self.rows[code] = row
+            self.table['code'][row] = code
+            self.header[2] = row + 1
+        versions = self.table['version']
+        version = int(versions[row])
+        versions[row] = version + 1
+        self.table[row] = (version + 1, code, recv_time) + tuple(values)
+        versions[row] = version + 2
+        return row
+
+    def get(self, code, retries=100):
+        """
+        code 종목의 최신 시세
+
+        Returns
+        ---------------------
+        quote: dict
+            {항목: 값}, 받은 틱이 없으면 None
+        """
+        self._refresh()
+        row = self.rows.get(code)
+        if row is None:
+            return None
+        versions = self.table['version']
+        for i in range(retries):
+            version = int(versions[row])
+            if version % 2 == 0:
+                values = self.table[row].copy()
+                if int(versions[row]) == version:
+                    return {name: values[name].item() for name in ('recv_time',) + self.names}
+            time.sleep(0)
+        return None
+
+    def column(self, name):
+        """
+        전 종목의 name 항목 (공유메모리를 가리키는 view, 행 단위 일관성은 보장하지 않음)
+
+        Returns
+        ---------------------
+        (codes, values): tuple
+        """
+        self._refresh()
+        count = len(self.rows)
+        return list(self.rows), self.table[name][:count]
+
+    def close(self):
+        self.table = self.header = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def order_record(handle):
+    return (0, time.time(), handle.order_no or '', handle.org_order_no or '', handle.code, handle.order_class,
+            handle.state, handle.quantity, int(handle.price or 0), handle.filled, handle.remaining,
+            handle.avg_fill_price, handle.rqname)
+
+
+def order_snapshot(handle):
+    return dict(zip(ORDER_DTYPE.names[1:], order_record(handle)[1:]))
+
+
+class SharedMemoryGateway(object):
+    """
+    EasyAPI를 가진 프로세스에서 시세/틱/주문 상태를 공유메모리로 내보내고 다른 프로세스의 요청을 처리하는 게이트웨이
+
+    주식체결 틱은 API.tick_streams에 등록되어 틱 링(TICK_DTYPE)과 시세 테이블(ShmQuoteTable)에 쓰이고,
+    주문 상태 변경은 OrderManager의 listener로 주문 링(ORDER_DTYPE)에 쓰인다.
+
+    클라이언트의 요청 (요청번호, 메소드, args, kwargs)은 연결마다 받는 스레드에서 EasyAPIDispatcher로 넘겨서
+    Qt 스레드에서 하나씩 실행한다. 결과가 Future면 완료될 때, OrderHandle이면 주문번호를 받았을 때 응답한다.
+    subscribe로 등록한 실시간은 연결이 끊기면 해제한다.
+
+    Parameters
+    ---------------------
+    easy: EasyAPI
+    address:
+        multiprocessing.connection 주소, None이면 자동으로 정함 (self.address)
+    authkey: bytes
+        None이면 임의로 만듦 (self.authkey)
+    authkey_file: str
+        지정하면 start()할 때 인증키를 이 파일에 씀 (소유자만 읽을 수 있게)
+    methods: tuple
+        클라이언트가 호출할 수 있는 메소드 (dispatch.DEFAULT_METHODS)
+    tick_capacity: int
+        틱 링 크기
+    order_capacity: int
+        주문 링 크기
+    max_codes: int
+        시세 테이블의 최대 종목 수
+    """
+
+    def __init__(self, easy, address=None, authkey=None, authkey_file=None, methods=DEFAULT_METHODS,
+                 tick_capacity=1 << 20, order_capacity=1 << 14, max_codes=4096):
+        self.easy = easy
+        self.api = easy.api
+        self.authkey = authkey or os.urandom(32)
+        self.authkey_file = authkey_file
+        self.ticks = ShmRing(TICK_DTYPE, tick_capacity)
+        self.orders = ShmRing(ORDER_DTYPE, order_capacity)
+        self.quotes = ShmQuoteTable(max_codes)
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.running = False
+        self.connections = {} # {연결: [RealTimeSubscription, ...]}
+        self.requests = 0
+        self.dispatcher = EasyAPIDispatcher(easy, methods)
+
+    def layout(self):
+        """
+        클라이언트가 연결할 공유메모리 이름
+        """
+        return {'ticks': self.ticks.name, 'orders': self.orders.name, 'quotes': self.quotes.name}
+
+    def start(self):
+        if self.running:
+            return
+        if self.authkey_file is not None:
+            _write_secret(self.authkey_file, self.authkey.hex().encode('ascii'))
+        self.running = True
+        self.api.tick_streams.append(self)
+        self.api.orders.listeners.append(self._publish_order)
+        threading.Thread(target=self._accept, name='kiwooma-gateway', daemon=True).start()
+
+    def close(self):
+        """
+        요청을 그만 받고 공유메모리를 삭제
+        """
+        if not self.running:
+            return
+        self.running = False
+        if self in self.api.tick_streams:
+            self.api.tick_streams.remove(self)
+        self.api.orders.listeners.remove(self._publish_order)
+        self.listener.close()
+        for conn in list(self.connections):
+            conn.close()
+            self._disconnected(conn)
+        for block in (self.ticks, self.orders, self.quotes):
+            block.close()
+
+    # API.tick_streams 인터페이스
+    def wants(self, code):
+        return True
+
+    def publish(self, code, values):
+        recv_time = time.time()
+        self.ticks.publish((0, code, recv_time) + tuple(values))
+        self.quotes.update(code, recv_time, values)
+
+    def _publish_order(self, handle):
+        self.orders.publish(order_record(handle))
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if not self.running:
+                    return
+                continue
+            self.dispatcher.post(partial(self.connections.setdefault, conn, []))
+            threading.Thread(target=self._receive, args=(conn,), name='kiwooma-gateway-conn', daemon=True).start()
+
+    def _receive(self, conn):
+        while self.running:
+            try:
+                request_id, method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                break
+            self.requests += 1
+            if method == 'layout':
+                self._reply(conn, request_id, True, self.layout())
+                continue
+            if method == 'subscribe':
+                method = 'subscribe_real_data'
+            self.dispatcher.submit(method, args, kwargs, partial(self._reply_call, conn, request_id))
+        self.dispatcher.post(partial(self._disconnected, conn))
+
+    def _reply_call(self, conn, request_id, ok, result):
+        """
+        Qt 스레드에서 호출 결과를 응답
+        """
+        if isinstance(result, RealTimeSubscription):
+            if conn in self.connections:
+                self.connections[conn].append(result)
+            else: # 응답 전에 연결이 끊김
+                result.close()
+            result = sorted(result.codes)
+        elif isinstance(result, OrderHandle):
+            result = order_snapshot(result)
+        self._reply(conn, request_id, ok, result)
+
+    def _reply(self, conn, request_id, ok, result):
+        try:
+            conn.send((request_id, ok, result))
+        except (OSError, ValueError):
+            pass
+        except Exception as e: # 결과를 pickle할 수 없음
+            conn.send((request_id, False, TypeError('{0}: {1}'.format(type(result).__name__, e))))
+
+    def _disconnected(self, conn):
+        for subscription in self.connections.pop(conn, ()):
+            subscription.close()
+
+    def stats(self):
+        return {'connections': len(self.connections), 'requests': self.requests, 'ticks': self.ticks.head,
+                'orders': self.orders.head, 'codes': len(self.quotes)}
+
+
+class GatewayClient(object):
+    """
+    SharedMemoryGateway에 연결하는 클라이언트 (Qt와 OCX가 필요 없음)
+
+    Parameters
+    ---------------------
+    address:
+        SharedMemoryGateway.address
+    authkey: bytes
+        SharedMemoryGateway.authkey
+    authkey_file: str
+        authkey 대신 SharedMemoryGateway의 authkey_file에서 인증키를 읽음
+    """
+
+    def __init__(self, address, authkey=None, authkey_file=None):
+        if authkey is None:
+            if authkey_file is None:
+                raise ValueError('authkey 또는 authkey_file을 지정해야 합니다.')
+            authkey = bytes.fromhex(_read_secret(authkey_file).decode('ascii'))
+        self.conn = Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        layout = self.call('layout')
+        self.ticks = ShmRing(TICK_DTYPE, name=layout['ticks'], create=False)
+        self.orders = ShmRing(ORDER_DTYPE, name=layout['orders'], create=False)
+        self.quotes = ShmQuoteTable(name=layout['quotes'], create=False)
+
+    def call(self, method, *args, **kwargs):
+        """
+        게이트웨이의 EasyAPI 메소드를 호출하고 결과를 기다림
+        (Future를 리턴하는 메소드는 완료된 결과, 주문은 주문번호를 받은 시점의 주문 상태 dict)
+        """
+        with self._lock:
+            request_id = next(self._ids)
+            self.conn.send((request_id, method, args, kwargs))
+            while True:
+                response_id, ok, result = self.conn.recv()
+                if response_id == request_id:
+                    break
+        if not ok:
+            raise result
+        return result
+
+    def request_tr(self, trcode, inputs=None, next=0):
+        """
+        Returns
+        ---------------------
+        result: TRResult
+        """
+        return self.call('request_tr', trcode, inputs, next)
+
+    def subscribe(self, codes, fids=STOCK_TRADE_FIDS):
+        """
+        실시간 등록 (이 연결이 끊기면 해제됨), 주식체결 틱은 tick_reader()와 quotes로 받음
+
+        Returns
+        ---------------------
+        codes: list
+        """
+        return self.call('subscribe', codes, fids)
+
+    def send_order(self, code, quantity, price, trans_type, order_type, org_order_no=''):
+        """
+        Returns
+        ---------------------
+        order: dict
+            주문번호를 받은 시점의 주문 상태 (ORDER_DTYPE 항목), 이후 변경은 order_reader()로 받음
+        """
+        return self.call('send_order', code, quantity, price, trans_type, order_type, org_order_no)
+
+    def tick_reader(self, from_start=False):
+        return self.ticks.reader(from_start)
+
+    def order_reader(self, from_start=True):
+        return self.orders.reader(from_start)
+
+    def get_quote(self, code):
+        return self.quotes.get(code)
+
+    def close(self):
+        self.conn.close()
+        for block in (self.ticks, self.orders, self.quotes):
+            block.close()
@@ -0,0 +1,4 @@
+from kiwooma.storage.ohlcv_cache import *
+from kiwooma.storage.checkpoint import *
+from kiwooma.storage.event_log import *
+from kiwooma.storage.tick_archive import *
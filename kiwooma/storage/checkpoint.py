@@ -0,0 +1,154 @@
+import json
+import os
+import numpy as np
+
+
+class BatchCheckpoint(object):
+    """
+    여러 종목을 한번에 조회하는 작업의 진행상황을 디스크에 기록하는 클래스
+
+    root/progress.jsonl에 종목별 결과를 한 줄씩 덧붙이고, OHLCV처럼 큰 결과는 root/{code}.npy로 따로 저장한다.
+    작업이 중간에 끊겨도 같은 root로 다시 실행하면 성공한 종목은 건너뛰고 나머지만 조회한다.
+    실패한 종목은 기록만 하고 다음 실행 때 다시 조회한다.
+    조회 조건(params)은 root/params.json에 저장해두고, 다른 조건으로 같은 root를 쓰면 이전 결과를 섞지 않는다.
+
+    Parameters
+    ---------------------
+    root: str
+        체크포인트 디렉토리
+    params: dict
+        조회 조건 (TR, timeframe, repeat, adj_close 등), JSON으로 저장할 수 있어야 함
+    reset: bool
+        저장된 조건이 params와 다를 때 True면 기록을 지우고 새로 시작, False면 ValueError
+    """
+
+    def __init__(self, root, params=None, reset=False):
+        self.root = root
+        self.params = params
+        self.results = {} # {code: 결과}
+        self.failures = {} # {code: 에러 메세지}
+        os.makedirs(root, exist_ok=True)
+        self._check_params(reset)
+        self._load()
+
+    @property
+    def progress_path(self):
+        return os.path.join(self.root, 'progress.jsonl')
+
+    @property
+    def params_path(self):
+        return os.path.join(self.root, 'params.json')
+
+    def _check_params(self, reset):
+        if self.params is None:
+            return
+
+        params = json.loads(json.dumps(self.params))
+        if os.path.exists(self.params_path):
+            with open(self.params_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved == params:
+                return
+            if not reset:
+                raise ValueError('{0}의 체크포인트는 다른 조건으로 만들어졌습니다. (저장된 조건: {1}, 요청: {2})'
+                                 .format(self.root, saved, params))
+            self.clear()
+        elif os.path.exists(self.progress_path): # 조건을 기록하지 않던 체크포인트
+            if not reset:
+                raise ValueError('{0}의 체크포인트에 조회 조건이 기록되어 있지 않습니다.'.format(self.root))
+            self.clear()
+        self._write_params(params)
+
+    def _write_params(self, params):
+        temp_path = self.params_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(params, f, ensure_ascii=False)
+        os.replace(temp_path, self.params_path)
+
+    def array_path(self, code):
+        return os.path.join(self.root, code + '.npy')
+
+    def _load(self):
+        if not os.path.exists(self.progress_path):
+            return
+
+        with open(self.progress_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError: # 기록 도중 끊긴 마지막 줄
+                    continue
+
+                code = entry['code']
+                if 'error' in entry:
+                    self.failures[code] = entry['error']
+                    continue
+
+                self.failures.pop(code, None)
+                if entry.get('array'):
+                    path = self.array_path(code)
+                    if not os.path.exists(path):
+                        continue
+                    self.results[code] = np.load(path)
+                else:
+                    self.results[code] = entry['result']
+
+    def is_done(self, code):
+        return code in self.results
+
+    def save(self, code, result):
+        """
+        code 종목의 결과를 기록 (np.ndarray는 별도 파일로 저장)
+        """
+        entry = {'code': code}
+        if isinstance(result, np.ndarray):
+            temp_path = self.array_path(code) + '.tmp.npy'
+            np.save(temp_path, result)
+            os.replace(temp_path, self.array_path(code))
+            entry['array'] = True
+        else:
+            entry['result'] = result
+
+        self._append(entry)
+        self.results[code] = result
+        self.failures.pop(code, None)
+
+    def fail(self, code, error):
+        """
+        code 종목이 실패했음을 기록
+        """
+        self._append({'code': code, 'error': str(error)})
+        self.failures[code] = str(error)
+
+    def _owned_files(self):
+        codes = set(self.results) | set(self.failures)
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        codes.add(json.loads(line)['code'])
+                    except (ValueError, KeyError):
+                        continue
+        paths = [self.progress_path, self.params_path, self.params_path + '.tmp']
+        for code in codes:
+            paths += [self.array_path(code), self.array_path(code) + '.tmp.npy']
+        return paths
+
+    def _append(self, entry):
+        with open(self.progress_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+
+    def clear(self):
+        """
+        기록을 모두 지운다. (체크포인트가 만든 파일만 지우고 root의 다른 파일은 그대로 둔다)
+        """
+        for path in self._owned_files():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.results = {}
+        self.failures = {}
+        if self.params is not None:
+            self._write_params(self.params)
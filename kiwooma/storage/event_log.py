@@ -0,0 +1,285 @@
+import io
+import os
+import pickle
+import struct
+import time
+
+
+# 이벤트 종류
+EVENT_CONNECT = 1 # OnEventConnect
+EVENT_TR = 2 # OnReceiveTrData
+EVENT_REAL = 3 # OnReceiveRealData
+EVENT_CHEJAN = 4 # OnReceiveChejanData
+EVENT_MSG = 5 # OnReceiveMsg
+EVENT_SESSION = 6 # 이벤트 밖에서 읽은 로그인/종목 정보
+EVENT_INDEX = 255 # 색인 블록
+
+MAGIC = b'KWEVLOG\0'
+LEGACY_MAGIC = b'KWEVLOG1' # 버전 1 파일의 MAGIC
+FORMAT_VERSION = 2 # 1: marshal payload (파이썬 버전마다 달라서 더 이상 읽지 않음), 2: pickle 프로토콜 4 payload
+PICKLE_PROTOCOL = 4
+FILE_HEADER = struct.Struct('<8sHd') # (MAGIC, FORMAT_VERSION, 기록 시작 시각(epoch 초))
+RECORD_HEADER = struct.Struct('<BId') # (이벤트 종류, payload 길이, 기록 시작 후 경과 시간(초))
+INDEX_PAYLOAD = struct.Struct('<qqddqq') # (이전 색인 위치, 블록 첫 레코드 위치, 첫 시각, 마지막 시각, 레코드 수, 이 색인 위치)
+INDEX_SIZE = RECORD_HEADER.size + INDEX_PAYLOAD.size
+
+
+class EventLogWriter(object):
+    """
+    OCX 이벤트를 바이너리 로그 파일에 덧붙이는 클래스
+
+    레코드는 (종류, 길이, 시각) 헤더 뒤에 pickle(프로토콜 4)로 직렬화한 payload가 붙는 형식이고,
+    index_every개의 레코드마다 직전 블록의 위치와 시각 범위를 담은 고정 크기 색인 블록을 쓴다.
+    색인 블록은 이전 색인 블록의 위치를 가지고 있어서 파일 끝에서부터 거슬러 올라가며 블록 목록을 만들 수 있다.
+    시각은 파일을 처음 만든 시각 기준의 경과 시간(초)이고 세션 안에서는 monotonic clock으로 증가한다.
+
+    이미 있는 파일을 열면 중간에 끊긴 마지막 레코드를 잘라내고 이어서 기록한다.
+
+    Parameters
+    ---------------------
+    path: str
+    index_every: int
+        색인 블록을 쓰는 레코드 간격
+    """
+
+    def __init__(self, path, index_every=4096):
+        self.path = path
+        self.index_every = index_every
+        self.count = 0
+
+        if os.path.exists(path) and os.path.getsize(path) >= len(LEGACY_MAGIC):
+            reader = EventLogReader(path) # 다른 형식의 파일이면 ValueError (덮어쓰지 않음)
+            self.started = reader.started
+            self._prev_index = reader.last_index
+            end = reader.valid_end
+            self._file = open(path, 'r+b')
+            self._file.truncate(end)
+            self._file.seek(end)
+            unindexed = reader.blocks[-1] if reader.blocks and reader.blocks[-1][0] > reader.last_index else None
+        else:
+            self.started = time.time()
+            self._prev_index = -1
+            self._file = open(path, 'wb')
+            self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, self.started))
+            unindexed = None
+
+        # 세션 안에서는 monotonic clock, 세션 사이에서는 파일 시작 시각 기준으로 이어지도록 맞춤
+        self._offset = time.time() - self.started - time.monotonic()
+        self._block_start = None
+        self._block_first = self._block_last = 0.0
+        self._block_count = 0
+        if unindexed is not None: # 색인을 쓰기 전에 끊긴 레코드는 이번 블록에 포함
+            self._block_start, self._block_first, self._block_last, self._block_count = unindexed
+
+    def now(self):
+        """
+        기록 시작 후 경과 시간(초)
+        """
+        return time.monotonic() + self._offset
+
+    def write(self, event_type, payload, timestamp=None):
+        """
+        레코드 하나를 덧붙임
+
+        Parameters
+        ---------------------
+        event_type: int
+        payload:
+            str, bytes, int, float, bool, None과 이들로 된 tuple, list, dict
+        timestamp: float
+            None이면 now()
+        """
+        if timestamp is None:
+            timestamp = self.now()
+        data = pickle.dumps(payload, PICKLE_PROTOCOL)
+        if self._block_start is None:
+            self._block_start = self._file.tell()
+            self._block_first = timestamp
+        self._file.write(RECORD_HEADER.pack(event_type, len(data), timestamp))
+        self._file.write(data)
+        self._block_last = timestamp
+        self._block_count += 1
+        self.count += 1
+        if self._block_count >= self.index_every:
+            self.write_index()
+
+    def write_index(self):
+        """
+        지금까지 쓴 블록의 색인을 쓰고 디스크로 내보냄
+        """
+        if not self._block_count:
+            return
+        position = self._file.tell()
+        self._file.write(RECORD_HEADER.pack(EVENT_INDEX, INDEX_PAYLOAD.size, self._block_last))
+        self._file.write(INDEX_PAYLOAD.pack(self._prev_index, self._block_start, self._block_first, self._block_last,
+                                            self._block_count, position))
+        self._file.flush()
+        self._prev_index = position
+        self._block_start = None
+        self._block_count = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.write_index()
+            self._file.close()
+
+
+class EventLogReader(object):
+    """
+    EventLogWriter로 기록한 로그를 읽는 클래스
+
+    Parameters
+    ---------------------
+    path: str
+
+    Attributes
+    ---------------------
+    version: int
+        파일 형식 버전 (FORMAT_VERSION만 읽을 수 있음)
+    started: float
+        기록 시작 시각 (epoch 초)
+    blocks: list
+        [(블록 첫 레코드 위치, 첫 시각, 마지막 시각, 레코드 수), ...] 파일 순서
+    valid_end: int
+        마지막으로 온전한 레코드가 끝나는 위치
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(FILE_HEADER.size)
+            if header[:len(LEGACY_MAGIC)] == LEGACY_MAGIC: # 버전 필드가 없던 marshal 형식
+                self.version = 1
+            elif header[:len(MAGIC)] == MAGIC:
+                if len(header) < FILE_HEADER.size:
+                    raise ValueError('{0}의 헤더가 잘렸습니다.'.format(path))
+                magic, self.version, self.started = FILE_HEADER.unpack(header)
+            else:
+                raise ValueError('{0}은(는) 이벤트 로그 파일이 아닙니다.'.format(path))
+            if self.version != FORMAT_VERSION:
+                raise ValueError('{0}은(는) 지원하지 않는 이벤트 로그 형식입니다. (버전 {1})'.format(path, self.version))
+            self.blocks, self.last_index, self.valid_end = self._load_index(f)
+
+    def _load_index(self, f):
+        size = f.seek(0, os.SEEK_END)
+        if size >= FILE_HEADER.size + INDEX_SIZE:
+            # 정상적으로 닫힌 파일은 색인 블록으로 끝나므로 색인만 거슬러 올라가며 읽음
+            entry = self._read_index(f, size - INDEX_SIZE)
+            if entry is not None:
+                blocks = []
+                last_index = position = size - INDEX_SIZE
+                while entry is not None:
+                    prev, start, first, last, count, _ = entry
+                    blocks.append((start, first, last, count))
+                    entry = self._read_index(f, prev) if prev >= 0 else None
+                blocks.reverse()
+                return blocks, last_index, size
+        return self._scan(f)
+
+    def _read_index(self, f, position):
+        f.seek(position)
+        data = f.read(INDEX_SIZE)
+        if len(data) != INDEX_SIZE:
+            return None
+        event_type, length, timestamp = RECORD_HEADER.unpack_from(data)
+        if event_type != EVENT_INDEX or length != INDEX_PAYLOAD.size:
+            return None
+        entry = INDEX_PAYLOAD.unpack_from(data, RECORD_HEADER.size)
+        return entry if entry[5] == position else None
+
+    def _scan(self, f):
+        """
+        색인으로 끝나지 않는 파일(기록 중이거나 비정상 종료)은 레코드 헤더를 따라가며 색인을 만듦
+        """
+        blocks, last_index = [], -1
+        position = FILE_HEADER.size
+        f.seek(position)
+        start = first = last = None
+        count = 0
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            event_type, length, timestamp = RECORD_HEADER.unpack(header)
+            if len(f.read(length)) < length:
+                break
+            if event_type == EVENT_INDEX:
+                last_index = position
+                if count:
+                    blocks.append((start, first, last, count))
+                start, count = None, 0
+            else:
+                if start is None:
+                    start, first = position, timestamp
+                last = timestamp
+                count += 1
+            position += RECORD_HEADER.size + length
+        if count:
+            blocks.append((start, first, last, count))
+        return blocks, last_index, position
+
+    def __len__(self):
+        return sum(block[3] for block in self.blocks)
+
+    @property
+    def duration(self):
+        if not self.blocks:
+            return 0.0
+        return self.blocks[-1][2] - self.blocks[0][1]
+
+    def read(self, start=None, end=None, types=None):
+        """
+        레코드를 파일 순서대로 읽는 제너레이터
+
+        Parameters
+        ---------------------
+        start: float
+            이 시각(경과 시간, 초) 이전 레코드는 건너뜀 (색인으로 해당 블록부터 읽음)
+        end: float
+            이 시각 이후 레코드에서 멈춤
+        types: tuple
+            읽을 이벤트 종류, None이면 전체
+
+        Yields
+        ---------------------
+        (event_type, timestamp, payload)
+        """
+        position = FILE_HEADER.size
+        if start is not None:
+            for block_start, first, last, count in self.blocks:
+                if last >= start:
+                    position = block_start
+                    break
+            else:
+                return
+
+        with open(self.path, 'rb') as f:
+            f.seek(position)
+            while position < self.valid_end:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                event_type, length, timestamp = RECORD_HEADER.unpack(header)
+                position += RECORD_HEADER.size + length
+                if (event_type == EVENT_INDEX or (types is not None and event_type not in types)
+                        or (start is not None and timestamp < start)):
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+                if end is not None and timestamp > end:
+                    break
+                yield event_type, timestamp, _PayloadUnpickler(io.BytesIO(f.read(length))).load()
+
+    def __iter__(self):
+        return self.read()
+
+
+class _PayloadUnpickler(pickle.Unpickler):
+    """
+    기본 타입만 읽는 Unpickler (로그 파일에 든 임의의 객체를 만들지 않음)
+    """
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError('이벤트 로그에 허용되지 않는 객체가 있습니다: {0}.{1}'.format(module, name))
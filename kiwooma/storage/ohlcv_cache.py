@@ -0,0 +1,107 @@
+import os
+import shutil
+import numpy as np
+from kiwooma.api.ohlcv import OHLCV_DTYPE
+
+
+class OHLCVCache(object):
+    """
+    종목/봉 종류/수정주가 여부별로 OHLCV를 디스크에 저장하는 캐시
+
+    root/{timeframe}/{adj|raw}/{code}.npy 파일에 날짜 오름차순 OHLCV_DTYPE 구조체 배열로 저장하고,
+    읽을 때는 메모리맵으로 열어서 필요한 부분만 읽는다.
+
+    Parameters
+    ---------------------
+    root: str
+        캐시 디렉토리
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, code, timeframe, adj_close):
+        return os.path.join(self.root, timeframe, 'adj' if int(adj_close) else 'raw', code + '.npy')
+
+    def load(self, code, timeframe, adj_close):
+        """
+        캐시된 OHLCV를 메모리맵으로 읽는다.
+
+        Returns
+        ---------------------
+        records: np.memmap
+            OHLCV_DTYPE 구조체 배열, 캐시가 없으면 None
+        """
+        path = self.path(code, timeframe, adj_close)
+        if not os.path.exists(path):
+            return None
+        records = np.load(path, mmap_mode='r')
+        if records.dtype != OHLCV_DTYPE or not len(records):
+            return None
+        return records
+
+    def save(self, code, timeframe, adj_close, records):
+        """
+        OHLCV 구조체 배열을 저장 (임시파일에 쓴 후 교체하므로 중간에 끊겨도 기존 캐시가 깨지지 않음)
+        """
+        path = self.path(code, timeframe, adj_close)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp.npy'
+        np.save(temp_path, np.asarray(records, dtype=OHLCV_DTYPE))
+        os.replace(temp_path, path)
+
+    def remove(self, code, timeframe, adj_close):
+        path = self.path(code, timeframe, adj_close)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def invalidate(self, code=None):
+        """
+        code 종목의 모든 캐시를 지운다. (code가 None이면 전체 캐시 삭제)
+        """
+        if code is None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            return
+
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if code + '.npy' in filenames:
+                os.remove(os.path.join(dirpath, code + '.npy'))
+
+    @staticmethod
+    def is_consistent(cached, fetched):
+        """
+        새로 받은 봉과 캐시된 봉이 겹치는 구간에서 가격이 같은지 확인
+        수정주가 반영 등으로 과거 가격이 바뀌었으면 False
+
+        캐시의 마지막 봉은 장중에 저장된 미완성 봉일 수 있으므로 비교하지 않는다. (캐시에 봉이 하나뿐이면 True)
+
+        Parameters
+        ---------------------
+        cached: np.ndarray
+            캐시된 OHLCV_DTYPE 배열
+        fetched: OHLCVBuffer
+            새로 받은 봉
+        """
+        completed = cached[:-1]
+        if not len(completed):
+            return True
+        dates, cached_index, fetched_index = np.intersect1d(completed['date'], fetched['date'], return_indices=True)
+        if not len(dates):
+            return False
+        for column in ('open', 'high', 'low', 'close'):
+            if not np.array_equal(completed[column][cached_index], fetched[column][fetched_index]):
+                return False
+        return True
+
+    @staticmethod
+    def merge(cached, fetched):
+        """
+        캐시된 봉 중 새로 받은 봉보다 과거인 것들과 새로 받은 봉을 이어붙인다.
+
+        Returns
+        ---------------------
+        records: np.ndarray
+            날짜 오름차순 OHLCV_DTYPE 배열
+        """
+        head = cached[cached['date'] < fetched.first_date()]
+        return np.concatenate([head, fetched.to_records()])
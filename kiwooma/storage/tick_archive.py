@@ -0,0 +1,390 @@
+import json
+import os
+import shutil
+from datetime import date, datetime, time as dtime
+import numpy as np
+import pandas as pd
+
+
+# 보관하는 컬럼: (이름, dtype, TickStream의 필드 이름)
+TICK_COLUMNS = (
+    ('time', np.int32, '체결시간'), # HHMMSS
+    ('recv_time', np.float64, 'recv_time'), # 받은 시각 (epoch 초)
+    ('code_id', np.int32, None), # codes.json의 위치
+    ('price', np.int64, '현재가'),
+    ('volume', np.int64, '거래량'), # +: 매수체결, -: 매도체결
+    ('ask', np.int64, '(최우선)매도호가'),
+    ('bid', np.int64, '(최우선)매수호가'),
+    ('strength', np.float64, '체결강도'),
+)
+COLUMN_NAMES = tuple(column[0] for column in TICK_COLUMNS)
+ARCHIVE_FIDS = ('20', '10', '15', '27', '28', '228') # 위 컬럼을 채우는 주식체결 FID
+# 종목별/분(HHMM)별 첫 행 위치 (틱이 있는 분만 기록)
+INDEX_DTYPE = np.dtype([('code_id', np.int32), ('bucket', np.int32), ('start', np.int64)])
+
+
+def _day_str(day):
+    if isinstance(day, (date, datetime)):
+        return day.strftime('%Y%m%d')
+    return str(day).replace('-', '')
+
+
+def _hhmmss(value):
+    """
+    '09:30', '09:30:15', 93000, datetime.time을 HHMMSS 정수로 변환
+    """
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    if isinstance(value, (dtime, datetime)):
+        return value.hour * 10000 + value.minute * 100 + value.second
+    parts = [int(part) for part in str(value).split(':')]
+    if len(parts) == 1:
+        return parts[0]
+    return parts[0] * 10000 + parts[1] * 100 + (parts[2] if len(parts) > 2 else 0)
+
+
+class TickArchiveWriter(object):
+    """
+    주식체결 틱을 날짜별 디렉토리에 쌓는 클래스
+
+    장중에는 root/{YYYYMMDD}/raw/{컬럼}.bin에 받은 순서대로 덧붙이고, finalize()에서
+    (종목, 체결시간, 받은 순서)로 정렬해서 컬럼별 .npy 파일과 색인을 만든다.
+    날짜가 바뀌면 이전 날짜를 finalize()하고 새 날짜에 쓴다.
+
+    Parameters
+    ---------------------
+    root: str
+        아카이브 디렉토리
+    today: callable
+        오늘 날짜를 리턴하는 함수
+    """
+
+    def __init__(self, root, today=date.today):
+        self.root = root
+        self.today = today
+        self.count = 0
+        self.dropped = 0 # 쓰기 전에 버퍼에서 덮어써져 놓친 틱 수 (API.open_tick_archive가 셈)
+        self.day = None
+        self._files = None
+        self._codes = []
+        self._code_ids = {}
+        self._saved_codes = 0
+
+    def _open(self, day):
+        self.day = day
+        raw = os.path.join(self.root, day, 'raw')
+        os.makedirs(raw, exist_ok=True)
+        codes_path = os.path.join(raw, 'codes.json')
+        self._codes = []
+        if os.path.exists(codes_path):
+            with open(codes_path, encoding='utf-8') as f:
+                self._codes = json.load(f)
+        self._code_ids = {code: i for i, code in enumerate(self._codes)}
+        self._saved_codes = len(self._codes)
+
+        # 중간에 끊겨서 컬럼 길이가 다르면 가장 짧은 길이에 맞춤
+        paths = [os.path.join(raw, name + '.bin') for name in COLUMN_NAMES]
+        lengths = [os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+                   for path, (name, dtype, field) in zip(paths, TICK_COLUMNS)]
+        rows = min(lengths)
+        if rows: # codes.json을 쓰기 전에 끊겼으면 모르는 종목의 틱부터 버림
+            unknown = np.flatnonzero(np.fromfile(paths[2], dtype=np.int32, count=rows) >= len(self._codes))
+            if len(unknown):
+                rows = int(unknown[0])
+        self._files = []
+        for path, (name, dtype, field) in zip(paths, TICK_COLUMNS):
+            f = open(path, 'ab')
+            f.truncate(rows * np.dtype(dtype).itemsize)
+            self._files.append(f)
+
+    def _code_id(self, code):
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            code_id = self._code_ids[code] = len(self._codes)
+            self._codes.append(code)
+        return code_id
+
+    def write(self, ticks):
+        """
+        TickStream 구조체 배열(TickConsumer.read()의 결과)을 덧붙임
+
+        Parameters
+        ---------------------
+        ticks: np.ndarray
+            code, recv_time과 TICK_COLUMNS의 필드를 가진 구조체 배열
+        """
+        day = _day_str(self.today())
+        if day != self.day:
+            if self.day is not None:
+                self.finalize()
+            self._open(day)
+        if not len(ticks):
+            return
+
+        codes, inverse = np.unique(ticks['code'], return_inverse=True)
+        code_ids = np.array([self._code_id(str(code)) for code in codes], dtype=np.int32)[inverse]
+        for f, (name, dtype, field) in zip(self._files, TICK_COLUMNS):
+            column = code_ids if field is None else np.asarray(ticks[field], dtype=dtype)
+            column.tofile(f)
+        self.count += len(ticks)
+
+    def flush(self):
+        if self._files is None:
+            return
+        for f in self._files:
+            f.flush()
+        if self._saved_codes == len(self._codes):
+            return
+        self._saved_codes = len(self._codes)
+        temp_path = os.path.join(self.root, self.day, 'raw', 'codes.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._codes, f)
+        os.replace(temp_path, os.path.join(self.root, self.day, 'raw', 'codes.json'))
+
+    def finalize(self):
+        """
+        쌓은 틱을 정렬해서 조회용 파일을 만들고 raw 파일을 지움
+        이미 정렬된 파일이 있으면 합쳐서 다시 만듦
+        """
+        if self._files is None:
+            return
+        self._saved_codes = -1
+        self.flush()
+        for f in self._files:
+            f.close()
+        self._files = None
+        build_day(os.path.join(self.root, self.day))
+        self.day = None
+
+    close = finalize
+
+
+def build_day(path):
+    """
+    날짜 디렉토리의 raw 파일(과 이전에 만든 파일)로 조회용 컬럼 파일과 색인을 만든다.
+
+    Parameters
+    ---------------------
+    path: str
+        root/{YYYYMMDD}
+    """
+    raw = os.path.join(path, 'raw')
+    with open(os.path.join(raw, 'codes.json'), encoding='utf-8') as f:
+        raw_codes = json.load(f)
+    rows = min(os.path.getsize(os.path.join(raw, name + '.bin')) // np.dtype(dtype).itemsize
+               for name, dtype, field in TICK_COLUMNS)
+    columns = {name: np.fromfile(os.path.join(raw, name + '.bin'), dtype=dtype, count=rows)
+               for name, dtype, field in TICK_COLUMNS}
+    codes = raw_codes
+
+    if os.path.exists(os.path.join(path, 'codes.json')): # 이미 만든 날짜에 더 쌓은 경우
+        old = TickDay(path)
+        codes = list(old.codes)
+        code_ids = {code: i for i, code in enumerate(codes)}
+        for code in raw_codes:
+            if code not in code_ids:
+                code_ids[code] = len(codes)
+                codes.append(code)
+        remap = np.array([code_ids[code] for code in raw_codes], dtype=np.int32)
+        columns['code_id'] = remap[columns['code_id']] if rows else columns['code_id']
+        columns = {name: np.concatenate([np.asarray(old.columns[name]), columns[name]]) for name in COLUMN_NAMES}
+        old.close()
+
+    order = np.lexsort((columns['time'], columns['code_id'])) # 정렬이 안정적이므로 같은 시각은 받은 순서 유지
+    for name, dtype, field in TICK_COLUMNS:
+        temp_path = os.path.join(path, name + '.tmp.npy')
+        np.save(temp_path, columns[name][order])
+        os.replace(temp_path, os.path.join(path, name + '.npy'))
+
+    code_ids = columns['code_id'][order]
+    offsets = np.searchsorted(code_ids, np.arange(len(codes) + 1)).astype(np.int64)
+    buckets = columns['time'][order] // 100
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (code_ids[1:] != code_ids[:-1]) | (buckets[1:] != buckets[:-1])
+    index = np.zeros(int(first.sum()), dtype=INDEX_DTYPE)
+    index['code_id'] = code_ids[first]
+    index['bucket'] = buckets[first]
+    index['start'] = np.flatnonzero(first)
+    for name, array in (('offsets', offsets), ('index', index)):
+        temp_path = os.path.join(path, name + '.tmp.npy')
+        np.save(temp_path, array)
+        os.replace(temp_path, os.path.join(path, name + '.npy'))
+
+    temp_path = os.path.join(path, 'codes.json.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(codes, f)
+    os.replace(temp_path, os.path.join(path, 'codes.json'))
+    shutil.rmtree(raw)
+
+
+class TickDay(object):
+    """
+    하루치 틱 파일을 메모리맵으로 연 것
+
+    Attributes
+    ---------------------
+    codes: list
+        code_id 순서의 종목코드
+    columns: dict
+        {컬럼 이름: np.memmap} (종목, 체결시간) 순서
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.day = os.path.basename(os.path.normpath(path))
+        with open(os.path.join(path, 'codes.json'), encoding='utf-8') as f:
+            self.codes = json.load(f)
+        self.code_ids = {code: i for i, code in enumerate(self.codes)}
+        self.columns = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in COLUMN_NAMES}
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.index = np.load(os.path.join(path, 'index.npy'))
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def _bound(self, code_id, lo, hi, hhmmss):
+        """
+        code_id 종목의 [lo, hi) 행에서 체결시간이 hhmmss 이상인 첫 행
+        색인으로 해당 분의 행 범위를 찾은 후 그 안에서만 이진탐색
+        """
+        index = self.index
+        index_lo, index_hi = np.searchsorted(index['code_id'], (code_id, code_id + 1))
+        buckets = index['bucket'][index_lo:index_hi]
+        i = np.searchsorted(buckets, hhmmss // 100, 'right') - 1 # hhmmss가 속한 분 또는 그 이전 분
+        if i >= 0:
+            lo = int(index['start'][index_lo + i])
+        if i + 1 < len(buckets):
+            hi = int(index['start'][index_lo + i + 1])
+        return lo + int(np.searchsorted(self.columns['time'][lo:hi], hhmmss))
+
+    def rows(self, code, start=None, end=None):
+        """
+        code 종목의 체결시간이 [start, end)인 행 범위
+
+        Returns
+        ---------------------
+        (lo, hi): tuple
+        """
+        code_id = self.code_ids.get(code)
+        if code_id is None:
+            return 0, 0
+        lo, hi = int(self.offsets[code_id]), int(self.offsets[code_id + 1])
+        start, end = _hhmmss(start), _hhmmss(end)
+        if start is not None:
+            lo = self._bound(code_id, lo, hi, start)
+        if end is not None:
+            hi = max(self._bound(code_id, lo, hi, end), lo)
+        return lo, hi
+
+    def query(self, code, start=None, end=None, columns=None):
+        """
+        code 종목의 체결시간이 [start, end)인 틱
+
+        Parameters
+        ---------------------
+        code: str
+        start, end:
+            '09:00', '09:00:30', 90000, datetime.time
+        columns: list
+            가져올 컬럼, None이면 전체
+
+        Returns
+        ---------------------
+        ticks: dict
+            {컬럼 이름: np.memmap} 파일을 복사하지 않은 view
+        """
+        lo, hi = self.rows(code, start, end)
+        return {name: self.columns[name][lo:hi] for name in (columns or COLUMN_NAMES)}
+
+    def scan(self, start=None, end=None, columns=None):
+        """
+        모든 종목을 차례로 query()
+
+        Yields
+        ---------------------
+        (code, ticks)
+        """
+        for code in self.codes:
+            ticks = self.query(code, start, end, columns)
+            if len(ticks[(columns or COLUMN_NAMES)[0]]):
+                yield code, ticks
+
+    def close(self):
+        """
+        메모리맵 참조를 놓음 (query()로 받은 view가 남아있으면 그 view가 없어질 때 닫힘)
+        """
+        self.columns = {}
+
+
+class TickArchive(object):
+    """
+    TickArchiveWriter로 만든 날짜별 틱 파일을 조회하는 클래스
+
+    Parameters
+    ---------------------
+    root: str
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._days = {}
+
+    def days(self):
+        """
+        조회할 수 있는 (finalize된) 날짜 목록 (YYYYMMDD, 오름차순)
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, 'codes.json')))
+
+    def day(self, day):
+        """
+        Returns
+        ---------------------
+        tick_day: TickDay
+            날짜의 파일이 없으면 None
+        """
+        day = _day_str(day)
+        tick_day = self._days.get(day)
+        if tick_day is None:
+            path = os.path.join(self.root, day)
+            if not os.path.exists(os.path.join(path, 'codes.json')):
+                return None
+            tick_day = self._days[day] = TickDay(path)
+        return tick_day
+
+    def query(self, code, day, start=None, end=None, columns=None):
+        """
+        day의 code 종목 틱 (TickDay.query 참고), 날짜의 파일이 없으면 None
+        """
+        tick_day = self.day(day)
+        if tick_day is None:
+            return None
+        return tick_day.query(code, start, end, columns)
+
+    def iter_days(self, code, first_day=None, last_day=None, start=None, end=None, columns=None):
+        """
+        [first_day, last_day] 날짜마다 code 종목의 틱을 query()
+
+        Yields
+        ---------------------
+        (YYYYMMDD, ticks)
+        """
+        first_day = first_day and _day_str(first_day)
+        last_day = last_day and _day_str(last_day)
+        for day in self.days():
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            yield day, self.query(code, day, start, end, columns)
+
+    def to_frame(self, ticks):
+        """
+        query()의 결과를 DataFrame으로 변환 (복사됨)
+        """
+        return pd.DataFrame({name: np.asarray(column) for name, column in ticks.items()})
+
+    def close(self):
+        for tick_day in self._days.values():
+            tick_day.close()
+        self._days = {}
@@ -14,3 +14,42 @@ def to_float(data):
     elif data == '':
         data = 0
     return float(data)
+
+def tick_size(price):
+    """
+    가격대별 호가단위를 리턴하는 함수 (코스피/코스닥 공통)
+    """
+    price = abs(price)
+    if price < 2000:
+        return 1
+    elif price < 5000:
+        return 5
+    elif price < 20000:
+        return 10
+    elif price < 50000:
+        return 50
+    elif price < 200000:
+        return 100
+    elif price < 500000:
+        return 500
+    return 1000
+
+def to_str(data):
+    return data
+
+def to_int(data):
+    return int(change_format(data))
+
+def to_price(data):
+    """
+    부호(+, -)가 붙어서 오는 가격을 양수 float로 변환
+    """
+    return abs(to_float(data))
+
+def to_code(data):
+    """
+    'A005930' 형식의 종목번호를 종목코드로 변환
+    """
+    if data.startswith('A'):
+        return data[1:]
+    return data
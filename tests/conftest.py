@@ -0,0 +1,68 @@
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import threading
+import time
+import pytest
+from kiwooma.api import EasyAPI
+from kiwooma.api.simulator import SimulatedOCX
+
+
+@pytest.fixture
+def sim():
+    return SimulatedOCX()
+
+
+@pytest.fixture
+def easy(sim):
+    easy = EasyAPI(sim)
+    easy.register_account_no(easy.get_account_no())
+    yield easy
+    easy.api.stop_realtime_worker()
+    easy.api.realtime.unsubscribe_all()
+    easy.api.supervisor.stop()
+
+
+@pytest.fixture
+def pump(easy):
+    """
+    pump(seconds) - Qt 이벤트를 seconds 동안 처리
+    pump(until=callable, timeout=초) - until()이 참이 될 때까지 처리, 참이 되었는지 리턴
+    """
+
+    def pump(seconds=0.0, until=None, timeout=5.0):
+        end = time.monotonic() + (timeout if until is not None else seconds)
+        while time.monotonic() < end:
+            easy.app.processEvents()
+            if until is not None and until():
+                return True
+            time.sleep(0.001)
+        easy.app.processEvents()
+        return until() if until is not None else True
+
+    return pump
+
+
+@pytest.fixture
+def in_thread(pump):
+    """
+    in_thread(func) - func()를 다른 스레드에서 실행하는 동안 Qt 이벤트를 처리하고 결과를 리턴 (게이트웨이 클라이언트용)
+    """
+
+    def in_thread(func, timeout=30.0):
+        result = {}
+
+        def run():
+            try:
+                result['value'] = func()
+            except BaseException as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        assert pump(until=lambda: not thread.is_alive(), timeout=timeout), 'thread did not finish'
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    return in_thread
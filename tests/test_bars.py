@@ -0,0 +1,67 @@
+from datetime import date
+import numpy as np
+from kiwooma.api.bars import BarAggregator
+
+DAY = date(2024, 1, 2)
+
+
+def collect():
+    bars = []
+    return bars, lambda code, spec, bar: bars.append((code, spec, str(bar[0])[11:], tuple(int(v) for v in bar[1:])))
+
+
+def test_minute_bars():
+    bars, on_bar = collect()
+    aggregator = BarAggregator(('minute1',), on_bar, date=DAY)
+    for hhmmss, price, volume in ((90000, 100, 1), (90010, 103, 2), (90059, 99, -3), (90100, 101, 4)):
+        aggregator.update('A', hhmmss, price, volume)
+    assert bars == [('A', 'minute1', '09:01:00', (100, 103, 99, 99, 6))]
+
+    aggregator.close_due(90200)
+    assert bars[-1] == ('A', 'minute1', '09:02:00', (101, 101, 101, 101, 4))
+    assert len(aggregator.get_bars('A', 'minute1')) == 2
+
+
+def test_late_tick_merges_into_closed_bar():
+    bars, on_bar = collect()
+    aggregator = BarAggregator(('minute1',), on_bar, date=DAY)
+    aggregator.update('B', 90020, 100, 10)
+    aggregator.update('A', 90100, 200, 5) # 다른 종목 체결로 B의 09:01 봉이 마감됨
+    aggregator.update('B', 90059, 105, 3) # 늦게 온 09:00대 체결
+    aggregator.update('B', 85930, 90, 1) # 이미 지난 봉보다 이전 체결은 버림
+    aggregator.close_due(90200)
+
+    series = aggregator.series['B']['minute1']
+    records = series.to_records()
+    assert len(records) == 1
+    assert tuple(int(records[0][name]) for name in ('open', 'high', 'low', 'close', 'volume')) == (100, 105, 100, 105, 13)
+    assert (series.merged, series.dropped) == (1, 1)
+    assert [bar for bar in bars if bar[0] == 'B'] == [('B', 'minute1', '09:01:00', (100, 100, 100, 100, 10))]
+
+
+def test_tick_and_volume_bars():
+    bars, on_bar = collect()
+    aggregator = BarAggregator(('tick2', 'volume10'), on_bar, date=DAY)
+    for i in range(4):
+        aggregator.update('A', 90000 + i, 100 + i, 4)
+    assert [bar for bar in bars if bar[1] == 'tick2'] == [('A', 'tick2', '09:00:01', (100, 101, 100, 101, 8)),
+                                                          ('A', 'tick2', '09:00:03', (102, 103, 102, 103, 8))]
+    assert [bar for bar in bars if bar[1] == 'volume10'] == [('A', 'volume10', '09:00:02', (100, 102, 100, 102, 12))]
+
+
+def test_open_bars_from_simulated_ticks(sim, easy):
+    codes = ['005930', '000660']
+    aggregator = easy.open_bars(codes, ('minute1', 'tick5'))
+    stream = easy.open_tick_stream()
+    consumer = stream.subscribe()
+    sim.emit_ticks(400)
+
+    ticks = consumer.read()
+    for code in codes:
+        mine = ticks[ticks['code'] == code]
+        for spec in ('minute1', 'tick5'):
+            bars = aggregator.get_bars(code, spec)
+            assert bars['volume'].sum() == np.abs(mine['거래량']).sum()
+            assert bars['high'].max() == mine['현재가'].max()
+        assert len(aggregator.get_bars(code, 'tick5')) == len(mine) // 5 + (len(mine) % 5 > 0)
+    aggregator.subscription.close()
@@ -0,0 +1,43 @@
+import json
+import os
+import numpy as np
+import pytest
+from kiwooma.api import EasyAPI # noqa: F401 (kiwooma.storage보다 먼저 import)
+from kiwooma.storage.checkpoint import BatchCheckpoint
+
+
+def test_params_mismatch(tmp_path):
+    root = str(tmp_path)
+    params = {'tr': 'opt10081', 'timeframe': 'day', 'repeat': 1, 'adj_close': 1}
+    checkpoint = BatchCheckpoint(root, params)
+    checkpoint.save('005930', {'ok': 1})
+    assert BatchCheckpoint(root, params).is_done('005930')
+
+    with pytest.raises(ValueError):
+        BatchCheckpoint(root, dict(params, repeat=2))
+    assert not BatchCheckpoint(root, dict(params, repeat=2), reset=True).results
+    assert not BatchCheckpoint(root, dict(params, repeat=2)).results
+
+
+def test_clear_keeps_unrelated_files(tmp_path):
+    root = str(tmp_path)
+    (tmp_path / 'notes.txt').write_text('keep')
+    (tmp_path / 'other.npy').write_bytes(b'keep')
+    checkpoint = BatchCheckpoint(root, {'repeat': 1})
+    checkpoint.save('005930', np.arange(3))
+    checkpoint.fail('000660', 'error')
+
+    BatchCheckpoint(root, {'repeat': 2}, reset=True)
+    assert sorted(os.listdir(root)) == ['notes.txt', 'other.npy', 'params.json']
+
+
+def test_batch_ohlcv_checkpoint_records_base_date(tmp_path, easy):
+    root = str(tmp_path)
+    df, failures = easy.batch_ohlcv(['005930'], checkpoint_dir=root)
+    assert not failures and len(df) == 600
+
+    path = tmp_path / 'params.json'
+    params = json.loads(path.read_text(encoding='utf-8'))
+    path.write_text(json.dumps(dict(params, base_date='20000101')), encoding='utf-8') # 다른 날 만든 체크포인트
+    with pytest.raises(ValueError):
+        easy.batch_ohlcv(['005930'], checkpoint_dir=root)
@@ -0,0 +1,34 @@
+def _count_calls(sim, names):
+    calls = dict.fromkeys(names, 0)
+    for name in names:
+        method = getattr(sim, name)
+
+        def counted(*args, _name=name, _method=method):
+            calls[_name] += 1
+            return _method(*args)
+
+        setattr(sim, name, counted)
+    return calls
+
+
+def test_master_is_loaded_once_without_cache_dir(sim, easy):
+    calls = _count_calls(sim, ('GetCodeListByMarket', 'GetMasterCodeName'))
+    code = list(sim.codes)[0]
+    name = easy.get_code_name(code)
+    kospi = easy.get_code_list_by_market('KOSPI')
+    loaded = dict(calls)
+    assert loaded['GetCodeListByMarket'] > 0
+
+    for _ in range(10):
+        assert easy.get_code_name(code) == name
+        assert easy.get_code_list_by_market('kospi') == kospi
+    assert calls == loaded # 마스터를 읽은 후에는 COM 호출 없음
+    assert easy.get_code(name) == code
+
+
+def test_unknown_code_falls_back_to_com(sim, easy):
+    easy.master
+    expected = sim.GetMasterCodeName('999999')
+    calls = _count_calls(sim, ('GetMasterCodeName',))
+    assert easy.get_code_name('999999') == expected
+    assert calls['GetMasterCodeName'] == 1
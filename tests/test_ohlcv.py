@@ -0,0 +1,29 @@
+import numpy as np
+from kiwooma.api.ohlcv import to_int_array, to_price_array, to_date_array, OHLCVBuffer
+
+
+def test_converters_accept_blank_and_decimal_values():
+    assert to_int_array(['10', '', '-3', '2.7']).tolist() == [10, 0, -3, 2]
+    assert to_price_array(['+100', '-99', '']).tolist() == [100, 99, 0]
+    assert to_date_array(['20240103', ''])[0] == np.datetime64('2024-01-03')
+    assert np.isnat(to_date_array(['20240103', ''])[1])
+    minutes = to_date_array(['', '20240103093000'])
+    assert np.isnat(minutes[0]) and minutes[1] == np.datetime64('2024-01-03T09:30:00')
+
+
+def test_buffer_drops_blank_rows():
+    buffer = OHLCVBuffer(0)
+    page = {'date': to_date_array(['20240103', '20240102', '']), 'open': to_price_array(['2', '1', '']),
+            'high': to_price_array(['2', '1', '']), 'low': to_price_array(['2', '1', '']),
+            'close': to_price_array(['2', '1', '']), 'volume': to_int_array(['20', '10', ''])}
+    buffer.append(page)
+    assert len(buffer) == 2
+    assert buffer['close'].tolist() == [1, 2]
+
+
+def test_blank_trailing_row_does_not_fail_the_request(sim, easy):
+    row = {'일자': '20240103', '현재가': '+1000', '시가': '990', '고가': '1010', '저가': '980', '거래량': '5'}
+    blank = dict.fromkeys(row, '')
+    sim.tr_payloads['opt10081'] = {'single': {'종목코드': '005930'}, 'multi': [row, blank]}
+    df = easy.get_daily_ohlcv('005930')
+    assert len(df) == 1 and df['close'].tolist() == [1000]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from kiwooma.api import EasyAPI
+from kiwooma.api.ohlcv import OHLCVBuffer
+from kiwooma.storage.ohlcv_cache import OHLCVCache
+
+
+@pytest.fixture
+def cached_easy(tmp_path, sim):
+    easy = EasyAPI(sim, cache_dir=str(tmp_path))
+    yield easy
+    easy.api.supervisor.stop()
+
+
+def test_top_up_uses_cache(cached_easy):
+    cache = cached_easy.ohlcv_cache
+    full = cached_easy.get_daily_ohlcv('005930', repeat=3)
+    assert len(full) == 1800
+
+    records = np.array(cache.load('005930', 'day', 1))
+    cache.save('005930', 'day', 1, records[:-10]) # 최근 10봉이 빠진 캐시
+    df = cached_easy.get_daily_ohlcv('005930')
+    assert len(df) == 1800
+    assert np.array_equal(df['close'].to_numpy(), full['close'].to_numpy())
+
+
+def test_adjusted_history_is_refetched_to_cached_depth(cached_easy):
+    cache = cached_easy.ohlcv_cache
+    full = cached_easy.get_daily_ohlcv('005930', repeat=3)
+
+    records = np.array(cache.load('005930', 'day', 1))
+    records['close'][:-1] += 1 # 수정주가 반영으로 과거 가격이 바뀐 것처럼
+    cache.save('005930', 'day', 1, records)
+    df = cached_easy.get_daily_ohlcv('005930') # repeat=1이어도 캐시에 있던 기간을 모두 다시 받음
+    assert len(df) == 1800
+    assert np.array_equal(df['close'].to_numpy(), full['close'].to_numpy())
+    assert len(cache.load('005930', 'day', 1)) == 1800
+
+
+def test_single_cached_bar_is_consistent():
+    fetched = OHLCVBuffer(0)
+    dates = np.array(['2024-01-03', '2024-01-02'], dtype='datetime64[s]')
+    fetched.append({'date': dates, 'open': np.array([2, 1]), 'high': np.array([2, 1]), 'low': np.array([2, 1]),
+                    'close': np.array([2, 1]), 'volume': np.array([20, 10])})
+    cached = fetched.to_records()[-1:].copy()
+    cached['close'] = 99 # 마지막 봉은 장중 미완성 봉일 수 있으므로 비교하지 않음
+    assert OHLCVCache.is_consistent(cached, fetched)
@@ -0,0 +1,89 @@
+from kiwooma.api.errors import OrderStateUnknownError
+from kiwooma.api.orders import ACCEPTED, PARTIAL, FILLED, CANCELLED, CONFIRMED, UNKNOWN, EARLY_LIMIT
+
+
+def test_market_order_fills(easy):
+    handle = easy.send_order('005930', 3, 0, '신규매수', '시장가')
+    easy.api.wait(handle.done)
+    assert handle.state == FILLED
+    assert handle.order_no and handle.accepted.result() == handle.order_no
+    assert (handle.filled, handle.remaining) == (3, 0)
+    assert easy.api.orders.get(handle.order_no) is handle
+
+
+def test_partial_fill_then_cancel(sim, easy, pump):
+    sim.auto_fill = False
+    price = sim.base_price('005930')
+    handle = easy.send_order('005930', 10, price, '신규매수', '지정가')
+    easy.api.wait(handle.accepted)
+    assert pump(until=lambda: handle.state == ACCEPTED)
+
+    sim.fill_order(handle.order_no, 4)
+    assert handle.state == PARTIAL and (handle.filled, handle.remaining) == (4, 6)
+    assert handle.avg_fill_price == price
+
+    states = []
+    easy.api.orders.listeners.append(lambda changed: changed is cancel and states.append(changed.state))
+    cancel = easy.cancel_order(handle)
+    assert pump(until=lambda: cancel.done.done() and handle.done.done())
+    assert states == [ACCEPTED, CONFIRMED] # 접수 후 확인
+    assert handle.state == CANCELLED and handle.filled == 4
+    assert not easy.api.orders.live_orders()
+
+
+def test_modify_moves_remaining_to_new_order(sim, easy, pump):
+    sim.auto_fill = False
+    price = sim.base_price('005930')
+    handle = easy.send_order('005930', 5, price, '신규매수', '지정가')
+    easy.api.wait(handle.accepted)
+    assert pump(until=lambda: handle.state == ACCEPTED)
+
+    sim.auto_fill = True
+    modify = easy.modify_order(handle, price)
+    easy.api.wait([modify.done, handle.done])
+    assert modify.state == FILLED and modify.filled == 5
+    assert not handle.is_live
+
+
+def test_order_without_order_no_is_unknown_after_reconnect(sim, easy, pump):
+    easy.api.supervisor.backoff = 0.02
+    sim.latency = 0.05 # 주문번호가 오기 전에 끊김
+    sim.auto_fill = False
+    handle = easy.send_order('005930', 1, 0, '신규매수', '시장가')
+    pump(0.01)
+    assert handle.sent and handle.order_no is None
+    sim.disconnect()
+    queued = easy.send_order('005930', 1, 0, '신규매수', '시장가') # 끊긴 동안 보낸 주문은 재접속 후 전송
+
+    assert pump(until=lambda: handle.done.done() and queued.accepted.done())
+    assert handle.state == UNKNOWN
+    assert isinstance(handle.accepted.exception(), OrderStateUnknownError)
+    assert handle.rqname not in easy.api._tr_handlers
+    assert queued.accepted.result() == queued.order_no
+
+
+def test_order_sent_during_silent_drop_is_not_abandoned(sim, easy):
+    easy.api.supervisor.backoff = 0.02
+    sim.disconnect(notify=False) # SendOrder가 -101을 리턴해서 큐로 돌아감
+    handle = easy.send_order('005930', 1, 0, '신규매수', '시장가')
+    easy.api.wait(handle.done)
+    assert handle.state == FILLED and handle.accepted.result() == handle.order_no
+    assert easy.api.supervisor.stats()['reconnects'] == 1
+    assert not easy.api.orders.screens.in_use
+
+
+def test_chejan_before_order_no_is_applied(sim, easy):
+    sim.latency = 0.05 # 주문번호(TR 응답)보다 체결 통보가 먼저 옴
+    handle = easy.send_order('005930', 2, 0, '신규매수', '시장가')
+    easy.api.wait(handle.done)
+    assert handle.state == FILLED and handle.filled == 2
+    assert not easy.api.orders._early
+
+
+def test_foreign_chejan_is_not_buffered(easy):
+    orders = easy.api.orders
+    for i in range(EARLY_LIMIT * 2):
+        event = {9203: '9{0:06d}'.format(i), 913: '접수', 9001: 'A005930', 900: '1', 902: '1', 908: '090000'}
+        orders.receive_chejan(lambda fid: event.get(fid, ''))
+    assert not orders._early
+    assert orders.unmatched == EARLY_LIMIT * 2
@@ -0,0 +1,54 @@
+import pytest
+from kiwooma.api.portfolio import Portfolio
+
+
+def test_executions_before_seed_are_ignored():
+    portfolio = Portfolio()
+    portfolio.on_execution('005930', -5, 70000)
+    assert not portfolio.positions and portfolio.realized_pnl == 0
+
+
+def test_buy_and_sell_update_average_and_pnl():
+    portfolio = Portfolio()
+    portfolio.seed({})
+    portfolio.on_execution('005930', 10, 60000)
+    portfolio.on_execution('005930', 10, 70000)
+    position = portfolio.positions['005930']
+    assert (position.quantity, position.avg_price) == (20, 65000)
+
+    portfolio.on_execution('005930', -5, 71000)
+    assert position.quantity == 15 and position.avg_price == 65000
+    assert portfolio.realized_pnl == position.realized_pnl == 5 * 6000
+
+    portfolio.mark('005930', 66000)
+    balance = portfolio.get_balance()
+    assert balance['총매입금액'] == 15 * 65000 and balance['총평가금액'] == 15 * 66000
+
+
+def test_oversell_never_goes_negative():
+    portfolio = Portfolio()
+    portfolio.seed({})
+    portfolio.on_execution('000660', -3, 100000) # 장부에 없는 종목
+    assert '000660' not in portfolio.get_positions() and portfolio.realized_pnl == 0
+
+    portfolio.on_execution('005930', 10, 60000)
+    portfolio.on_execution('005930', -15, 70000)
+    assert '005930' not in portfolio.get_positions()
+    assert portfolio.realized_pnl == 10 * 10000
+    assert portfolio.get_balance()['총매입금액'] == pytest.approx(0)
+
+
+def test_live_positions_follow_fills(sim, easy):
+    easy.sync_portfolio()
+    for code, quantity, trans_type in (('005930', 10, '신규매수'), ('000660', 5, '신규매수'), ('005930', 4, '신규매도')):
+        handle = easy.send_order(code, quantity, 0, trans_type, '시장가')
+        easy.api.wait(handle.done)
+
+    positions = easy.get_live_positions()
+    assert positions['005930']['보유수량'] == sim.positions['005930'][0] == 6
+    assert positions['000660']['보유수량'] == 5
+    assert easy.reconcile_portfolio() == {}
+
+    sim.positions['005930'][0] += 1 # 장부 밖에서 바뀐 잔고
+    assert set(easy.reconcile_portfolio()) == {'005930'}
+    assert easy.get_live_positions()['005930']['보유수량'] == 7
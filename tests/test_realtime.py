@@ -0,0 +1,57 @@
+import pytest
+from kiwooma.api import EasyAPI # noqa: F401 (QApplication)
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.realtime import RealTimeManager
+
+
+@pytest.fixture
+def manager(sim, easy):
+    manager = RealTimeManager(sim, screen_start=7000, screen_count=2, codes_per_screen=2)
+    manager.live = True
+    return manager
+
+
+def test_failed_subscribe_is_rolled_back(sim, manager):
+    codes = list(sim.codes)
+    first = manager.subscribe(codes[:3], ('10',), 'first')
+    registered = {screen: dict(reg) for screen, reg in sim._real_reg.items()}
+    version, fids = manager.version, manager.requested_fids()
+
+    with pytest.raises(KiwoomError): # 화면번호 부족
+        manager.subscribe(codes[3:6], ('10',), 'second')
+    assert manager.subscriptions == [first]
+    assert {screen: reg for screen, reg in sim._real_reg.items() if reg} == registered
+    assert manager.version == version
+
+    with pytest.raises(KiwoomError):
+        manager.subscribe(codes[:1], ('10', '15'), 'other fids')
+    assert manager.subscriptions == [first] and manager.requested_fids() == fids
+
+    first.close()
+    assert not any(sim._real_reg.values()) and not manager.screens.in_use
+
+
+def test_market_status_letter_codes(sim, easy):
+    easy.subscribe_real_data([''], ('215', '20', '214'), 'market')
+    table = easy.api.real_tables['장시작시간']
+    for status in ('0', 'a', 'c', '3'):
+        sim.emit_market_status(status, 30)
+        assert table.get('')['장운영구분'] == status
+    assert table.get('')['장시작예상잔여시간'] == 30
+
+
+def test_resubscribe_continues_past_a_failed_screen(sim, easy, pump):
+    supervisor = easy.api.supervisor
+    supervisor.backoff = 0.02
+    realtime = easy.api.realtime
+    easy.subscribe_real_data(['005930'], ('10',), 'trade')
+    easy.subscribe_real_data(['000660'], ('27', '28'), 'quote')
+    failing = realtime.screen_map()
+    failing = next(screen for screen, (fids, codes) in failing.items() if fids == '10')
+
+    set_real_reg = sim.SetRealReg
+    sim.SetRealReg = lambda screen_no, *args: -1 if screen_no == failing else set_real_reg(screen_no, *args)
+    sim.disconnect()
+    assert pump(until=lambda: supervisor.stats()['reconnects'] == 1)
+    assert list(realtime.failed_screens) == [failing]
+    assert {code for codes in sim._real_reg.values() for code in codes} == {'000660'}
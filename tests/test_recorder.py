@@ -0,0 +1,76 @@
+import struct
+import pytest
+from kiwooma.api import EasyAPI
+from kiwooma.api.recorder import RecordingOCX, ReplayOCX, REPLAY_TYPES
+from kiwooma.api.simulator import SimulatedOCX, make_universe
+from kiwooma.storage.event_log import EventLogReader, EventLogWriter, EVENT_REAL, FORMAT_VERSION, LEGACY_MAGIC
+
+
+def record_session(path):
+    sim = SimulatedOCX(codes=make_universe(5))
+    recorder = RecordingOCX(sim, path, index_every=50)
+    easy = EasyAPI(recorder)
+    easy.register_account_no(easy.get_account_no())
+    ohlcv = easy.get_daily_ohlcv(list(sim.codes)[0], 2)
+    easy.request_real_data(list(sim.codes))
+    sim.emit_ticks(200)
+    handle = easy.send_order(list(sim.codes)[0], 3, 0, '신규매수', '시장가')
+    easy.api.wait(handle.done)
+    quotes = {code: easy.get_quote(code) for code in sim.codes}
+    recorder.close()
+    easy.api.supervisor.stop()
+    return list(sim.codes), ohlcv, quotes
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = str(tmp_path / 'session.evlog')
+    return (path,) + tuple(record_session(path))
+
+
+def test_replay_reproduces_session(recording):
+    path, codes, ohlcv, quotes = recording
+    replay = ReplayOCX(path, speed=None)
+    easy = EasyAPI(replay)
+    try:
+        assert easy.get_daily_ohlcv(codes[0], 2).equals(ohlcv)
+        assert replay.run() == len(list(EventLogReader(path).read(types=REPLAY_TYPES)))
+        assert {code: easy.get_quote(code) for code in codes} == quotes
+    finally:
+        easy.api.supervisor.stop()
+
+
+def test_reader_index_and_seek(recording):
+    path = recording[0]
+    reader = EventLogReader(path)
+    assert reader.version == FORMAT_VERSION
+    assert len(reader.blocks) > 1
+    real = list(reader.read(types=(EVENT_REAL,)))
+    assert len(real) == 200
+    middle = real[100][1]
+    assert [record[1] for record in reader.read(start=middle, types=(EVENT_REAL,))] == [r[1] for r in real[100:]]
+
+
+def test_truncated_tail_is_ignored_and_overwritten(recording):
+    path = recording[0]
+    count = len(EventLogReader(path))
+    with open(path, 'ab') as f:
+        f.write(b'\x03\xff\xff') # 기록 도중 끊긴 레코드
+    assert len(EventLogReader(path)) == count
+
+    writer = EventLogWriter(path)
+    writer.write(EVENT_REAL, ('005930', '주식체결', ''))
+    writer.close()
+    assert len(EventLogReader(path)) == count + 1
+
+
+def test_legacy_log_is_rejected(tmp_path):
+    path = str(tmp_path / 'old.evlog')
+    with open(path, 'wb') as f:
+        f.write(LEGACY_MAGIC + struct.pack('<d', 0.0))
+    with pytest.raises(ValueError):
+        EventLogReader(path)
+    with pytest.raises(ValueError):
+        EventLogWriter(path)
+    with open(path, 'rb') as f:
+        assert f.read().startswith(LEGACY_MAGIC) # 덮어쓰지 않음
@@ -0,0 +1,73 @@
+import http.client
+import json
+import socket
+import pytest
+from kiwooma.gateway import RestGateway, RestClient, GatewayError
+
+
+@pytest.fixture
+def rest_gateway(tmp_path, easy):
+    gateway = RestGateway(easy, port=0, token_file=str(tmp_path / 'token'))
+    gateway.start()
+    yield gateway
+    gateway.close()
+
+
+def _post(port, path, body, headers):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request('POST', path, json.dumps(body).encode('utf-8'), headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_rest_gateway_rejects_unauthorized_requests(rest_gateway, sim, easy, in_thread):
+    body = {'code': list(sim.codes)[0], 'quantity': 1, 'price': 0, 'trans_type': '신규매수', 'order_type': '시장가'}
+    auth = 'Bearer ' + rest_gateway.token
+    cases = [
+        ({'Content-Type': 'application/json'}, 401),
+        ({'Content-Type': 'application/json', 'Authorization': 'Bearer x'}, 401),
+        ({'Content-Type': 'application/json', 'Authorization': auth, 'Origin': 'http://evil.example'}, 403),
+        ({'Content-Type': 'text/plain', 'Authorization': auth}, 415),
+        ]
+    for headers, status in cases:
+        assert in_thread(lambda: _post(rest_gateway.port, '/orders', body, headers))[0] == status
+    assert not easy.api.orders.orders
+
+
+def test_rest_gateway_client(rest_gateway, sim, easy, pump, in_thread):
+    code = list(sim.codes)[0]
+    client = RestClient(port=rest_gateway.port, token_file=rest_gateway.token_file)
+    try:
+        info = in_thread(lambda: client.get('/basic_info/' + code))
+        assert info['종목코드'] == code
+        assert len(in_thread(lambda: client.get('/ohlcv/' + code, timeframe='day', repeat=1))) == 600
+        order = in_thread(lambda: client.post('/orders', code=code, quantity=1, price=0, trans_type='신규매수',
+                                              order_type='시장가'))
+        assert order['order_no'] in easy.api.orders.orders
+        with pytest.raises(GatewayError) as info:
+            in_thread(lambda: client.get('/ohlcv/' + code, timeframe='year'))
+        assert info.value.status == 400
+    finally:
+        client.close()
+
+
+def _raw(port, data):
+    with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+        sock.sendall(data)
+        response = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return response
+            response += chunk
+
+
+def test_rest_gateway_rejects_malformed_content_length(rest_gateway, in_thread):
+    for length in (b'abc', b'-5'):
+        request = (b'POST /orders HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer ' + rest_gateway.token.encode()
+                   + b'\r\nContent-Type: application/json\r\nContent-Length: ' + length + b'\r\n\r\n{}')
+        response = in_thread(lambda: _raw(rest_gateway.port, request))
+        assert response.startswith(b'HTTP/1.1 400 ')
@@ -0,0 +1,87 @@
+import pytest
+from kiwooma.api import EasyAPI
+from kiwooma.api.errors import TRError
+from kiwooma.api.scheduler import RateLimiter, PRIORITY_ORDER, PRIORITY_BULK
+from kiwooma.api.simulator import SimulatedOCX
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_spaces_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(((2, 1.0), (3, 10.0)), margin=0.0, clock=clock)
+    for _ in range(2):
+        assert limiter.wait_time() == 0
+        limiter.record()
+    assert limiter.wait_time() == pytest.approx(1.0)
+
+    clock.now += 1.0
+    limiter.record()
+    assert limiter.wait_time() == pytest.approx(9.0) # 10초에 3번
+
+    limiter.penalize(20.0)
+    assert limiter.wait_time() == pytest.approx(20.0)
+
+
+def test_scheduler_sends_higher_priority_first(easy):
+    api = easy.api
+    scheduler = api.scheduler
+    order = []
+    scheduler.pause()
+    scheduler.submit(lambda: order.append('bulk'), PRIORITY_BULK)
+    scheduler.submit(lambda: order.append('order'), PRIORITY_ORDER)
+    scheduler.submit(lambda: order.append('bulk2'), PRIORITY_BULK)
+    scheduler.resume()
+    api.wait(api.request_tr('opt10001', {'종목코드': '005930'}))
+    assert order == ['order', 'bulk', 'bulk2']
+
+
+def test_scheduler_retries_server_overflow():
+    sim = SimulatedOCX(tr_limits=((3, 0.5),))
+    easy = EasyAPI(sim)
+    api = easy.api
+    api.scheduler.limiter = RateLimiter(((100, 1.0),), margin=0.0) # 클라이언트 제한이 서버보다 느슨함
+    api.scheduler.overflow_penalty = 0.1
+    try:
+        results = api.wait([api.request_tr('opt10001', {'종목코드': '005930'}) for _ in range(6)])
+        assert len(results) == 6
+        assert sim.overflow_count > 0
+        assert api.scheduler.stats()['overflows'] == sim.overflow_count
+    finally:
+        api.supervisor.stop()
+
+
+def test_dispatch_exception_fails_only_that_job(easy):
+    api = easy.api
+    scheduler = api.scheduler
+    errors, sent = [], []
+
+    def broken():
+        raise RuntimeError('dispatch failed')
+
+    scheduler.pause()
+    scheduler.submit(broken, PRIORITY_ORDER, 'broken', lambda err_code, cause: errors.append((err_code, cause)))
+    scheduler.submit(lambda: sent.append('next'), PRIORITY_BULK)
+    future = api.request_tr('opt10001', {'종목코드': '005930'})
+    scheduler.resume()
+    assert api.wait(future).single['종목코드'] == '005930'
+    assert sent == ['next']
+    assert errors[0][0] is None and isinstance(errors[0][1], RuntimeError)
+    assert scheduler.stats()['errors'] == 1
+
+
+def test_dispatch_exception_fails_the_tr_future(easy, monkeypatch):
+    api = easy.api
+    monkeypatch.setattr(api, '_send_rq_data', lambda *args: 1 / 0)
+    future = api.request_tr('opt10001', {'종목코드': '005930'})
+    with pytest.raises(TRError) as info:
+        api.wait(future)
+    assert isinstance(info.value.__cause__, ZeroDivisionError)
+    assert not api._pending_tr and not api.screens.in_use
@@ -0,0 +1,46 @@
+import pytest
+from kiwooma.api.orders import FILLED
+from kiwooma.gateway import SharedMemoryGateway, GatewayClient
+
+
+@pytest.fixture
+def shm_gateway(tmp_path, easy):
+    gateway = SharedMemoryGateway(easy, authkey_file=str(tmp_path / 'key'), tick_capacity=1024)
+    gateway.start()
+    yield gateway
+    gateway.close()
+
+
+def test_shared_memory_gateway(shm_gateway, sim, easy, pump, in_thread):
+    codes = list(sim.codes)
+    client = in_thread(lambda: GatewayClient(shm_gateway.address, authkey_file=shm_gateway.authkey_file))
+    try:
+        assert in_thread(lambda: client.subscribe(codes[:1])) == codes[:1]
+        reader = client.tick_reader()
+        sim.emit_ticks(50)
+        pump(0.05)
+        ticks = reader.read(copy=True)
+        assert len(ticks) > 0 and set(ticks['code'].tolist()) == {codes[0]}
+        assert reader.missed == 0
+        assert client.get_quote(codes[0])['현재가'] == ticks['현재가'][-1]
+
+        result = in_thread(lambda: client.request_tr('opt10001', {'종목코드': codes[0]}))
+        assert result.single['종목코드'] == codes[0]
+
+        order = in_thread(lambda: client.send_order(codes[0], 1, 0, '신규매수', '시장가'))
+        assert order['order_no']
+        assert pump(until=lambda: easy.api.orders.get(order['order_no']).state == FILLED)
+        pump(0.05)
+        states = client.order_reader().read(copy=True)
+        assert states[-1]['order_no'] == order['order_no'] and states[-1]['state'] == FILLED
+
+        with pytest.raises(AttributeError):
+            in_thread(lambda: client.call('register_account_no', 'x'))
+    finally:
+        client.close()
+    assert pump(until=lambda: not easy.api.realtime.subscriptions) # 연결이 끊기면 실시간 해제
+
+
+def test_shared_memory_gateway_rejects_wrong_key(shm_gateway, in_thread):
+    with pytest.raises(Exception):
+        in_thread(lambda: GatewayClient(shm_gateway.address, authkey=b'kiwooma'))
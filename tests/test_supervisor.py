@@ -0,0 +1,48 @@
+import pytest
+from kiwooma.api import EasyAPI
+from kiwooma.api.errors import KiwoomError
+from kiwooma.api.simulator import SimulatedOCX
+from kiwooma.api.supervisor import CONNECTED
+
+
+@pytest.fixture
+def supervisor(easy):
+    supervisor = easy.api.supervisor
+    supervisor.backoff = 0.02
+    return supervisor
+
+
+def test_reconnect_requeues_tr_and_resubscribes(sim, easy, supervisor, pump):
+    api = easy.api
+    log = []
+    supervisor.disconnected.connect(lambda code: log.append('lost'))
+    supervisor.reconnected.connect(lambda: log.append('ok'))
+    easy.request_real_data(['005930', '000660'])
+    sim.latency = 0.05
+
+    in_flight = [api.request_tr('opt10001', {'종목코드': code}) for code in ('005930', '000660')]
+    pump(0.01)
+    sim.fail_connects = 1
+    sim.disconnect()
+    queued = api.request_tr('opt10001', {'종목코드': '035420'}) # 끊긴 동안 요청
+
+    results = api.wait(in_flight + [queued])
+    assert [result.single['종목코드'] for result in results] == ['005930', '000660', '035420']
+    assert log == ['lost', 'ok']
+    assert supervisor.state == CONNECTED
+    assert supervisor.stats()['reconnects'] == 1
+    assert {code for codes in sim._real_reg.values() for code in codes} == {'005930', '000660'}
+
+
+def test_silent_drop_is_detected_on_request(sim, easy, supervisor):
+    sim.disconnect(notify=False)
+    result = easy.api.wait(easy.api.request_tr('opt10001', {'종목코드': '005930'}))
+    assert result.single['종목코드'] == '005930'
+    assert supervisor.stats()['disconnects'] == 1
+
+
+def test_initial_login_failure_raises():
+    sim = SimulatedOCX()
+    sim.fail_connects = 1
+    with pytest.raises(KiwoomError):
+        EasyAPI(sim)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from kiwooma.api.simulator import make_universe
+from kiwooma.storage.tick_archive import TickArchive
+
+
+@pytest.fixture
+def sim():
+    from kiwooma.api.simulator import SimulatedOCX
+    return SimulatedOCX(codes=make_universe(20))
+
+
+@pytest.fixture
+def archived(tmp_path, sim, easy, pump):
+    """
+    시뮬레이터 틱을 아카이브에 쌓고 (root, 같은 기간의 TickStream 틱)을 리턴
+    """
+    root = str(tmp_path / 'ticks')
+    codes = list(sim.codes)
+    writer = easy.open_tick_archive(root, codes, interval=0.01)
+    consumer = easy.open_tick_stream().subscribe()
+    for _ in range(10):
+        sim.emit_ticks(300)
+        pump(0.02)
+    easy.close_tick_archive(writer)
+    assert writer.count == 3000 and writer.dropped == 0
+    assert writer.subscription is None and not easy.api.realtime.subscriptions
+    return root, consumer.read()
+
+
+def test_query_matches_stream(archived, sim):
+    root, ticks = archived
+    archive = TickArchive(root)
+    day = archive.days()[-1]
+    assert len(archive.day(day)) == len(ticks)
+
+    for code in list(sim.codes)[:5]:
+        mine = ticks[ticks['code'] == code]
+        times = mine['체결시간']
+        lo, hi = int(np.percentile(times, 25)), int(np.percentile(times, 75))
+        result = archive.query(code, day, lo, hi)
+        expected = mine[(times >= lo) & (times < hi)]
+        assert np.array_equal(result['price'], expected['현재가'])
+        assert np.array_equal(result['volume'], expected['거래량'])
+        assert np.array_equal(result['strength'], expected['체결강도'])
+    archive.close()
+
+
+def test_query_ranges(archived, sim):
+    root, ticks = archived
+    archive = TickArchive(root)
+    tick_day = archive.day(archive.days()[-1])
+    for code in list(sim.codes)[:3]:
+        times = ticks[ticks['code'] == code]['체결시간']
+        for lo in range(int(times.min()) - 5, int(times.max()) + 5, 53):
+            for hi in (lo, lo + 1, lo + 100):
+                assert len(tick_day.query(code, lo, hi, ['time'])['time']) == ((times >= lo) & (times < hi)).sum()
+    assert archive.query('999999', archive.days()[-1])['time'].size == 0
+    archive.close()
+
+
+def test_overwritten_ticks_are_counted(tmp_path, sim, easy):
+    writer = easy.api.open_tick_archive(str(tmp_path / 'small'), interval=10, capacity=64)
+    subscription = easy.api.realtime.subscribe(list(sim.codes), ('20', '10', '15'), 'test')
+    sim.emit_ticks(500)
+    easy.api.close_tick_archive(writer, finalize=False)
+    subscription.close()
+    assert (writer.count, writer.dropped) == (64, 436)
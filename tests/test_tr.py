@@ -0,0 +1,40 @@
+import warnings
+import pytest
+from kiwooma.api.errors import TRError
+
+
+def test_request_tr_returns_future_of_result(easy):
+    api = easy.api
+    futures = [api.request_tr('opt10001', {'종목코드': code}) for code in ('005930', '000660', '035420')]
+    results = api.wait(futures)
+    assert [result.single['종목코드'] for result in results] == ['005930', '000660', '035420']
+    assert all(result.trcode == 'opt10001' and not result.remained for result in results)
+    assert not api._pending_tr
+
+
+def test_decode_error_fails_the_future(sim, easy):
+    sim.tr_payloads['opt10001'] = {'single': {'종목코드': '005930', '액면가': 'abc'}}
+    future = easy.api.request_tr('opt10001', {'종목코드': '005930'})
+    with pytest.raises(TRError) as info:
+        easy.api.wait(future)
+    assert isinstance(info.value.__cause__, ValueError)
+
+    # 다음 요청은 정상 처리됨
+    del sim.tr_payloads['opt10001']
+    assert easy.basic_info('005930')['종목코드'] == '005930'
+
+
+def test_continuation_uses_result_remained(easy):
+    api = easy.api
+    pages = api.wait(api.request_pages('opt10081', {'종목코드': '005930', '기준일자': '20240102', '수정주가구분': 1}, 3))
+    assert len(pages) == 3
+    assert [page.remained for page in pages] == [True, True, True]
+    assert len(easy.get_daily_ohlcv('005930', repeat=2)) == 1200
+
+
+def test_remained_data_is_deprecated(easy):
+    easy.get_daily_ohlcv('005930', repeat=1)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        easy.api.remained_data
+    assert any(issubclass(w.category, DeprecationWarning) for w in caught)
@@ -0,0 +1,61 @@
+"""
+GetCommDataEx 결과는 열 위치로 디코딩되고 SimulatedOCX도 같은 schema.columns로 응답을 만드므로,
+열 순서가 틀려도 시뮬레이터 테스트는 통과한다. 그래서 KOA Studio(개발가이드)의 레코드 항목 순서를 여기에 직접 적어서 비교한다.
+"""
+import pytest
+from kiwooma.api.tr_schema import TR_SCHEMAS, get_schema
+
+_CHART_ADJUST = ('수정주가구분', '수정비율', '대업종구분', '소업종구분', '종목정보', '수정주가이벤트', '전일종가')
+
+DEVGUIDE_COLUMNS = {
+    'opt10080': ('주식분봉차트조회', ('현재가', '거래량', '체결시간', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10081': ('주식일봉차트조회',
+                 ('종목코드', '현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10082': ('주식주봉차트조회', ('현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt10083': ('주식월봉차트조회', ('현재가', '거래량', '거래대금', '일자', '시가', '고가', '저가') + _CHART_ADJUST),
+    'opt20006': ('업종일봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금', '대업종구분', '소업종구분',
+                             '종목정보', '수정주가이벤트', '전일종가')),
+    'opt20007': ('업종주봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금', '대업종구분', '소업종구분',
+                             '종목정보', '수정주가이벤트', '전일종가')),
+    'opt20008': ('업종월봉조회', ('현재가', '거래량', '일자', '시가', '고가', '저가', '거래대금', '대업종구분', '소업종구분',
+                             '종목정보', '수정주가이벤트', '전일종가')),
+    'opt10016': ('신고저가', ('종목코드', '종목명', '현재가', '전일대비기호', '전일대비', '등락률', '거래량',
+                          '전일거래량대비율', '매도호가', '매수호가', '고가', '저가')),
+    'opt10017': ('상하한가', ('종목코드', '종목정보', '종목명', '전일대비기호', '현재가', '전일대비', '등락률', '거래량',
+                          '전일거래량', '매도잔량', '매도호가', '매수호가', '매수잔량', '횟수')),
+    'opw00018': ('계좌평가잔고개별합산', ('종목번호', '종목명', '평가손익', '수익률(%)', '매입가', '전일종가', '보유수량',
+                                '매매가능수량', '현재가', '전일매수수량', '전일매도수량', '금일매수수량', '금일매도수량',
+                                '매입금액', '매입수수료', '평가금액', '평가수수료', '세금', '수수료합', '보유비중(%)',
+                                '신용구분', '신용구분명', '대출일')),
+    'opt10075': ('미체결', ('계좌번호', '주문번호', '관리사번', '종목코드', '업무구분', '주문상태', '종목명', '주문수량',
+                         '주문가격', '미체결수량', '체결누계금액', '원주문번호', '주문구분', '매매구분', '시간', '체결번호',
+                         '체결가', '체결량', '현재가', '매도호가', '매수호가', '단위체결가', '단위체결량', '당일매매수수료',
+                         '당일매매세금', '개인투자자')),
+    'opt10077': ('당일실현손익상세', ('종목명', '체결량', '매입단가', '체결가', '당일매도손익', '손익율', '당일매매수수료',
+                              '당일매매세금', '종목코드')),
+    'opt10085': ('계좌수익률', ('일자', '종목코드', '종목명', '현재가', '매입가', '매입금액', '보유수량', '당일매도손익',
+                           '당일매매수수료', '당일매매세금', '신용구분', '대출일', '결제잔고', '청산가능수량', '신용금액',
+                           '신용이자', '만기일')),
+    'opw00007': ('계좌별주문체결내역상세', ('주문번호', '종목번호', '매매구분', '신용구분', '주문수량', '주문단가', '확인수량',
+                                 '접수구분', '반대여부', '주문시간', '원주문', '종목명', '주문구분', '대출일', '체결수량',
+                                 '체결단가', '주문잔량', '통신구분', '정정취소', '확인시간')),
+    }
+
+
+@pytest.mark.parametrize('trcode', sorted(DEVGUIDE_COLUMNS))
+def test_columns_follow_devguide(trcode):
+    record, columns = DEVGUIDE_COLUMNS[trcode]
+    schema = get_schema(trcode)
+    assert schema.record == record
+    assert schema.columns == columns
+
+
+def test_every_multi_schema_is_pinned():
+    assert {trcode for trcode, schema in TR_SCHEMAS.items() if schema.columns} == set(DEVGUIDE_COLUMNS)
+
+
+@pytest.mark.parametrize('trcode', sorted(DEVGUIDE_COLUMNS))
+def test_multi_items_use_column_index(trcode):
+    schema = get_schema(trcode)
+    assert schema.column_index is not None
+    assert [schema.columns[i] for i in schema.column_index] == list(schema.multi_items)